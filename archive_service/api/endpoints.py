@@ -229,6 +229,8 @@ async def search_documents(
         
         return response
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ [ARCHIVE_API] Error searching documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
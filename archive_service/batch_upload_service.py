@@ -8,16 +8,20 @@ import asyncio
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
-import shutil
 
 from .models import (
     ArchiveDocument, DocumentSection, ArchiveProject, 
-    BatchUploadRequest, BatchUploadResponse, DocumentType, ProcessingStatus
+    BatchUploadRequest, BatchUploadResponse, RelationType
 )
 from .database_manager import ArchiveDatabaseManager
 from .document_processor import ArchiveDocumentProcessor
 from .vector_indexer import ArchiveVectorIndexer
-from .config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_FILE_TYPES, BATCH_SIZE
+from .upload_pipeline import ArchiveUploadPipeline
+from .document_relations import build_document_relations, determine_relation_type
+from .config import (
+    UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_FILE_TYPES, BATCH_SIZE,
+    MAX_CONCURRENT_UPLOADS, EXTRACT_PROCESSES, PIPELINE_QUEUE_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,13 @@ class BatchUploadService:
         self.db_manager = db_manager
         self.document_processor = ArchiveDocumentProcessor()
         self.vector_indexer = ArchiveVectorIndexer()
+        self.upload_pipeline = ArchiveUploadPipeline(
+            db_manager, self.vector_indexer,
+            io_workers=MAX_CONCURRENT_UPLOADS,
+            extract_processes=EXTRACT_PROCESSES,
+            write_batch_size=BATCH_SIZE,
+            queue_size=PIPELINE_QUEUE_SIZE
+        )
         
         # Создаем директорию для загрузок
         os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -54,22 +65,14 @@ class BatchUploadService:
             # Создаем или обновляем проект
             await self._ensure_project_exists(request.project_code, request.metadata)
             
-            # Обрабатываем документы пакетами
-            processed_documents = 0
-            failed_documents = 0
-            document_ids = []
-            errors = []
-            
-            for i in range(0, len(request.documents), BATCH_SIZE):
-                batch = request.documents[i:i + BATCH_SIZE]
-                batch_result = await self._process_document_batch(
-                    batch, request.project_code, request.auto_extract_sections
-                )
-                
-                processed_documents += batch_result['processed']
-                failed_documents += batch_result['failed']
-                document_ids.extend(batch_result['document_ids'])
-                errors.extend(batch_result['errors'])
+            # Обрабатываем документы конвейером: копирование, извлечение и запись идут одновременно
+            batch_result = await self.upload_pipeline.run(
+                request.documents, request.project_code, request.auto_extract_sections
+            )
+            processed_documents = batch_result['processed']
+            failed_documents = batch_result['failed']
+            document_ids = batch_result['document_ids']
+            errors = batch_result['errors']
             
             # Создаем связи между документами, если требуется
             if request.create_relations and len(document_ids) > 1:
@@ -170,104 +173,6 @@ class BatchUploadService:
             logger.error(f"❌ [ENSURE_PROJECT] Error ensuring project exists: {e}")
             raise
     
-    async def _process_document_batch(self, documents: List[Dict[str, Any]], 
-                                    project_code: str, auto_extract_sections: bool) -> Dict[str, Any]:
-        """Обработка пакета документов"""
-        processed = 0
-        failed = 0
-        document_ids = []
-        errors = []
-        
-        for doc_data in documents:
-            try:
-                file_path = doc_data['file_path']
-                logger.info(f"🔄 [PROCESS_BATCH] Processing document: {file_path}")
-                
-                # Обрабатываем документ
-                document, sections = self.document_processor.process_document(
-                    file_path, project_code
-                )
-                
-                # Обновляем данные из запроса
-                if 'document_type' in doc_data:
-                    document.document_type = DocumentType(doc_data['document_type'])
-                if 'document_name' in doc_data:
-                    document.document_name = doc_data['document_name']
-                if 'document_number' in doc_data:
-                    document.document_number = doc_data['document_number']
-                if 'author' in doc_data:
-                    document.author = doc_data['author']
-                if 'department' in doc_data:
-                    document.department = doc_data['department']
-                if 'version' in doc_data:
-                    document.version = doc_data['version']
-                
-                # Копируем файл в директорию загрузок
-                saved_file_path = await self._save_uploaded_file(file_path, project_code)
-                document.file_path = saved_file_path
-                
-                # Сохраняем документ в базу данных
-                document_id = self.db_manager.save_document(document)
-                document_ids.append(document_id)
-                
-                # Обновляем ID в разделах
-                for section in sections:
-                    section.archive_document_id = document_id
-                
-                # Сохраняем разделы, если требуется
-                if auto_extract_sections and sections:
-                    for section in sections:
-                        self.db_manager.save_document_section(section)
-                
-                # Создаем векторные индексы для разделов
-                if sections:
-                    await self.vector_indexer.index_document_sections(document_id, sections)
-                
-                # Обновляем статус обработки
-                self.db_manager.update_document_status(document_id, ProcessingStatus.COMPLETED)
-                
-                processed += 1
-                logger.info(f"✅ [PROCESS_BATCH] Document processed successfully: {document_id}")
-                
-            except Exception as e:
-                failed += 1
-                error_msg = f"Error processing {doc_data.get('file_path', 'unknown')}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(f"❌ [PROCESS_BATCH] {error_msg}")
-        
-        return {
-            'processed': processed,
-            'failed': failed,
-            'document_ids': document_ids,
-            'errors': errors
-        }
-    
-    async def _save_uploaded_file(self, source_path: str, project_code: str) -> str:
-        """Сохранение загруженного файла в директорию проекта"""
-        try:
-            # Создаем директорию для проекта
-            project_dir = os.path.join(UPLOAD_DIR, project_code)
-            os.makedirs(project_dir, exist_ok=True)
-            
-            # Генерируем уникальное имя файла
-            filename = os.path.basename(source_path)
-            name, ext = os.path.splitext(filename)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            unique_filename = f"{name}_{timestamp}{ext}"
-            
-            # Путь для сохранения
-            dest_path = os.path.join(project_dir, unique_filename)
-            
-            # Копируем файл
-            shutil.copy2(source_path, dest_path)
-            
-            logger.info(f"✅ [SAVE_FILE] File saved: {dest_path}")
-            return dest_path
-            
-        except Exception as e:
-            logger.error(f"❌ [SAVE_FILE] Error saving file: {e}")
-            raise
-    
     async def _create_document_relations(self, document_ids: List[int], project_code: str):
         """Создание связей между документами проекта"""
         try:
@@ -276,47 +181,28 @@ class BatchUploadService:
             
             # Получаем документы проекта
             documents = self.db_manager.get_documents_by_project(project_code)
-            
-            # Создаем связи на основе типов документов
-            relations_created = 0
-            
-            for i, doc1 in enumerate(documents):
-                for j, doc2 in enumerate(documents[i+1:], i+1):
-                    relation_type = self._determine_relation_type(doc1, doc2)
-                    if relation_type:
-                        # Создаем связь
-                        relation = DocumentRelation(
-                            source_document_id=doc1.id,
-                            target_document_id=doc2.id,
-                            relation_type=relation_type,
-                            relation_description=f"Автоматически созданная связь между {doc1.document_type.value} и {doc2.document_type.value}"
-                        )
-                        
-                        # Сохраняем связь (пока без реализации в database_manager)
-                        relations_created += 1
-            
+
+            # Сравниваются только кандидаты из одного блока (шифр объекта и марка),
+            # связи сохраняются одним запросом
+            relations = build_document_relations(documents, new_document_ids=document_ids)
+            relations_created = self.db_manager.save_document_relations(relations)
+
             logger.info(f"✅ [CREATE_RELATIONS] Created {relations_created} relations for project {project_code}")
-            
+
         except Exception as e:
             logger.error(f"❌ [CREATE_RELATIONS] Error creating relations: {e}")
-    
-    def _determine_relation_type(self, doc1: ArchiveDocument, doc2: ArchiveDocument) -> Optional[str]:
+
+    def _determine_relation_type(self, doc1: ArchiveDocument, doc2: ArchiveDocument) -> Optional[RelationType]:
         """Определение типа связи между документами"""
-        # Простая логика определения связей
-        if doc1.document_type == DocumentType.PD and doc2.document_type == DocumentType.RD:
-            return "DEPENDS_ON"  # РД зависит от ПД
-        elif doc1.document_type == DocumentType.RD and doc2.document_type == DocumentType.PD:
-            return "REFERENCES"  # РД ссылается на ПД
-        elif doc1.document_type == DocumentType.TEO and doc2.document_type in [DocumentType.PD, DocumentType.RD]:
-            return "RELATED_TO"  # ТЭО связано с ПД/РД
-        else:
-            return None
+        return determine_relation_type(doc1, doc2)
     
     async def get_upload_progress(self, project_code: str) -> Dict[str, Any]:
         """Получение прогресса загрузки для проекта"""
         try:
             # Получаем статистику проекта
             stats = self.db_manager.get_project_stats(project_code)
+            # Ход последней пакетной загрузки по этапам конвейера (в памяти процесса)
+            pipeline = self.upload_pipeline.get_progress(project_code)
             if not stats:
                 return {
                     'project_code': project_code,
@@ -324,7 +210,8 @@ class BatchUploadService:
                     'total_documents': 0,
                     'processed_documents': 0,
                     'failed_documents': 0,
-                    'progress_percent': 0
+                    'progress_percent': 0,
+                    'pipeline': pipeline
                 }
             
             # Подсчитываем документы по статусам
@@ -335,14 +222,17 @@ class BatchUploadService:
             
             progress_percent = (processed_docs / total_docs * 100) if total_docs > 0 else 0
             
+            pipeline_running = pipeline is not None and pipeline['status'] == 'running'
+            
             return {
                 'project_code': project_code,
-                'status': 'active' if pending_docs > 0 else 'completed',
+                'status': 'active' if pending_docs > 0 or pipeline_running else 'completed',
                 'total_documents': total_docs,
                 'processed_documents': processed_docs,
                 'failed_documents': failed_docs,
                 'pending_documents': pending_docs,
-                'progress_percent': round(progress_percent, 2)
+                'progress_percent': round(progress_percent, 2),
+                'pipeline': pipeline
             }
             
         except Exception as e:
@@ -353,6 +243,10 @@ class BatchUploadService:
                 'error': str(e)
             }
     
+    def shutdown(self):
+        """Остановка пулов конвейера загрузки"""
+        self.upload_pipeline.shutdown()
+    
     async def cancel_upload(self, project_code: str) -> bool:
         """Отмена загрузки проекта"""
         try:
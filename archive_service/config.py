@@ -25,6 +25,14 @@ QDRANT_COLLECTION_NAME = "archive_documents"
 # Настройки эмбеддингов
 EMBEDDING_MODEL = os.getenv("ARCHIVE_EMBEDDING_MODEL", "BGE-M3")
 EMBEDDING_DIMENSION = int(os.getenv("ARCHIVE_EMBEDDING_DIMENSION", 1536))
+# Модель эмбеддингов: rag (BGE-M3 через rag-service), sentence-transformers или onnx (локально на CPU),
+# hashing (лексические векторы размерности EMBEDDING_DIMENSION, без модели)
+EMBEDDING_BACKEND = os.getenv("ARCHIVE_EMBEDDING_BACKEND", "rag")
+EMBEDDING_LOCAL_MODEL = os.getenv("ARCHIVE_EMBEDDING_LOCAL_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://rag-service:8003")
+EMBEDDING_BATCH_SIZE = int(os.getenv("ARCHIVE_EMBEDDING_BATCH_SIZE", 32))
+# Кеш векторов по хешу текста раздела
+EMBEDDING_CACHE_SIZE = int(os.getenv("ARCHIVE_EMBEDDING_CACHE_SIZE", 10000))
 
 # Настройки логирования
 LOG_LEVEL = os.getenv("ARCHIVE_LOG_LEVEL", "INFO")
@@ -34,6 +42,17 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 10))
 MAX_CONCURRENT_UPLOADS = int(os.getenv("ARCHIVE_MAX_CONCURRENT_UPLOADS", 5))
 
+# Конвейер пакетной загрузки: копирование и хеширование - в потоках (MAX_CONCURRENT_UPLOADS),
+# извлечение текста и разделов - в пуле процессов, запись в БД и Qdrant - пачками по BATCH_SIZE
+EXTRACT_PROCESSES = int(os.getenv("ARCHIVE_EXTRACT_PROCESSES", os.cpu_count() or 1))
+PIPELINE_QUEUE_SIZE = int(os.getenv("ARCHIVE_PIPELINE_QUEUE_SIZE", 32))
+
+# Объединение документов проекта: PDF копируются постранично, результат дописывается
+# на диск (инкрементальное сохранение) каждые MERGE_FLUSH_PAGES страниц
+MERGED_DIR = os.getenv("ARCHIVE_MERGED_DIR", "/app/uploads/merged")
+MERGE_FLUSH_PAGES = int(os.getenv("ARCHIVE_MERGE_FLUSH_PAGES", 200))
+MERGE_FONT_PATH = os.getenv("ARCHIVE_MERGE_FONT_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
 # Типы технических документов
 DOCUMENT_TYPES = {
     "PD": "Проектная документация",
@@ -98,8 +117,15 @@ def get_config() -> Dict[str, Any]:
         "qdrant_collection": QDRANT_COLLECTION_NAME,
         "embedding_model": EMBEDDING_MODEL,
         "embedding_dimension": EMBEDDING_DIMENSION,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "embedding_local_model": EMBEDDING_LOCAL_MODEL,
+        "embedding_batch_size": EMBEDDING_BATCH_SIZE,
         "batch_size": BATCH_SIZE,
         "max_concurrent_uploads": MAX_CONCURRENT_UPLOADS,
+        "extract_processes": EXTRACT_PROCESSES,
+        "pipeline_queue_size": PIPELINE_QUEUE_SIZE,
+        "merged_dir": MERGED_DIR,
+        "merge_flush_pages": MERGE_FLUSH_PAGES,
         "document_types": DOCUMENT_TYPES,
         "importance_levels": IMPORTANCE_LEVELS,
         "relation_types": RELATION_TYPES,
@@ -2,13 +2,15 @@
 Менеджер базы данных для сервиса архива технической документации
 """
 
+import base64
+import json
 import logging
 import hashlib
 import os
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, Json, execute_values
 from psycopg2.pool import SimpleConnectionPool
 from datetime import datetime
 
@@ -21,6 +23,14 @@ from .config import DATABASE_URL
 
 logger = logging.getLogger(__name__)
 
+# Колонки документа для поиска (без search_vector)
+SEARCH_DOCUMENT_COLUMNS = """
+    d.id, d.project_code, d.document_type, d.document_number, d.document_name,
+    d.original_filename, d.file_type, d.file_size, d.file_path, d.document_hash,
+    d.upload_date, d.processing_status, d.processing_error, d.token_count, d.version,
+    d.revision_date, d.author, d.department, d.status, d.metadata, d.created_at, d.updated_at
+"""
+
 class ArchiveDatabaseManager:
     """Менеджер базы данных для архива технической документации"""
     
@@ -375,63 +385,113 @@ class ArchiveDatabaseManager:
             return []
     
     def search_documents(self, search_request: DocumentSearchRequest) -> DocumentSearchResponse:
-        """Поиск документов по критериям"""
+        """Поиск документов по критериям.
+        
+        Текст запроса ищется по tsvector-колонкам документов и их разделов (GIN) и по
+        триграммам номера документа, результаты ранжируются ts_rank. Страницы выдаются
+        по ключу: cursor из ответа указывает, с какого документа продолжить.
+        """
+        cursor_key = self._decode_search_cursor(search_request.cursor) if search_request.cursor else None
         try:
             # Строим WHERE условия
             where_conditions = []
-            params = []
+            params: Dict[str, Any] = {}
             
             if search_request.project_code:
-                where_conditions.append("project_code = %s")
-                params.append(search_request.project_code)
+                where_conditions.append("d.project_code = %(project_code)s")
+                params['project_code'] = search_request.project_code
             
             if search_request.document_type:
-                where_conditions.append("document_type = %s")
-                params.append(search_request.document_type.value)
-            
-            if search_request.search_query:
-                where_conditions.append("(document_name ILIKE %s OR document_number ILIKE %s)")
-                search_pattern = f"%{search_request.search_query}%"
-                params.extend([search_pattern, search_pattern])
+                where_conditions.append("d.document_type = %(document_type)s")
+                params['document_type'] = search_request.document_type.value
             
             if search_request.date_from:
-                where_conditions.append("upload_date >= %s")
-                params.append(search_request.date_from)
+                where_conditions.append("d.upload_date >= %(date_from)s")
+                params['date_from'] = search_request.date_from
             
             if search_request.date_to:
-                where_conditions.append("upload_date <= %s")
-                params.append(search_request.date_to)
+                where_conditions.append("d.upload_date <= %(date_to)s")
+                params['date_to'] = search_request.date_to
             
             if search_request.author:
-                where_conditions.append("author ILIKE %s")
-                params.append(f"%{search_request.author}%")
+                where_conditions.append("d.author ILIKE %(author)s")
+                params['author'] = f"%{search_request.author}%"
             
             if search_request.department:
-                where_conditions.append("department ILIKE %s")
-                params.append(f"%{search_request.department}%")
+                where_conditions.append("d.department ILIKE %(department)s")
+                params['department'] = f"%{search_request.department}%"
             
             if search_request.status:
-                where_conditions.append("status = %s")
-                params.append(search_request.status)
-            
-            # Строим запрос
-            where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-            
-            # Подсчитываем общее количество
-            count_query = f"SELECT COUNT(*) as total FROM archive_documents WHERE {where_clause}"
-            count_result = self.execute_read_query(count_query, tuple(params))
-            total_count = count_result[0]['total'] if count_result else 0
-            
-            # Получаем документы с пагинацией
-            query = f"""
-                SELECT * FROM archive_documents 
-                WHERE {where_clause}
-                ORDER BY upload_date DESC
-                LIMIT %s OFFSET %s
-            """
-            params.extend([search_request.limit, search_request.offset])
-            
-            results = self.execute_read_query(query, tuple(params))
+                where_conditions.append("d.status = %(status)s")
+                params['status'] = search_request.status
+            
+            where_clause = " AND ".join(where_conditions) if where_conditions else "TRUE"
+            search_text = (search_request.search_query or "").strip()
+            
+            if search_text:
+                # Кандидаты берутся из индексов: совпадения в документах, в разделах и по номеру
+                params['query'] = search_text
+                params['number_pattern'] = "%" + search_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                # tsquery подставляется в каждое условие, чтобы планировщик видел константу
+                tsquery = "websearch_to_tsquery('russian', %(query)s)"
+                base_query = f"""
+                    WITH section_hits AS (
+                        SELECT archive_document_id AS id, MAX(ts_rank(search_vector, {tsquery})) AS rank
+                        FROM archive_document_sections
+                        WHERE search_vector @@ {tsquery}
+                        GROUP BY archive_document_id
+                    ),
+                    candidates AS (
+                        SELECT id FROM archive_documents WHERE search_vector @@ {tsquery}
+                        UNION
+                        SELECT id FROM section_hits
+                        UNION
+                        SELECT id FROM archive_documents
+                        WHERE document_number %% %(query)s OR document_number ILIKE %(number_pattern)s
+                    )
+                    SELECT {SEARCH_DOCUMENT_COLUMNS},
+                           (ts_rank(d.search_vector, {tsquery}) + 0.5 * COALESCE(h.rank, 0)
+                            + similarity(COALESCE(d.document_number, ''), %(query)s))::float8 AS sort_value
+                    FROM candidates c
+                    JOIN archive_documents d ON d.id = c.id
+                    LEFT JOIN section_hits h ON h.id = d.id
+                    WHERE {where_clause}
+                """
+                cursor_kind = "rank"
+            else:
+                base_query = f"""
+                    SELECT {SEARCH_DOCUMENT_COLUMNS}, d.upload_date AS sort_value
+                    FROM archive_documents d
+                    WHERE {where_clause}
+                """
+                cursor_kind = "date"
+            
+            # Количество: точное, оценка планировщика или без подсчета
+            total_count = 0
+            count_estimated = search_request.count_mode == "estimated"
+            if search_request.count_mode == "exact":
+                count_result = self.execute_read_query(f"SELECT COUNT(*) AS total FROM ({base_query}) matched", params)
+                total_count = count_result[0]['total'] if count_result else 0
+            elif count_estimated:
+                total_count = self._estimate_row_count(base_query, params)
+            
+            # Получаем документы страницы по ключу (sort_value, id); OFFSET - только без курсора
+            page_query = f"SELECT * FROM ({base_query}) page"
+            if cursor_key:
+                if cursor_key['kind'] != cursor_kind:
+                    raise ValueError("Search cursor does not match the search query")
+                page_query += " WHERE (page.sort_value, page.id) < (%(cursor_value)s, %(cursor_id)s)"
+                params['cursor_value'] = cursor_key['value']
+                params['cursor_id'] = cursor_key['id']
+            page_query += " ORDER BY page.sort_value DESC, page.id DESC LIMIT %(limit)s"
+            params['limit'] = search_request.limit + 1
+            if not cursor_key and search_request.offset:
+                page_query += " OFFSET %(offset)s"
+                params['offset'] = search_request.offset
+            
+            results = self.execute_read_query(page_query, params)
+            has_more = len(results) > search_request.limit
+            results = results[:search_request.limit]
             
             documents = []
             for row in results:
@@ -461,23 +521,62 @@ class ArchiveDatabaseManager:
                 )
                 documents.append(document)
             
-            has_more = (search_request.offset + len(documents)) < total_count
+            next_cursor = None
+            if has_more and results:
+                next_cursor = self._encode_search_cursor(cursor_kind, results[-1]['sort_value'], results[-1]['id'])
             
             response = DocumentSearchResponse(
                 documents=documents,
                 total_count=total_count,
                 page=search_request.offset // search_request.limit + 1,
                 page_size=search_request.limit,
-                has_more=has_more
+                has_more=has_more,
+                next_cursor=next_cursor,
+                total_count_estimated=count_estimated
             )
             
-            logger.info(f"🔍 [SEARCH_DOCUMENTS] Found {len(documents)} documents (total: {total_count})")
+            logger.info(f"🔍 [SEARCH_DOCUMENTS] Found {len(documents)} documents "
+                        f"(total: {'~' if count_estimated else ''}{total_count})")
             return response
             
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"❌ [SEARCH_DOCUMENTS] Error searching documents: {e}")
             return DocumentSearchResponse()
     
+    def _estimate_row_count(self, query: str, params: Dict[str, Any]) -> int:
+        """Оценка числа строк запроса по статистике планировщика (EXPLAIN без выполнения)"""
+        results = self.execute_read_query(f"EXPLAIN (FORMAT JSON) {query}", params)
+        if not results:
+            return 0
+        plan = results[0]['QUERY PLAN']
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    
+    @staticmethod
+    def _encode_search_cursor(kind: str, value: Any, document_id: int) -> str:
+        """Курсор следующей страницы: значение сортировки и id последнего документа"""
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps({"kind": kind, "value": value, "id": document_id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_search_cursor(cursor: str) -> Dict[str, Any]:
+        """Разбор курсора; ValueError, если курсор поврежден"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if key['kind'] == "date":
+                key['value'] = datetime.fromisoformat(key['value'])
+            else:
+                key['value'] = float(key['value'])
+            key['id'] = int(key['id'])
+            return key
+        except Exception as e:
+            raise ValueError(f"Invalid search cursor: {e}")
+    
     def get_project_stats(self, project_code: str) -> Optional[ProjectStats]:
         """Получение статистики проекта"""
         try:
@@ -562,6 +661,129 @@ class ArchiveDatabaseManager:
             logger.error(f"❌ [UPDATE_DOCUMENT_STATUS] Error updating document {document_id} status: {e}")
             raise
     
+    def save_documents_batch(self, items: List[Tuple[ArchiveDocument, List[DocumentSection]]],
+                             save_sections: bool = True) -> List[Tuple[ArchiveDocument, List[DocumentSection]]]:
+        """Сохранение пачки документов и их разделов в одной транзакции.
+        
+        Документы с уже загруженным хешем пропускаются (ON CONFLICT). Возвращает
+        сохраненные документы с проставленными id документов и разделов.
+        """
+        if not items:
+            return []
+        try:
+            with self.get_write_cursor() as (cursor, connection):
+                rows = execute_values(cursor, """
+                    INSERT INTO archive_documents 
+                    (project_code, document_type, document_number, document_name, 
+                     original_filename, file_type, file_size, file_path, document_hash,
+                     processing_status, token_count, version, revision_date, author, 
+                     department, status, metadata)
+                    VALUES %s
+                    ON CONFLICT (document_hash) DO NOTHING
+                    RETURNING id, document_hash
+                """, [(
+                    document.project_code,
+                    document.document_type.value,
+                    document.document_number,
+                    document.document_name,
+                    document.original_filename,
+                    document.file_type,
+                    document.file_size,
+                    document.file_path,
+                    document.document_hash,
+                    document.processing_status.value,
+                    document.token_count,
+                    document.version,
+                    document.revision_date,
+                    document.author,
+                    document.department,
+                    document.status,
+                    Json(document.metadata or {})
+                ) for document, _ in items], page_size=len(items), fetch=True)
+                
+                ids_by_hash = {row['document_hash']: row['id'] for row in rows}
+                saved = []
+                for document, sections in items:
+                    document_id = ids_by_hash.pop(document.document_hash, None)
+                    if document_id is None:
+                        continue
+                    document.id = document_id
+                    for section in sections:
+                        section.archive_document_id = document_id
+                    saved.append((document, sections))
+                
+                sections = [section for _, document_sections in saved for section in document_sections]
+                if save_sections and sections:
+                    section_rows = execute_values(cursor, """
+                        INSERT INTO archive_document_sections 
+                        (archive_document_id, section_number, section_title, section_content,
+                         page_number, section_type, importance_level)
+                        VALUES %s
+                        RETURNING id
+                    """, [(
+                        section.archive_document_id,
+                        section.section_number,
+                        section.section_title,
+                        section.section_content,
+                        section.page_number,
+                        section.section_type,
+                        section.importance_level
+                    ) for section in sections], page_size=len(sections), fetch=True)
+                    for section, row in zip(sections, section_rows):
+                        section.id = row['id']
+                
+                connection.commit()
+            
+            logger.info(f"✅ [SAVE_DOCUMENTS_BATCH] Saved {len(saved)}/{len(items)} documents, "
+                        f"{len(sections) if save_sections else 0} sections")
+            return saved
+            
+        except Exception as e:
+            logger.error(f"❌ [SAVE_DOCUMENTS_BATCH] Error saving documents batch: {e}")
+            raise
+    
+    def update_documents_status(self, document_ids: List[int], status: ProcessingStatus):
+        """Обновление статуса обработки нескольких документов одним запросом"""
+        if not document_ids:
+            return
+        try:
+            self.execute_write_query("""
+                UPDATE archive_documents 
+                SET processing_status = %s, processing_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s)
+            """, (status.value, list(document_ids)))
+            
+            logger.info(f"✅ [UPDATE_DOCUMENTS_STATUS] {len(document_ids)} documents status updated to: {status.value}")
+            
+        except Exception as e:
+            logger.error(f"❌ [UPDATE_DOCUMENTS_STATUS] Error updating documents status: {e}")
+            raise
+
+    def save_document_relations(self, relations: List[DocumentRelation]) -> int:
+        """Сохранение связей между документами одним запросом"""
+        if not relations:
+            return 0
+        try:
+            with self.get_write_cursor() as (cursor, connection):
+                execute_values(cursor, """
+                    INSERT INTO archive_document_relations
+                    (source_document_id, target_document_id, relation_type, relation_description)
+                    VALUES %s
+                """, [(
+                    relation.source_document_id,
+                    relation.target_document_id,
+                    relation.relation_type.value,
+                    relation.relation_description
+                ) for relation in relations], page_size=len(relations))
+                connection.commit()
+
+            logger.info(f"✅ [SAVE_RELATIONS] Saved {len(relations)} document relations")
+            return len(relations)
+
+        except Exception as e:
+            logger.error(f"❌ [SAVE_RELATIONS] Error saving document relations: {e}")
+            raise
+
     def health_check(self) -> Dict[str, Any]:
         """Проверка здоровья соединений с базой данных"""
         try:
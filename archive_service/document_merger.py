@@ -2,29 +2,41 @@
 Модуль объединения документов по общему ШИФР проекта
 """
 
+import asyncio
 import logging
 import os
+import tempfile
+import textwrap
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 import fitz  # PyMuPDF
 import docx
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.units import inch
 
-from .models import ArchiveDocument, DocumentSection, DocumentType
+from .models import ArchiveDocument, DocumentSection, DocumentType, ProcessingStatus
 from .database_manager import ArchiveDatabaseManager
+from .config import MERGED_DIR, MERGE_FLUSH_PAGES, MERGE_FONT_PATH, DOCUMENT_TYPES
 
 logger = logging.getLogger(__name__)
 
+# Форматы, которые PyMuPDF открывает и переводит в PDF сам (изображения, XPS, EPUB, SVG)
+FITZ_CONVERTIBLE_TYPES = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif', '.xps', '.oxps', '.epub', '.svg'}
+
+# Текстовые страницы (титул, содержание, документы не в PDF): A4, 10 pt
+TEXT_FONT_SIZE = 10
+TEXT_MARGIN = 56
+TEXT_LINES_PER_PAGE = 60
+TEXT_LINE_CHARS = 80
+
 class DocumentMerger:
     """Класс для объединения документов по ШИФР проекта"""
     
-    def __init__(self, db_manager: ArchiveDatabaseManager):
+    def __init__(self, db_manager: ArchiveDatabaseManager, merged_dir: str = MERGED_DIR,
+                 flush_pages: int = MERGE_FLUSH_PAGES):
         self.db_manager = db_manager
+        self.merged_dir = merged_dir
+        self.flush_pages = max(1, flush_pages)
     
     async def merge_project_documents(self, project_code: str, output_format: str = "pdf") -> Dict[str, Any]:
         """Объединение всех документов проекта в один файл"""
@@ -88,10 +100,15 @@ class DocumentMerger:
         return sorted(documents, key=sort_key)
     
     async def _merge_to_pdf(self, project_code: str, documents: List[ArchiveDocument]) -> str:
-        """Объединение документов в PDF"""
+        """Объединение документов в PDF.
+        
+        Страницы PDF копируются без перерисовки (insert_pdf), в PDF переводятся только
+        файлы других форматов. Источники открываются по одному, результат дописывается
+        на диск инкрементально, поэтому память не растет с размером проекта.
+        """
         try:
             # Создаем директорию для объединенных документов
-            merge_dir = f"/app/uploads/merged/{project_code}"
+            merge_dir = os.path.join(self.merged_dir, project_code)
             os.makedirs(merge_dir, exist_ok=True)
             
             # Создаем имя файла
@@ -99,100 +116,192 @@ class DocumentMerger:
             output_filename = f"{project_code}_merged_{timestamp}.pdf"
             output_path = os.path.join(merge_dir, output_filename)
             
-            # Создаем PDF документ
-            doc = SimpleDocTemplate(output_path, pagesize=A4)
-            story = []
-            
-            # Стили для заголовков
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Центрирование
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=12,
-                spaceBefore=20
-            )
-            
-            # Добавляем титульную страницу
-            story.append(Paragraph(f"Объединенная документация проекта", title_style))
-            story.append(Paragraph(f"ШИФР проекта: {project_code}", styles['Heading2']))
-            story.append(Paragraph(f"Дата объединения: {datetime.now().strftime('%d.%m.%Y %H:%M')}", styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # Добавляем оглавление
-            story.append(Paragraph("Содержание", heading_style))
-            story.append(Spacer(1, 10))
-            
-            for i, doc in enumerate(documents, 1):
-                doc_title = f"{i}. {doc.document_name} ({doc.document_type.value})"
-                story.append(Paragraph(doc_title, styles['Normal']))
+            loop = asyncio.get_running_loop()
+            stats = await loop.run_in_executor(None, self._write_merged_pdf, project_code, documents, output_path)
             
-            story.append(PageBreak())
-            
-            # Добавляем содержимое каждого документа
-            for i, doc in enumerate(documents, 1):
-                logger.info(f"📄 [MERGE_PDF] Processing document {i}/{len(documents)}: {doc.document_name}")
-                
-                # Заголовок документа
-                story.append(Paragraph(f"{i}. {doc.document_name}", heading_style))
-                story.append(Paragraph(f"Тип: {doc.document_type.value}", styles['Normal']))
-                if doc.document_number:
-                    story.append(Paragraph(f"Номер: {doc.document_number}", styles['Normal']))
-                if doc.author:
-                    story.append(Paragraph(f"Автор: {doc.author}", styles['Normal']))
-                if doc.version:
-                    story.append(Paragraph(f"Версия: {doc.version}", styles['Normal']))
-                story.append(Spacer(1, 20))
-                
-                # Добавляем содержимое документа
-                if doc.file_path and os.path.exists(doc.file_path):
-                    content = await self._extract_document_content(doc)
-                    if content:
-                        # Разбиваем на абзацы
-                        paragraphs = content.split('\n\n')
-                        for para in paragraphs:
-                            if para.strip():
-                                story.append(Paragraph(para.strip(), styles['Normal']))
-                                story.append(Spacer(1, 6))
-                
-                # Добавляем разделы документа
-                sections = self.db_manager.get_document_sections(doc.id)
-                if sections:
-                    story.append(Paragraph("Разделы документа:", styles['Heading3']))
-                    for section in sections:
-                        if section.section_title:
-                            story.append(Paragraph(f"• {section.section_title}", styles['Normal']))
-                        if section.section_content:
-                            # Ограничиваем длину содержимого раздела
-                            content = section.section_content[:500] + "..." if len(section.section_content) > 500 else section.section_content
-                            story.append(Paragraph(content, styles['Normal']))
-                            story.append(Spacer(1, 6))
-                
-                story.append(PageBreak())
-            
-            # Создаем PDF
-            doc.build(story)
-            
-            logger.info(f"✅ [MERGE_PDF] PDF created: {output_path}")
+            logger.info(f"✅ [MERGE_PDF] PDF created: {output_path} ({stats['pages']} pages, "
+                        f"{stats['converted']} converted, {stats['seconds']:.1f}s)")
             return output_path
             
         except Exception as e:
             logger.error(f"❌ [MERGE_PDF] Error creating PDF: {e}")
             raise
     
+    def _write_merged_pdf(self, project_code: str, documents: List[ArchiveDocument], output_path: str) -> Dict[str, Any]:
+        """Запись объединенного PDF: титул и содержание, затем страницы документов по порядку"""
+        started = time.time()
+        part_path = output_path + ".part"
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as temp_dir:
+            # Источники: PDF как есть, остальные форматы - во временные PDF
+            sources = []
+            converted = 0
+            for index, document in enumerate(documents, 1):
+                pdf_path, page_count, is_converted = self._prepare_pdf_source(document, index, temp_dir)
+                sources.append((document, pdf_path, page_count))
+                converted += int(is_converted)
+            
+            # Титул и содержание с номерами страниц (их число известно заранее)
+            title_lines = [
+                "Объединенная документация проекта",
+                f"ШИФР проекта: {project_code}",
+                f"Дата объединения: {datetime.now().strftime('%d.%m.%Y %H:%M')}",
+                "",
+                "Содержание",
+                ""
+            ]
+            front_pages = self._count_text_pages(title_lines + [""] * len(sources))
+            toc_lines = []
+            start_pages = []
+            next_page = front_pages + 1
+            for index, (document, _, page_count) in enumerate(sources, 1):
+                start_pages.append(next_page)
+                toc_lines.append(self._truncate_line(
+                    f"{index}. {document.document_name} ({document.document_type.value}) - стр. {next_page}"))
+                next_page += page_count
+            
+            try:
+                output = fitz.open()
+                self._write_text_pages(output, title_lines + toc_lines)
+                output.save(part_path)
+                output.close()
+                
+                # Закладки: тип документа -> документ -> оглавление исходного PDF
+                toc = [[1, "Содержание", 1]]
+                current_type = None
+                pages_since_flush = 0
+                output = fitz.open(part_path)
+                for index, ((document, pdf_path, page_count), start_page) in enumerate(zip(sources, start_pages), 1):
+                    if document.document_type != current_type:
+                        current_type = document.document_type
+                        toc.append([1, DOCUMENT_TYPES.get(current_type.value, current_type.value), start_page])
+                    title = f"{index}. {document.document_name}"
+                    if document.document_number:
+                        title += f" ({document.document_number})"
+                    toc.append([2, title, start_page])
+                    
+                    source = fitz.open(pdf_path)
+                    output.insert_pdf(source)
+                    for level, entry_title, entry_page in source.get_toc(simple=True):
+                        page = entry_page if 1 <= entry_page <= page_count else 1
+                        toc.append([level + 2, entry_title, start_page + page - 1])
+                    source.close()
+                    
+                    # Готовые страницы уходят на диск, документ открывается заново без них в памяти
+                    pages_since_flush += page_count
+                    if pages_since_flush >= self.flush_pages:
+                        output.saveIncr()
+                        output.close()
+                        output = fitz.open(part_path)
+                        pages_since_flush = 0
+                    logger.debug(f"📄 [MERGE_PDF] Document {index}/{len(sources)} copied: {page_count} pages")
+                
+                output.set_toc(toc)
+                output.saveIncr()
+                total_pages = output.page_count
+                output.close()
+                os.replace(part_path, output_path)
+            except Exception:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+        
+        return {
+            "pages": total_pages,
+            "documents": len(sources),
+            "converted": converted,
+            "seconds": time.time() - started
+        }
+    
+    def _prepare_pdf_source(self, document: ArchiveDocument, index: int, temp_dir: str) -> Tuple[str, int, bool]:
+        """PDF-источник документа: (путь, число страниц, переведен ли из другого формата)"""
+        header = [f"{index}. {document.document_name}", f"Тип: {document.document_type.value}"]
+        if document.document_number:
+            header.append(f"Номер: {document.document_number}")
+        if document.author:
+            header.append(f"Автор: {document.author}")
+        if document.version:
+            header.append(f"Версия: {document.version}")
+        header.append("")
+        
+        file_path = document.file_path
+        temp_path = os.path.join(temp_dir, f"{index:05d}.pdf")
+        if not file_path or not os.path.exists(file_path):
+            return temp_path, self._save_text_pdf(temp_path, header + ["Файл документа не найден."]), True
+        
+        file_ext = Path(file_path).suffix.lower()
+        try:
+            if file_ext == '.pdf':
+                source = fitz.open(file_path)
+                try:
+                    if not source.needs_pass and source.page_count > 0:
+                        return file_path, source.page_count, False
+                finally:
+                    source.close()
+                lines = ["PDF защищен паролем или не содержит страниц."]
+            elif file_ext in FITZ_CONVERTIBLE_TYPES:
+                source = fitz.open(file_path)
+                try:
+                    pdf_bytes = source.convert_to_pdf()
+                finally:
+                    source.close()
+                with open(temp_path, "wb") as f:
+                    f.write(pdf_bytes)
+                converted = fitz.open(temp_path)
+                page_count = converted.page_count
+                converted.close()
+                return temp_path, page_count, True
+            elif file_ext == '.docx':
+                lines = [paragraph.text for paragraph in docx.Document(file_path).paragraphs]
+            elif file_ext == '.txt':
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    lines = f.read().splitlines()
+            else:
+                lines = [f"Формат {file_ext} не переводится в PDF, файл: {os.path.basename(file_path)}"]
+        except Exception as e:
+            logger.warning(f"⚠️ [MERGE_PDF] Document {document.id} could not be read: {e}")
+            lines = [f"Документ не удалось прочитать: {e}"]
+        
+        return temp_path, self._save_text_pdf(temp_path, header + lines), True
+    
+    def _save_text_pdf(self, path: str, lines: List[str]) -> int:
+        """Текстовый PDF во временный файл, возвращает число страниц"""
+        pdf = fitz.open()
+        self._write_text_pages(pdf, lines)
+        page_count = pdf.page_count
+        pdf.save(path)
+        pdf.close()
+        return page_count
+    
+    def _write_text_pages(self, pdf, lines: List[str]):
+        """Страницы A4 с текстом (шрифт с кириллицей, если доступен)"""
+        wrapped = self._wrap_lines(lines)
+        font = {"fontname": "dejavu", "fontfile": MERGE_FONT_PATH} if os.path.exists(MERGE_FONT_PATH) else {"fontname": "helv"}
+        width, height = fitz.paper_size("a4")
+        for start in range(0, len(wrapped), TEXT_LINES_PER_PAGE):
+            page = pdf.new_page(width=width, height=height)
+            chunk = wrapped[start:start + TEXT_LINES_PER_PAGE]
+            page.insert_text((TEXT_MARGIN, TEXT_MARGIN + TEXT_FONT_SIZE), chunk, fontsize=TEXT_FONT_SIZE, **font)
+    
+    def _count_text_pages(self, lines: List[str]) -> int:
+        """Число страниц, которое займет текст"""
+        return max(1, -(-len(self._wrap_lines(lines)) // TEXT_LINES_PER_PAGE))
+    
+    def _wrap_lines(self, lines: List[str]) -> List[str]:
+        """Перенос строк по ширине страницы"""
+        wrapped = []
+        for line in lines:
+            wrapped.extend(textwrap.wrap(line, TEXT_LINE_CHARS) or [""])
+        return wrapped
+    
+    def _truncate_line(self, line: str) -> str:
+        """Строка содержания в одну строку страницы"""
+        return line if len(line) <= TEXT_LINE_CHARS else line[:TEXT_LINE_CHARS - 1] + "…"
+    
     async def _merge_to_docx(self, project_code: str, documents: List[ArchiveDocument]) -> str:
         """Объединение документов в DOCX"""
         try:
             # Создаем директорию для объединенных документов
-            merge_dir = f"/app/uploads/merged/{project_code}"
+            merge_dir = os.path.join(self.merged_dir, project_code)
             os.makedirs(merge_dir, exist_ok=True)
             
             # Создаем имя файла
@@ -14,7 +14,7 @@ import docx
 import pandas as pd
 from pathlib import Path
 
-from .models import ArchiveDocument, DocumentSection, DocumentType
+from .models import ArchiveDocument, DocumentSection, DocumentType, ProcessingStatus
 from .config import PROJECT_CODE_PATTERNS, CHUNK_SIZE, CHUNK_OVERLAP
 
 logger = logging.getLogger(__name__)
@@ -343,8 +343,9 @@ class ArchiveDocumentProcessor:
             logger.error(f"❌ [CALCULATE_HASH] Error calculating file hash: {e}")
             return ""
     
-    def process_document(self, file_path: str, project_code: str = None) -> Tuple[ArchiveDocument, List[DocumentSection]]:
-        """Полная обработка документа"""
+    def process_document(self, file_path: str, project_code: str = None,
+                         document_hash: str = None) -> Tuple[ArchiveDocument, List[DocumentSection]]:
+        """Полная обработка документа (хеш файла пересчитывается, если не передан)"""
         try:
             logger.info(f"🔄 [PROCESS_DOCUMENT] Processing document: {file_path}")
             
@@ -371,7 +372,7 @@ class ArchiveDocumentProcessor:
                 file_type=Path(file_path).suffix.lower(),
                 file_size=os.path.getsize(file_path),
                 file_path=file_path,
-                document_hash=self.calculate_file_hash(file_path),
+                document_hash=document_hash or self.calculate_file_hash(file_path),
                 token_count=len(text_content.split()),
                 upload_date=datetime.now(),
                 processing_status=ProcessingStatus.PENDING
@@ -0,0 +1,139 @@
+"""
+Построение связей между документами проекта по ключам блокировки
+"""
+
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Iterable, Set
+
+from .models import ArchiveDocument, DocumentRelation, DocumentType, RelationType
+
+REVISION_PATTERN = re.compile(r'[\s_.-]*(?:ИЗМ|REV|РЕД)\.?\s*(\d+)\s*$')
+TOKEN_SPLIT_PATTERN = re.compile(r'[\s/_-]+')
+MARK_PATTERN = re.compile(r'^([А-ЯЁA-Z]{1,6})(\d+(?:\.\d+)*)?$')
+# Обозначения стадии не входят в шифр объекта: "1234-П-АР" и "1234-АР" - один объект
+STAGE_TOKENS = {"П", "Р", "ПД", "РД", "РП", "ТЭО"}
+DISCIPLINE_TYPES = (DocumentType.PD, DocumentType.RD)
+
+
+@dataclass(frozen=True)
+class DocumentNumberKey:
+    """Разбор обозначения документа: шифр объекта, марка, комплект листов, изменение"""
+    prefix: Optional[str] = None
+    mark: Optional[str] = None
+    sheet_set: Optional[str] = None
+    revision: Optional[int] = None
+
+    @property
+    def block(self) -> Tuple[Optional[str], Optional[str]]:
+        """Блок для связей ПД/РД: один объект и одна марка (без листов и изменений)"""
+        return self.prefix, self.mark
+
+
+@lru_cache(maxsize=65536)
+def parse_document_number(document_number: Optional[str]) -> DocumentNumberKey:
+    """Разбор обозначения вида "1234-21-П-АР1.2 изм.3" на части ключа"""
+    if not document_number or not document_number.strip():
+        return DocumentNumberKey()
+    number = document_number.strip().upper()
+
+    revision = None
+    match = REVISION_PATTERN.search(number)
+    if match:
+        revision = int(match.group(1))
+        number = number[:match.start()]
+
+    tokens = [token for token in TOKEN_SPLIT_PATTERN.split(number) if token]
+    # Марка стоит после шифра объекта, поэтому первый элемент обозначения маркой не считается
+    mark_index = None
+    for index in range(len(tokens) - 1, 0, -1):
+        if MARK_PATTERN.match(tokens[index]) and tokens[index] not in STAGE_TOKENS:
+            mark_index = index
+            break
+    if mark_index is None:
+        return DocumentNumberKey(prefix="-".join(tokens) or None, revision=revision)
+
+    mark_match = MARK_PATTERN.match(tokens[mark_index])
+    sheet_parts = [mark_match.group(2)] if mark_match.group(2) else []
+    sheet_parts += [token for token in tokens[mark_index + 1:] if token.replace('.', '').isdigit()]
+    prefix_tokens = [token for token in tokens[:mark_index] if token not in STAGE_TOKENS]
+    return DocumentNumberKey(
+        prefix="-".join(prefix_tokens) or None,
+        mark=mark_match.group(1),
+        sheet_set=".".join(sheet_parts) or None,
+        revision=revision
+    )
+
+
+def determine_relation_type(doc1: ArchiveDocument, doc2: ArchiveDocument) -> Optional[RelationType]:
+    """Тип связи doc1 -> doc2.
+
+    ПД и РД связываются только внутри одного блока (шифр объекта и марка),
+    ТЭО - со всеми ПД и РД проекта. Документы без обозначения попадают в общий блок.
+    """
+    if doc1.document_type == DocumentType.TEO and doc2.document_type in DISCIPLINE_TYPES:
+        return RelationType.RELATED_TO  # ТЭО связано с ПД/РД
+    if (doc1.document_type, doc2.document_type) not in ((DocumentType.PD, DocumentType.RD),
+                                                        (DocumentType.RD, DocumentType.PD)):
+        return None
+    if parse_document_number(doc1.document_number).block != parse_document_number(doc2.document_number).block:
+        return None
+    if doc1.document_type == DocumentType.PD:
+        return RelationType.DEPENDS_ON  # РД зависит от ПД
+    return RelationType.REFERENCES  # РД ссылается на ПД
+
+
+def relation_candidates(documents: List[ArchiveDocument]) -> List[Tuple[int, int]]:
+    """Пары индексов (i < j), для которых determine_relation_type может вернуть связь.
+
+    Вместо перебора всех пар: ПД сопоставляются только с РД своего блока,
+    ТЭО - с ПД/РД, стоящими после него (связь ТЭО направлена от ТЭО).
+    """
+    blocks = defaultdict(lambda: {DocumentType.PD: [], DocumentType.RD: []})
+    discipline_indexes = []
+    teo_indexes = []
+    for index, document in enumerate(documents):
+        if document.document_type in DISCIPLINE_TYPES:
+            blocks[parse_document_number(document.document_number).block][document.document_type].append(index)
+            discipline_indexes.append(index)
+        elif document.document_type == DocumentType.TEO:
+            teo_indexes.append(index)
+
+    pairs = []
+    for block in blocks.values():
+        for pd_index in block[DocumentType.PD]:
+            for rd_index in block[DocumentType.RD]:
+                pairs.append((min(pd_index, rd_index), max(pd_index, rd_index)))
+    for teo_index in teo_indexes:
+        start = bisect_right(discipline_indexes, teo_index)
+        pairs.extend((teo_index, index) for index in discipline_indexes[start:])
+    pairs.sort()
+    return pairs
+
+
+def build_document_relations(documents: List[ArchiveDocument],
+                             new_document_ids: Optional[Iterable[int]] = None) -> List[DocumentRelation]:
+    """Связи между документами в том же порядке, что и при попарном сравнении.
+
+    Если передан new_document_ids, остаются только связи с новыми документами:
+    связи между ранее загруженными созданы предыдущими пакетами.
+    """
+    new_ids: Optional[Set[int]] = set(new_document_ids) if new_document_ids is not None else None
+    relations = []
+    for i, j in relation_candidates(documents):
+        doc1, doc2 = documents[i], documents[j]
+        if new_ids is not None and doc1.id not in new_ids and doc2.id not in new_ids:
+            continue
+        relation_type = determine_relation_type(doc1, doc2)
+        if relation_type:
+            relations.append(DocumentRelation(
+                source_document_id=doc1.id,
+                target_document_id=doc2.id,
+                relation_type=relation_type,
+                relation_description=f"Автоматически созданная связь между {doc1.document_type.value} и {doc2.document_type.value}"
+            ))
+    return relations
+
@@ -0,0 +1,201 @@
+"""
+Модели эмбеддингов для векторного индекса архива
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+class EmbeddingBackend:
+    """Модель эмбеддингов: пачка текстов -> нормированные векторы"""
+    name = "base"
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Локальная модель sentence-transformers на CPU (backend="onnx" - через ONNX Runtime)"""
+
+    def __init__(self, model_name: str, batch_size: int = 32, backend: str = "torch", device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.backend = backend
+        self.device = device
+        self.name = f"sentence-transformers:{model_name}" + (":onnx" if backend == "onnx" else "")
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self._get_model().get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._get_model().encode(texts, batch_size=self.batch_size,
+                                           normalize_embeddings=True, show_progress_bar=False)
+        return vectors.tolist()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                started = time.time()
+                kwargs = {"backend": "onnx"} if self.backend == "onnx" else {}
+                self._model = SentenceTransformer(self.model_name, device=self.device, **kwargs)
+                logger.info(f"✅ [EMBEDDINGS] Model {self.model_name} loaded ({self.backend}, "
+                            f"{time.time() - started:.1f}s)")
+            return self._model
+
+
+class RagServiceBackend(EmbeddingBackend):
+    """Эмбеддинги rag-service (BGE-M3): пачка текстов одним запросом к /api/embeddings"""
+
+    def __init__(self, rag_service_url: str, batch_size: int = 32, timeout: float = 120):
+        self.rag_service_url = rag_service_url.rstrip('/')
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.name = f"rag-service:{self.rag_service_url}"
+        self._dimension: Optional[int] = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = len(self.embed(["размерность"])[0])
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self._get_client().post(
+                f"{self.rag_service_url}/api/embeddings",
+                json={"texts": texts[start:start + self.batch_size]}
+            )
+            response.raise_for_status()
+            vectors.extend(response.json()["embeddings"])
+        return vectors
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(timeout=self.timeout)
+            return self._client
+
+
+class HashingBackend(EmbeddingBackend):
+    """Лексические векторы без модели: хеширование слов и биграмм (для работы без сети и GPU)"""
+    name = "hashing"
+
+    def __init__(self, dimension: int = 1024):
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            # Основа слова (первые 6 букв) сглаживает окончания русских словоформ
+            features = [token[:6] for token in tokens]
+            features += [f"{first} {second}" for first, second in zip(features, features[1:])]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], 'little') % self._dimension
+                vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+
+class CachedEmbedder:
+    """Эмбеддинги пачками с LRU-кешем по хешу содержимого текста.
+
+    Одинаковые тексты (повторяющиеся разделы, типовые примечания) считаются
+    моделью один раз; промахи кеша уходят в модель пачками по batch_size.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, batch_size: int = 32, cache_size: int = 10000):
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"texts": 0, "cache_hits": 0, "model_calls": 0, "seconds": 0.0}
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        keys = [hashlib.sha1(text.encode('utf-8')).hexdigest() for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    vectors[key] = vector
+                elif key not in missing:
+                    missing[key] = text
+        self.stats["texts"] += len(texts)
+        self.stats["cache_hits"] += len(texts) - len(missing)
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            started = time.time()
+            batch_vectors = self.backend.embed([missing[key] for key in batch_keys])
+            self.stats["model_calls"] += 1
+            self.stats["seconds"] += time.time() - started
+            vectors.update(zip(batch_keys, batch_vectors))
+            self._cache_put(batch_keys, batch_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = len(self._cache)
+        return {**self.stats, "backend": self.backend.name, "cached_vectors": cached}
+
+    def _cache_put(self, keys: List[str], vectors: List[List[float]]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._cache[key] = vector
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def create_embedding_backend(backend: str, model_name: str, rag_service_url: str,
+                             batch_size: int, dimension: int) -> EmbeddingBackend:
+    """Модель эмбеддингов по имени из конфигурации"""
+    if backend == "rag":
+        return RagServiceBackend(rag_service_url, batch_size=batch_size)
+    if backend in ("sentence-transformers", "onnx"):
+        return SentenceTransformerBackend(model_name, batch_size=batch_size,
+                                          backend="onnx" if backend == "onnx" else "torch")
+    if backend == "hashing":
+        return HashingBackend(dimension)
+    raise ValueError(f"Unknown embedding backend: {backend}")
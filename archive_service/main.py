@@ -92,6 +92,9 @@ async def shutdown_event():
     try:
         logger.info("🛑 [SHUTDOWN] Shutting down Archive Service...")
         
+        if batch_upload_service:
+            batch_upload_service.shutdown()
+        
         if db_manager:
             db_manager.close_all_connections()
         
@@ -284,6 +287,8 @@ async def search_documents(request: DocumentSearchRequest):
         
         return response
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ [SEARCH] Error searching documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -146,6 +146,8 @@ class DocumentSearchRequest:
     status: Optional[str] = None
     limit: int = 100
     offset: int = 0
+    cursor: Optional[str] = None  # next_cursor предыдущей страницы (вместо offset)
+    count_mode: str = "exact"  # exact, estimated (по статистике планировщика), none
 
 @dataclass
 class DocumentSearchResponse:
@@ -155,6 +157,8 @@ class DocumentSearchResponse:
     page: int = 0
     page_size: int = 100
     has_more: bool = False
+    next_cursor: Optional[str] = None
+    total_count_estimated: bool = False
 
 @dataclass
 class ProjectStats:
@@ -163,7 +167,7 @@ class ProjectStats:
     project_name: str
     total_documents: int
     documents_by_type: Dict[str, int] = field(default_factory=dict)
-    total_sections: int
+    total_sections: int = 0
     total_size: int = 0
     last_upload: Optional[datetime] = None
     processing_status: Dict[str, int] = field(default_factory=dict)
@@ -0,0 +1,362 @@
+"""
+Конвейер пакетной загрузки документов архива
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from .models import ArchiveDocument, DocumentSection, DocumentType, ProcessingStatus
+from .database_manager import ArchiveDatabaseManager
+from .document_processor import ArchiveDocumentProcessor
+from .vector_indexer import ArchiveVectorIndexer
+from .config import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+# Этапы конвейера в порядке прохождения документа
+STAGES = ("copy", "extract", "write", "index")
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Поля запроса, которые переопределяют извлеченные из файла значения
+REQUEST_FIELDS = ("document_name", "document_number", "author", "department", "version")
+
+# Процессор документов рабочего процесса пула (создается один раз на процесс)
+_processor: Optional[ArchiveDocumentProcessor] = None
+
+
+def extract_document(file_path: str, project_code: str,
+                     document_hash: str) -> Tuple[ArchiveDocument, List[DocumentSection]]:
+    """Извлечение текста и разделов документа (выполняется в пуле процессов)"""
+    global _processor
+    if _processor is None:
+        _processor = ArchiveDocumentProcessor()
+    return _processor.process_document(file_path, project_code, document_hash)
+
+
+def copy_and_hash(source_path: str, project_dir: str) -> Tuple[str, str]:
+    """Копирование файла в директорию проекта с вычислением SHA-256 за одно чтение"""
+    os.makedirs(project_dir, exist_ok=True)
+    name, ext = os.path.splitext(os.path.basename(source_path))
+    partial_path = os.path.join(project_dir, f".{name}_{uuid.uuid4().hex}{ext}.part")
+    hash_sha256 = hashlib.sha256()
+    try:
+        with open(source_path, "rb") as source, open(partial_path, "wb") as dest:
+            for chunk in iter(lambda: source.read(COPY_BUFFER_SIZE), b""):
+                hash_sha256.update(chunk)
+                dest.write(chunk)
+        shutil.copystat(source_path, partial_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    document_hash = hash_sha256.hexdigest()
+    # Префикс хеша в имени: одноименные файлы, скопированные в одну секунду, не перезаписывают друг друга
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    dest_path = os.path.join(project_dir, f"{name}_{timestamp}_{document_hash[:8]}{ext}")
+    os.replace(partial_path, dest_path)
+    return dest_path, document_hash
+
+
+def apply_request_fields(document: ArchiveDocument, doc_data: Dict[str, Any]):
+    """Перенос заданных в запросе атрибутов документа"""
+    if 'document_type' in doc_data:
+        document.document_type = DocumentType(doc_data['document_type'])
+    for name in REQUEST_FIELDS:
+        if name in doc_data:
+            setattr(document, name, doc_data[name])
+
+
+class _UploadItem:
+    """Документ пакета на пути через этапы конвейера"""
+    __slots__ = ("index", "doc_data", "saved_path", "document_hash", "document", "sections")
+
+    def __init__(self, index: int, doc_data: Dict[str, Any]):
+        self.index = index
+        self.doc_data = doc_data
+        self.saved_path: Optional[str] = None
+        self.document_hash: Optional[str] = None
+        self.document: Optional[ArchiveDocument] = None
+        self.sections: List[DocumentSection] = []
+
+
+class ArchiveUploadPipeline:
+    """Конвейер пакетной загрузки с отдельным ограниченным пулом на каждый этап.
+
+    copy: копирование файла и SHA-256 за одно чтение - в пуле потоков;
+    extract: извлечение текста и разделов - в пуле процессов;
+    write/index: документы и разделы пишутся в БД пачками по write_batch_size
+    (execute_values в одной транзакции, отдельный поток записи), разделы пачки -
+    одним upsert в Qdrant.
+    Этапы связаны ограниченными очередями, поэтому пока одна пачка пишется
+    в БД, следующие файлы уже копируются и разбираются.
+    """
+
+    def __init__(self, db_manager: ArchiveDatabaseManager, vector_indexer: ArchiveVectorIndexer,
+                 io_workers: int = 5, extract_processes: int = 1,
+                 write_batch_size: int = 10, queue_size: int = 32):
+        self.db_manager = db_manager
+        self.vector_indexer = vector_indexer
+        self.io_workers = max(1, io_workers)
+        self.extract_processes = max(0, extract_processes)
+        self.write_batch_size = max(1, write_batch_size)
+        self.queue_size = max(1, queue_size)
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._progress: Dict[str, Dict[str, Any]] = {}
+
+    async def run(self, documents: List[Dict[str, Any]], project_code: str,
+                  auto_extract_sections: bool) -> Dict[str, Any]:
+        """Загрузка документов пакета: результат в формате BatchUploadResponse"""
+        started = time.time()
+        progress = self._start_progress(project_code, len(documents))
+        project_dir = os.path.join(UPLOAD_DIR, project_code)
+        loop = asyncio.get_running_loop()
+
+        source: asyncio.Queue = asyncio.Queue()
+        for index, doc_data in enumerate(documents):
+            source.put_nowait(_UploadItem(index, doc_data))
+        extract_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        document_ids: Dict[int, int] = {}
+        errors: List[Tuple[int, str]] = []
+
+        def fail(items: List[_UploadItem], stage: str, error: Any):
+            for item in items:
+                error_msg = f"Error processing {item.doc_data.get('file_path', 'unknown')}: {error}"
+                errors.append((item.index, error_msg))
+                progress['stages'][stage]['failed'] += 1
+                progress['failed_documents'] += 1
+                logger.error(f"❌ [UPLOAD_PIPELINE] {error_msg}")
+                if item.saved_path and os.path.exists(item.saved_path):
+                    os.remove(item.saved_path)
+
+        async def copy_worker():
+            stage = progress['stages']['copy']
+            while True:
+                try:
+                    item = source.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                stage['running'] += 1
+                try:
+                    item.saved_path, item.document_hash = await loop.run_in_executor(
+                        self._get_io_executor(), copy_and_hash, item.doc_data['file_path'], project_dir
+                    )
+                except Exception as e:
+                    fail([item], 'copy', e)
+                    continue
+                finally:
+                    stage['running'] -= 1
+                stage['done'] += 1
+                await extract_queue.put(item)
+
+        async def extract_worker():
+            stage = progress['stages']['extract']
+            while True:
+                item = await extract_queue.get()
+                if item is None:
+                    return
+                stage['running'] += 1
+                try:
+                    item.document, item.sections = await self._extract(
+                        item.doc_data['file_path'], project_code, item.document_hash
+                    )
+                    apply_request_fields(item.document, item.doc_data)
+                    item.document.file_path = item.saved_path
+                    item.document.processing_status = ProcessingStatus.PROCESSING
+                except Exception as e:
+                    fail([item], 'extract', e)
+                    continue
+                finally:
+                    stage['running'] -= 1
+                stage['done'] += 1
+                await write_queue.put(item)
+
+        async def save_batch(items: List[_UploadItem]):
+            return await loop.run_in_executor(
+                self._get_write_executor(), self.db_manager.save_documents_batch,
+                [(item.document, item.sections) for item in items], auto_extract_sections
+            )
+
+        async def write_batch(batch: List[_UploadItem]):
+            stage = progress['stages']['write']
+            running = len(batch)
+            stage['running'] += running
+            try:
+                saved = await save_batch(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    fail(batch, 'write', e)
+                    return
+                # Транзакция пачки откатилась целиком: документы сохраняются по одному,
+                # ошибкой завершаются только те, что не записываются сами по себе
+                logger.warning(f"⚠️ [UPLOAD_PIPELINE] Batch of {len(batch)} documents failed, saving one by one: {e}")
+                saved, written = [], []
+                for item in batch:
+                    try:
+                        saved.extend(await save_batch([item]))
+                        written.append(item)
+                    except Exception as item_error:
+                        fail([item], 'write', item_error)
+                batch = written
+            finally:
+                stage['running'] -= running
+
+            saved_ids = {id(document) for document, _ in saved}
+            stored = [item for item in batch if id(item.document) in saved_ids]
+            fail([item for item in batch if id(item.document) not in saved_ids], 'write',
+                 "Document with this content already exists")
+            stage['done'] += len(stored)
+
+            # Разделы пачки - одним запросом к Qdrant; сбой индексации не отменяет загрузку
+            indexed = [item for item in stored if item.sections]
+            if indexed:
+                index_stage = progress['stages']['index']
+                index_stage['running'] += len(indexed)
+                points = await self.vector_indexer.index_sections_batch(
+                    [(item.document.id, item.sections) for item in indexed]
+                )
+                index_stage['running'] -= len(indexed)
+                index_stage['done' if points else 'failed'] += len(indexed)
+
+            stored_ids = [item.document.id for item in stored]
+            try:
+                await loop.run_in_executor(
+                    self._get_write_executor(), self.db_manager.update_documents_status,
+                    stored_ids, ProcessingStatus.COMPLETED
+                )
+            except Exception as e:
+                logger.error(f"❌ [UPLOAD_PIPELINE] Error completing documents {stored_ids}: {e}")
+            for item in stored:
+                document_ids[item.index] = item.document.id
+            progress['processed_documents'] += len(stored)
+
+        async def writer():
+            while True:
+                item = await write_queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                while len(batch) < self.write_batch_size:
+                    try:
+                        item = write_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is None:
+                        await write_batch(batch)
+                        return
+                    batch.append(item)
+                await write_batch(batch)
+
+        copy_tasks = [asyncio.create_task(copy_worker()) for _ in range(min(self.io_workers, len(documents)) or 1)]
+        extract_tasks = [asyncio.create_task(extract_worker()) for _ in range(self.extract_processes or 1)]
+        writer_task = asyncio.create_task(writer())
+        try:
+            await asyncio.gather(*copy_tasks)
+            for _ in extract_tasks:
+                await extract_queue.put(None)
+            await asyncio.gather(*extract_tasks)
+            await write_queue.put(None)
+            await writer_task
+        except BaseException:
+            for task in copy_tasks + extract_tasks + [writer_task]:
+                task.cancel()
+            progress['status'] = 'error'
+            raise
+
+        elapsed = time.time() - started
+        progress['status'] = 'completed'
+        progress['finished_at'] = datetime.now().isoformat()
+        progress['files_per_minute'] = round(len(documents) / elapsed * 60, 2) if elapsed > 0 else 0
+        logger.info(f"✅ [UPLOAD_PIPELINE] Project {project_code}: {len(document_ids)}/{len(documents)} documents "
+                    f"in {elapsed:.2f}s ({progress['files_per_minute']} files/min)")
+        return {
+            'processed': len(document_ids),
+            'failed': len(errors),
+            'document_ids': [document_ids[index] for index in sorted(document_ids)],
+            'errors': [error for _, error in sorted(errors)]
+        }
+
+    def get_progress(self, project_code: str) -> Optional[Dict[str, Any]]:
+        """Ход последней загрузки проекта по этапам конвейера"""
+        progress = self._progress.get(project_code)
+        if progress is None:
+            return None
+        return {**progress, 'stages': {stage: dict(counters) for stage, counters in progress['stages'].items()}}
+
+    def shutdown(self):
+        with self._lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
+            for executor in (self._io_executor, self._write_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False)
+            self._io_executor = None
+            self._write_executor = None
+
+    def _start_progress(self, project_code: str, total: int) -> Dict[str, Any]:
+        progress = {
+            'status': 'running',
+            'total_documents': total,
+            'processed_documents': 0,
+            'failed_documents': 0,
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'stages': {stage: {'running': 0, 'done': 0, 'failed': 0} for stage in STAGES}
+        }
+        self._progress[project_code] = progress
+        return progress
+
+    async def _extract(self, file_path: str, project_code: str,
+                       document_hash: str) -> Tuple[ArchiveDocument, List[DocumentSection]]:
+        loop = asyncio.get_running_loop()
+        if self.extract_processes == 0:
+            return await loop.run_in_executor(self._get_io_executor(), extract_document,
+                                              file_path, project_code, document_hash)
+        pool = self._get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, extract_document, file_path, project_code, document_hash)
+        except BrokenProcessPool:
+            # Упавший процесс (например, на поврежденном файле) ломает весь пул - следующий документ получит новый
+            with self._lock:
+                if self._process_pool is pool:
+                    self._process_pool = None
+            logger.warning(f"⚠️ [UPLOAD_PIPELINE] Extraction process pool broken on {file_path}, restarting")
+            raise
+
+    def _get_io_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._io_executor is None:
+                self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="archive-upload")
+            return self._io_executor
+
+    def _get_write_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._write_executor is None:
+                # Пачки пишутся в БД по одной: порядок сохраняется, а потоки копирования не ждут записи
+                self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive-write")
+            return self._write_executor
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                context = multiprocessing.get_context("forkserver")
+                self._process_pool = ProcessPoolExecutor(max_workers=self.extract_processes, mp_context=context)
+                logger.info(f"✅ [UPLOAD_PIPELINE] Extraction process pool started ({self.extract_processes} processes)")
+            return self._process_pool
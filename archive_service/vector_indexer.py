@@ -4,24 +4,38 @@
 
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+import hashlib
+import uuid
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from .models import DocumentSection
-from .config import QDRANT_URL, QDRANT_COLLECTION_NAME, EMBEDDING_DIMENSION
+from .embeddings import CachedEmbedder, create_embedding_backend
+from .config import (
+    QDRANT_URL, QDRANT_COLLECTION_NAME, EMBEDDING_DIMENSION, EMBEDDING_BACKEND,
+    EMBEDDING_LOCAL_MODEL, RAG_SERVICE_URL, EMBEDDING_BATCH_SIZE, EMBEDDING_CACHE_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
 class ArchiveVectorIndexer:
     """Векторный индексатор для архива технической документации"""
     
-    def __init__(self, qdrant_url: str = QDRANT_URL):
+    def __init__(self, qdrant_url: str = QDRANT_URL, embedder: Optional[CachedEmbedder] = None):
         self.qdrant_url = qdrant_url
         self.collection_name = QDRANT_COLLECTION_NAME
+        self.embedder = embedder or CachedEmbedder(
+            create_embedding_backend(EMBEDDING_BACKEND, EMBEDDING_LOCAL_MODEL, RAG_SERVICE_URL,
+                                     EMBEDDING_BATCH_SIZE, EMBEDDING_DIMENSION),
+            batch_size=EMBEDDING_BATCH_SIZE,
+            cache_size=EMBEDDING_CACHE_SIZE
+        )
         self.client = None
+        self._collection_ready = False
         self._init_client()
     
     def _init_client(self):
@@ -35,7 +49,12 @@ class ArchiveVectorIndexer:
     
     async def ensure_collection_exists(self):
         """Создание коллекции, если она не существует"""
+        if self._collection_ready:
+            return
         try:
+            # Размерность задает модель эмбеддингов (для локальной модели - после ее загрузки)
+            dimension = await asyncio.get_running_loop().run_in_executor(None, lambda: self.embedder.dimension)
+            
             # Проверяем, существует ли коллекция
             collections = self.client.get_collections()
             collection_names = [col.name for col in collections.collections]
@@ -45,13 +64,21 @@ class ArchiveVectorIndexer:
                 self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
-                        size=EMBEDDING_DIMENSION,
+                        size=dimension,
                         distance=Distance.COSINE
                     )
                 )
-                logger.info(f"✅ [VECTOR_INDEXER] Collection created: {self.collection_name}")
+                logger.info(f"✅ [VECTOR_INDEXER] Collection created: {self.collection_name} ({dimension} dims)")
             else:
+                vectors_config = self.client.get_collection(self.collection_name).config.params.vectors
+                if getattr(vectors_config, 'size', dimension) != dimension:
+                    raise ValueError(
+                        f"Collection {self.collection_name} has {vectors_config.size}-dim vectors, "
+                        f"embedding backend {self.embedder.backend.name} produces {dimension}: "
+                        f"recreate the collection and reindex the archive"
+                    )
                 logger.info(f"ℹ️ [VECTOR_INDEXER] Collection already exists: {self.collection_name}")
+            self._collection_ready = True
                 
         except Exception as e:
             logger.error(f"❌ [VECTOR_INDEXER] Error ensuring collection exists: {e}")
@@ -59,51 +86,42 @@ class ArchiveVectorIndexer:
     
     async def generate_embedding(self, text: str) -> List[float]:
         """Генерация эмбеддинга для текста"""
+        return (await self.generate_embeddings([text]))[0]
+    
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Эмбеддинги пачки текстов (модель вызывается вне цикла событий, повторы берутся из кеша)"""
         try:
-            # Здесь должна быть интеграция с моделью эмбеддингов
-            # Пока используем простую хеш-функцию для демонстрации
-            import hashlib
-            
-            # Создаем хеш от текста
-            text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-            
-            # Преобразуем хеш в вектор фиксированной размерности
-            # Это не настоящий эмбеддинг, но подходит для демонстрации
-            vector = []
-            for i in range(0, len(text_hash), 2):
-                hex_pair = text_hash[i:i+2]
-                value = int(hex_pair, 16) / 255.0  # Нормализуем к [0, 1]
-                vector.append(value)
-            
-            # Дополняем до нужной размерности
-            while len(vector) < EMBEDDING_DIMENSION:
-                vector.append(0.0)
-            
-            # Обрезаем до нужной размерности
-            vector = vector[:EMBEDDING_DIMENSION]
-            
-            logger.debug(f"🔍 [GENERATE_EMBEDDING] Generated embedding for text: {len(text)} chars")
-            return vector
+            vectors = await asyncio.get_running_loop().run_in_executor(None, self.embedder.embed, texts)
+            logger.debug(f"🔍 [GENERATE_EMBEDDING] Generated {len(vectors)} embeddings")
+            return vectors
             
         except Exception as e:
-            logger.error(f"❌ [GENERATE_EMBEDDING] Error generating embedding: {e}")
-            return [0.0] * EMBEDDING_DIMENSION
+            logger.error(f"❌ [GENERATE_EMBEDDING] Error generating embeddings: {e}")
+            raise
     
     async def index_document_sections(self, document_id: int, sections: List[DocumentSection]) -> bool:
         """Индексация разделов документа в векторную базу"""
+        indexed = await self.index_sections_batch([(document_id, sections)])
+        if not indexed:
+            logger.warning(f"⚠️ [INDEX_SECTIONS] No sections indexed for document {document_id}")
+        return indexed > 0
+    
+    async def index_sections_batch(self, documents: List[Tuple[int, List[DocumentSection]]]) -> int:
+        """Индексация разделов нескольких документов одним upsert; возвращает число точек"""
         try:
             await self.ensure_collection_exists()
             
-            points = []
+            # Эмбеддинги всех разделов пачки - одним вызовом модели
+            sections_to_index = [(document_id, section) for document_id, sections in documents for section in sections]
+            embeddings = await self.generate_embeddings([section.section_content for _, section in sections_to_index])
             
-            for section in sections:
-                # Генерируем эмбеддинг для содержимого раздела
-                embedding = await self.generate_embedding(section.section_content)
-                
-                # Создаем точку для Qdrant
-                point_id = f"{document_id}_{section.id}" if section.id else f"{document_id}_{hash(section.section_content)}"
+            points = []
+            for (document_id, section), embedding in zip(sections_to_index, embeddings):
+                # Qdrant принимает только целые и UUID идентификаторы точек
+                point_key = section.id or hashlib.sha1(section.section_content.encode('utf-8')).hexdigest()
+                point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"archive/{document_id}/{point_key}"))
                 
-                point = PointStruct(
+                points.append(PointStruct(
                     id=point_id,
                     vector=embedding,
                     payload={
@@ -117,25 +135,19 @@ class ArchiveVectorIndexer:
                         'importance_level': section.importance_level,
                         'created_at': section.created_at.isoformat() if section.created_at else None
                     }
-                )
-                points.append(point)
+                ))
             
-            # Загружаем точки в Qdrant
+            # Загружаем точки в Qdrant (клиент синхронный - вызов вне цикла событий)
             if points:
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=points
+                await asyncio.get_running_loop().run_in_executor(
+                    None, partial(self.client.upsert, collection_name=self.collection_name, points=points)
                 )
-                
-                logger.info(f"✅ [INDEX_SECTIONS] Indexed {len(points)} sections for document {document_id}")
-                return True
-            else:
-                logger.warning(f"⚠️ [INDEX_SECTIONS] No sections to index for document {document_id}")
-                return False
+                logger.info(f"✅ [INDEX_SECTIONS] Indexed {len(points)} sections for {len(documents)} documents")
+            return len(points)
                 
         except Exception as e:
             logger.error(f"❌ [INDEX_SECTIONS] Error indexing sections: {e}")
-            return False
+            return 0
     
     async def search_similar_sections(self, query: str, project_code: str = None, 
                                     limit: int = 10, score_threshold: float = 0.7) -> List[Dict[str, Any]]:
@@ -250,7 +262,8 @@ class ArchiveVectorIndexer:
                 'qdrant_connected': True,
                 'collection_exists': collection_exists,
                 'collection_name': self.collection_name,
-                'total_collections': len(collections.collections)
+                'total_collections': len(collections.collections),
+                'embeddings': self.embedder.get_stats()
             }
             
         except Exception as e:
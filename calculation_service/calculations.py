@@ -4,14 +4,14 @@
 import logging
 import time
 import math
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
 from models import (
     CalculationCreate, CalculationResponse, CalculationExecute,
     StructuralCalculationParams, FoundationCalculationParams,
     ThermalCalculationParams, VentilationCalculationParams,
-    DegasificationCalculationParams, ElectricalLoadCalculationParams,
+    DegasificationCalculationParams,
     WaterSupplyCalculationParams, FireSafetyCalculationParams,
     AcousticCalculationParams, LightingCalculationParams,
     GeologicalCalculationParams, UAVShockWaveCalculationParams,
@@ -19,6 +19,8 @@ from models import (
     CalculationTypeInfo, CalculationCategoryInfo
 )
 from database import db_manager
+from result_cache import CalculationResultCache, calculate_parameters_hash
+from registry import calculation_registry
 
 logger = logging.getLogger(__name__)
 
@@ -27,96 +29,19 @@ class CalculationEngine:
     """Движок для выполнения расчетов"""
     
     def __init__(self):
-        self.calculation_types = {
-            "structural": {
-                "name": "Строительные конструкции",
-                "description": "Расчеты строительных конструкций",
-                "categories": ["beam", "column", "slab", "foundation"]
-            },
-            "foundation": {
-                "name": "Основания и фундаменты", 
-                "description": "Расчеты оснований и фундаментов",
-                "categories": ["bearing_capacity", "settlement", "stability"]
-            },
-            "thermal": {
-                "name": "Теплотехнические расчеты",
-                "description": "Теплотехнические расчеты зданий",
-                "categories": ["heat_loss", "thermal_insulation", "condensation"]
-            },
-            "ventilation": {
-                "name": "Вентиляция и кондиционирование",
-                "description": "Расчеты систем вентиляции согласно СП 60.13330.2016, СП 7.13130.2013, СП 54.13330.2016",
-                "categories": [
-                    "air_exchange",           # Расчеты воздухообмена
-                    "smoke_ventilation",      # Противодымная вентиляция
-                    "residential_ventilation", # Вентиляция жилых зданий
-                    "energy_efficiency",      # Энергоэффективность
-                    "acoustic_calculations",  # Акустические расчеты
-                    "heat_recovery",          # Рекуперация тепла
-                    "air_conditioning"        # Кондиционирование
-                ]
-            },
-            "degasification": {
-                "name": "Расчет дегазации угольных шахт",
-                "description": "Расчеты систем дегазации угольных шахт",
-                "categories": ["methane_extraction", "ventilation_requirements", "safety_systems"]
-            },
-            "electrical": {
-                "name": "Электротехнические расчеты",
-                "description": "Расчеты электрических нагрузок, заземления и молниезащиты",
-                "categories": ["electrical_loads", "cable_calculation", "grounding", "lightning_protection", "energy_efficiency"]
-            },
-            "water_supply": {
-                "name": "Водоснабжение и водоотведение",
-                "description": "Расчеты систем водоснабжения и водоотведения согласно СП 30.13330.2016",
-                "categories": ["water_consumption", "pipe_calculation", "sewage_treatment", "water_pressure", "drainage"]
-            },
-            "fire_safety": {
-                "name": "Пожарная безопасность",
-                "description": "Расчеты пожарной безопасности согласно 123-ФЗ, ГОСТ 12.1.004-91",
-                "categories": ["evacuation", "fire_suppression", "smoke_control", "fire_resistance", "emergency_systems"]
-            },
-            "acoustic": {
-                "name": "Акустические расчеты",
-                "description": "Расчеты звукоизоляции и акустики согласно СП 51.13330.2011",
-                "categories": ["sound_insulation", "noise_control", "vibration_control", "acoustic_treatment", "reverberation"]
-            },
-            "lighting": {
-                "name": "Освещение и инсоляция",
-                "description": "Расчеты освещения и инсоляции согласно СП 52.13330.2016",
-                "categories": ["artificial_lighting", "natural_lighting", "insolation", "luminaire_calculation", "energy_efficiency"]
-            },
-            "geological": {
-                "name": "Инженерно-геологические расчеты",
-                "description": "Расчеты оснований и грунтов согласно СП 22.13330.2016",
-                "categories": ["bearing_capacity", "settlement", "slope_stability", "seismic_analysis", "groundwater"]
-            },
-            "uav_protection": {
-                "name": "Защита от БПЛА",
-                "description": "Расчеты защиты от воздействия беспилотных летательных аппаратов согласно СП 542.1325800.2024",
-                "categories": ["shock_wave", "impact_penetration"]
-            }
-        }
+        self.registry = calculation_registry
+        self.result_cache = CalculationResultCache(db_manager)
     
     def get_calculation_types(self) -> List[CalculationTypeInfo]:
         """Получение доступных типов расчетов"""
-        return [
-            CalculationTypeInfo(
-                type=calc_type,
-                name=info["name"],
-                description=info["description"],
-                parameters_schema=self._get_parameters_schema(calc_type),
-                categories=info["categories"]
-            )
-            for calc_type, info in self.calculation_types.items()
-        ]
+        return [CalculationTypeInfo(**plugin.to_type_info()) for plugin in self.registry.listed()]
     
     def get_calculation_categories(self, calculation_type: str) -> List[CalculationCategoryInfo]:
         """Получение категорий для типа расчета"""
-        if calculation_type not in self.calculation_types:
+        plugin = self.registry.get(calculation_type)
+        if not plugin:
             return []
         
-        categories = self.calculation_types[calculation_type]["categories"]
         return [
             CalculationCategoryInfo(
                 category=category,
@@ -124,312 +49,9 @@ class CalculationEngine:
                 description=self._get_category_description(category),
                 calculation_types=[calculation_type]
             )
-            for category in categories
+            for category in plugin.categories
         ]
     
-    def _get_parameters_schema(self, calculation_type: str) -> Dict[str, Any]:
-        """Получение схемы параметров для типа расчета"""
-        schemas = {
-            "structural": {
-                "type": "object",
-                "properties": {
-                    "beam_length": {"type": "number", "title": "Длина балки (м)"},
-                    "beam_width": {"type": "number", "title": "Ширина балки (м)"},
-                    "beam_height": {"type": "number", "title": "Высота балки (м)"},
-                    "material_strength": {"type": "number", "title": "Прочность материала (МПа)"},
-                    "load_value": {"type": "number", "title": "Нагрузка (кН/м)"},
-                    "safety_factor": {"type": "number", "title": "Коэффициент безопасности", "default": 1.5},
-                    "deflection_limit": {"type": "number", "title": "Предел прогиба", "default": 1.0/250}
-                },
-                "required": ["beam_length", "beam_width", "beam_height", "material_strength", "load_value"]
-            },
-            "foundation": {
-                "type": "object",
-                "properties": {
-                    "foundation_width": {"type": "number", "title": "Ширина фундамента (м)"},
-                    "foundation_length": {"type": "number", "title": "Длина фундамента (м)"},
-                    "foundation_depth": {"type": "number", "title": "Глубина заложения (м)"},
-                    "soil_cohesion": {"type": "number", "title": "Сцепление грунта (кПа)"},
-                    "soil_friction_angle": {"type": "number", "title": "Угол внутреннего трения (град)"},
-                    "soil_density": {"type": "number", "title": "Плотность грунта (т/м³)"},
-                    "safety_factor": {"type": "number", "title": "Коэффициент безопасности", "default": 2.0},
-                    "water_table_depth": {"type": "number", "title": "Глубина залегания грунтовых вод (м)"}
-                },
-                "required": ["foundation_width", "foundation_length", "foundation_depth", 
-                           "soil_cohesion", "soil_friction_angle", "soil_density"]
-            },
-            "thermal": {
-                "type": "object",
-                "properties": {
-                    "building_type": {"type": "string", "title": "Тип здания", "enum": ["жилое", "общественное", "производственное"]},
-                    "building_area": {"type": "number", "title": "Площадь здания (м²)"},
-                    "building_volume": {"type": "number", "title": "Объем здания (м³)"},
-                    "number_of_floors": {"type": "integer", "title": "Количество этажей"},
-                    "wall_thickness": {"type": "number", "title": "Толщина стены (м)"},
-                    "wall_material": {"type": "string", "title": "Материал стены"},
-                    "thermal_conductivity": {"type": "number", "title": "Теплопроводность (Вт/(м·К))"},
-                    "wall_area": {"type": "number", "title": "Площадь стен (м²)"},
-                    "window_area": {"type": "number", "title": "Площадь окон (м²)", "default": 0},
-                    "window_thermal_conductivity": {"type": "number", "title": "Теплопроводность окон (Вт/(м²·К))", "default": 2.8},
-                    "floor_area": {"type": "number", "title": "Площадь пола (м²)"},
-                    "floor_thickness": {"type": "number", "title": "Толщина пола (м)", "default": 0.2},
-                    "floor_thermal_conductivity": {"type": "number", "title": "Теплопроводность пола (Вт/(м·К))", "default": 1.5},
-                    "ceiling_area": {"type": "number", "title": "Площадь потолка (м²)"},
-                    "ceiling_thickness": {"type": "number", "title": "Толщина потолка (м)", "default": 0.3},
-                    "ceiling_thermal_conductivity": {"type": "number", "title": "Теплопроводность потолка (Вт/(м·К))", "default": 0.8},
-                    "indoor_temperature": {"type": "number", "title": "Внутренняя температура (°C)", "default": 20},
-                    "outdoor_temperature": {"type": "number", "title": "Наружная температура (°C)", "default": -25},
-                    "relative_humidity": {"type": "number", "title": "Относительная влажность (%)", "default": 55},
-                    "wind_speed": {"type": "number", "title": "Скорость ветра (м/с)", "default": 5.0},
-                    "air_exchange_rate": {"type": "number", "title": "Кратность воздухообмена (1/ч)", "default": 0.5},
-                    "heat_emission_people": {"type": "number", "title": "Тепловыделения от людей (Вт)", "default": 0},
-                    "heat_emission_equipment": {"type": "number", "title": "Тепловыделения от оборудования (Вт)", "default": 0},
-                    "heat_emission_lighting": {"type": "number", "title": "Тепловыделения от освещения (Вт)", "default": 0},
-                    "normative_heat_transfer_resistance": {"type": "number", "title": "Нормативное сопротивление теплопередаче (м²·К/Вт)", "default": 3.2},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 50.13330.2012"}
-                },
-                "required": ["building_type", "building_area", "building_volume", "number_of_floors", 
-                           "wall_thickness", "wall_material", "thermal_conductivity", "wall_area", 
-                           "floor_area", "ceiling_area"]
-            },
-            "ventilation": {
-                "type": "object",
-                "properties": {
-                    "room_volume": {"type": "number", "title": "Объем помещения (м³)"},
-                    "room_area": {"type": "number", "title": "Площадь помещения (м²)"},
-                    "room_height": {"type": "number", "title": "Высота помещения (м)"},
-                    "room_type": {"type": "string", "title": "Тип помещения", "enum": ["жилое", "общественное", "производственное"]},
-                    "occupancy": {"type": "integer", "title": "Количество людей в помещении", "default": 1},
-                    "air_exchange_rate": {"type": "number", "title": "Кратность воздухообмена (1/ч)"},
-                    "air_exchange_per_person": {"type": "number", "title": "Воздухообмен на человека (м³/ч·чел)"},
-                    "air_exchange_per_area": {"type": "number", "title": "Воздухообмен на площадь (м³/ч·м²)"},
-                    "supply_air_temperature": {"type": "number", "title": "Температура приточного воздуха (°C)", "default": 20},
-                    "exhaust_air_temperature": {"type": "number", "title": "Температура вытяжного воздуха (°C)", "default": 22},
-                    "outdoor_temperature": {"type": "number", "title": "Температура наружного воздуха (°C)", "default": -25},
-                    "co2_emission_per_person": {"type": "number", "title": "Выделение CO₂ на человека (м³/ч)", "default": 0.02},
-                    "moisture_emission_per_person": {"type": "number", "title": "Выделение влаги на человека (кг/ч)", "default": 0.05},
-                    "heat_emission_per_person": {"type": "number", "title": "Тепловыделения на человека (Вт)", "default": 120},
-                    "heat_emission_from_equipment": {"type": "number", "title": "Тепловыделения от оборудования (Вт)", "default": 0},
-                    "relative_humidity": {"type": "number", "title": "Относительная влажность (%)", "default": 50},
-                    "air_velocity": {"type": "number", "title": "Скорость движения воздуха (м/с)", "default": 0.2},
-                    "air_density": {"type": "number", "title": "Плотность воздуха (кг/м³)", "default": 1.2},
-                    "specific_heat": {"type": "number", "title": "Удельная теплоемкость воздуха (Дж/(кг·К))", "default": 1005},
-                    "ventilation_type": {"type": "string", "title": "Тип вентиляции", "enum": ["natural", "mechanical", "mixed"], "default": "mechanical"},
-                    "heat_recovery_efficiency": {"type": "number", "title": "КПД рекуперации тепла (0-1)", "default": 0},
-                    "fan_efficiency": {"type": "number", "title": "КПД вентилятора (0-1)", "default": 0.7},
-                    "smoke_ventilation_required": {"type": "boolean", "title": "Требуется ли противодымная вентиляция", "default": False},
-                    "evacuation_route": {"type": "boolean", "title": "Является ли помещение эвакуационным путем", "default": False},
-                    "fire_compartment_area": {"type": "number", "title": "Площадь пожарного отсека (м²)"},
-                    "noise_level_limit": {"type": "number", "title": "Предельный уровень шума (дБА)", "default": 40},
-                    "energy_efficiency_class": {"type": "string", "title": "Класс энергоэффективности", "enum": ["A", "B", "C", "D", "E"], "default": "B"},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 60.13330.2016"}
-                },
-                "required": ["room_volume", "room_area", "room_height", "room_type"]
-            },
-            "degasification": {
-                "type": "object",
-                "properties": {
-                    "mine_depth": {"type": "number", "title": "Глубина шахты (м)"},
-                    "mine_area": {"type": "number", "title": "Площадь шахты (м²)"},
-                    "coal_seam_thickness": {"type": "number", "title": "Мощность угольного пласта (м)"},
-                    "methane_content": {"type": "number", "title": "Содержание метана в угле (%)"},
-                    "extraction_rate": {"type": "number", "title": "Скорость отработки (м/сут)"},
-                    "methane_emission_rate": {"type": "number", "title": "Интенсивность выделения метана (м³/т)"},
-                    "ventilation_air_flow": {"type": "number", "title": "Расход вентиляционного воздуха (м³/с)"},
-                    "methane_concentration_limit": {"type": "number", "title": "Предельная концентрация метана (%)", "default": 1.0},
-                    "safety_factor": {"type": "number", "title": "Коэффициент безопасности", "default": 2.0},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "ГОСТ Р 55154-2012"},
-                    "safety_requirements": {"type": "string", "title": "Правила безопасности", "default": "ПБ 05-618-03"}
-                },
-                "required": ["mine_depth", "mine_area", "coal_seam_thickness", "methane_content", 
-                           "extraction_rate", "methane_emission_rate", "ventilation_air_flow"]
-            },
-            "electrical": {
-                "type": "object",
-                "properties": {
-                    "building_type": {"type": "string", "title": "Тип здания", "enum": ["жилое", "общественное"]},
-                    "total_area": {"type": "number", "title": "Общая площадь здания (м²)"},
-                    "number_of_floors": {"type": "integer", "title": "Количество этажей"},
-                    "number_of_apartments": {"type": "integer", "title": "Количество квартир", "default": 0},
-                    "lighting_load": {"type": "number", "title": "Нагрузка освещения (Вт/м²)"},
-                    "power_load": {"type": "number", "title": "Силовая нагрузка (Вт/м²)"},
-                    "heating_load": {"type": "number", "title": "Нагрузка отопления (Вт/м²)", "default": 0},
-                    "ventilation_load": {"type": "number", "title": "Нагрузка вентиляции (Вт/м²)", "default": 0},
-                    "demand_factor": {"type": "number", "title": "Коэффициент спроса", "default": 0.7},
-                    "diversity_factor": {"type": "number", "title": "Коэффициент разновременности", "default": 0.8},
-                    "power_factor": {"type": "number", "title": "Коэффициент мощности", "default": 0.9},
-                    "load_current": {"type": "number", "title": "Расчетный ток нагрузки (А)"},
-                    "voltage": {"type": "number", "title": "Номинальное напряжение (В)", "default": 380},
-                    "power": {"type": "number", "title": "Мощность нагрузки (кВт)"},
-                    "cable_length": {"type": "number", "title": "Длина кабеля (м)"},
-                    "soil_resistivity": {"type": "number", "title": "Удельное сопротивление грунта (Ом·м)"},
-                    "building_height": {"type": "number", "title": "Высота здания (м)"},
-                    "building_length": {"type": "number", "title": "Длина здания (м)"},
-                    "building_width": {"type": "number", "title": "Ширина здания (м)"},
-                    "annual_electricity_consumption": {"type": "number", "title": "Годовое потребление электроэнергии (кВт·ч)"},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 31.110-2003"}
-                },
-                "required": ["building_type", "total_area", "number_of_floors", "lighting_load", "power_load"]
-            },
-            "water_supply": {
-                "type": "object",
-                "properties": {
-                    "building_type": {"type": "string", "title": "Тип здания", "enum": ["жилое", "общественное", "производственное"]},
-                    "building_area": {"type": "number", "title": "Площадь здания (м²)"},
-                    "number_of_floors": {"type": "integer", "title": "Количество этажей"},
-                    "number_of_apartments": {"type": "integer", "title": "Количество квартир", "default": 0},
-                    "number_of_people": {"type": "integer", "title": "Количество людей"},
-                    "water_consumption_per_person": {"type": "number", "title": "Норма водопотребления на человека (л/сут)", "default": 200},
-                    "hot_water_consumption_per_person": {"type": "number", "title": "Норма горячей воды на человека (л/сут)", "default": 100},
-                    "cold_water_consumption_per_person": {"type": "number", "title": "Норма холодной воды на человека (л/сут)", "default": 100},
-                    "consumption_coefficient": {"type": "number", "title": "Коэффициент неравномерности потребления", "default": 1.2},
-                    "simultaneity_coefficient": {"type": "number", "title": "Коэффициент одновременности", "default": 0.3},
-                    "peak_coefficient": {"type": "number", "title": "Коэффициент пикового потребления", "default": 2.5},
-                    "water_pressure": {"type": "number", "title": "Требуемое давление воды (МПа)", "default": 0.3},
-                    "pipe_diameter": {"type": "number", "title": "Диаметр трубопровода (м)", "default": 0.05},
-                    "pipe_length": {"type": "number", "title": "Длина трубопровода (м)", "default": 100},
-                    "pipe_material": {"type": "string", "title": "Материал трубопровода", "default": "сталь"},
-                    "sewage_flow_rate": {"type": "number", "title": "Расход сточных вод (л/с)", "default": 0.8},
-                    "sewage_concentration": {"type": "number", "title": "Концентрация загрязнений (мг/л)", "default": 500},
-                    "treatment_efficiency": {"type": "number", "title": "Эффективность очистки", "default": 0.95},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 30.13330.2016"}
-                },
-                "required": ["building_type", "building_area", "number_of_floors", "number_of_people"]
-            },
-            "fire_safety": {
-                "type": "object",
-                "properties": {
-                    "building_type": {"type": "string", "title": "Тип здания", "enum": ["жилое", "общественное", "производственное"]},
-                    "building_area": {"type": "number", "title": "Площадь здания (м²)"},
-                    "building_volume": {"type": "number", "title": "Объем здания (м³)"},
-                    "number_of_floors": {"type": "integer", "title": "Количество этажей"},
-                    "building_height": {"type": "number", "title": "Высота здания (м)"},
-                    "fire_resistance_rating": {"type": "string", "title": "Степень огнестойкости", "enum": ["I", "II", "III", "IV", "V"], "default": "II"},
-                    "fire_compartment_area": {"type": "number", "title": "Площадь пожарного отсека (м²)", "default": 1000},
-                    "evacuation_time": {"type": "number", "title": "Время эвакуации (с)", "default": 300},
-                    "evacuation_capacity": {"type": "integer", "title": "Вместимость эвакуационных путей (чел)", "default": 100},
-                    "sprinkler_density": {"type": "number", "title": "Плотность орошения спринклерами (л/(с·м²))", "default": 0.12},
-                    "fire_hydrant_flow": {"type": "number", "title": "Расход пожарного гидранта (л/с)", "default": 2.5},
-                    "fire_extinguisher_count": {"type": "integer", "title": "Количество огнетушителей", "default": 10},
-                    "smoke_detector_count": {"type": "integer", "title": "Количество дымовых извещателей", "default": 50},
-                    "evacuation_route_width": {"type": "number", "title": "Ширина эвакуационного пути (м)", "default": 1.2},
-                    "evacuation_route_length": {"type": "number", "title": "Длина эвакуационного пути (м)", "default": 50},
-                    "emergency_exit_count": {"type": "integer", "title": "Количество аварийных выходов", "default": 4},
-                    "fire_load_density": {"type": "number", "title": "Плотность пожарной нагрузки (МДж/м²)", "default": 50},
-                    "smoke_generation_rate": {"type": "number", "title": "Скорость образования дыма (кг/с)", "default": 0.1},
-                    "heat_release_rate": {"type": "number", "title": "Скорость тепловыделения (кВт)", "default": 1000},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "123-ФЗ"}
-                },
-                "required": ["building_type", "building_area", "building_volume", "number_of_floors", "building_height"]
-            },
-            "acoustic": {
-                "type": "object",
-                "properties": {
-                    "room_type": {"type": "string", "title": "Тип помещения", "enum": ["жилое", "общественное", "производственное"]},
-                    "room_area": {"type": "number", "title": "Площадь помещения (м²)"},
-                    "room_volume": {"type": "number", "title": "Объем помещения (м³)"},
-                    "room_height": {"type": "number", "title": "Высота помещения (м)"},
-                    "noise_level_limit": {"type": "number", "title": "Предельный уровень шума (дБА)", "default": 40},
-                    "background_noise_level": {"type": "number", "title": "Уровень фонового шума (дБА)", "default": 35},
-                    "noise_source_power": {"type": "number", "title": "Мощность источника шума (дБ)", "default": 80},
-                    "noise_source_distance": {"type": "number", "title": "Расстояние до источника шума (м)", "default": 5},
-                    "wall_thickness": {"type": "number", "title": "Толщина стены (м)", "default": 0.2},
-                    "wall_material": {"type": "string", "title": "Материал стены", "default": "бетон"},
-                    "wall_sound_insulation": {"type": "number", "title": "Звукоизоляция стены (дБ)", "default": 50},
-                    "floor_sound_insulation": {"type": "number", "title": "Звукоизоляция пола (дБ)", "default": 55},
-                    "ceiling_sound_insulation": {"type": "number", "title": "Звукоизоляция потолка (дБ)", "default": 60},
-                    "sound_absorption_coefficient": {"type": "number", "title": "Коэффициент звукопоглощения", "default": 0.3},
-                    "reverberation_time": {"type": "number", "title": "Время реверберации (с)", "default": 0.8},
-                    "acoustic_treatment_area": {"type": "number", "title": "Площадь акустической обработки (м²)", "default": 0},
-                    "vibration_level": {"type": "number", "title": "Уровень вибрации (дБ)", "default": 70},
-                    "vibration_frequency": {"type": "number", "title": "Частота вибрации (Гц)", "default": 50},
-                    "vibration_insulation": {"type": "number", "title": "Виброизоляция (дБ)", "default": 20},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 51.13330.2011"}
-                },
-                "required": ["room_type", "room_area", "room_volume", "room_height"]
-            },
-            "lighting": {
-                "type": "object",
-                "properties": {
-                    "room_type": {"type": "string", "title": "Тип помещения", "enum": ["жилое", "общественное", "производственное"]},
-                    "room_area": {"type": "number", "title": "Площадь помещения (м²)"},
-                    "room_height": {"type": "number", "title": "Высота помещения (м)"},
-                    "room_length": {"type": "number", "title": "Длина помещения (м)"},
-                    "room_width": {"type": "number", "title": "Ширина помещения (м)"},
-                    "required_illuminance": {"type": "number", "title": "Нормативная освещенность (лк)", "default": 300},
-                    "lighting_type": {"type": "string", "title": "Тип освещения", "enum": ["естественное", "искусственное", "комбинированное"], "default": "искусственное"},
-                    "light_source_type": {"type": "string", "title": "Тип источника света", "enum": ["LED", "люминесцентные", "накаливания"], "default": "LED"},
-                    "light_source_power": {"type": "number", "title": "Мощность источника света (Вт)", "default": 20},
-                    "light_source_efficiency": {"type": "number", "title": "Световая отдача (лм/Вт)", "default": 100},
-                    "window_area": {"type": "number", "title": "Площадь окон (м²)", "default": 0},
-                    "window_height": {"type": "number", "title": "Высота окон (м)", "default": 1.5},
-                    "window_width": {"type": "number", "title": "Ширина окон (м)", "default": 1.2},
-                    "window_count": {"type": "integer", "title": "Количество окон", "default": 0},
-                    "window_orientation": {"type": "string", "title": "Ориентация окон", "enum": ["север", "юг", "восток", "запад"], "default": "юг"},
-                    "shading_factor": {"type": "number", "title": "Коэффициент затенения", "default": 0.8},
-                    "insolation_duration": {"type": "number", "title": "Продолжительность инсоляции (ч)", "default": 3},
-                    "insolation_angle": {"type": "number", "title": "Угол инсоляции (градусы)", "default": 30},
-                    "building_spacing": {"type": "number", "title": "Расстояние между зданиями (м)", "default": 20},
-                    "building_height_adjacent": {"type": "number", "title": "Высота соседнего здания (м)", "default": 15},
-                    "luminaire_count": {"type": "integer", "title": "Количество светильников", "default": 0},
-                    "luminaire_efficiency": {"type": "number", "title": "КПД светильника", "default": 0.8},
-                    "luminaire_height": {"type": "number", "title": "Высота подвеса светильников (м)", "default": 2.5},
-                    "luminaire_spacing": {"type": "number", "title": "Шаг светильников (м)", "default": 3},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 52.13330.2016"}
-                },
-                "required": ["room_type", "room_area", "room_height", "room_length", "room_width"]
-            },
-            "geological": {
-                "type": "object",
-                "properties": {
-                    "site_area": {"type": "number", "title": "Площадь участка (м²)"},
-                    "site_length": {"type": "number", "title": "Длина участка (м)"},
-                    "site_width": {"type": "number", "title": "Ширина участка (м)"},
-                    "groundwater_level": {"type": "number", "title": "Уровень грунтовых вод (м)", "default": 2},
-                    "soil_type": {"type": "string", "title": "Тип грунта", "enum": ["глина", "песок", "суглинок", "супесь"]},
-                    "soil_density": {"type": "number", "title": "Плотность грунта (кг/м³)", "default": 1800},
-                    "soil_moisture": {"type": "number", "title": "Влажность грунта (%)", "default": 15},
-                    "soil_plasticity_index": {"type": "number", "title": "Показатель пластичности", "default": 10},
-                    "soil_consistency": {"type": "string", "title": "Консистенция грунта", "enum": ["твердая", "полутвердая", "мягкопластичная"], "default": "твердая"},
-                    "compression_modulus": {"type": "number", "title": "Модуль деформации (МПа)", "default": 10},
-                    "angle_of_internal_friction": {"type": "number", "title": "Угол внутреннего трения (градусы)", "default": 25},
-                    "cohesion": {"type": "number", "title": "Сцепление (кПа)", "default": 20},
-                    "bearing_capacity": {"type": "number", "title": "Несущая способность (кПа)", "default": 200},
-                    "foundation_type": {"type": "string", "title": "Тип фундамента", "enum": ["ленточный", "плитный", "свайный"], "default": "ленточный"},
-                    "foundation_width": {"type": "number", "title": "Ширина фундамента (м)", "default": 0.6},
-                    "foundation_depth": {"type": "number", "title": "Глубина заложения фундамента (м)", "default": 1.5},
-                    "foundation_length": {"type": "number", "title": "Длина фундамента (м)", "default": 20},
-                    "building_weight": {"type": "number", "title": "Вес здания (кН)", "default": 1000},
-                    "live_load": {"type": "number", "title": "Полезная нагрузка (кН/м²)", "default": 200},
-                    "snow_load": {"type": "number", "title": "Снеговая нагрузка (кН/м²)", "default": 100},
-                    "wind_load": {"type": "number", "title": "Ветровая нагрузка (кН/м²)", "default": 50},
-                    "seismic_intensity": {"type": "integer", "title": "Сейсмическая интенсивность (баллы)", "default": 6},
-                    "seismic_coefficient": {"type": "number", "title": "Сейсмический коэффициент", "default": 0.1},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 22.13330.2016"}
-                },
-                "required": ["site_area", "site_length", "site_width", "soil_type"]
-            },
-            "uav_protection": {
-                "type": "object",
-                "properties": {
-                    "calculation_subtype": {"type": "string", "title": "Тип расчета", "enum": ["shock_wave", "impact_penetration"]},
-                    "uav_mass": {"type": "number", "title": "Масса БПЛА (кг)"},
-                    "distance": {"type": "number", "title": "Расстояние до объекта (м)"},
-                    "explosive_type": {"type": "string", "title": "Тип взрывчатого вещества", "enum": ["TNT", "RDX", "PETN", "HMX"]},
-                    "explosion_height": {"type": "number", "title": "Высота взрыва (м)"},
-                    "structure_material": {"type": "string", "title": "Материал конструкции", "enum": ["concrete", "steel", "brick", "wood"]},
-                    "structure_thickness": {"type": "number", "title": "Толщина конструкции (мм)"},
-                    "uav_velocity": {"type": "number", "title": "Скорость БПЛА (м/с)"},
-                    "uav_material": {"type": "string", "title": "Материал БПЛА", "enum": ["aluminum", "carbon_fiber", "steel", "plastic"]},
-                    "structure_strength": {"type": "number", "title": "Прочность материала (МПа)"},
-                    "impact_angle": {"type": "number", "title": "Угол удара (град)", "default": 90},
-                    "normative_document": {"type": "string", "title": "Нормативный документ", "default": "СП 542.1325800.2024"}
-                },
-                "required": ["calculation_subtype", "uav_mass", "structure_material", "structure_thickness"]
-            }
-        }
-        return schemas.get(calculation_type, {})
-    
     def _get_category_name(self, category: str) -> str:
         """Получение названия категории"""
         names = {
@@ -537,86 +159,50 @@ class CalculationEngine:
         return descriptions.get(category, f"Расчеты категории {category}")
     
     def execute_calculation(self, calculation_id: int, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Выполнение расчета"""
+        """Выполнение расчета.
+        
+        Чтение расчета и запись результата выполняются в одной транзакции
+        (строка блокируется на время расчета); отдельная запись нужна
+        только для статуса "failed" после отката.
+        """
         start_time = time.time()
         
         try:
-            # Получение расчета из базы данных
-            calculation = db_manager.get_calculation(calculation_id)
-            if not calculation:
-                raise ValueError(f"Calculation {calculation_id} not found")
-            
-            logger.info(f"🔍 [DEBUG] Calculation object: {calculation}")
-            logger.info(f"🔍 [DEBUG] Calculation type: {calculation.type}, ID: {calculation_id}")
-            logger.info(f"🔍 [DEBUG] Calculation type class: {type(calculation.type)}")
-            logger.info(f"🔍 [DEBUG] Calculation type value: '{calculation.type}', length: {len(str(calculation.type))}")
-            
-            # Обновление статуса на "выполняется"
-            db_manager.update_calculation_results(calculation_id, {}, "running")
-            
-            # Выполнение расчета в зависимости от типа
-            if calculation.type == "structural":
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "dynamic":
-                # Динамический расчет - это подтип структурного расчета
-                parameters['calculation_type'] = 'dynamic'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "strength":
-                # Расчет на прочность - это подтип структурного расчета
-                parameters['calculation_type'] = 'strength'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "stability":
-                # Расчет на устойчивость - это подтип структурного расчета
-                parameters['calculation_type'] = 'stability'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "stiffness":
-                # Расчет на жесткость - это подтип структурного расчета
-                parameters['calculation_type'] = 'stiffness'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "cracking":
-                # Расчет на трещиностойкость - это подтип структурного расчета
-                parameters['calculation_type'] = 'cracking'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation.type == "foundation":
-                results = self._execute_foundation_calculation(parameters)
-            elif calculation.type == "thermal":
-                results = self._execute_thermal_calculation(parameters)
-            elif calculation.type == "ventilation":
-                results = self._execute_ventilation_calculation(parameters)
-            elif calculation.type == "degasification":
-                # Преобразование параметров в модель
-                degas_params = DegasificationCalculationParams(**parameters)
-                results = self._execute_degasification_calculation(degas_params)
-            elif calculation.type == "electrical":
-                results = self._execute_electrical_calculation(parameters)
-            elif calculation.type == "water_supply":
-                results = self._execute_water_supply_calculation(parameters)
-            elif calculation.type == "fire_safety":
-                results = self._execute_fire_safety_calculation(parameters)
-            elif calculation.type == "acoustic":
-                results = self._execute_acoustic_calculation(parameters)
-            elif calculation.type == "lighting":
-                results = self._execute_lighting_calculation(parameters)
-            elif calculation.type == "geological":
-                results = self._execute_geological_calculation(parameters)
-            elif calculation.type == "uav_protection":
-                results = self._execute_uav_protection_calculation(parameters)
-            else:
-                raise ValueError(f"Unknown calculation type: {calculation.type}")
-            
-            # Добавление метаданных
-            execution_time = time.time() - start_time
-            results.update({
-                "execution_time": execution_time,
-                "calculation_id": calculation_id,
-                "timestamp": datetime.now().isoformat(),
-                "status": "completed"
-            })
-            
-            # Сохранение результатов
-            db_manager.update_calculation_results(calculation_id, results, "completed")
+            with db_manager.transaction() as cursor:
+                # Получение расчета из базы данных
+                calculation = db_manager.get_calculation(calculation_id, cursor=cursor, for_update=True)
+                if not calculation:
+                    raise ValueError(f"Calculation {calculation_id} not found")
+                
+                logger.info(f"🔍 [DEBUG] Calculation type: {calculation.type}, ID: {calculation_id}")
+                
+                parameters_hash = calculate_parameters_hash(calculation.type, parameters)
+                stored = calculation.result or {}
+                if (calculation.status == "completed"
+                        and stored.get("parameters_hash") == parameters_hash
+                        and stored.get("engine_version") == self.result_cache.engine_version):
+                    # Результат для этих параметров уже сохранен в расчете - не пересчитываем и не перезаписываем
+                    logger.info(f"⚡ Calculation {calculation_id} already has results for these parameters")
+                    return {**stored, "cache_hit": True}
+                
+                results, cache_hit = self._compute_cached(calculation.type, parameters, parameters_hash, cursor=cursor)
+                
+                # Добавление метаданных
+                execution_time = time.time() - start_time
+                results.update({
+                    "execution_time": execution_time,
+                    "calculation_id": calculation_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "status": "completed",
+                    "cache_hit": cache_hit,
+                    "parameters_hash": parameters_hash,
+                    "engine_version": self.result_cache.engine_version
+                })
+                
+                # Сохранение результатов в той же транзакции
+                db_manager.update_calculation_results(calculation_id, results, "completed", cursor=cursor)
             
-            logger.info(f"✅ Calculation {calculation_id} completed in {execution_time:.2f}s")
+            logger.info(f"✅ Calculation {calculation_id} completed in {execution_time:.2f}s (cache hit: {cache_hit})")
             return results
             
         except Exception as e:
@@ -629,10 +215,40 @@ class CalculationEngine:
                 "status": "failed"
             }
             
-            db_manager.update_calculation_results(calculation_id, error_results, "failed")
+            try:
+                db_manager.update_calculation_results(calculation_id, error_results, "failed")
+            except Exception as status_error:
+                logger.error(f"❌ Failed to store failed status for calculation {calculation_id}: {status_error}")
             logger.error(f"❌ Calculation {calculation_id} failed: {e}")
             raise
     
+    def _compute_cached(self, calculation_type: str, parameters: Dict[str, Any],
+                        parameters_hash: str, cursor=None) -> Tuple[Dict[str, Any], bool]:
+        """Получение результата из кеша или выполнение расчета; возвращает (результат, попадание в кеш)"""
+        cached = self.result_cache.get(calculation_type, parameters_hash, cursor=cursor)
+        if cached is not None:
+            return cached, True
+        
+        # Копия: подтипы структурных расчетов дописывают calculation_type в параметры
+        results = self._dispatch_calculation(calculation_type, dict(parameters))
+        self.result_cache.put(calculation_type, parameters_hash, results, cursor=cursor)
+        return results, False
+    
+    def _dispatch_calculation(self, calculation_type: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнение расчета указанного типа через реестр"""
+        plugin = self.registry.get(calculation_type)
+        if plugin is None:
+            raise ValueError(f"Unknown calculation type: {calculation_type}")
+        
+        if plugin.subtype:
+            # Подтип структурного расчета передается в параметрах
+            parameters['calculation_type'] = plugin.subtype
+        
+        handler = getattr(self, plugin.handler)
+        if plugin.pass_model:
+            return handler(plugin.params_model(**parameters))
+        return handler(parameters)
+    
     def execute_calculation_by_type(self, calculation_type: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение расчета по типу (для совместимости с фронтендом)"""
         start_time = time.time()
@@ -640,56 +256,8 @@ class CalculationEngine:
         logger.info(f"🔍 [DEBUG] execute_calculation_by_type called with type: '{calculation_type}', class: {type(calculation_type)}")
         
         try:
-            # Выполнение расчета в зависимости от типа
-            if calculation_type == "structural":
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "dynamic":
-                # Динамический расчет - это подтип структурного расчета
-                # Устанавливаем тип расчета в параметрах
-                parameters['calculation_type'] = 'dynamic'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "strength":
-                # Расчет на прочность - это подтип структурного расчета
-                parameters['calculation_type'] = 'strength'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "stability":
-                # Расчет на устойчивость - это подтип структурного расчета
-                parameters['calculation_type'] = 'stability'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "stiffness":
-                # Расчет на жесткость - это подтип структурного расчета
-                parameters['calculation_type'] = 'stiffness'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "cracking":
-                # Расчет на трещиностойкость - это подтип структурного расчета
-                parameters['calculation_type'] = 'cracking'
-                results = self._execute_structural_calculation(parameters)
-            elif calculation_type == "foundation":
-                results = self._execute_foundation_calculation(parameters)
-            elif calculation_type == "thermal":
-                results = self._execute_thermal_calculation(parameters)
-            elif calculation_type == "ventilation":
-                results = self._execute_ventilation_calculation(parameters)
-            elif calculation_type == "degasification":
-                # Преобразование параметров в модель
-                degas_params = DegasificationCalculationParams(**parameters)
-                results = self._execute_degasification_calculation(degas_params)
-            elif calculation_type == "electrical":
-                results = self._execute_electrical_calculation(parameters)
-            elif calculation_type == "water_supply":
-                results = self._execute_water_supply_calculation(parameters)
-            elif calculation_type == "fire_safety":
-                results = self._execute_fire_safety_calculation(parameters)
-            elif calculation_type == "acoustic":
-                results = self._execute_acoustic_calculation(parameters)
-            elif calculation_type == "lighting":
-                results = self._execute_lighting_calculation(parameters)
-            elif calculation_type == "geological":
-                results = self._execute_geological_calculation(parameters)
-            elif calculation_type == "uav_protection":
-                results = self._execute_uav_protection_calculation(parameters)
-            else:
-                raise ValueError(f"Unknown calculation type: {calculation_type}")
+            parameters_hash = calculate_parameters_hash(calculation_type, parameters)
+            results, cache_hit = self._compute_cached(calculation_type, parameters, parameters_hash)
             
             # Добавление метаданных
             execution_time = time.time() - start_time
@@ -697,10 +265,13 @@ class CalculationEngine:
                 "execution_time": execution_time,
                 "calculation_type": calculation_type,
                 "timestamp": datetime.now().isoformat(),
-                "status": "completed"
+                "status": "completed",
+                "cache_hit": cache_hit,
+                "parameters_hash": parameters_hash,
+                "engine_version": self.result_cache.engine_version
             })
             
-            logger.info(f"✅ Calculation type {calculation_type} completed in {execution_time:.2f}s")
+            logger.info(f"✅ Calculation type {calculation_type} completed in {execution_time:.2f}s (cache hit: {cache_hit})")
             return results
             
         except Exception as e:
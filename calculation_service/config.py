@@ -10,6 +10,10 @@ DATABASE_URL: str = os.getenv(
     f'postgresql://{os.getenv("POSTGRES_USER", "norms_user")}:{os.getenv("POSTGRES_PASSWORD", "norms_password")}@{os.getenv("POSTGRES_HOST", "localhost")}:{os.getenv("POSTGRES_PORT", "5432")}/{os.getenv("POSTGRES_DB", "norms_db")}'
 )
 
+# Пул соединений с БД (на процесс)
+DB_POOL_MIN_CONNECTIONS: int = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '1'))
+DB_POOL_MAX_CONNECTIONS: int = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '10'))
+
 # Настройки JWT
 JWT_SECRET_KEY: str = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 JWT_ALGORITHM: str = "HS256"
@@ -41,6 +45,34 @@ LOG_FILE: str = 'calculation_service.log'
 MAX_CALCULATION_RESULTS: int = 1000
 CALCULATION_TIMEOUT: int = 300  # 5 минут
 
+# Кеш результатов расчетов. Версию движка нужно увеличивать при изменении
+# формул или нормативных таблиц - записи других версий не используются
+CALCULATION_ENGINE_VERSION: str = os.getenv('CALCULATION_ENGINE_VERSION', '1')
+CALCULATION_CACHE_MAX_ENTRIES: int = int(os.getenv('CALCULATION_CACHE_MAX_ENTRIES', '1024'))
+CALCULATION_CACHE_MAX_ROWS: int = int(os.getenv('CALCULATION_CACHE_MAX_ROWS', '50000'))
+CALCULATION_CACHE_TTL_DAYS: int = int(os.getenv('CALCULATION_CACHE_TTL_DAYS', '90'))
+
+# Настройки параметрических расчетов (серий вариантов)
+SWEEP_MAX_VARIANTS: int = int(os.getenv('SWEEP_MAX_VARIANTS', '100000'))
+SWEEP_SCALAR_MAX_VARIANTS: int = int(os.getenv('SWEEP_SCALAR_MAX_VARIANTS', '500'))
+
+# Очередь фоновых расчетов (таблица calculation_jobs)
+CALCULATION_JOB_WORKERS: int = int(os.getenv('CALCULATION_JOB_WORKERS', '4'))
+# Процесс сервиса раз в CALCULATION_JOB_HEARTBEAT_SECONDS отмечает свои задания живыми и завершает ошибкой
+# задания в статусе queued/running без отметки дольше CALCULATION_JOB_STALE_SECONDS (процесс, который их вел, упал)
+CALCULATION_JOB_HEARTBEAT_SECONDS: float = float(os.getenv('CALCULATION_JOB_HEARTBEAT_SECONDS', '30'))
+CALCULATION_JOB_STALE_SECONDS: int = int(os.getenv('CALCULATION_JOB_STALE_SECONDS', '180'))
+CALCULATION_JOB_EVENTS_POLL_INTERVAL: float = float(os.getenv('CALCULATION_JOB_EVENTS_POLL_INTERVAL', '0.5'))
+# Серии в фоновых заданиях делятся на части по процессам
+SWEEP_JOB_PROCESSES: int = int(os.getenv('SWEEP_JOB_PROCESSES', str(os.cpu_count() or 1)))
+SWEEP_JOB_MIN_CHUNK_VARIANTS: int = int(os.getenv('SWEEP_JOB_MIN_CHUNK_VARIANTS', '10000'))
+
+# Пакетный экспорт расчетов в DOCX
+DOCX_EXPORT_MAX_CALCULATIONS: int = int(os.getenv('DOCX_EXPORT_MAX_CALCULATIONS', '1000'))
+DOCX_EXPORT_PROCESSES: int = int(os.getenv('DOCX_EXPORT_PROCESSES', str(os.cpu_count() or 1)))
+# Меньшие выгрузки строятся в текущем процессе
+DOCX_EXPORT_PARALLEL_THRESHOLD: int = int(os.getenv('DOCX_EXPORT_PARALLEL_THRESHOLD', '20'))
+
 # Настройки файлов
 MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
 ALLOWED_FILE_TYPES: list = ['.docx', '.pdf', '.txt']
@@ -1,25 +1,49 @@
 """
 Модуль для работы с базой данных
 """
+import base64
 import logging
 import json
+import threading
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from config import DATABASE_URL
+from config import DATABASE_URL, DB_POOL_MIN_CONNECTIONS, DB_POOL_MAX_CONNECTIONS
 from models import CalculationCreate, CalculationResponse, CalculationUpdate
 
 logger = logging.getLogger(__name__)
 
 
+def encode_page_cursor(created_at: datetime, calculation_id: int) -> str:
+    """Кодирование позиции последней записи страницы в курсор"""
+    raw = f"{created_at.isoformat()}|{calculation_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_page_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Декодирование курсора страницы в (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, calculation_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(calculation_id)
+    except Exception:
+        raise ValueError(f"Invalid page cursor: {cursor}")
+
+
 class DatabaseManager:
     """Менеджер для работы с базой данных"""
     
     def __init__(self):
         self.database_url = DATABASE_URL
+        self.max_connections = DB_POOL_MAX_CONNECTIONS
+        # Пул соединений на процесс; семафор ждет свободное соединение вместо PoolError
+        self._pool = ThreadedConnectionPool(DB_POOL_MIN_CONNECTIONS, DB_POOL_MAX_CONNECTIONS, self.database_url)
+        self._pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS)
+        logger.info(f"✅ Database connection pool initialized ({DB_POOL_MIN_CONNECTIONS}-{DB_POOL_MAX_CONNECTIONS})")
         self._init_database()
     
     def _init_database(self):
@@ -72,6 +96,72 @@ class DatabaseManager:
                         ON calculations(user_id)
                     """)
                     
+                    # Колонка результата, в которую пишет update_calculation_results
+                    cursor.execute("""
+                        ALTER TABLE calculations 
+                        ADD COLUMN IF NOT EXISTS result JSONB
+                    """)
+                    
+                    # Индекс для постраничного вывода по ключу (created_at, id)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_calculations_user_created 
+                        ON calculations(user_id, created_at DESC, id DESC)
+                    """)
+                    
+                    # Кеш результатов расчетов (тип, хеш параметров, версия движка)
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS calculation_result_cache (
+                            id SERIAL PRIMARY KEY,
+                            calculation_type VARCHAR(100) NOT NULL,
+                            parameters_hash VARCHAR(64) NOT NULL,
+                            engine_version VARCHAR(50) NOT NULL,
+                            results JSONB NOT NULL,
+                            hit_count INTEGER DEFAULT 0,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            UNIQUE (calculation_type, parameters_hash, engine_version)
+                        )
+                    """)
+                    
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_calculation_result_cache_accessed 
+                        ON calculation_result_cache(last_accessed_at)
+                    """)
+                    
+                    # Фоновые задания расчетов
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS calculation_jobs (
+                            id VARCHAR(36) PRIMARY KEY,
+                            kind VARCHAR(20) NOT NULL,
+                            calculation_type VARCHAR(100) NOT NULL,
+                            parameters JSONB NOT NULL,
+                            parameters_hash VARCHAR(64) NOT NULL,
+                            engine_version VARCHAR(50) NOT NULL,
+                            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                            progress REAL NOT NULL DEFAULT 0,
+                            message TEXT,
+                            results JSONB,
+                            error TEXT,
+                            user_id INTEGER,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            started_at TIMESTAMP,
+                            finished_at TIMESTAMP,
+                            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    
+                    # Одно незавершившееся ошибкой задание на набор параметров
+                    cursor.execute("""
+                        CREATE UNIQUE INDEX IF NOT EXISTS idx_calculation_jobs_dedup 
+                        ON calculation_jobs(kind, calculation_type, parameters_hash, engine_version)
+                        WHERE status <> 'failed'
+                    """)
+                    
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS idx_calculation_jobs_status 
+                        ON calculation_jobs(status, updated_at)
+                    """)
+                    
                     conn.commit()
                     logger.info("✅ Database initialized successfully")
                     
@@ -81,19 +171,34 @@ class DatabaseManager:
     
     @contextmanager
     def get_connection(self):
-        """Контекстный менеджер для получения соединения с БД"""
+        """Контекстный менеджер для получения соединения из пула"""
+        self._pool_slots.acquire()
         conn = None
+        broken = False
         try:
-            conn = psycopg2.connect(self.database_url)
+            conn = self._pool.getconn()
             yield conn
         except Exception as e:
             if conn:
-                conn.rollback()
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                broken = True
             logger.error(f"❌ Database connection error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                if not broken and not conn.closed:
+                    try:
+                        # Незавершенная транзакция не должна вернуться в пул
+                        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                            conn.rollback()
+                    except Exception:
+                        broken = True
+                self._pool.putconn(conn, close=broken or conn.closed)
+            self._pool_slots.release()
     
     @contextmanager
     def get_cursor(self):
@@ -102,6 +207,22 @@ class DatabaseManager:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 yield cursor
     
+    @contextmanager
+    def transaction(self):
+        """Курсор с одной транзакцией: фиксация при успехе, откат при ошибке"""
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                yield cursor
+            conn.commit()
+    
+    def close(self):
+        """Закрытие всех соединений пула"""
+        try:
+            self._pool.closeall()
+            logger.info("✅ Database connection pool closed")
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing database connection pool: {e}")
+    
     def create_calculation(self, calculation: CalculationCreate, user_id: Optional[int] = None) -> int:
         """Создание нового расчета"""
         try:
@@ -131,41 +252,51 @@ class DatabaseManager:
             logger.error(f"❌ Error creating calculation: {e}")
             raise
     
-    def get_calculation(self, calculation_id: int) -> Optional[CalculationResponse]:
-        """Получение расчета по ID"""
-        try:
-            with self.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM calculations WHERE id = %s
-                """, (calculation_id,))
-                
-                result = cursor.fetchone()
-                if result:
-                    logger.info(f"🔍 [DEBUG] Database result: {result}")
-                    # Преобразуем результат в словарь и обрабатываем NULL значения
-                    calc_dict = dict(result)
-                    if calc_dict.get('parameters') is None:
-                        calc_dict['parameters'] = {}
-                    if calc_dict.get('result') is None:
-                        calc_dict['result'] = None
-                    
-                    calculation = CalculationResponse(**calc_dict)
-                    logger.info(f"🔍 [DEBUG] CalculationResponse object: {calculation}")
-                    logger.info(f"🔍 [DEBUG] CalculationResponse type: {calculation.type}")
-                    return calculation
-                return None
-                
-        except Exception as e:
-            logger.error(f"❌ Error getting calculation {calculation_id}: {e}")
-            raise
+    def get_calculation(self, calculation_id: int, cursor=None,
+                        for_update: bool = False) -> Optional[CalculationResponse]:
+        """Получение расчета по ID (в переданной транзакции, если указан cursor)"""
+        if cursor is None:
+            try:
+                with self.get_cursor() as own_cursor:
+                    return self._fetch_calculation(own_cursor, calculation_id, for_update)
+            except Exception as e:
+                logger.error(f"❌ Error getting calculation {calculation_id}: {e}")
+                raise
+        return self._fetch_calculation(cursor, calculation_id, for_update)
+    
+    def _fetch_calculation(self, cursor, calculation_id: int, for_update: bool) -> Optional[CalculationResponse]:
+        query = "SELECT * FROM calculations WHERE id = %s"
+        if for_update:
+            query += " FOR UPDATE"
+        cursor.execute(query, (calculation_id,))
+        
+        result = cursor.fetchone()
+        if result:
+            logger.debug(f"🔍 [DEBUG] Database result: {result}")
+            return self._row_to_calculation(result)
+        return None
+    
+    @staticmethod
+    def _row_to_calculation(row) -> CalculationResponse:
+        """Преобразование строки в модель с обработкой NULL значений"""
+        calc_dict = dict(row)
+        if calc_dict.get('parameters') is None:
+            calc_dict['parameters'] = {}
+        if calc_dict.get('result') is None:
+            calc_dict['result'] = None
+        return CalculationResponse(**calc_dict)
     
     def get_calculations(self, user_id: Optional[int] = None, 
                         calculation_type: Optional[str] = None,
                         category: Optional[str] = None,
-                        limit: int = 100, offset: int = 0) -> List[CalculationResponse]:
-        """Получение списка расчетов"""
+                        limit: int = 100,
+                        cursor: Optional[str] = None) -> Tuple[List[CalculationResponse], Optional[str]]:
+        """Получение страницы расчетов (постранично по ключу created_at, id).
+        
+        Возвращает расчеты и курсор следующей страницы (None, если страница последняя).
+        """
         try:
-            with self.get_cursor() as cursor:
+            with self.get_cursor() as db_cursor:
                 query = "SELECT * FROM calculations WHERE 1=1"
                 params = []
                 
@@ -181,27 +312,44 @@ class DatabaseManager:
                     query += " AND category = %s"
                     params.append(category)
                 
-                query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
-                params.extend([limit, offset])
+                if cursor:
+                    last_created_at, last_id = decode_page_cursor(cursor)
+                    query += " AND (created_at, id) < (%s, %s)"
+                    params.extend([last_created_at, last_id])
                 
-                cursor.execute(query, params)
-                results = cursor.fetchall()
+                # Запрашиваем на одну запись больше, чтобы понять, есть ли следующая страница
+                query += " ORDER BY created_at DESC, id DESC LIMIT %s"
+                params.append(limit + 1)
+                
+                db_cursor.execute(query, params)
+                results = db_cursor.fetchall()
                 
-                calculations = []
-                for row in results:
-                    calc_dict = dict(row)
-                    if calc_dict.get('parameters') is None:
-                        calc_dict['parameters'] = {}
-                    if calc_dict.get('result') is None:
-                        calc_dict['result'] = None
-                    calculations.append(CalculationResponse(**calc_dict))
+                calculations = [self._row_to_calculation(row) for row in results[:limit]]
+                next_cursor = None
+                if len(results) > limit and calculations:
+                    last = calculations[-1]
+                    next_cursor = encode_page_cursor(last.created_at, last.id)
                 
-                return calculations
+                return calculations, next_cursor
                 
         except Exception as e:
             logger.error(f"❌ Error getting calculations: {e}")
             raise
     
+    def get_calculations_by_ids(self, calculation_ids: List[int]) -> List[CalculationResponse]:
+        """Получение расчетов одним запросом (в порядке переданных ID, отсутствующие пропускаются)"""
+        if not calculation_ids:
+            return []
+        try:
+            with self.get_cursor() as cursor:
+                cursor.execute("SELECT * FROM calculations WHERE id = ANY(%s)", (list(calculation_ids),))
+                rows = {row['id']: row for row in cursor.fetchall()}
+            return [self._row_to_calculation(rows[calculation_id])
+                    for calculation_id in dict.fromkeys(calculation_ids) if calculation_id in rows]
+        except Exception as e:
+            logger.error(f"❌ Error getting calculations by IDs: {e}")
+            raise
+    
     def update_calculation(self, calculation_id: int, 
                           calculation_update: CalculationUpdate) -> Optional[CalculationResponse]:
         """Обновление расчета"""
@@ -270,28 +418,33 @@ class DatabaseManager:
     
     def update_calculation_results(self, calculation_id: int, 
                                  results: Dict[str, Any], 
-                                 status: str = "completed") -> bool:
-        """Обновление результатов расчета"""
+                                 status: str = "completed",
+                                 cursor=None) -> bool:
+        """Обновление результатов расчета (в переданной транзакции, если указан cursor)"""
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute("""
-                    UPDATE calculations 
-                    SET result = %s, status = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (json.dumps(results), status, calculation_id))
-                
-                updated_count = cursor.rowcount
-                cursor.connection.commit()
-                
-                if updated_count > 0:
-                    logger.info(f"✅ Calculation {calculation_id} results updated")
-                    return True
-                return False
+            if cursor is None:
+                with self.transaction() as own_cursor:
+                    updated_count = self._write_results(own_cursor, calculation_id, results, status)
+            else:
+                updated_count = self._write_results(cursor, calculation_id, results, status)
+            
+            if updated_count > 0:
+                logger.info(f"✅ Calculation {calculation_id} results updated")
+                return True
+            return False
                 
         except Exception as e:
             logger.error(f"❌ Error updating calculation results {calculation_id}: {e}")
             raise
     
+    def _write_results(self, cursor, calculation_id: int, results: Dict[str, Any], status: str) -> int:
+        cursor.execute("""
+            UPDATE calculations 
+            SET result = %s, status = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """, (json.dumps(results), status, calculation_id))
+        return cursor.rowcount
+    
     def get_calculation_stats(self) -> Dict[str, Any]:
         """Получение статистики по расчетам"""
         try:
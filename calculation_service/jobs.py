@@ -0,0 +1,374 @@
+"""
+Модуль фоновых заданий расчетов
+"""
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from config import (
+    CALCULATION_JOB_WORKERS, CALCULATION_JOB_STALE_SECONDS, CALCULATION_JOB_HEARTBEAT_SECONDS,
+    SWEEP_JOB_PROCESSES, SWEEP_JOB_MIN_CHUNK_VARIANTS
+)
+from result_cache import calculate_parameters_hash
+from utils.process_pool import create_process_pool
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Сколько завершенных заданий держать в памяти для опроса и SSE без обращения к БД
+FINISHED_JOBS_IN_MEMORY = 256
+
+# Колонки calculation_jobs, обновляемые по ходу выполнения
+UPDATABLE_FIELDS = ("status", "progress", "message", "results", "error", "started_at", "finished_at")
+
+
+class CalculationJobManager:
+    """Очередь фоновых расчетов.
+
+    Задание записывается в таблицу calculation_jobs и выполняется пулом потоков
+    процесса, серии параметров делятся на части и считаются в пуле процессов.
+    Постановка идемпотентна: для того же вида задания, типа, хеша параметров и
+    версии движка возвращается существующее задание (кроме завершившихся ошибкой).
+    Состояние заданий этого процесса хранится в памяти, остальные читаются из таблицы.
+    Фоновый поток (start) отмечает задания процесса живыми и завершает ошибкой
+    задания, чей процесс перестал их отмечать, поэтому опрос и SSE всегда
+    доходят до завершающего статуса.
+    """
+
+    def __init__(self, calculation_engine, db_manager,
+                 workers: int = CALCULATION_JOB_WORKERS,
+                 sweep_processes: int = SWEEP_JOB_PROCESSES):
+        self.calculation_engine = calculation_engine
+        self.db_manager = db_manager
+        self.workers = max(1, workers)
+        self.sweep_processes = max(1, sweep_processes)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._sweep_engine = None
+        self._active: Dict[str, Dict[str, Any]] = {}
+        self._finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Завершение прерванных заданий и запуск потока отметок"""
+        try:
+            self.fail_stale_jobs()
+        except Exception as e:
+            logger.warning(f"⚠️ [JOBS] Failed to clean up interrupted jobs: {e}")
+        if self._heartbeat_thread is None:
+            self._stopped.clear()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop, name="calculation-job-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def get_sweep_engine(self):
+        """Движок параметрических расчетов (numpy загружается при первом обращении)"""
+        if self._sweep_engine is None:
+            from sweep import ParametricSweepEngine
+            self._sweep_engine = ParametricSweepEngine(self.calculation_engine)
+        return self._sweep_engine
+
+    def submit(self, calculation_type: str, parameters: Dict[str, Any],
+               user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Постановка расчета в очередь"""
+        if calculation_type not in self.calculation_engine.registry:
+            raise ValueError(f"Unknown calculation type: {calculation_type}")
+
+        parameters_hash = calculate_parameters_hash(calculation_type, parameters)
+        return self._submit(
+            "calculation", calculation_type, parameters, parameters_hash, user_id,
+            lambda job_id: self.calculation_engine.execute_calculation_by_type(calculation_type, dict(parameters))
+        )
+
+    def submit_sweep(self, calculation_type: str, parameters: Dict[str, Any],
+                     grid: Optional[Dict[str, List[float]]] = None,
+                     arrays: Optional[Dict[str, List[float]]] = None,
+                     user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Постановка серии расчетов в очередь.
+
+        Серия проверяется и делится на части сразу, поэтому ошибки параметров
+        серии возвращаются при постановке, а не в статусе задания.
+        """
+        if calculation_type not in self.calculation_engine.registry:
+            raise ValueError(f"Unknown calculation type: {calculation_type}")
+
+        chunks = self.get_sweep_engine().split(
+            calculation_type, parameters, grid, arrays,
+            max_chunks=self.sweep_processes,
+            min_chunk_variants=SWEEP_JOB_MIN_CHUNK_VARIANTS
+        )
+        payload = {"parameters": parameters, "grid": grid or {}, "arrays": arrays or {}}
+        parameters_hash = calculate_parameters_hash(f"{calculation_type}:sweep", payload)
+        return self._submit(
+            "sweep", calculation_type, payload, parameters_hash, user_id,
+            lambda job_id: self._run_sweep(job_id, calculation_type, parameters, chunks)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Состояние задания (из памяти процесса или из таблицы)"""
+        with self._lock:
+            job = self._active.get(job_id) or self._finished.get(job_id)
+            if job is not None:
+                return copy.deepcopy(job)
+
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT * FROM calculation_jobs WHERE id = %s", (job_id,))
+            row = cursor.fetchone()
+        return self._row_to_job(row) if row else None
+
+    def fail_stale_jobs(self) -> int:
+        """Завершение ошибкой заданий, которые перестал отмечать их процесс"""
+        with self.db_manager.transaction() as cursor:
+            cursor.execute("""
+                UPDATE calculation_jobs
+                SET status = 'failed', error = 'Job interrupted', finished_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE status IN ('queued', 'running')
+                  AND updated_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 second')
+            """, (CALCULATION_JOB_STALE_SECONDS,))
+            failed = cursor.rowcount
+        if failed:
+            logger.warning(f"⚠️ [JOBS] Marked {failed} interrupted jobs as failed")
+        return failed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика очереди"""
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._active.values():
+                statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+            return {
+                "workers": self.workers,
+                "sweep_processes": self.sweep_processes,
+                "active_jobs": len(self._active),
+                "active_by_status": statuses,
+                "finished_in_memory": len(self._finished)
+            }
+
+    def shutdown(self):
+        """Остановка пулов; незавершенные задания помечаются прерванными"""
+        self._stopped.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout=5)
+            self._heartbeat_thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            interrupted = list(self._active)
+        for job_id in interrupted:
+            self._update(job_id, status="failed", error="Interrupted by service shutdown",
+                         finished_at=datetime.now())
+        logger.info(f"✅ [JOBS] Job manager stopped ({len(interrupted)} jobs interrupted)")
+
+    def _submit(self, kind: str, calculation_type: str, parameters: Dict[str, Any],
+                parameters_hash: str, user_id: Optional[int],
+                operation: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """Запись задания в таблицу (или поиск существующего) и запуск в пуле потоков"""
+        engine_version = self.calculation_engine.result_cache.engine_version
+        key = (kind, calculation_type, parameters_hash, engine_version)
+        job_id = str(uuid.uuid4())
+        created_at = datetime.now()
+
+        with self.db_manager.transaction() as cursor:
+            # Зависшее задание с тем же ключом не должно блокировать повторную постановку
+            cursor.execute("""
+                UPDATE calculation_jobs
+                SET status = 'failed', error = 'Job interrupted', finished_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE kind = %s AND calculation_type = %s AND parameters_hash = %s AND engine_version = %s
+                  AND status IN ('queued', 'running')
+                  AND updated_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 second')
+            """, (*key, CALCULATION_JOB_STALE_SECONDS))
+            cursor.execute("""
+                INSERT INTO calculation_jobs
+                    (id, kind, calculation_type, parameters, parameters_hash, engine_version, user_id, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (kind, calculation_type, parameters_hash, engine_version)
+                    WHERE status <> 'failed' DO NOTHING
+                RETURNING id
+            """, (job_id, kind, calculation_type, json.dumps(parameters, ensure_ascii=False, default=str),
+                  parameters_hash, engine_version, user_id, created_at))
+            created = cursor.fetchone() is not None
+            existing = None
+            if not created:
+                cursor.execute("""
+                    SELECT * FROM calculation_jobs
+                    WHERE kind = %s AND calculation_type = %s AND parameters_hash = %s AND engine_version = %s
+                      AND status <> 'failed'
+                """, key)
+                existing = cursor.fetchone()
+
+        if not created:
+            if existing is None:
+                raise RuntimeError(f"Failed to enqueue {kind} job for {calculation_type}: concurrent update")
+            job = self.get(existing["id"]) or self._row_to_job(existing)
+            job["deduplicated"] = True
+            logger.info(f"⚡ [JOBS] Reusing {job['status']} job {job['id']} for {calculation_type} {parameters_hash[:12]}")
+            return job
+
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "calculation_type": calculation_type,
+            "status": "queued",
+            "progress": 0.0,
+            "message": None,
+            "parameters_hash": parameters_hash,
+            "engine_version": engine_version,
+            "results": None,
+            "error": None,
+            "created_at": created_at.isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "deduplicated": False
+        }
+        with self._lock:
+            self._active[job_id] = job
+            snapshot = copy.deepcopy(job)
+
+        self._get_executor().submit(self._run_job, job_id, operation)
+        logger.info(f"✅ [JOBS] Queued {kind} job {job_id} for {calculation_type}")
+        return snapshot
+
+    def _run_job(self, job_id: str, operation: Callable[[str], Dict[str, Any]]):
+        """Выполнение задания в потоке пула"""
+        start_time = time.time()
+        self._update(job_id, status="running", started_at=datetime.now())
+        try:
+            results = operation(job_id)
+            self._update(job_id, status="completed", progress=1.0, message=None,
+                         results=results, finished_at=datetime.now())
+            logger.info(f"✅ [JOBS] Job {job_id} completed in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            logger.error(f"❌ [JOBS] Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.now())
+
+    def _run_sweep(self, job_id: str, calculation_type: str, parameters: Dict[str, Any],
+                   chunks: List[Dict[str, List[float]]]) -> Dict[str, Any]:
+        """Расчет серии по частям в пуле процессов с обновлением прогресса"""
+        from sweep import ParametricSweepEngine, run_sweep_chunk
+
+        start_time = time.time()
+        if len(chunks) == 1:
+            parts = [self.get_sweep_engine().run(calculation_type, parameters, arrays=chunks[0])]
+            return ParametricSweepEngine.merge(calculation_type, parts, time.time() - start_time)
+
+        pool = self._get_process_pool()
+        futures = {
+            pool.submit(run_sweep_chunk, calculation_type, parameters, chunk): index
+            for index, chunk in enumerate(chunks)
+        }
+        parts: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                parts[futures[future]] = future.result()
+                self._update(job_id, progress=done / len(chunks),
+                             message=f"Completed chunks: {done}/{len(chunks)}")
+        except BrokenProcessPool:
+            with self._lock:
+                self._process_pool = None
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+        return ParametricSweepEngine.merge(calculation_type, parts, time.time() - start_time)
+
+    def _update(self, job_id: str, **fields):
+        """Обновление состояния задания в памяти и в таблице"""
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                job.update({
+                    name: value.isoformat() if isinstance(value, datetime) else value
+                    for name, value in fields.items()
+                })
+                if job["status"] in TERMINAL_STATUSES:
+                    self._active.pop(job_id, None)
+                    self._finished[job_id] = job
+                    while len(self._finished) > FINISHED_JOBS_IN_MEMORY:
+                        self._finished.popitem(last=False)
+
+        assignments = []
+        values = []
+        for name in UPDATABLE_FIELDS:
+            if name in fields:
+                assignments.append(f"{name} = %s")
+                value = fields[name]
+                values.append(json.dumps(value, ensure_ascii=False, default=str) if name == "results" else value)
+        try:
+            with self.db_manager.transaction() as cursor:
+                cursor.execute(
+                    f"UPDATE calculation_jobs SET {', '.join(assignments)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (*values, job_id)
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ [JOBS] Failed to persist state of job {job_id}: {e}")
+
+    def _heartbeat_loop(self):
+        """Отметка заданий процесса и завершение чужих прерванных заданий"""
+        while not self._stopped.wait(CALCULATION_JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                active = list(self._active)
+            try:
+                if active:
+                    with self.db_manager.transaction() as cursor:
+                        cursor.execute("""
+                            UPDATE calculation_jobs SET updated_at = CURRENT_TIMESTAMP
+                            WHERE id = ANY(%s) AND status IN ('queued', 'running')
+                        """, (active,))
+                self.fail_stale_jobs()
+            except Exception as e:
+                logger.warning(f"⚠️ [JOBS] Heartbeat failed: {e}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="calculation-job")
+            return self._executor
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # В пул передаются только векторизованные части серий (см. ParametricSweepEngine.split)
+                self._process_pool = create_process_pool(self.sweep_processes, ["sweep"])
+                logger.info(f"✅ [JOBS] Sweep process pool started ({self.sweep_processes} processes)")
+            return self._process_pool
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        """Преобразование строки calculation_jobs в состояние задания"""
+        def _iso(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "calculation_type": row["calculation_type"],
+            "status": row["status"],
+            "progress": float(row["progress"] or 0),
+            "message": row["message"],
+            "parameters_hash": row["parameters_hash"],
+            "engine_version": row["engine_version"],
+            "results": row["results"],
+            "error": row["error"],
+            "created_at": _iso(row["created_at"]),
+            "started_at": _iso(row["started_at"]),
+            "finished_at": _iso(row["finished_at"]),
+            "deduplicated": False
+        }
@@ -7,6 +7,7 @@ import time
 import logging
 import asyncio
 import signal
+import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from contextlib import asynccontextmanager
@@ -14,7 +15,7 @@ from contextlib import asynccontextmanager
 import qdrant_client
 from fastapi import FastAPI, HTTPException, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.exceptions import RequestValidationError
 import uvicorn
@@ -22,16 +23,18 @@ import uvicorn
 # Импорт наших модулей
 from config import (
     HOST, PORT, DEBUG, CORS_ORIGINS, LOG_LEVEL, LOG_FORMAT, LOG_FILE,
-    QDRANT_URL, QDRANT_API_KEY
+    QDRANT_URL, QDRANT_API_KEY, MAX_CALCULATION_RESULTS, CALCULATION_JOB_EVENTS_POLL_INTERVAL,
+    DOCX_EXPORT_MAX_CALCULATIONS
 )
 from models import (
     CalculationCreate, CalculationResponse, CalculationUpdate, CalculationExecute,
+    CalculationSweepRequest, CalculationJobCreate, CalculationJobResponse, CalculationBulkExportRequest,
     HealthResponse, ErrorResponse
 )
 from auth import auth_service, get_current_active_user
 from database import db_manager
 from calculations import calculation_engine
-from utils.calculation_docx_generator import CalculationDOCXGenerator
+from jobs import CalculationJobManager, TERMINAL_STATUSES
 
 # Настройка логирования
 logging.basicConfig(
@@ -44,6 +47,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Очередь фоновых расчетов (пулы создаются при первом задании)
+calculation_jobs = CalculationJobManager(calculation_engine, db_manager)
+
+# Интервал комментариев keepalive в потоке событий задания (секунды)
+JOB_EVENTS_KEEPALIVE_INTERVAL = 15
+
+
+# Пакетный экспорт в DOCX (python-docx загружается при первом экспорте)
+_docx_exporter = None
+
+
+def get_docx_exporter():
+    """Получение экспортера отчетов по расчетам"""
+    global _docx_exporter
+    if _docx_exporter is None:
+        from utils.calculation_docx_export import CalculationBulkExporter
+        _docx_exporter = CalculationBulkExporter()
+    return _docx_exporter
+
+
+def get_sweep_engine():
+    """Получение движка параметрических расчетов (numpy загружается при первом запросе)"""
+    return calculation_jobs.get_sweep_engine()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка заголовка If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def types_payload_response(request: Request, calculation_type: Optional[str] = None) -> Response:
+    """Ответ /types из неизменяемого сериализованного описания типов с ETag"""
+    payload = calculation_engine.registry.get_types_payload(calculation_type)
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 # Инициализируем startup_time
 startup_time = datetime.now()
 
@@ -69,6 +115,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Qdrant client initialization failed: {e}")
     
+    # Задания, прерванные предыдущей остановкой сервиса, и отметки заданий этого процесса
+    calculation_jobs.start()
+    
     yield
     
     # Graceful shutdown
@@ -76,6 +125,10 @@ async def lifespan(app: FastAPI):
     is_shutting_down = True
     shutdown_event.set()
     logger.info("🛑 Calculation service shutting down...")
+    calculation_jobs.shutdown()
+    if _docx_exporter:
+        _docx_exporter.shutdown()
+    db_manager.close()
 
 
 # Создание FastAPI приложения
@@ -93,6 +146,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
@@ -318,25 +372,34 @@ async def create_calculation(
 
 @app.get("/calculations", response_model=List[CalculationResponse])
 async def get_calculations(
+    response: Response,
     calculation_type: Optional[str] = None,
     category: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    cursor: Optional[str] = None
 ):
-    """Получение списка расчетов"""
+    """Получение списка расчетов.
+    
+    Постраничный вывод по курсору: курсор следующей страницы возвращается
+    в заголовке X-Next-Cursor и передается в параметре cursor.
+    """
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        calculations = db_manager.get_calculations(
+        calculations, next_cursor = db_manager.get_calculations(
             user_id=1,  # Используем фиксированный user_id для демо
             calculation_type=calculation_type,
             category=category,
-            limit=limit,
-            offset=offset
+            limit=max(1, min(limit, MAX_CALCULATION_RESULTS)),
+            cursor=cursor
         )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return calculations
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error getting calculations: {e}")
         raise HTTPException(status_code=500, detail="Failed to get calculations")
@@ -413,13 +476,13 @@ async def delete_calculation(
 
 # Информация о типах расчетов
 @app.get("/calculations/structural/types")
-async def get_structural_calculation_types():
+async def get_structural_calculation_types(request: Request):
     """Получение доступных типов расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting calculation types: {e}")
@@ -455,13 +518,13 @@ async def execute_structural_calculation(
 
 # Информация о типах расчетов дегазации
 @app.get("/calculations/degasification/types")
-async def get_degasification_calculation_types():
+async def get_degasification_calculation_types(request: Request):
     """Получение доступных типов расчетов дегазации"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting degasification calculation types: {e}")
@@ -470,13 +533,13 @@ async def get_degasification_calculation_types():
 
 # Информация о типах электротехнических расчетов
 @app.get("/calculations/electrical/types")
-async def get_electrical_calculation_types():
+async def get_electrical_calculation_types(request: Request):
     """Получение доступных типов электротехнических расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting electrical calculation types: {e}")
@@ -485,13 +548,13 @@ async def get_electrical_calculation_types():
 
 # Информация о типах теплотехнических расчетов
 @app.get("/calculations/thermal/types")
-async def get_thermal_calculation_types():
+async def get_thermal_calculation_types(request: Request):
     """Получение доступных типов теплотехнических расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting thermal calculation types: {e}")
@@ -500,13 +563,13 @@ async def get_thermal_calculation_types():
 
 # Информация о типах вентиляционных расчетов
 @app.get("/calculations/ventilation/types")
-async def get_ventilation_calculation_types():
+async def get_ventilation_calculation_types(request: Request):
     """Получение доступных типов вентиляционных расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting ventilation calculation types: {e}")
@@ -609,6 +672,189 @@ async def execute_ventilation_calculation(
         raise HTTPException(status_code=500, detail=f"Failed to execute ventilation calculation: {str(e)}")
 
 
+# Параметрический расчет (серия вариантов) для любого типа
+@app.post("/calculations/{calculation_type}/sweep")
+async def execute_calculation_sweep(
+    calculation_type: str,
+    sweep_request: CalculationSweepRequest
+):
+    """Выполнение серии расчетов по сетке или массивам параметров"""
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    if calculation_type not in calculation_engine.registry:
+        raise HTTPException(status_code=404, detail=f"Unknown calculation type: {calculation_type}")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            None,
+            get_sweep_engine().run,
+            calculation_type,
+            sweep_request.parameters,
+            sweep_request.grid,
+            sweep_request.arrays
+        )
+        # Колоночная таблица уже приведена к JSON-типам, отдаем без jsonable_encoder
+        return JSONResponse(content=results)
+        
+    except ValueError as e:
+        # Ошибки валидации pydantic также являются ValueError
+        logger.error(f"❌ Invalid sweep request for {calculation_type}: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid sweep request: {str(e)}")
+    except Exception as e:
+        logger.error(f"❌ Error executing {calculation_type} sweep: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to execute {calculation_type} sweep: {str(e)}")
+
+
+# Фоновые задания расчетов
+def _job_response(job: Dict[str, Any], status_code: int = 200) -> JSONResponse:
+    """Ответ с состоянием задания (результаты серий уже приведены к JSON-типам)"""
+    return JSONResponse(status_code=status_code, content=job)
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Форматирование события Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@app.post("/calculations/{calculation_type}/jobs", response_model=CalculationJobResponse, status_code=202)
+async def submit_calculation_job(
+    calculation_type: str,
+    job_request: CalculationJobCreate
+):
+    """Постановка расчета в очередь.
+    
+    Возвращает задание сразу; повторная постановка с теми же параметрами
+    возвращает существующее задание (deduplicated=true).
+    """
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    if calculation_type not in calculation_engine.registry:
+        raise HTTPException(status_code=404, detail=f"Unknown calculation type: {calculation_type}")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(
+            None, calculation_jobs.submit, calculation_type, job_request.parameters, 1  # фиксированный user_id для демо
+        )
+        return _job_response(job, status_code=202)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error submitting {calculation_type} job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to submit {calculation_type} job: {str(e)}")
+
+
+@app.post("/calculations/{calculation_type}/sweep/jobs", response_model=CalculationJobResponse, status_code=202)
+async def submit_calculation_sweep_job(
+    calculation_type: str,
+    sweep_request: CalculationSweepRequest
+):
+    """Постановка серии расчетов в очередь (части серии считаются в отдельных процессах)"""
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    if calculation_type not in calculation_engine.registry:
+        raise HTTPException(status_code=404, detail=f"Unknown calculation type: {calculation_type}")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(
+            None,
+            calculation_jobs.submit_sweep,
+            calculation_type,
+            sweep_request.parameters,
+            sweep_request.grid,
+            sweep_request.arrays,
+            1  # фиксированный user_id для демо
+        )
+        return _job_response(job, status_code=202)
+        
+    except ValueError as e:
+        logger.error(f"❌ Invalid sweep job for {calculation_type}: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid sweep request: {str(e)}")
+    except Exception as e:
+        logger.error(f"❌ Error submitting {calculation_type} sweep job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to submit {calculation_type} sweep job: {str(e)}")
+
+
+@app.get("/calculations/jobs/{job_id}", response_model=CalculationJobResponse)
+async def get_calculation_job(job_id: str):
+    """Получение состояния и результата задания"""
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, calculation_jobs.get, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return _job_response(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error getting job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get job")
+
+
+@app.get("/calculations/jobs/{job_id}/events")
+async def stream_calculation_job_events(job_id: str, request: Request):
+    """Поток событий задания (SSE).
+    
+    Событие progress отправляется при изменении статуса или прогресса,
+    последнее событие - completed или failed с полным состоянием задания.
+    """
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    loop = asyncio.get_running_loop()
+    try:
+        job = await loop.run_in_executor(None, calculation_jobs.get, job_id)
+    except Exception as e:
+        logger.error(f"❌ Error getting job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get job")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        current = job
+        last_state = None
+        last_sent = time.monotonic()
+        while current is not None:
+            if current["status"] in TERMINAL_STATUSES:
+                yield _format_sse(current["status"], current)
+                return
+            
+            state = (current["status"], current["progress"], current["message"])
+            if state != last_state:
+                yield _format_sse("progress", {key: value for key, value in current.items() if key != "results"})
+                last_state = state
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent > JOB_EVENTS_KEEPALIVE_INTERVAL:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            
+            if is_shutting_down or await request.is_disconnected():
+                return
+            await asyncio.sleep(CALCULATION_JOB_EVENTS_POLL_INTERVAL)
+            try:
+                current = await loop.run_in_executor(None, calculation_jobs.get, job_id)
+            except Exception as e:
+                logger.error(f"❌ Error polling job {job_id}: {e}")
+                yield _format_sse("error", {"id": job_id, "error": "Failed to get job"})
+                return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Общий эндпоинт для выполнения расчетов по типу (удален из-за конфликта с {calculation_id})
 # Используйте специфичные эндпоинты для каждого типа расчета
 
@@ -629,8 +875,10 @@ async def export_calculation_docx(
             raise HTTPException(status_code=404, detail="Calculation not found")
         
         # Генерация DOCX
+        from utils.calculation_docx_generator import CalculationDOCXGenerator
+        from utils.calculation_docx_export import calculation_to_report_data
         docx_generator = CalculationDOCXGenerator()
-        docx_content = docx_generator.generate_calculation_report(calculation)
+        docx_content = docx_generator.generate_calculation_report(calculation_to_report_data(calculation))
         
         # Возврат файла
         return Response(
@@ -646,6 +894,70 @@ async def export_calculation_docx(
         raise HTTPException(status_code=500, detail="Failed to export calculation")
 
 
+# Пакетный экспорт расчетов в DOCX
+@app.post("/calculations/export-docx")
+async def export_calculations_docx(
+    export_request: CalculationBulkExportRequest
+):
+    """Экспорт нескольких расчетов: один DOCX (format=docx) или ZIP с отчетами (format=zip).
+    
+    Расчеты задаются списком ID или фильтрами по типу и категории.
+    """
+    if is_shutting_down:
+        raise HTTPException(status_code=503, detail="Service is shutting down")
+    
+    if len(export_request.calculation_ids) > DOCX_EXPORT_MAX_CALCULATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many calculations: {len(export_request.calculation_ids)} (max {DOCX_EXPORT_MAX_CALCULATIONS})"
+        )
+    
+    try:
+        loop = asyncio.get_running_loop()
+        if export_request.calculation_ids:
+            calculations = await loop.run_in_executor(
+                None, db_manager.get_calculations_by_ids, export_request.calculation_ids
+            )
+        else:
+            calculations, _ = await loop.run_in_executor(
+                None,
+                lambda: db_manager.get_calculations(
+                    user_id=1,  # Используем фиксированный user_id для демо
+                    calculation_type=export_request.calculation_type,
+                    category=export_request.category,
+                    limit=DOCX_EXPORT_MAX_CALCULATIONS
+                )
+            )
+        if not calculations:
+            raise HTTPException(status_code=404, detail="No calculations found")
+        
+        from utils.calculation_docx_export import calculation_to_report_data
+        report_data = [calculation_to_report_data(calculation) for calculation in calculations]
+        exporter = get_docx_exporter()
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if export_request.format == "zip":
+            content = await loop.run_in_executor(None, exporter.export_zip, report_data)
+            media_type = "application/zip"
+            filename = f"calculations_{timestamp}.zip"
+        else:
+            content = await loop.run_in_executor(None, exporter.export_docx, report_data)
+            media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            filename = f"calculations_{timestamp}.docx"
+        
+        return Response(
+            content=content,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error exporting calculations to DOCX: {e}")
+        raise HTTPException(status_code=500, detail="Failed to export calculations")
+
+
 # Метрики
 @app.get("/metrics")
 async def get_metrics():
@@ -660,6 +972,8 @@ async def get_metrics():
         return {
             "uptime_seconds": uptime,
             "calculations": stats,
+            "result_cache": calculation_engine.result_cache.get_stats(),
+            "jobs": calculation_jobs.get_stats(),
             "service_status": "running" if not is_shutting_down else "shutting_down"
         }
         
@@ -707,13 +1021,13 @@ async def execute_calculation(
 # ===== ВОДОСНАБЖЕНИЕ И ВОДООТВЕДЕНИЕ =====
 
 @app.get("/calculations/water_supply/types")
-async def get_water_supply_calculation_types():
+async def get_water_supply_calculation_types(request: Request):
     """Получение доступных типов расчетов водоснабжения"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting water supply calculation types: {e}")
@@ -745,13 +1059,13 @@ async def execute_water_supply_calculation(
 # ===== ПОЖАРНАЯ БЕЗОПАСНОСТЬ =====
 
 @app.get("/calculations/fire_safety/types")
-async def get_fire_safety_calculation_types():
+async def get_fire_safety_calculation_types(request: Request):
     """Получение доступных типов расчетов пожарной безопасности"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting fire safety calculation types: {e}")
@@ -783,13 +1097,13 @@ async def execute_fire_safety_calculation(
 # ===== АКУСТИЧЕСКИЕ РАСЧЕТЫ =====
 
 @app.get("/calculations/acoustic/types")
-async def get_acoustic_calculation_types():
+async def get_acoustic_calculation_types(request: Request):
     """Получение доступных типов акустических расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting acoustic calculation types: {e}")
@@ -821,13 +1135,13 @@ async def execute_acoustic_calculation(
 # ===== ОСВЕЩЕНИЕ И ИНСОЛЯЦИЯ =====
 
 @app.get("/calculations/lighting/types")
-async def get_lighting_calculation_types():
+async def get_lighting_calculation_types(request: Request):
     """Получение доступных типов расчетов освещения"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting lighting calculation types: {e}")
@@ -859,13 +1173,13 @@ async def execute_lighting_calculation(
 # ===== ИНЖЕНЕРНО-ГЕОЛОГИЧЕСКИЕ РАСЧЕТЫ =====
 
 @app.get("/calculations/geological/types")
-async def get_geological_calculation_types():
+async def get_geological_calculation_types(request: Request):
     """Получение доступных типов инженерно-геологических расчетов"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        return calculation_engine.get_calculation_types()
+        return types_payload_response(request)
         
     except Exception as e:
         logger.error(f"❌ Error getting geological calculation types: {e}")
@@ -896,15 +1210,13 @@ async def execute_geological_calculation(
 
 # Получение типов расчетов защиты от БПЛА
 @app.get("/calculations/uav_protection/types")
-async def get_uav_protection_calculation_types():
+async def get_uav_protection_calculation_types(request: Request):
     """Получение типов расчетов защиты от БПЛА"""
     if is_shutting_down:
         raise HTTPException(status_code=503, detail="Service is shutting down")
     
     try:
-        types = calculation_engine.get_calculation_types()
-        uav_types = [t for t in types if t.type == "uav_protection"]
-        return {"types": [t.dict() for t in uav_types]}
+        return types_payload_response(request, "uav_protection")
         
     except Exception as e:
         logger.error(f"❌ Error getting UAV protection calculation types: {e}")
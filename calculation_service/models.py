@@ -42,6 +42,44 @@ class CalculationExecute(BaseModel):
     parameters: Dict[str, Any] = Field(..., description="Параметры для выполнения расчета")
 
 
+class CalculationSweepRequest(BaseModel):
+    """Модель для параметрического расчета (серии вариантов)"""
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Базовые параметры расчета")
+    grid: Dict[str, List[float]] = Field(default_factory=dict, description="Значения параметров для декартова произведения")
+    arrays: Dict[str, List[float]] = Field(default_factory=dict, description="Совместно меняющиеся параметры (списки одинаковой длины)")
+
+
+class CalculationJobCreate(BaseModel):
+    """Модель для постановки расчета в очередь"""
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Параметры расчета")
+
+
+class CalculationJobResponse(BaseModel):
+    """Модель ответа с состоянием фонового задания"""
+    id: str
+    kind: str
+    calculation_type: str
+    status: str
+    progress: float
+    message: Optional[str] = None
+    parameters_hash: str
+    engine_version: str
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    deduplicated: bool = False
+
+
+class CalculationBulkExportRequest(BaseModel):
+    """Модель для пакетного экспорта расчетов в DOCX"""
+    calculation_ids: List[int] = Field(default_factory=list, description="ID расчетов (если пусто - по фильтрам)")
+    calculation_type: Optional[str] = Field(None, description="Фильтр по типу расчета")
+    category: Optional[str] = Field(None, description="Фильтр по категории")
+    format: str = Field("docx", pattern="^(docx|zip)$", description="docx - один документ, zip - архив отчетов")
+
+
 class CalculationResult(BaseModel):
     """Модель для результата расчета"""
     calculation_id: int
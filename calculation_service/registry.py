@@ -0,0 +1,260 @@
+"""
+Реестр типов расчетов (плагинов CalculationEngine)
+"""
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from models import (
+    StructuralCalculationParams, FoundationCalculationParams,
+    ThermalCalculationParams, VentilationCalculationParams,
+    DegasificationCalculationParams, ElectricalLoadCalculationParams,
+    WaterSupplyCalculationParams, FireSafetyCalculationParams,
+    AcousticCalculationParams, LightingCalculationParams,
+    GeologicalCalculationParams
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CalculationPlugin:
+    """Описание типа расчета.
+
+    handler - имя метода CalculationEngine, выполняющего расчет. Если задан
+    subtype, он записывается в parameters['calculation_type'] (подтипы
+    структурного расчета). При pass_model=True обработчик получает модель
+    параметров вместо словаря. Неперечисляемые (listed=False) типы
+    выполняются, но не попадают в ответ /types.
+    """
+    type: str
+    handler: str
+    name: str = ""
+    description: str = ""
+    categories: Tuple[str, ...] = ()
+    params_model: Optional[Type[BaseModel]] = None
+    pass_model: bool = False
+    subtype: Optional[str] = None
+    listed: bool = True
+
+    @cached_property
+    def parameters_schema(self) -> Dict[str, Any]:
+        """Схема параметров (строится один раз)"""
+        declared = _get_declared_schemas().get(self.type)
+        if declared is not None:
+            return declared
+        if self.params_model is not None:
+            return self.params_model.model_json_schema()
+        return {}
+
+    def to_type_info(self) -> Dict[str, Any]:
+        """Описание типа в формате CalculationTypeInfo"""
+        return {
+            "type": self.type,
+            "name": self.name,
+            "description": self.description,
+            "parameters_schema": self.parameters_schema,
+            "categories": list(self.categories)
+        }
+
+
+_declared_schemas: Optional[Dict[str, Dict[str, Any]]] = None
+_declared_schemas_lock = threading.Lock()
+
+
+def _get_declared_schemas() -> Dict[str, Dict[str, Any]]:
+    """Схемы параметров из parameter_schemas (загружаются при первом обращении)"""
+    global _declared_schemas
+    if _declared_schemas is None:
+        with _declared_schemas_lock:
+            if _declared_schemas is None:
+                from parameter_schemas import build_parameter_schemas
+                _declared_schemas = build_parameter_schemas()
+    return _declared_schemas
+
+
+@dataclass(frozen=True)
+class TypesPayload:
+    """Готовый ответ /types: сериализованное тело и его ETag"""
+    body: bytes
+    etag: str
+
+
+class CalculationRegistry:
+    """Реестр типов расчетов: диспетчеризация по типу и неизменяемые ответы /types"""
+
+    def __init__(self):
+        self._plugins: Dict[str, CalculationPlugin] = {}
+        self._payloads: Dict[Optional[str], TypesPayload] = {}
+        self._lock = threading.Lock()
+
+    def register(self, plugin: CalculationPlugin):
+        """Регистрация типа расчета"""
+        if plugin.type in self._plugins:
+            raise ValueError(f"Calculation type already registered: {plugin.type}")
+        self._plugins[plugin.type] = plugin
+        with self._lock:
+            self._payloads.clear()
+
+    def get(self, calculation_type: str) -> Optional[CalculationPlugin]:
+        """Получение описания типа расчета (None, если тип неизвестен)"""
+        return self._plugins.get(calculation_type)
+
+    def __contains__(self, calculation_type: str) -> bool:
+        return calculation_type in self._plugins
+
+    def listed(self) -> List[CalculationPlugin]:
+        """Типы расчетов, отдаваемые в /types"""
+        return [plugin for plugin in self._plugins.values() if plugin.listed]
+
+    def get_types_payload(self, calculation_type: Optional[str] = None) -> TypesPayload:
+        """Сериализованный ответ /types (все типы или {"types": [...]} одного типа).
+
+        Строится при первом запросе и далее отдается без изменений.
+        """
+        payload = self._payloads.get(calculation_type)
+        if payload is not None:
+            return payload
+
+        with self._lock:
+            payload = self._payloads.get(calculation_type)
+            if payload is None:
+                if calculation_type is None:
+                    content: Any = [plugin.to_type_info() for plugin in self.listed()]
+                else:
+                    content = {"types": [plugin.to_type_info() for plugin in self.listed()
+                                         if plugin.type == calculation_type]}
+                body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                payload = TypesPayload(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:20]}"')
+                self._payloads[calculation_type] = payload
+                logger.info(f"✅ [REGISTRY] Built types payload ({calculation_type or 'all'}): {len(body)} bytes")
+        return payload
+
+
+def _build_default_registry() -> CalculationRegistry:
+    registry = CalculationRegistry()
+
+    registry.register(CalculationPlugin(
+        type="structural",
+        handler="_execute_structural_calculation",
+        name="Строительные конструкции",
+        description="Расчеты строительных конструкций",
+        categories=("beam", "column", "slab", "foundation"),
+        params_model=StructuralCalculationParams
+    ))
+    # Подтипы структурного расчета
+    for subtype in ("dynamic", "strength", "stability", "stiffness", "cracking"):
+        registry.register(CalculationPlugin(
+            type=subtype,
+            handler="_execute_structural_calculation",
+            subtype=subtype,
+            listed=False
+        ))
+
+    registry.register(CalculationPlugin(
+        type="foundation",
+        handler="_execute_foundation_calculation",
+        name="Основания и фундаменты",
+        description="Расчеты оснований и фундаментов",
+        categories=("bearing_capacity", "settlement", "stability"),
+        params_model=FoundationCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="thermal",
+        handler="_execute_thermal_calculation",
+        name="Теплотехнические расчеты",
+        description="Теплотехнические расчеты зданий",
+        categories=("heat_loss", "thermal_insulation", "condensation"),
+        params_model=ThermalCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="ventilation",
+        handler="_execute_ventilation_calculation",
+        name="Вентиляция и кондиционирование",
+        description="Расчеты систем вентиляции согласно СП 60.13330.2016, СП 7.13130.2013, СП 54.13330.2016",
+        categories=(
+            "air_exchange",            # Расчеты воздухообмена
+            "smoke_ventilation",       # Противодымная вентиляция
+            "residential_ventilation", # Вентиляция жилых зданий
+            "energy_efficiency",       # Энергоэффективность
+            "acoustic_calculations",   # Акустические расчеты
+            "heat_recovery",           # Рекуперация тепла
+            "air_conditioning"         # Кондиционирование
+        ),
+        params_model=VentilationCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="degasification",
+        handler="_execute_degasification_calculation",
+        name="Расчет дегазации угольных шахт",
+        description="Расчеты систем дегазации угольных шахт",
+        categories=("methane_extraction", "ventilation_requirements", "safety_systems"),
+        params_model=DegasificationCalculationParams,
+        pass_model=True
+    ))
+    registry.register(CalculationPlugin(
+        type="electrical",
+        handler="_execute_electrical_calculation",
+        name="Электротехнические расчеты",
+        description="Расчеты электрических нагрузок, заземления и молниезащиты",
+        categories=("electrical_loads", "cable_calculation", "grounding", "lightning_protection", "energy_efficiency"),
+        params_model=ElectricalLoadCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="water_supply",
+        handler="_execute_water_supply_calculation",
+        name="Водоснабжение и водоотведение",
+        description="Расчеты систем водоснабжения и водоотведения согласно СП 30.13330.2016",
+        categories=("water_consumption", "pipe_calculation", "sewage_treatment", "water_pressure", "drainage"),
+        params_model=WaterSupplyCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="fire_safety",
+        handler="_execute_fire_safety_calculation",
+        name="Пожарная безопасность",
+        description="Расчеты пожарной безопасности согласно 123-ФЗ, ГОСТ 12.1.004-91",
+        categories=("evacuation", "fire_suppression", "smoke_control", "fire_resistance", "emergency_systems"),
+        params_model=FireSafetyCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="acoustic",
+        handler="_execute_acoustic_calculation",
+        name="Акустические расчеты",
+        description="Расчеты звукоизоляции и акустики согласно СП 51.13330.2011",
+        categories=("sound_insulation", "noise_control", "vibration_control", "acoustic_treatment", "reverberation"),
+        params_model=AcousticCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="lighting",
+        handler="_execute_lighting_calculation",
+        name="Освещение и инсоляция",
+        description="Расчеты освещения и инсоляции согласно СП 52.13330.2016",
+        categories=("artificial_lighting", "natural_lighting", "insolation", "luminaire_calculation", "energy_efficiency"),
+        params_model=LightingCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="geological",
+        handler="_execute_geological_calculation",
+        name="Инженерно-геологические расчеты",
+        description="Расчеты оснований и грунтов согласно СП 22.13330.2016",
+        categories=("bearing_capacity", "settlement", "slope_stability", "seismic_analysis", "groundwater"),
+        params_model=GeologicalCalculationParams
+    ))
+    registry.register(CalculationPlugin(
+        type="uav_protection",
+        handler="_execute_uav_protection_calculation",
+        name="Защита от БПЛА",
+        description="Расчеты защиты от воздействия беспилотных летательных аппаратов согласно СП 542.1325800.2024",
+        categories=("shock_wave", "impact_penetration")
+    ))
+    return registry
+
+
+# Глобальный реестр типов расчетов
+calculation_registry = _build_default_registry()
@@ -0,0 +1,203 @@
+"""
+Модуль кеширования результатов расчетов
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import (
+    CALCULATION_ENGINE_VERSION, CALCULATION_CACHE_MAX_ENTRIES,
+    CALCULATION_CACHE_MAX_ROWS, CALCULATION_CACHE_TTL_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+# Как часто (в записях) запускать очистку таблицы кеша
+EVICTION_INTERVAL = 100
+
+
+def _canonicalize(value: Any) -> Any:
+    """Приведение параметров к каноническому виду (1.0 и 1 дают один ключ)"""
+    if isinstance(value, dict):
+        return {str(key): _canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def calculate_parameters_hash(calculation_type: str, parameters: Dict[str, Any]) -> str:
+    """Хеш канонизированных параметров расчета"""
+    serialized = json.dumps(
+        {"type": calculation_type, "parameters": _canonicalize(parameters)},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CalculationResultCache:
+    """Кеш результатов расчетов.
+
+    Все расчеты - чистые функции параметров и нормативных таблиц, поэтому
+    результат определяется ключом (тип расчета, хеш параметров, версия движка).
+    В памяти процесса хранится ограниченный LRU, в PostgreSQL - таблица
+    calculation_result_cache. При изменении формул или таблиц нужно увеличить
+    CALCULATION_ENGINE_VERSION. Если таблица недоступна, кеш работает только в памяти.
+    """
+
+    def __init__(self, db_manager,
+                 engine_version: str = CALCULATION_ENGINE_VERSION,
+                 max_entries: int = CALCULATION_CACHE_MAX_ENTRIES,
+                 max_rows: int = CALCULATION_CACHE_MAX_ROWS,
+                 ttl_days: int = CALCULATION_CACHE_TTL_DAYS):
+        self.db_manager = db_manager
+        self.engine_version = engine_version
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_days = ttl_days
+        self._memory: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_eviction = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, calculation_type: str, parameters_hash: str, cursor=None) -> Optional[Dict[str, Any]]:
+        """Получение результата из кеша (None при промахе)"""
+        key = (calculation_type, parameters_hash, self.engine_version)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                logger.info(f"⚡ [CALC_CACHE] Memory hit: {calculation_type} {parameters_hash[:12]}")
+                return copy.deepcopy(self._memory[key])
+
+        results = self._load_from_db(key, cursor)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, results)
+        logger.info(f"⚡ [CALC_CACHE] Database hit: {calculation_type} {parameters_hash[:12]}")
+        return copy.deepcopy(results)
+
+    def put(self, calculation_type: str, parameters_hash: str, results: Dict[str, Any], cursor=None):
+        """Сохранение результата в кеш"""
+        key = (calculation_type, parameters_hash, self.engine_version)
+        with self._lock:
+            self._remember(key, copy.deepcopy(results))
+            self._puts_since_eviction += 1
+            run_eviction = self._puts_since_eviction >= EVICTION_INTERVAL
+            if run_eviction:
+                self._puts_since_eviction = 0
+
+        self._store_in_db(key, results, cursor)
+        if run_eviction:
+            self.evict(cursor)
+
+    def evict(self, cursor=None) -> int:
+        """Удаление просроченных записей, записей других версий движка и записей сверх лимита.
+
+        Во внешней транзакции очистка выполняется на ее курсоре: второе соединение
+        из пула при занятом пуле ждало бы соединение, которое держит сам вызывающий код.
+        """
+        def _evict(db_cursor):
+            db_cursor.execute("""
+                DELETE FROM calculation_result_cache
+                WHERE engine_version <> %s
+                   OR last_accessed_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 day')
+            """, (self.engine_version, self.ttl_days))
+            evicted = db_cursor.rowcount
+            db_cursor.execute("""
+                DELETE FROM calculation_result_cache
+                WHERE id IN (
+                    SELECT id FROM calculation_result_cache
+                    ORDER BY last_accessed_at DESC
+                    OFFSET %s
+                )
+            """, (self.max_rows,))
+            return evicted + db_cursor.rowcount
+
+        try:
+            evicted = self._execute(_evict, cursor)
+            if evicted:
+                logger.info(f"🧹 [CALC_CACHE] Evicted {evicted} entries")
+            return evicted
+        except Exception as e:
+            logger.warning(f"⚠️ [CALC_CACHE] Eviction failed: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика использования кеша"""
+        with self._lock:
+            return {
+                "engine_version": self.engine_version,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _remember(self, key: Tuple[str, str, str], results: Dict[str, Any]):
+        """Добавление записи в LRU в памяти (вызывается под блокировкой)"""
+        self._memory[key] = results
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load_from_db(self, key: Tuple[str, str, str], cursor=None) -> Optional[Dict[str, Any]]:
+        def _load(db_cursor):
+            db_cursor.execute("""
+                UPDATE calculation_result_cache
+                SET last_accessed_at = CURRENT_TIMESTAMP, hit_count = hit_count + 1
+                WHERE calculation_type = %s AND parameters_hash = %s AND engine_version = %s
+                RETURNING results
+            """, key)
+            row = db_cursor.fetchone()
+            return row["results"] if row else None
+
+        try:
+            return self._execute(_load, cursor)
+        except Exception as e:
+            logger.warning(f"⚠️ [CALC_CACHE] Failed to read cache entry: {e}")
+            return None
+
+    def _store_in_db(self, key: Tuple[str, str, str], results: Dict[str, Any], cursor=None):
+        def _store(db_cursor):
+            db_cursor.execute("""
+                INSERT INTO calculation_result_cache (calculation_type, parameters_hash, engine_version, results)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (calculation_type, parameters_hash, engine_version) DO UPDATE
+                SET results = EXCLUDED.results,
+                    created_at = CURRENT_TIMESTAMP,
+                    last_accessed_at = CURRENT_TIMESTAMP
+            """, (*key, json.dumps(results, ensure_ascii=False, default=str)))
+
+        try:
+            self._execute(_store, cursor)
+        except Exception as e:
+            logger.warning(f"⚠️ [CALC_CACHE] Failed to persist cache entry: {e}")
+
+    def _execute(self, operation, cursor=None):
+        """Выполнение операции в своей транзакции или в транзакции вызывающего кода.
+
+        Во внешней транзакции операция выполняется под точкой сохранения,
+        чтобы ошибка кеша не прерывала основную транзакцию.
+        """
+        if cursor is None:
+            with self.db_manager.transaction() as own_cursor:
+                return operation(own_cursor)
+
+        cursor.execute("SAVEPOINT calculation_result_cache")
+        try:
+            result = operation(cursor)
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT calculation_result_cache")
+            raise
+        cursor.execute("RELEASE SAVEPOINT calculation_result_cache")
+        return result
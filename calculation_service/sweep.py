@@ -0,0 +1,497 @@
+"""
+Модуль параметрических расчетов (серии вариантов)
+"""
+import logging
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import numpy as np
+
+from config import SWEEP_MAX_VARIANTS, SWEEP_SCALAR_MAX_VARIANTS
+from models import (
+    ThermalCalculationParams, VentilationCalculationParams,
+    GeologicalCalculationParams, UAVShockWaveCalculationParams
+)
+
+logger = logging.getLogger(__name__)
+
+# Нормы воздухообмена по типам помещений (м³/ч·чел), как в _calculate_air_exchange
+AIR_EXCHANGE_NORMS = {
+    "жилое": 30,
+    "общественное": 20,
+    "производственное": 60
+}
+
+# Критические давления ударной волны для материалов (кПа)
+CRITICAL_PRESSURES = {
+    "concrete": 200,
+    "steel": 500,
+    "brick": 100,
+    "wood": 50
+}
+
+# Коэффициенты эквивалентности взрывчатых веществ по ТНТ
+EXPLOSIVE_EQUIVALENTS = {
+    "TNT": 1.0,
+    "RDX": 1.6,
+    "PETN": 1.7,
+    "HMX": 1.8
+}
+
+# Предельные осадки по типам фундаментов (м)
+MAX_SETTLEMENTS = {
+    "ленточный": 0.1,
+    "плитный": 0.15,
+    "свайный": 0.08
+}
+
+
+_process_sweep_engine = None
+
+
+def run_sweep_chunk(calculation_type: str, parameters: Dict[str, Any],
+                    arrays: Dict[str, List[float]]) -> Dict[str, Any]:
+    """Расчет части серии в дочернем процессе пула (см. ParametricSweepEngine.split).
+
+    В процесс пула попадают только части векторизованных серий: поштучному расчету
+    нужен CalculationEngine, а его импорт открывает пул соединений с БД.
+    """
+    global _process_sweep_engine
+    if _process_sweep_engine is None:
+        _process_sweep_engine = ParametricSweepEngine()
+    return _process_sweep_engine.run(calculation_type, parameters, arrays=arrays)
+
+
+class ParametricSweepEngine:
+    """Выполнение одного расчета для серии вариантов параметров.
+
+    Для типов с векторизованным ядром все варианты считаются одним проходом
+    по массивам numpy с теми же формулами, что и в CalculationEngine.
+    Остальные типы считаются поштучно через execute_calculation_by_type
+    (с меньшим лимитом вариантов). Результат - колоночная таблица.
+    """
+
+    def __init__(self, calculation_engine=None):
+        # Без движка (в дочерних процессах пула) доступны только векторизованные ядра
+        self.calculation_engine = calculation_engine
+        # (тип, подтип) -> (модель параметров, векторизованное ядро)
+        self._kernels: Dict[Tuple[str, Optional[str]], Tuple[type, Callable]] = {
+            ("thermal", None): (ThermalCalculationParams, self._thermal_kernel),
+            ("ventilation", None): (VentilationCalculationParams, self._ventilation_kernel),
+            ("geological", None): (GeologicalCalculationParams, self._geological_kernel),
+            ("uav_protection", "shock_wave"): (UAVShockWaveCalculationParams, self._uav_shock_wave_kernel),
+        }
+
+    def get_vectorized_types(self) -> List[str]:
+        """Типы расчетов, для которых есть векторизованное ядро"""
+        return sorted({calc_type for calc_type, _ in self._kernels})
+
+    def run(self, calculation_type: str, parameters: Dict[str, Any],
+            grid: Optional[Dict[str, List[float]]] = None,
+            arrays: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
+        """Выполнение серии расчетов.
+
+        grid - значения параметров, по которым строится декартово произведение,
+        arrays - параметры, меняющиеся совместно (списки одинаковой длины).
+        """
+        start_time = time.time()
+        swept, variants = self._expand_variants(grid or {}, arrays or {})
+        if not swept:
+            raise ValueError("At least one parameter must be swept via grid or arrays")
+
+        overlap = set(swept) & set(parameters)
+        if overlap:
+            logger.info(f"🔍 [SWEEP] Swept values override base parameters: {sorted(overlap)}")
+
+        kernel_key = self._check_variants(calculation_type, parameters, variants)
+        if kernel_key:
+            params_model, kernel = self._kernels[kernel_key]
+            columns = self._run_vectorized(params_model, kernel, parameters, swept, variants)
+            vectorized = True
+        else:
+            columns = self._run_scalar(calculation_type, parameters, swept, variants)
+            vectorized = False
+
+        execution_time = time.time() - start_time
+        logger.info(f"✅ [SWEEP] {calculation_type}: {variants} variants in {execution_time:.3f}s (vectorized: {vectorized})")
+        return {
+            "calculation_type": calculation_type,
+            "variants": variants,
+            "swept_parameters": list(swept),
+            "columns": list(columns),
+            "data": {name: self._to_list(values) for name, values in columns.items()},
+            "vectorized": vectorized,
+            "execution_time": execution_time,
+            "timestamp": datetime.now().isoformat(),
+            "status": "completed"
+        }
+
+    def split(self, calculation_type: str, parameters: Dict[str, Any],
+              grid: Optional[Dict[str, List[float]]] = None,
+              arrays: Optional[Dict[str, List[float]]] = None,
+              max_chunks: int = 1, min_chunk_variants: int = 1) -> List[Dict[str, List[float]]]:
+        """Разбиение серии на части для параллельного расчета.
+
+        Каждая часть - непрерывный диапазон вариантов в виде arrays, поэтому
+        результаты частей склеиваются через merge в исходном порядке.
+        Делятся только векторизованные серии (часть не меньше min_chunk_variants
+        вариантов); серия без ядра остается одной частью и считается в процессе
+        сервиса движком расчетов.
+        """
+        swept, variants = self._expand_variants(grid or {}, arrays or {})
+        if not swept:
+            raise ValueError("At least one parameter must be swept via grid or arrays")
+
+        kernel_key = self._check_variants(calculation_type, parameters, variants)
+        chunks = max(1, min(max_chunks, variants // max(min_chunk_variants, 1))) if kernel_key else 1
+        bounds = np.linspace(0, variants, chunks + 1, dtype=np.int64)
+        return [
+            {name: values[start:stop].tolist() for name, values in swept.items()}
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+
+    @staticmethod
+    def merge(calculation_type: str, parts: List[Dict[str, Any]], execution_time: float) -> Dict[str, Any]:
+        """Склейка результатов частей серии (в порядке split)"""
+        columns: List[str] = []
+        seen = set()
+        for part in parts:
+            for name in part["columns"]:
+                if name not in seen:
+                    seen.add(name)
+                    columns.append(name)
+
+        data: Dict[str, List[Any]] = {name: [] for name in columns}
+        for part in parts:
+            for name in columns:
+                values = part["data"].get(name)
+                data[name].extend(values if values is not None else [None] * part["variants"])
+
+        return {
+            "calculation_type": calculation_type,
+            "variants": sum(part["variants"] for part in parts),
+            "swept_parameters": parts[0]["swept_parameters"] if parts else [],
+            "columns": columns,
+            "data": data,
+            "vectorized": all(part["vectorized"] for part in parts),
+            "chunks": len(parts),
+            "execution_time": execution_time,
+            "timestamp": datetime.now().isoformat(),
+            "status": "completed"
+        }
+
+    def _check_variants(self, calculation_type: str, parameters: Dict[str, Any],
+                        variants: int) -> Optional[Tuple[str, Optional[str]]]:
+        """Проверка числа вариантов; возвращает ключ векторизованного ядра (или None)"""
+        kernel_key = self._get_kernel_key(calculation_type, parameters)
+        if kernel_key:
+            if variants > SWEEP_MAX_VARIANTS:
+                raise ValueError(f"Too many variants: {variants} (max {SWEEP_MAX_VARIANTS})")
+        elif variants > SWEEP_SCALAR_MAX_VARIANTS:
+            raise ValueError(
+                f"Too many variants for non-vectorized type '{calculation_type}': "
+                f"{variants} (max {SWEEP_SCALAR_MAX_VARIANTS})"
+            )
+        return kernel_key
+
+    def _get_kernel_key(self, calculation_type: str, parameters: Dict[str, Any]) -> Optional[Tuple[str, Optional[str]]]:
+        """Поиск векторизованного ядра для типа (и подтипа) расчета"""
+        if (calculation_type, None) in self._kernels:
+            return (calculation_type, None)
+        if calculation_type == "uav_protection":
+            key = (calculation_type, parameters.get("calculation_subtype", "shock_wave"))
+            if key in self._kernels:
+                return key
+        return None
+
+    def _expand_variants(self, grid: Dict[str, List[float]],
+                         arrays: Dict[str, List[float]]) -> Tuple[Dict[str, np.ndarray], int]:
+        """Построение колонок значений варьируемых параметров.
+
+        Каждый параметр grid - отдельная ось, все arrays - одна общая ось;
+        итоговые варианты - декартово произведение осей.
+        """
+        overlap = set(grid) & set(arrays)
+        if overlap:
+            raise ValueError(f"Parameters cannot be both in grid and arrays: {sorted(overlap)}")
+
+        axes: List[Dict[str, np.ndarray]] = []
+        for name, values in grid.items():
+            axes.append({name: self._as_array(name, values)})
+
+        if arrays:
+            columns = {name: self._as_array(name, values) for name, values in arrays.items()}
+            lengths = {len(values) for values in columns.values()}
+            if len(lengths) != 1:
+                raise ValueError("All arrays must have the same length")
+            axes.append(columns)
+
+        if not axes:
+            return {}, 0
+
+        shape = tuple(len(next(iter(axis.values()))) for axis in axes)
+        variants = int(np.prod(shape, dtype=np.int64))
+        if variants > max(SWEEP_MAX_VARIANTS, SWEEP_SCALAR_MAX_VARIANTS):
+            raise ValueError(f"Too many variants: {variants} (max {SWEEP_MAX_VARIANTS})")
+
+        indices = np.unravel_index(np.arange(variants), shape)
+        swept = {}
+        for axis, axis_indices in zip(axes, indices):
+            for name, values in axis.items():
+                swept[name] = values[axis_indices]
+        return swept, variants
+
+    @staticmethod
+    def _as_array(name: str, values: List[float]) -> np.ndarray:
+        """Преобразование списка значений параметра в массив"""
+        array = np.asarray(values, dtype=np.float64)
+        if array.ndim != 1 or array.size == 0:
+            raise ValueError(f"Parameter '{name}' must be a non-empty list of numbers")
+        return array
+
+    def _run_vectorized(self, params_model: type, kernel: Callable, parameters: Dict[str, Any],
+                        swept: Dict[str, np.ndarray], variants: int) -> Dict[str, np.ndarray]:
+        """Расчет всех вариантов одним проходом векторизованного ядра"""
+        for name in swept:
+            field = params_model.model_fields.get(name)
+            if field is None:
+                raise ValueError(f"Unknown parameter for sweep: {name}")
+            if field.annotation not in (float, int, Optional[float], Optional[int]):
+                raise ValueError(f"Parameter '{name}' is not numeric and cannot be swept")
+
+        # Проверяем базовые параметры моделью, подставив первый вариант
+        first_variant = {name: values[0].item() for name, values in swept.items()}
+        validated = params_model(**{**parameters, **first_variant})
+        p = SimpleNamespace(**{**validated.model_dump(), **swept})
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            results = kernel(p)
+
+        columns = dict(swept)
+        for name, values in results.items():
+            columns[name] = np.broadcast_to(np.asarray(values), (variants,))
+        return columns
+
+    def _run_scalar(self, calculation_type: str, parameters: Dict[str, Any],
+                    swept: Dict[str, np.ndarray], variants: int) -> Dict[str, np.ndarray]:
+        """Поштучный расчет вариантов для типов без векторизованного ядра"""
+        engine = self.calculation_engine
+        if engine is None:
+            raise RuntimeError(f"Per-variant sweep of '{calculation_type}' requires the calculation engine")
+        rows: List[Dict[str, Any]] = []
+        for index in range(variants):
+            variant_parameters = dict(parameters)
+            variant_parameters.update({name: values[index].item() for name, values in swept.items()})
+            try:
+                results = engine.execute_calculation_by_type(calculation_type, variant_parameters)
+                row = self._flatten(results)
+                for key in ("execution_time", "timestamp", "status", "calculation_type",
+                            "cache_hit", "parameters_hash", "engine_version"):
+                    row.pop(key, None)
+                rows.append(row)
+            except Exception as e:
+                rows.append({"error": str(e)})
+
+        names: List[str] = []
+        seen = set(swept)
+        for row in rows:
+            for name in row:
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+
+        columns: Dict[str, np.ndarray] = dict(swept)
+        for name in names:
+            columns[name] = np.array([row.get(name) for row in rows], dtype=object)
+        return columns
+
+    def _flatten(self, results: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """Преобразование вложенного результата в плоский словарь скалярных значений"""
+        flat = {}
+        for key, value in results.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat.update(self._flatten(value, f"{name}."))
+            elif isinstance(value, (bool, int, float, str)) or value is None:
+                flat[name] = value
+        return flat
+
+    @staticmethod
+    def _to_list(values: np.ndarray) -> List[Any]:
+        """Преобразование колонки в список, совместимый с JSON (inf/nan -> None)"""
+        if values.dtype.kind == "f" and not np.isfinite(values).all():
+            values = np.where(np.isfinite(values), values, None)
+        return values.tolist()
+
+    # ===== ВЕКТОРИЗОВАННЫЕ ЯДРА =====
+    # Формулы повторяют соответствующие методы CalculationEngine
+
+    def _thermal_kernel(self, p: SimpleNamespace) -> Dict[str, Any]:
+        """Теплотехнический расчет (_execute_thermal_calculation)"""
+        inner_resistance = 1 / p.heat_transfer_coefficient_inner
+        outer_resistance = 1 / p.heat_transfer_coefficient_outer
+
+        wall_resistance = p.wall_thickness / p.thermal_conductivity
+        wall_u = 1 / (inner_resistance + wall_resistance + outer_resistance)
+        window_u = np.where(
+            p.window_area == 0, 0.0,
+            1 / (inner_resistance + 1 / p.window_thermal_conductivity + outer_resistance)
+        )
+        floor_u = 1 / (inner_resistance + p.floor_thickness / p.floor_thermal_conductivity + outer_resistance)
+        ceiling_u = 1 / (inner_resistance + p.ceiling_thickness / p.ceiling_thermal_conductivity + outer_resistance)
+
+        total_area = p.wall_area + p.window_area + p.floor_area + p.ceiling_area
+        average_u = (wall_u * p.wall_area + window_u * p.window_area +
+                     floor_u * p.floor_area + ceiling_u * p.ceiling_area) / total_area
+
+        delta_t = p.indoor_temperature - p.outdoor_temperature
+        wall_loss = wall_u * p.wall_area * delta_t
+        window_loss = window_u * p.window_area * delta_t
+        floor_loss = floor_u * p.floor_area * delta_t
+        ceiling_loss = ceiling_u * p.ceiling_area * delta_t
+        transmission_loss = wall_loss + window_loss + floor_loss + ceiling_loss
+
+        ventilation_loss = p.building_volume * p.air_exchange_rate * 1.2 * 1005 * delta_t / 3600
+
+        building_area = np.asarray(p.building_area, dtype=np.float64)
+        has_area = building_area > 0
+        total_heat_loss = transmission_loss + ventilation_loss
+        heat_emissions = p.heat_emission_people + p.heat_emission_equipment + p.heat_emission_lighting
+        specific_consumption = np.where(has_area, total_heat_loss / building_area, 0.0)
+        efficiency_class = np.select(
+            [specific_consumption <= 50, specific_consumption <= 75, specific_consumption <= 100,
+             specific_consumption <= 125, specific_consumption <= 150],
+            ["A+", "A", "B", "C", "D"],
+            default="E"
+        )
+
+        wall_inner_temperature = p.indoor_temperature - (wall_u * delta_t) / p.heat_transfer_coefficient_inner
+        window_inner_temperature = p.indoor_temperature - (window_u * delta_t) / p.heat_transfer_coefficient_inner
+        alpha, beta = 17.27, 237.7
+        gamma = (alpha * p.indoor_temperature) / (beta + p.indoor_temperature) + np.log(p.relative_humidity / 100)
+        dew_point = beta * gamma / (alpha - gamma)
+
+        actual_resistance = 1 / wall_u
+        normative_resistance = p.normative_heat_transfer_resistance
+
+        return {
+            "wall_heat_transfer_coefficient": wall_u,
+            "window_heat_transfer_coefficient": window_u,
+            "floor_heat_transfer_coefficient": floor_u,
+            "ceiling_heat_transfer_coefficient": ceiling_u,
+            "average_heat_transfer_coefficient": average_u,
+            "wall_heat_loss": wall_loss,
+            "window_heat_loss": window_loss,
+            "floor_heat_loss": floor_loss,
+            "ceiling_heat_loss": ceiling_loss,
+            "transmission_heat_loss": transmission_loss,
+            "ventilation_heat_loss": ventilation_loss,
+            "total_heat_loss": total_heat_loss,
+            "heat_balance": heat_emissions - total_heat_loss,
+            "specific_consumption": specific_consumption,
+            "efficiency_class": efficiency_class,
+            "wall_inner_temperature": wall_inner_temperature,
+            "window_inner_temperature": window_inner_temperature,
+            "dew_point_temperature": dew_point,
+            "condensation_risk": (wall_inner_temperature < dew_point) | (window_inner_temperature < dew_point),
+            "actual_resistance": actual_resistance,
+            "meets_requirements": actual_resistance >= normative_resistance,
+            "compliance_percentage": np.where(
+                normative_resistance > 0, actual_resistance / normative_resistance * 100, 0.0
+            )
+        }
+
+    def _ventilation_kernel(self, p: SimpleNamespace) -> Dict[str, Any]:
+        """Расчет воздухообмена (_calculate_air_exchange)"""
+        co2_air_exchange = p.co2_emission_per_person * p.occupancy / 0.001
+        moisture_air_exchange = p.moisture_emission_per_person * p.occupancy * 1000 / 0.5
+        heat_air_exchange = (p.heat_emission_per_person * p.occupancy + p.heat_emission_from_equipment) / (
+            p.specific_heat * p.air_density * (p.exhaust_air_temperature - p.supply_air_temperature)
+        )
+
+        air_exchange_rate = 0.0 if p.air_exchange_rate is None else p.air_exchange_rate
+        air_exchange_per_area = 0.0 if p.air_exchange_per_area is None else p.air_exchange_per_area
+        air_exchange_per_person = 0.0 if p.air_exchange_per_person is None else p.air_exchange_per_person
+
+        air_exchange_by_rate = p.room_volume * air_exchange_rate
+        air_exchange_by_area = p.room_area * air_exchange_per_area
+        air_exchange_by_person = np.where(
+            np.asarray(air_exchange_per_person) != 0,
+            p.occupancy * air_exchange_per_person,
+            p.occupancy * AIR_EXCHANGE_NORMS.get(p.room_type, 30)
+        )
+
+        required_air_exchange = np.maximum.reduce(np.broadcast_arrays(
+            co2_air_exchange, moisture_air_exchange, heat_air_exchange,
+            air_exchange_by_rate, air_exchange_by_area, air_exchange_by_person
+        ))
+
+        room_volume = np.asarray(p.room_volume, dtype=np.float64)
+        return {
+            "required_air_exchange": required_air_exchange,
+            "air_exchange_by_co2": co2_air_exchange,
+            "air_exchange_by_moisture": moisture_air_exchange,
+            "air_exchange_by_heat": heat_air_exchange,
+            "air_exchange_by_rate": air_exchange_by_rate,
+            "air_exchange_by_area": air_exchange_by_area,
+            "air_exchange_by_person": air_exchange_by_person,
+            "air_exchange_rate_actual": np.where(room_volume > 0, required_air_exchange / room_volume, 0.0)
+        }
+
+    def _geological_kernel(self, p: SimpleNamespace) -> Dict[str, Any]:
+        """Несущая способность и осадка (_calculate_bearing_capacity, _calculate_settlement)"""
+        foundation_area = p.foundation_width * p.foundation_length
+        foundation_pressure = (p.building_weight + p.live_load * foundation_area) / foundation_area
+        safety_factor = 2.5
+        allowable_pressure = p.bearing_capacity / safety_factor
+
+        settlement_pressure = p.building_weight / foundation_area
+        settlement = settlement_pressure * p.foundation_width * 1.0 / (p.compression_modulus * 1000)
+        max_settlement = MAX_SETTLEMENTS.get(p.foundation_type, 0.1)
+
+        bearing_ok = foundation_pressure <= allowable_pressure
+        settlement_ok = settlement <= max_settlement
+        return {
+            "foundation_area": foundation_area,
+            "foundation_pressure": foundation_pressure,
+            "allowable_pressure": allowable_pressure,
+            "bearing_capacity_utilization": foundation_pressure / allowable_pressure,
+            "bearing_meets_requirements": bearing_ok,
+            "settlement": settlement,
+            "max_settlement": max_settlement,
+            "settlement_meets_requirements": settlement_ok,
+            "meets_requirements": bearing_ok & settlement_ok
+        }
+
+    def _uav_shock_wave_kernel(self, p: SimpleNamespace) -> Dict[str, Any]:
+        """Воздействие ударной волны от БПЛА (_execute_uav_shock_wave_calculation)"""
+        explosive_equivalent = p.uav_mass * EXPLOSIVE_EQUIVALENTS.get(p.explosive_type, 1.0)
+
+        distance = np.sqrt(p.distance ** 2 + p.explosion_height ** 2)
+        scaled_distance = distance / np.cbrt(explosive_equivalent)
+        pressure = np.select(
+            [scaled_distance < 0.1, scaled_distance < 1.0],
+            [1000.0, 1000 * (0.1 / scaled_distance) ** 2],
+            default=1000 * (0.1 / scaled_distance) ** 2 * np.exp(-scaled_distance + 0.1)
+        )
+        pressure = np.maximum(pressure, 0.1)
+
+        critical_pressure = CRITICAL_PRESSURES.get(p.structure_material, 100)
+        damage_factor = np.select(
+            [pressure < critical_pressure * 0.5, pressure < critical_pressure, pressure < critical_pressure * 2],
+            [0.1, 0.5, 0.8],
+            default=1.0
+        )
+        safety_factor = critical_pressure / pressure
+
+        return {
+            "explosive_equivalent_kg_tnt": explosive_equivalent,
+            "scaled_distance": scaled_distance,
+            "shock_wave_pressure_kpa": pressure,
+            "pressure_ratio": pressure / critical_pressure,
+            "damage_factor": damage_factor,
+            "safety_factor": safety_factor,
+            "meets_safety_requirements": safety_factor >= 1.0
+        }
@@ -0,0 +1,127 @@
+"""
+Пакетный экспорт расчетов в DOCX (один документ или ZIP)
+"""
+import logging
+import math
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, Any, List, Optional, Callable
+
+from config import DOCX_EXPORT_PROCESSES, DOCX_EXPORT_PARALLEL_THRESHOLD
+from utils.calculation_docx_generator import CalculationDOCXGenerator
+from utils.process_pool import create_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Генератор дочернего процесса: шаблон разбирается один раз на процесс
+_worker_generator: Optional[CalculationDOCXGenerator] = None
+
+
+def _get_worker_generator() -> CalculationDOCXGenerator:
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = CalculationDOCXGenerator()
+    return _worker_generator
+
+
+def render_reports(calculations: List[Dict[str, Any]]) -> List[bytes]:
+    """Отдельные DOCX отчеты по расчетам части выгрузки"""
+    generator = _get_worker_generator()
+    return [generator.generate_calculation_report(calculation) for calculation in calculations]
+
+
+def render_report_bodies(calculations: List[Dict[str, Any]]) -> List[bytes]:
+    """XML элементы тела общего документа для части выгрузки"""
+    return _get_worker_generator().render_body_xml(calculations)
+
+
+def calculation_to_report_data(calculation) -> Dict[str, Any]:
+    """Данные расчета (CalculationResponse) в формате генератора отчетов"""
+    data = calculation.model_dump(mode="json")
+    results = data.get("result") or {}
+    data["results"] = results
+    if results.get("execution_time") is not None:
+        data["execution_time"] = results["execution_time"]
+    return data
+
+
+class CalculationBulkExporter:
+    """Пакетный экспорт отчетов по расчетам.
+
+    Выгрузка делится на непрерывные части, которые строятся в пуле процессов;
+    части склеиваются в исходном порядке. Небольшие выгрузки строятся
+    в текущем процессе.
+    """
+
+    def __init__(self, processes: int = DOCX_EXPORT_PROCESSES,
+                 parallel_threshold: int = DOCX_EXPORT_PARALLEL_THRESHOLD):
+        self.processes = max(1, processes)
+        self.parallel_threshold = max(1, parallel_threshold)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def export_docx(self, calculations: List[Dict[str, Any]]) -> bytes:
+        """Один DOCX со всеми отчетами (каждый с новой страницы)"""
+        start_time = time.time()
+        parts = self._map_chunks(render_report_bodies, calculations)
+
+        generator = CalculationDOCXGenerator()
+        generator.new_combined_document()
+        for index, elements in enumerate(parts):
+            generator.append_body_xml(elements, page_break=index > 0)
+        content = generator.save_document()
+
+        logger.info(f"📄 [DOCX_EXPORT] Combined report for {len(calculations)} calculations "
+                    f"in {time.time() - start_time:.2f}s, size: {len(content)} bytes")
+        return content
+
+    def export_zip(self, calculations: List[Dict[str, Any]]) -> bytes:
+        """ZIP архив с отдельным DOCX на каждый расчет"""
+        start_time = time.time()
+        parts = self._map_chunks(render_reports, calculations)
+
+        buffer = BytesIO()
+        # DOCX уже сжат - повторное сжатие только тратит время
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            reports = (report for part in parts for report in part)
+            for calculation, report in zip(calculations, reports):
+                archive.writestr(f"calculation_{calculation.get('id')}.docx", report)
+        content = buffer.getvalue()
+
+        logger.info(f"📄 [DOCX_EXPORT] ZIP with {len(calculations)} reports "
+                    f"in {time.time() - start_time:.2f}s, size: {len(content)} bytes")
+        return content
+
+    def shutdown(self):
+        """Остановка пула процессов"""
+        with self._lock:
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _map_chunks(self, render: Callable[[List[Dict[str, Any]]], Any],
+                    calculations: List[Dict[str, Any]]) -> List[Any]:
+        """Построение частей выгрузки (в исходном порядке)"""
+        chunks_count = min(self.processes, math.ceil(len(calculations) / self.parallel_threshold))
+        if chunks_count <= 1:
+            return [render(calculations)]
+
+        size = math.ceil(len(calculations) / chunks_count)
+        chunks = [calculations[start:start + size] for start in range(0, len(calculations), size)]
+        try:
+            return list(self._get_pool().map(render, chunks))
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            raise
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = create_process_pool(self.processes, ["utils.calculation_docx_export"])
+                logger.info(f"✅ [DOCX_EXPORT] Export process pool started ({self.processes} processes)")
+            return self._pool
@@ -1,54 +1,219 @@
 import json
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any, List
+from io import BytesIO
+from typing import Dict, Any, List, Optional
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
 logger = logging.getLogger(__name__)
 
+# Справочники для оформления отчета (общие для всех отчетов)
+CALCULATION_TYPE_NAMES = {
+    'structural': 'Строительные конструкции',
+    'foundation': 'Основания и фундаменты',
+    'thermal': 'Теплотехнические расчеты',
+    'ventilation': 'Вентиляция и кондиционирование',
+    'electrical': 'Электротехнические расчеты',
+    'water': 'Водоснабжение и водоотведение',
+    'fire': 'Пожарная безопасность',
+    'acoustic': 'Акустические расчеты',
+    'lighting': 'Освещение и инсоляция',
+    'geotechnical': 'Инженерно-геологические расчеты'
+}
+
+CALCULATION_CATEGORY_NAMES = {
+    'strength': 'Расчёт на прочность',
+    'stability': 'Расчёт на устойчивость',
+    'stiffness': 'Расчёт на жёсткость',
+    'cracking': 'Расчёт на трещиностойкость',
+    'dynamic': 'Динамический расчёт',
+    'bearing_capacity': 'Расчёт несущей способности основания',
+    'settlement': 'Расчёт осадок фундамента',
+    'slope_stability': 'Расчёт устойчивости откосов',
+    'pile_foundation': 'Расчёт свайных фундаментов',
+    'retaining_wall': 'Расчёт подпорных стен',
+    'heat_transfer': 'Расчёт теплопередачи через ограждения',
+    'insulation': 'Расчёт теплоизоляции',
+    'energy_efficiency': 'Расчёт энергоэффективности здания',
+    'condensation': 'Расчёт конденсации влаги',
+    'thermal_bridge': 'Расчёт тепловых мостов',
+    'air_exchange': 'Расчёт воздухообмена',
+    'duct_sizing': 'Расчёт воздуховодов',
+    'fan_selection': 'Подбор вентиляторов',
+    'cooling_load': 'Расчёт холодильной нагрузки',
+    'humidity_control': 'Расчёт влажностного режима'
+}
+
+APPLICABLE_NORMS = {
+    'structural': {
+        'strength': ['СП 63.13330', 'СП 16.13330', 'EN 1992', 'EN 1993'],
+        'stability': ['СП 16.13330', 'СП 63.13330', 'EN 1993'],
+        'stiffness': ['СП 63.13330', 'СП 64.13330', 'EN 1995'],
+        'cracking': ['СП 63.13330', 'EN 1992'],
+        'dynamic': ['СП 14.13330', 'EN 1998']
+    },
+    'foundation': {
+        'bearing_capacity': ['СП 22.13330.2016', 'СП 24.13330.2011', 'СП 25.13330.2012'],
+        'settlement': ['СП 22.13330.2016', 'СП 24.13330.2011'],
+        'slope_stability': ['СП 22.13330.2016', 'СП 47.13330.2016'],
+        'pile_foundation': ['СП 24.13330.2011', 'СП 25.13330.2012'],
+        'retaining_wall': ['СП 22.13330.2016', 'СП 63.13330.2018']
+    },
+    'thermal': {
+        'heat_transfer': ['СП 50.13330.2012', 'СП 23-101-2004', 'ГОСТ 30494-2011'],
+        'insulation': ['СП 50.13330.2012', 'СП 23-101-2004'],
+        'energy_efficiency': ['СП 50.13330.2012', 'СП 23-101-2004', 'ГОСТ 30494-2011'],
+        'condensation': ['СП 50.13330.2012', 'СП 23-101-2004'],
+        'thermal_bridge': ['СП 50.13330.2012', 'СП 23-101-2004']
+    },
+    'ventilation': {
+        'air_exchange': ['СП 60.13330.2016', 'НПБ 250-97', 'СП 54.13330.2016'],
+        'duct_sizing': ['СП 60.13330.2016', 'НПБ 250-97'],
+        'fan_selection': ['СП 60.13330.2016', 'НПБ 250-97'],
+        'cooling_load': ['СП 60.13330.2016', 'НПБ 250-97'],
+        'humidity_control': ['СП 60.13330.2016', 'НПБ 250-97']
+    },
+    'fire_safety': {
+        'evacuation': ['123-ФЗ', 'ГОСТ 12.1.004-91'],
+        'fire_suppression': ['НПБ 88-2001', '123-ФЗ'],
+        'smoke_control': ['НПБ 250-97', '123-ФЗ'],
+        'fire_resistance': ['ГОСТ 30247.1-94', '123-ФЗ'],
+        'emergency_systems': ['123-ФЗ', 'ГОСТ 12.1.004-91']
+    }
+}
+
+PARAMETER_NAMES = {
+    'load_value': 'Расчетная нагрузка',
+    'section_area': 'Площадь сечения',
+    'material_strength': 'Расчетное сопротивление материала',
+    'safety_factor': 'Коэффициент надежности',
+    'foundation_width': 'Ширина фундамента',
+    'foundation_length': 'Длина фундамента',
+    'foundation_depth': 'Глубина заложения',
+    'soil_cohesion': 'Сцепление грунта',
+    'soil_friction_angle': 'Угол внутреннего трения',
+    'soil_density': 'Плотность грунта',
+    'wall_thickness': 'Толщина стены',
+    'wall_area': 'Площадь стены',
+    'thermal_conductivity': 'Коэффициент теплопроводности',
+    'indoor_temp': 'Внутренняя температура',
+    'outdoor_temp': 'Наружная температура',
+    'room_volume': 'Объем помещения',
+    'room_area': 'Площадь помещения',
+    'occupancy': 'Количество людей',
+    'air_flow_rate': 'Расход воздуха',
+    'duct_length': 'Длина воздуховода'
+}
+
+PARAMETER_UNITS = {
+    'load_value': 'кН',
+    'section_area': 'см²',
+    'material_strength': 'МПа',
+    'safety_factor': '',
+    'foundation_width': 'м',
+    'foundation_length': 'м',
+    'foundation_depth': 'м',
+    'soil_cohesion': 'кПа',
+    'soil_friction_angle': 'град',
+    'soil_density': 'т/м³',
+    'wall_thickness': 'м',
+    'wall_area': 'м²',
+    'thermal_conductivity': 'Вт/(м·К)',
+    'indoor_temp': '°C',
+    'outdoor_temp': '°C',
+    'room_volume': 'м³',
+    'room_area': 'м²',
+    'occupancy': 'чел',
+    'air_flow_rate': 'м³/ч',
+    'duct_length': 'м'
+}
+
+RESULT_NAMES = {
+    'bearing_capacity': 'Несущая способность',
+    'safety_factor': 'Коэффициент запаса',
+    'settlement': 'Осадка',
+    'heat_transfer_coefficient': 'Коэффициент теплопередачи',
+    'heat_loss': 'Тепловые потери',
+    'thermal_resistance': 'Термическое сопротивление',
+    'air_exchange_rate': 'Кратность воздухообмена',
+    'pressure_loss': 'Потери давления',
+    'fan_power': 'Мощность вентилятора',
+    'cooling_capacity': 'Холодильная мощность'
+}
+
+RESULT_UNITS = {
+    'bearing_capacity': 'кПа',
+    'safety_factor': '',
+    'settlement': 'мм',
+    'heat_transfer_coefficient': 'Вт/(м²·К)',
+    'heat_loss': 'Вт',
+    'thermal_resistance': 'м²·К/Вт',
+    'air_exchange_rate': '1/ч',
+    'pressure_loss': 'Па',
+    'fan_power': 'кВт',
+    'cooling_capacity': 'кВт'
+}
+
+STATUS_TEXTS = {
+    'created': 'Создан',
+    'in_progress': 'Выполняется',
+    'completed': 'Завершен',
+    'error': 'Ошибка',
+    'unknown': 'Неизвестно'
+}
+
+
+# Стили шаблона, используемые в отчете
+REPORT_STYLES = ("Title", "Heading 1", "Table Grid")
+
+_template_bytes: Optional[bytes] = None
+_template_lock = threading.Lock()
+
+
+def _get_template_bytes() -> bytes:
+    """Пустой документ-шаблон отчета (строится один раз на процесс)"""
+    global _template_bytes
+    if _template_bytes is None:
+        with _template_lock:
+            if _template_bytes is None:
+                document = Document()
+                CalculationDOCXGenerator._setup_styles(document)
+                buffer = BytesIO()
+                document.save(buffer)
+                _template_bytes = buffer.getvalue()
+    return _template_bytes
+
+
 class CalculationDOCXGenerator:
-    """Генератор DOCX отчетов для инженерных расчетов"""
+    """Генератор DOCX отчетов для инженерных расчетов.
+    
+    Шаблон документа разбирается один раз на экземпляр и переиспользуется:
+    перед каждым отчетом из него удаляется содержимое тела. Экземпляр
+    не потокобезопасен - каждому потоку или процессу нужен свой.
+    """
     
     def __init__(self):
         self.document = None
         self.default_font = 'Times New Roman'
         self.bold_font = 'Times New Roman'
+        self._template = None
+        self._style_ids = {}
         
     def generate_calculation_report(self, calculation_data: Dict[str, Any]) -> bytes:
         """Генерация DOCX отчета для расчета"""
         try:
             logger.info(f"📄 [DOCX_GENERATOR] Generating calculation report for: {calculation_data.get('name', 'Unknown')}")
             
-            # Создаем новый документ
-            self.document = Document()
-            self._setup_styles()
-            
-            # Заголовок отчета
-            self._create_header(calculation_data)
-            
-            # Информация о расчете
-            self._create_calculation_info_section(calculation_data)
-            
-            # Параметры расчета
-            self._create_parameters_section(calculation_data)
-            
-            # Результаты расчета
-            if calculation_data.get('results'):
-                self._create_results_section(calculation_data)
-            
-            # Заключение
-            self._create_conclusion_section(calculation_data)
-            
-            # Сохраняем документ в буфер
-            from io import BytesIO
-            buffer = BytesIO()
-            self.document.save(buffer)
-            buffer.seek(0)
-            docx_content = buffer.getvalue()
-            buffer.close()
+            self._new_document()
+            self._render_calculation(calculation_data)
+            docx_content = self._save()
             
             logger.info(f"📄 [DOCX_GENERATOR] Calculation report generated successfully, size: {len(docx_content)} bytes")
             return docx_content
@@ -57,20 +222,112 @@ class CalculationDOCXGenerator:
             logger.error(f"❌ [DOCX_GENERATOR] Error generating calculation report: {e}")
             raise
     
-    def _setup_styles(self):
-        """Настройка стилей документа"""
+    def render_body_xml(self, calculations: List[Dict[str, Any]]) -> List[bytes]:
+        """Отчеты по расчетам в виде XML элементов тела документа.
+        
+        Используется для сборки общего документа из частей, подготовленных
+        в разных процессах: все части строятся из одного шаблона и ссылаются
+        на одни и те же стили.
+        """
+        self._new_document()
+        self._render_calculations(calculations)
+        return [
+            etree.tostring(child) for child in self.document.element.body
+            if child.tag != qn('w:sectPr')
+        ]
+    
+    def append_body_xml(self, elements: List[bytes], page_break: bool = False):
+        """Добавление элементов тела (из render_body_xml) в текущий документ"""
+        if page_break:
+            self.document.add_page_break()
+        sect_pr = self.document.element.body.find(qn('w:sectPr'))
+        for element_xml in elements:
+            element = parse_xml(element_xml)
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                self.document.element.body.append(element)
+    
+    def new_combined_document(self):
+        """Начало общего документа, собираемого через append_body_xml"""
+        self._new_document()
+    
+    def save_document(self) -> bytes:
+        """Сохранение текущего документа"""
+        return self._save()
+    
+    def _new_document(self):
+        """Пустой документ на основе шаблона"""
+        if self._template is None:
+            self._template = Document(BytesIO(_get_template_bytes()))
+            # Назначение стиля по имени или объекту каждый раз обходит все стили
+            # документа - идентификаторы стилей определяем один раз
+            self._style_ids = {name: self._template.styles[name].style_id for name in REPORT_STYLES}
+        body = self._template.element.body
+        for child in list(body):
+            if child.tag != qn('w:sectPr'):
+                body.remove(child)
+        self.document = self._template
+        return self.document
+    
+    def _save(self) -> bytes:
+        """Сохранение документа в байты"""
+        buffer = BytesIO()
+        self.document.save(buffer)
+        return buffer.getvalue()
+    
+    def _render_calculations(self, calculations: List[Dict[str, Any]]):
+        """Добавление отчетов по расчетам, каждый с новой страницы"""
+        for index, calculation_data in enumerate(calculations):
+            if index:
+                self.document.add_page_break()
+            self._render_calculation(calculation_data)
+    
+    def _render_calculation(self, calculation_data: Dict[str, Any]):
+        """Добавление отчета по расчету в текущий документ"""
+        # Заголовок отчета
+        self._create_header(calculation_data)
+        
+        # Информация о расчете
+        self._create_calculation_info_section(calculation_data)
+        
+        # Параметры расчета
+        self._create_parameters_section(calculation_data)
+        
+        # Результаты расчета
+        if calculation_data.get('results'):
+            self._create_results_section(calculation_data)
+        
+        # Заключение
+        self._create_conclusion_section(calculation_data)
+    
+    @staticmethod
+    def _setup_styles(document):
+        """Настройка стилей документа-шаблона"""
         # Основные стили будут применяться при создании элементов
         pass
     
+    def _add_heading(self, text: str, level: int):
+        """Заголовок (как Document.add_heading, но с заранее найденным стилем)"""
+        style = "Title" if level == 0 else f"Heading {level}"
+        paragraph = self.document.add_paragraph(text)
+        paragraph._p.style = self._style_ids[style]
+        return paragraph
+    
+    @staticmethod
+    def _table_cells(table) -> List[List[Any]]:
+        """Ячейки таблицы по строкам"""
+        return [list(row.cells) for row in table.rows]
+    
     def _create_header(self, calculation_data: Dict[str, Any]):
         """Создание заголовка отчета"""
         # Основной заголовок
-        title = self.document.add_heading("ОТЧЕТ О ИНЖЕНЕРНОМ РАСЧЕТЕ", 0)
+        title = self._add_heading("ОТЧЕТ О ИНЖЕНЕРНОМ РАСЧЕТЕ", 0)
         title.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
         # Информация о расчете
         info_table = self.document.add_table(rows=6, cols=2)
-        info_table.style = 'Table Grid'
+        info_table._tbl.tblStyle_val = self._style_ids['Table Grid']
         info_table.alignment = WD_TABLE_ALIGNMENT.CENTER
         
         # Заполняем таблицу
@@ -83,20 +340,20 @@ class CalculationDOCXGenerator:
             ("Статус:", self._get_status_text(calculation_data.get('status', 'unknown')))
         ]
         
-        for i, (label, value) in enumerate(info_data):
-            info_table.cell(i, 0).text = label
-            info_table.cell(i, 1).text = str(value)
+        for (label_cell, value_cell), (label, value) in zip(self._table_cells(info_table), info_data):
+            label_cell.text = label
+            value_cell.text = str(value)
             
             # Стилизация
-            info_table.cell(i, 0).paragraphs[0].runs[0].bold = True
-            info_table.cell(i, 0).paragraphs[0].runs[0].font.name = self.bold_font
-            info_table.cell(i, 1).paragraphs[0].runs[0].font.name = self.default_font
+            label_cell.paragraphs[0].runs[0].bold = True
+            label_cell.paragraphs[0].runs[0].font.name = self.bold_font
+            value_cell.paragraphs[0].runs[0].font.name = self.default_font
         
         self.document.add_paragraph()
     
     def _create_calculation_info_section(self, calculation_data: Dict[str, Any]):
         """Создание раздела с информацией о расчете"""
-        self.document.add_heading("1. ИНФОРМАЦИЯ О РАСЧЕТЕ", 1)
+        self._add_heading("1. ИНФОРМАЦИЯ О РАСЧЕТЕ", 1)
         
         # Описание
         if calculation_data.get('description'):
@@ -121,7 +378,7 @@ class CalculationDOCXGenerator:
     
     def _create_parameters_section(self, calculation_data: Dict[str, Any]):
         """Создание раздела с параметрами расчета"""
-        self.document.add_heading("2. ПАРАМЕТРЫ РАСЧЕТА", 1)
+        self._add_heading("2. ПАРАМЕТРЫ РАСЧЕТА", 1)
         
         parameters = calculation_data.get('parameters', {})
         if not parameters:
@@ -130,10 +387,11 @@ class CalculationDOCXGenerator:
         
         # Создаем таблицу параметров
         params_table = self.document.add_table(rows=len(parameters) + 1, cols=3)
-        params_table.style = 'Table Grid'
+        params_table._tbl.tblStyle_val = self._style_ids['Table Grid']
         
         # Заголовки таблицы
-        header_cells = params_table.rows[0].cells
+        table_cells = self._table_cells(params_table)
+        header_cells = table_cells[0]
         header_cells[0].text = "Параметр"
         header_cells[1].text = "Значение"
         header_cells[2].text = "Единица измерения"
@@ -145,20 +403,20 @@ class CalculationDOCXGenerator:
         
         # Заполняем таблицу параметрами
         for i, (param_name, param_value) in enumerate(parameters.items(), 1):
-            row = params_table.rows[i]
-            row.cells[0].text = self._format_parameter_name(param_name)
-            row.cells[1].text = str(param_value)
-            row.cells[2].text = self._get_parameter_unit(param_name)
+            row_cells = table_cells[i]
+            row_cells[0].text = self._format_parameter_name(param_name)
+            row_cells[1].text = str(param_value)
+            row_cells[2].text = self._get_parameter_unit(param_name)
             
             # Стилизация
-            for cell in row.cells:
+            for cell in row_cells:
                 cell.paragraphs[0].runs[0].font.name = self.default_font
         
         self.document.add_paragraph()
     
     def _create_results_section(self, calculation_data: Dict[str, Any]):
         """Создание раздела с результатами расчета"""
-        self.document.add_heading("3. РЕЗУЛЬТАТЫ РАСЧЕТА", 1)
+        self._add_heading("3. РЕЗУЛЬТАТЫ РАСЧЕТА", 1)
         
         results = calculation_data.get('results', {})
         if not results:
@@ -167,10 +425,11 @@ class CalculationDOCXGenerator:
         
         # Создаем таблицу результатов
         results_table = self.document.add_table(rows=len(results) + 1, cols=3)
-        results_table.style = 'Table Grid'
+        results_table._tbl.tblStyle_val = self._style_ids['Table Grid']
         
         # Заголовки таблицы
-        header_cells = results_table.rows[0].cells
+        table_cells = self._table_cells(results_table)
+        header_cells = table_cells[0]
         header_cells[0].text = "Результат"
         header_cells[1].text = "Значение"
         header_cells[2].text = "Единица измерения"
@@ -182,20 +441,20 @@ class CalculationDOCXGenerator:
         
         # Заполняем таблицу результатами
         for i, (result_name, result_value) in enumerate(results.items(), 1):
-            row = results_table.rows[i]
-            row.cells[0].text = self._format_result_name(result_name)
-            row.cells[1].text = self._format_result_value(result_value)
-            row.cells[2].text = self._get_result_unit(result_name)
+            row_cells = table_cells[i]
+            row_cells[0].text = self._format_result_name(result_name)
+            row_cells[1].text = self._format_result_value(result_value)
+            row_cells[2].text = self._get_result_unit(result_name)
             
             # Стилизация
-            for cell in row.cells:
+            for cell in row_cells:
                 cell.paragraphs[0].runs[0].font.name = self.default_font
         
         self.document.add_paragraph()
     
     def _create_conclusion_section(self, calculation_data: Dict[str, Any]):
         """Создание раздела с заключением"""
-        self.document.add_heading("4. ЗАКЛЮЧЕНИЕ", 1)
+        self._add_heading("4. ЗАКЛЮЧЕНИЕ", 1)
         
         # Статус расчета
         status = calculation_data.get('status', 'unknown')
@@ -227,155 +486,27 @@ class CalculationDOCXGenerator:
     
     def _get_calculation_type_name(self, calculation_type: str) -> str:
         """Получение названия типа расчета"""
-        type_names = {
-            'structural': 'Строительные конструкции',
-            'foundation': 'Основания и фундаменты',
-            'thermal': 'Теплотехнические расчеты',
-            'ventilation': 'Вентиляция и кондиционирование',
-            'electrical': 'Электротехнические расчеты',
-            'water': 'Водоснабжение и водоотведение',
-            'fire': 'Пожарная безопасность',
-            'acoustic': 'Акустические расчеты',
-            'lighting': 'Освещение и инсоляция',
-            'geotechnical': 'Инженерно-геологические расчеты'
-        }
-        return type_names.get(calculation_type, calculation_type)
+        return CALCULATION_TYPE_NAMES.get(calculation_type, calculation_type)
     
     def _get_calculation_category_name(self, category: str) -> str:
         """Получение названия категории расчета"""
-        category_names = {
-            'strength': 'Расчёт на прочность',
-            'stability': 'Расчёт на устойчивость',
-            'stiffness': 'Расчёт на жёсткость',
-            'cracking': 'Расчёт на трещиностойкость',
-            'dynamic': 'Динамический расчёт',
-            'bearing_capacity': 'Расчёт несущей способности основания',
-            'settlement': 'Расчёт осадок фундамента',
-            'slope_stability': 'Расчёт устойчивости откосов',
-            'pile_foundation': 'Расчёт свайных фундаментов',
-            'retaining_wall': 'Расчёт подпорных стен',
-            'heat_transfer': 'Расчёт теплопередачи через ограждения',
-            'insulation': 'Расчёт теплоизоляции',
-            'energy_efficiency': 'Расчёт энергоэффективности здания',
-            'condensation': 'Расчёт конденсации влаги',
-            'thermal_bridge': 'Расчёт тепловых мостов',
-            'air_exchange': 'Расчёт воздухообмена',
-            'duct_sizing': 'Расчёт воздуховодов',
-            'fan_selection': 'Подбор вентиляторов',
-            'cooling_load': 'Расчёт холодильной нагрузки',
-            'humidity_control': 'Расчёт влажностного режима'
-        }
-        return category_names.get(category, category)
+        return CALCULATION_CATEGORY_NAMES.get(category, category)
     
     def _get_applicable_norms(self, calculation_type: str, category: str) -> List[str]:
         """Получение списка применяемых норм"""
-        norms_map = {
-            'structural': {
-                'strength': ['СП 63.13330', 'СП 16.13330', 'EN 1992', 'EN 1993'],
-                'stability': ['СП 16.13330', 'СП 63.13330', 'EN 1993'],
-                'stiffness': ['СП 63.13330', 'СП 64.13330', 'EN 1995'],
-                'cracking': ['СП 63.13330', 'EN 1992'],
-                'dynamic': ['СП 14.13330', 'EN 1998']
-            },
-            'foundation': {
-                'bearing_capacity': ['СП 22.13330.2016', 'СП 24.13330.2011', 'СП 25.13330.2012'],
-                'settlement': ['СП 22.13330.2016', 'СП 24.13330.2011'],
-                'slope_stability': ['СП 22.13330.2016', 'СП 47.13330.2016'],
-                'pile_foundation': ['СП 24.13330.2011', 'СП 25.13330.2012'],
-                'retaining_wall': ['СП 22.13330.2016', 'СП 63.13330.2018']
-            },
-            'thermal': {
-                'heat_transfer': ['СП 50.13330.2012', 'СП 23-101-2004', 'ГОСТ 30494-2011'],
-                'insulation': ['СП 50.13330.2012', 'СП 23-101-2004'],
-                'energy_efficiency': ['СП 50.13330.2012', 'СП 23-101-2004', 'ГОСТ 30494-2011'],
-                'condensation': ['СП 50.13330.2012', 'СП 23-101-2004'],
-                'thermal_bridge': ['СП 50.13330.2012', 'СП 23-101-2004']
-            },
-            'ventilation': {
-                'air_exchange': ['СП 60.13330.2016', 'НПБ 250-97', 'СП 54.13330.2016'],
-                'duct_sizing': ['СП 60.13330.2016', 'НПБ 250-97'],
-                'fan_selection': ['СП 60.13330.2016', 'НПБ 250-97'],
-                'cooling_load': ['СП 60.13330.2016', 'НПБ 250-97'],
-                'humidity_control': ['СП 60.13330.2016', 'НПБ 250-97']
-            },
-            'fire_safety': {
-                'evacuation': ['123-ФЗ', 'ГОСТ 12.1.004-91'],
-                'fire_suppression': ['НПБ 88-2001', '123-ФЗ'],
-                'smoke_control': ['НПБ 250-97', '123-ФЗ'],
-                'fire_resistance': ['ГОСТ 30247.1-94', '123-ФЗ'],
-                'emergency_systems': ['123-ФЗ', 'ГОСТ 12.1.004-91']
-            }
-        }
-        
-        return norms_map.get(calculation_type, {}).get(category, [])
+        return APPLICABLE_NORMS.get(calculation_type, {}).get(category, [])
     
     def _format_parameter_name(self, param_name: str) -> str:
         """Форматирование названия параметра"""
-        param_names = {
-            'load_value': 'Расчетная нагрузка',
-            'section_area': 'Площадь сечения',
-            'material_strength': 'Расчетное сопротивление материала',
-            'safety_factor': 'Коэффициент надежности',
-            'foundation_width': 'Ширина фундамента',
-            'foundation_length': 'Длина фундамента',
-            'foundation_depth': 'Глубина заложения',
-            'soil_cohesion': 'Сцепление грунта',
-            'soil_friction_angle': 'Угол внутреннего трения',
-            'soil_density': 'Плотность грунта',
-            'wall_thickness': 'Толщина стены',
-            'wall_area': 'Площадь стены',
-            'thermal_conductivity': 'Коэффициент теплопроводности',
-            'indoor_temp': 'Внутренняя температура',
-            'outdoor_temp': 'Наружная температура',
-            'room_volume': 'Объем помещения',
-            'room_area': 'Площадь помещения',
-            'occupancy': 'Количество людей',
-            'air_flow_rate': 'Расход воздуха',
-            'duct_length': 'Длина воздуховода'
-        }
-        return param_names.get(param_name, param_name.replace('_', ' ').title())
+        return PARAMETER_NAMES.get(param_name, param_name.replace('_', ' ').title())
     
     def _get_parameter_unit(self, param_name: str) -> str:
         """Получение единицы измерения параметра"""
-        units = {
-            'load_value': 'кН',
-            'section_area': 'см²',
-            'material_strength': 'МПа',
-            'safety_factor': '',
-            'foundation_width': 'м',
-            'foundation_length': 'м',
-            'foundation_depth': 'м',
-            'soil_cohesion': 'кПа',
-            'soil_friction_angle': 'град',
-            'soil_density': 'т/м³',
-            'wall_thickness': 'м',
-            'wall_area': 'м²',
-            'thermal_conductivity': 'Вт/(м·К)',
-            'indoor_temp': '°C',
-            'outdoor_temp': '°C',
-            'room_volume': 'м³',
-            'room_area': 'м²',
-            'occupancy': 'чел',
-            'air_flow_rate': 'м³/ч',
-            'duct_length': 'м'
-        }
-        return units.get(param_name, '')
+        return PARAMETER_UNITS.get(param_name, '')
     
     def _format_result_name(self, result_name: str) -> str:
         """Форматирование названия результата"""
-        result_names = {
-            'bearing_capacity': 'Несущая способность',
-            'safety_factor': 'Коэффициент запаса',
-            'settlement': 'Осадка',
-            'heat_transfer_coefficient': 'Коэффициент теплопередачи',
-            'heat_loss': 'Тепловые потери',
-            'thermal_resistance': 'Термическое сопротивление',
-            'air_exchange_rate': 'Кратность воздухообмена',
-            'pressure_loss': 'Потери давления',
-            'fan_power': 'Мощность вентилятора',
-            'cooling_capacity': 'Холодильная мощность'
-        }
-        return result_names.get(result_name, result_name.replace('_', ' ').title())
+        return RESULT_NAMES.get(result_name, result_name.replace('_', ' ').title())
     
     def _format_result_value(self, result_value: Any) -> str:
         """Форматирование значения результата"""
@@ -385,30 +516,11 @@ class CalculationDOCXGenerator:
     
     def _get_result_unit(self, result_name: str) -> str:
         """Получение единицы измерения результата"""
-        units = {
-            'bearing_capacity': 'кПа',
-            'safety_factor': '',
-            'settlement': 'мм',
-            'heat_transfer_coefficient': 'Вт/(м²·К)',
-            'heat_loss': 'Вт',
-            'thermal_resistance': 'м²·К/Вт',
-            'air_exchange_rate': '1/ч',
-            'pressure_loss': 'Па',
-            'fan_power': 'кВт',
-            'cooling_capacity': 'кВт'
-        }
-        return units.get(result_name, '')
+        return RESULT_UNITS.get(result_name, '')
     
     def _get_status_text(self, status: str) -> str:
         """Получение текста статуса"""
-        status_texts = {
-            'created': 'Создан',
-            'in_progress': 'Выполняется',
-            'completed': 'Завершен',
-            'error': 'Ошибка',
-            'unknown': 'Неизвестно'
-        }
-        return status_texts.get(status, status)
+        return STATUS_TEXTS.get(status, status)
     
     def _format_date(self, date_str: str) -> str:
         """Форматирование даты"""
@@ -0,0 +1,20 @@
+"""
+Пулы процессов сервиса расчетов
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+
+def create_process_pool(workers: int, preload: List[str]) -> ProcessPoolExecutor:
+    """Пул процессов для CPU-емкой работы (части серий, выгрузка DOCX).
+
+    Процессы запускаются через forkserver с заранее импортированными модулями
+    preload и не наследуют соединения с БД и потоки сервиса. Поэтому функции,
+    которые выполняются в пуле, не должны импортировать calculations (импорт
+    открывает пул соединений с БД). Упавший процесс переводит пул в
+    BrokenProcessPool: владелец сбрасывает пул, следующий вызов создает новый.
+    """
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(preload)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
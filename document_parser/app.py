@@ -7,15 +7,21 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
 import uvicorn
 
-from core.config import LOG_LEVEL, LOG_FORMAT
+from core.config import (
+    LOG_LEVEL, LOG_FORMAT, CHECKABLE_FILES_DIR, MAX_CHECKABLE_DOCUMENT_SIZE,
+    LARGE_FILE_MAX_CONCURRENCY, UPLOAD_MEMORY_WAIT_TIMEOUT
+)
 from database.connection import DatabaseConnection
 from services.norm_control_service import NormControlService
 from services.hierarchical_check_service import HierarchicalCheckService
 from services.document_processor import DocumentProcessor
-from utils.memory_utils import log_memory_usage
+from services.check_result_cache import CheckResultCache
+from services.report_artifact_store import ReportArtifactStore, REPORT_MEDIA_TYPES
+from utils.memory_utils import log_memory_usage, MemoryPressureGate, MemoryPressureTimeout
+from utils.file_utils import spool_upload_to_file, cleanup_temp_file, FileTooLargeError
 
 # Настройка логирования
 logging.basicConfig(
@@ -33,8 +39,13 @@ db_connection = None
 norm_control_service = None
 hierarchical_check_service = None
 document_processor = None
+check_result_cache = None
+report_artifact_store = None
 startup_time = None
 
+# Общий шлюз для загрузки и разбора больших файлов
+large_file_gate = MemoryPressureGate(LARGE_FILE_MAX_CONCURRENCY)
+
 def signal_handler(signum, frame):
     """Обработчик сигналов для graceful shutdown"""
     logger.info(f"Received signal {signum}, starting graceful shutdown...")
@@ -49,7 +60,7 @@ signal.signal(signal.SIGINT, signal_handler)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
-    global db_connection, norm_control_service, hierarchical_check_service, document_processor, startup_time
+    global db_connection, norm_control_service, hierarchical_check_service, document_processor, check_result_cache, report_artifact_store, startup_time
     
     # Startup
     startup_time = datetime.now()
@@ -62,14 +73,16 @@ async def lifespan(app: FastAPI):
         
         # Инициализация сервисов
         logger.info("🔍 [STARTUP] Initializing services...")
+        check_result_cache = CheckResultCache(db_connection)
+        report_artifact_store = ReportArtifactStore()
         logger.info("🔍 [STARTUP] Creating NormControlService...")
         norm_control_service = NormControlService(db_connection)
         logger.info("🔍 [STARTUP] NormControlService created successfully")
         logger.info("🔍 [STARTUP] Creating HierarchicalCheckService...")
-        hierarchical_check_service = HierarchicalCheckService(db_connection)
+        hierarchical_check_service = HierarchicalCheckService(db_connection, check_result_cache)
         logger.info("🔍 [STARTUP] HierarchicalCheckService created successfully")
         logger.info("🔍 [STARTUP] Creating DocumentProcessor...")
-        document_processor = DocumentProcessor(db_connection)
+        document_processor = DocumentProcessor(db_connection, check_result_cache)
         logger.info("🔍 [STARTUP] DocumentProcessor created successfully")
         
         # Логирование использования памяти
@@ -103,10 +116,14 @@ from starlette.responses import Response
 
 class LargeFileMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        # Увеличиваем лимит для загрузки файлов
-        if request.url.path.startswith("/upload"):
-            # Устанавливаем больший лимит для загрузки
-            request.scope["client_max_size"] = 100 * 1024 * 1024  # 100 MB
+        # Отклоняем заведомо слишком большие загрузки до чтения тела запроса
+        if request.url.path.startswith("/upload") or request.url.path.endswith("/reprocess"):
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > MAX_CHECKABLE_DOCUMENT_SIZE:
+                return JSONResponse(
+                    status_code=413,
+                    content={"detail": f"File too large. Maximum size is {MAX_CHECKABLE_DOCUMENT_SIZE // (1024*1024)} MB"}
+                )
         return await call_next(request)
 
 app.add_middleware(LargeFileMiddleware)
@@ -176,6 +193,7 @@ async def get_metrics():
         uptime = (datetime.now() - startup_time).total_seconds() if startup_time else 0
         db_connected = 1 if (db_connection.db_conn is not None and not db_connection.db_conn.closed if db_connection else False) else 0
         qdrant_connected = 1 if (db_connection.qdrant_client is not None if db_connection else False) else 0
+        cache_stats = check_result_cache.get_stats() if check_result_cache else {}
         
         # Формат метрик Prometheus
         metrics = f"""# HELP document_parser_uptime_seconds Время работы сервиса в секундах
@@ -202,6 +220,14 @@ document_parser_database_connected {db_connected}
 # TYPE document_parser_qdrant_connected gauge
 document_parser_qdrant_connected {qdrant_connected}
 
+# HELP document_parser_check_cache_hits_total Попадания в кеш результатов проверки
+# TYPE document_parser_check_cache_hits_total counter
+document_parser_check_cache_hits_total {cache_stats.get("hits", 0)}
+
+# HELP document_parser_check_cache_misses_total Промахи кеша результатов проверки
+# TYPE document_parser_check_cache_misses_total counter
+document_parser_check_cache_misses_total {cache_stats.get("misses", 0)}
+
 # HELP document_parser_info Информация о сервисе
 # TYPE document_parser_info gauge
 document_parser_info{{service="document-parser"}} 1
@@ -275,22 +301,11 @@ async def trigger_norm_control_check(
         update_checkable_document_status(document_id, "processing")
         
         # Получаем содержимое документа
-        with db_connection.db_conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT element_content
-                FROM checkable_elements
-                WHERE checkable_document_id = %s
-                ORDER BY page_number, id
-            """, (document_id,))
-            elements = cursor.fetchall()
-        
-        if not elements:
+        document_content = get_checkable_document_content(document_id)
+        if document_content is None:
             update_checkable_document_status(document_id, "error")
             raise HTTPException(status_code=404, detail="Document content not found")
         
-        # Объединяем содержимое
-        document_content = "\n\n".join([elem[0] for elem in elements])  # element_content
-        
         # Запускаем асинхронную проверку
         asyncio.create_task(
             perform_async_norm_control_check(document_id, document_content)
@@ -313,6 +328,23 @@ async def trigger_norm_control_check(
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
+def get_checkable_document_content(document_id: int):
+    """Получение объединенного содержимого проверяемого документа"""
+    with db_connection.db_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT element_content
+            FROM checkable_elements
+            WHERE checkable_document_id = %s
+            ORDER BY page_number, id
+        """, (document_id,))
+        elements = cursor.fetchall()
+    
+    if not elements:
+        return None
+    
+    # Объединяем содержимое
+    return "\n\n".join([elem[0] for elem in elements])  # element_content
+
 # Получение списка проверяемых документов
 @app.get("/checkable-documents")
 async def get_checkable_documents():
@@ -377,21 +409,19 @@ async def upload_checkable_document(
         if not file.filename.lower().endswith(('.pdf', '.dwg', '.ifc', '.docx')):
             raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF, DWG, IFC, and DOCX files are allowed.")
         
-        # Читаем содержимое файла
-        content = await file.read()
-        file_size = len(content)
-        
-        # Проверяем размер файла (максимум 100 MB)
-        max_file_size = 100 * 1024 * 1024  # 100 MB
-        if file_size > max_file_size:
+        # Потоково записываем файл на диск, вычисляя хеш для дедупликации по ходу чтения
+        try:
+            async with large_file_gate.acquire(f"upload {file.filename}", max_wait=UPLOAD_MEMORY_WAIT_TIMEOUT):
+                spooled_path, document_hash, file_size = await spool_upload_to_file(
+                    file, CHECKABLE_FILES_DIR, MAX_CHECKABLE_DOCUMENT_SIZE
+                )
+        except FileTooLargeError:
             raise HTTPException(
                 status_code=413, 
-                detail=f"File too large. Maximum size is {max_file_size // (1024*1024)} MB"
+                detail=f"File too large. Maximum size is {MAX_CHECKABLE_DOCUMENT_SIZE // (1024*1024)} MB"
             )
-        
-        # Генерируем хеш документа для дедупликации
-        import hashlib
-        document_hash = hashlib.sha256(content).hexdigest()
+        except MemoryPressureTimeout:
+            raise HTTPException(status_code=503, detail="Service is under memory pressure, please retry later")
         
         # Генерируем уникальный ID документа
         import time
@@ -433,9 +463,12 @@ async def upload_checkable_document(
             saved_document_id = db_connection.execute_in_transaction(_save_document)
             logger.debug(f"🔍 [DATABASE] Successfully saved checkable document {saved_document_id}")
             
+            # Сохраняем оригинал: обработка и переобработка читают файл с диска
+            stored_path = document_processor.store_original_file(saved_document_id, file.filename, spooled_path)
+            
             # Запускаем асинхронную обработку документа
             logger.info(f"🔄 [UPLOAD] Starting document processing for {saved_document_id}")
-            asyncio.create_task(process_document_async(saved_document_id, content, file.filename))
+            asyncio.create_task(process_document_async(saved_document_id, stored_path, file.filename, document_hash))
             
             return {
                 "status": "success",
@@ -450,6 +483,9 @@ async def upload_checkable_document(
         except Exception as e:
             logger.error(f"❌ [UPLOAD_CHECKABLE] Upload error: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            # Временный файл остается только если документ не был сохранен
+            cleanup_temp_file(spooled_path)
             
     except HTTPException:
         raise
@@ -457,7 +493,7 @@ async def upload_checkable_document(
         logger.error(f"❌ [UPLOAD_CHECKABLE] Upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_document_async(document_id: int, file_content: bytes, filename: str):
+async def process_document_async(document_id: int, file_path: str, filename: str, file_hash: str = None):
     """Асинхронная обработка документа"""
     try:
         logger.info(f"🔄 [ASYNC_PROCESS] Starting async document processing for {document_id}")
@@ -474,8 +510,9 @@ async def process_document_async(document_id: int, file_content: bytes, filename
         
         db_connection.execute_in_transaction(_update_processing_status)
         
-        # Обрабатываем документ
-        result = document_processor.process_document(document_id, file_content, filename)
+        # Обрабатываем документ с диска, не превышая общий лимит памяти сервиса
+        async with large_file_gate.acquire(f"processing document {document_id}"):
+            result = document_processor.process_document(document_id, file_path, filename, file_hash)
         
         if result["status"] == "success":
             logger.info(f"✅ [ASYNC_PROCESS] Document {document_id} processed successfully")
@@ -502,8 +539,8 @@ async def process_document_async(document_id: int, file_content: bytes, filename
 
 # Переобработка документа
 @app.post("/checkable-documents/{document_id}/reprocess")
-async def reprocess_document_endpoint(document_id: int):
-    """Переобработка документа"""
+async def reprocess_document_endpoint(document_id: int, file: UploadFile = File(None)):
+    """Инкрементальная переобработка документа (опционально - с новой редакцией файла)"""
     try:
         logger.info(f"🔄 [REPROCESS] Reprocessing requested for document {document_id}")
         
@@ -513,18 +550,52 @@ async def reprocess_document_endpoint(document_id: int):
             logger.error(f"🔄 [REPROCESS] Document {document_id} not found")
             raise HTTPException(status_code=404, detail="Document not found")
         
+        revision_path = None
+        revision_hash = None
+        if file is not None:
+            if not file.filename.lower().endswith('.pdf'):
+                raise HTTPException(status_code=400, detail="Only PDF revisions are supported for reprocessing")
+            try:
+                async with large_file_gate.acquire(f"revision upload {file.filename}", max_wait=UPLOAD_MEMORY_WAIT_TIMEOUT):
+                    revision_path, revision_hash, _ = await spool_upload_to_file(
+                        file, CHECKABLE_FILES_DIR, MAX_CHECKABLE_DOCUMENT_SIZE
+                    )
+            except FileTooLargeError:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {MAX_CHECKABLE_DOCUMENT_SIZE // (1024*1024)} MB"
+                )
+            except MemoryPressureTimeout:
+                raise HTTPException(status_code=503, detail="Service is under memory pressure, please retry later")
+        
         # Обновляем статус на "processing"
         update_checkable_document_status(document_id, "processing")
         
-        # Запускаем переобработку (пока заглушка)
-        result = await document_processor.reprocess_document(document_id)
+        # Переизвлекаем только изменившиеся страницы
+        try:
+            async with large_file_gate.acquire(f"reprocessing document {document_id}"):
+                result = await document_processor.reprocess_document(document_id, revision_path, revision_hash)
+        finally:
+            if revision_path:
+                cleanup_temp_file(revision_path)
         
         if result["status"] == "success":
+            # Перепроверяем документ: результаты неизмененных страниц переиспользуются
+            document_content = get_checkable_document_content(document_id) or ""
+            update_checkable_document_status(document_id, "processing")
+            asyncio.create_task(
+                perform_async_norm_control_check(document_id, document_content)
+            )
             return {
                 "status": "success",
-                "message": "Document reprocessing started"
+                "message": "Document reprocessing started",
+                "total_pages": result["total_pages"],
+                "changed_pages": result["changed_pages"],
+                "removed_pages": result["removed_pages"],
+                "unchanged_pages": result["unchanged_pages"]
             }
         else:
+            update_checkable_document_status(document_id, "error")
             raise HTTPException(status_code=500, detail=result.get("error", "Reprocessing failed"))
             
     except HTTPException:
@@ -613,6 +684,9 @@ async def perform_async_hierarchical_check(document_id: int, hierarchical_check_
         logger.info(f"🚀 [ASYNC_HIERARCHICAL] Updating document status to 'completed'")
         update_checkable_document_status(document_id, "completed")
         
+        # Готовим отчеты заранее, чтобы скачивание было мгновенным
+        asyncio.create_task(prerender_reports(document_id))
+        
         logger.info(f"✅ [ASYNC_HIERARCHICAL] Async hierarchical check completed for document {document_id}")
         logger.info(f"✅ [ASYNC_HIERARCHICAL] Async task completed at: {datetime.now().isoformat()}")
         
@@ -713,6 +787,8 @@ async def delete_checkable_document(document_id: int):
             success = db_connection.execute_in_transaction(_delete_document)
             
             if success:
+                report_artifact_store.delete_document_artifacts(document_id)
+                document_processor.delete_stored_file(document_id, document.get('file_type') or 'pdf')
                 return {
                     "status": "success",
                     "message": f"Document {document_id} deleted successfully"
@@ -788,47 +864,72 @@ async def get_report(document_id: int):
         logger.error(f"Get report error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Проверка заголовка If-None-Match"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+async def serve_report_artifact(document_id: int, report_format: str, request: Request):
+    """Отдача отчета из хранилища с поддержкой ETag/If-None-Match"""
+    format_name = report_format.upper()
+    
+    # Проверяем существование документа
+    document = get_checkable_document(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    # Получаем отчет
+    report_response = await get_report(document_id)
+    
+    try:
+        artifact_path, version = await report_artifact_store.get_or_render(
+            document_id, report_response, report_format
+        )
+    except ImportError as e:
+        logger.error(f"{format_name} generator import error: {e}")
+        raise HTTPException(status_code=500, detail=f"{format_name} generation not available")
+    except Exception as e:
+        logger.error(f"{format_name} generation error: {e}")
+        raise HTTPException(status_code=500, detail=f"{format_name} generation failed: {str(e)}")
+    
+    etag = f'"{version}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # Формируем имя файла
+    filename = f"report_{document_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{report_format}"
+    
+    # Отдаем файл потоком с диска
+    return FileResponse(
+        artifact_path,
+        media_type=REPORT_MEDIA_TYPES[report_format],
+        filename=filename,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+async def prerender_reports(document_id: int):
+    """Фоновая генерация отчетов после завершения проверки"""
+    try:
+        report_response = await get_report(document_id)
+        if not report_response.get("hierarchical_result"):
+            return
+        for report_format in ("pdf", "docx"):
+            try:
+                await report_artifact_store.get_or_render(document_id, report_response, report_format)
+            except Exception as e:
+                logger.warning(f"⚠️ [PRERENDER] Failed to pre-render {report_format} report for document {document_id}: {e}")
+        logger.info(f"✅ [PRERENDER] Reports pre-rendered for document {document_id}")
+    except Exception as e:
+        logger.warning(f"⚠️ [PRERENDER] Report pre-rendering skipped for document {document_id}: {e}")
+
 # Скачивание отчета в формате PDF
 @app.get("/checkable-documents/{document_id}/download-report")
-async def download_report(document_id: int):
+async def download_report(document_id: int, request: Request):
     """Скачивание отчета о проверке в формате PDF"""
     try:
-        # Проверяем существование документа
-        document = get_checkable_document(document_id)
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-        
-        # Получаем отчет
-        report_response = await get_report(document_id)
-        
-        # Генерируем PDF отчет
-        try:
-            from utils.pdf_generator import PDFReportGenerator
-            
-            pdf_generator = PDFReportGenerator()
-            pdf_content = pdf_generator.generate_report_pdf(report_response)
-            
-            # Формируем имя файла
-            filename = f"report_{document_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            
-            # Возвращаем PDF файл
-            from fastapi.responses import Response
-            return Response(
-                content=pdf_content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"attachment; filename={filename}",
-                    "Content-Length": str(len(pdf_content))
-                }
-            )
-            
-        except ImportError as e:
-            logger.error(f"PDF generator import error: {e}")
-            raise HTTPException(status_code=500, detail="PDF generation not available")
-        except Exception as e:
-            logger.error(f"PDF generation error: {e}")
-            raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
-        
+        return await serve_report_artifact(document_id, "pdf", request)
     except HTTPException:
         raise
     except Exception as e:
@@ -837,45 +938,10 @@ async def download_report(document_id: int):
 
 # Скачивание отчета в формате DOCX
 @app.get("/checkable-documents/{document_id}/download-report-docx")
-async def download_report_docx(document_id: int):
+async def download_report_docx(document_id: int, request: Request):
     """Скачивание отчета о проверке в формате DOCX"""
     try:
-        # Проверяем существование документа
-        document = get_checkable_document(document_id)
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-        
-        # Получаем отчет
-        report_response = await get_report(document_id)
-        
-        # Генерируем DOCX отчет
-        try:
-            from utils.docx_generator import DOCXReportGenerator
-            
-            docx_generator = DOCXReportGenerator()
-            docx_content = docx_generator.generate_report_docx(report_response)
-            
-            # Формируем имя файла
-            filename = f"report_{document_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-            
-            # Возвращаем DOCX файл
-            from fastapi.responses import Response
-            return Response(
-                content=docx_content,
-                media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                headers={
-                    "Content-Disposition": f"attachment; filename={filename}",
-                    "Content-Length": str(len(docx_content))
-                }
-            )
-            
-        except ImportError as e:
-            logger.error(f"DOCX generator import error: {e}")
-            raise HTTPException(status_code=500, detail="DOCX generation not available")
-        except Exception as e:
-            logger.error(f"DOCX generation error: {e}")
-            raise HTTPException(status_code=500, detail=f"DOCX generation failed: {str(e)}")
-        
+        return await serve_report_artifact(document_id, "docx", request)
     except HTTPException:
         raise
     except Exception as e:
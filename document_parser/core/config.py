@@ -22,11 +22,14 @@ RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://rag-service:8004")
 
 # Конфигурация приложения
 UPLOAD_DIR = "/app/uploads"
+CHECKABLE_FILES_DIR = os.path.join(UPLOAD_DIR, "checkable")  # оригиналы проверяемых документов
 TEMP_DIR = "/app/temp"
 REPORT_FORMAT_DIR = "/app/report_format"
+REPORTS_DIR = os.getenv("REPORTS_DIR", "/app/reports")  # сгенерированные PDF/DOCX отчеты
 
 # Лимиты и таймауты
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+MAX_CHECKABLE_DOCUMENT_SIZE = int(os.getenv("MAX_CHECKABLE_DOCUMENT_SIZE", str(100 * 1024 * 1024)))  # 100MB
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # секунды
 CONNECTION_TIMEOUT = 10
@@ -48,6 +51,19 @@ HF_HOME = MODEL_CACHE_DIR
 # Настройки памяти
 MEMORY_PRESSURE_THRESHOLD = 80  # процент использования памяти
 MIN_AVAILABLE_MEMORY = 500  # МБ
+LARGE_FILE_MAX_CONCURRENCY = int(os.getenv("LARGE_FILE_MAX_CONCURRENCY", "2"))  # одновременных загрузок/разборов файлов
+UPLOAD_MEMORY_WAIT_TIMEOUT = float(os.getenv("UPLOAD_MEMORY_WAIT_TIMEOUT", "60"))  # ожидание памяти при загрузке, секунды
+
+# Настройки кеша результатов проверки (ключ: хеш файла + версия правил)
+CHECK_CACHE_MAX_ENTRIES = int(os.getenv("CHECK_CACHE_MAX_ENTRIES", "256"))  # записей в памяти процесса
+CHECK_CACHE_MAX_ROWS = int(os.getenv("CHECK_CACHE_MAX_ROWS", "5000"))  # записей в таблице check_result_cache
+CHECK_CACHE_TTL_DAYS = int(os.getenv("CHECK_CACHE_TTL_DAYS", "30"))  # срок хранения неиспользуемых записей
+EXTRACTION_VERSION = "2"  # увеличивать при изменении логики извлечения элементов
+HIERARCHICAL_RULES_VERSION = os.getenv("HIERARCHICAL_RULES_VERSION", "1")  # версия пакета правил проверки
+
+# Настройки параллельной проверки страниц
+PAGE_CHECK_CONCURRENCY = int(os.getenv("PAGE_CHECK_CONCURRENCY", "4"))  # одновременных проверок (LLM-запросов)
+PAGE_CHECK_TIMEOUT = float(os.getenv("PAGE_PROCESSING_TIMEOUT", "300"))  # таймаут проверки одной страницы, секунды
 
 # Настройки асинхронной обработки
 ASYNC_CHECK_POLLING_INTERVAL = 3  # секунды
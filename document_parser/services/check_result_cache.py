@@ -0,0 +1,180 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import CHECK_CACHE_MAX_ENTRIES, CHECK_CACHE_MAX_ROWS, CHECK_CACHE_TTL_DAYS
+from database.connection import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# Имена этапов, под которыми результаты хранятся в кеше
+EXTRACTION_STAGE = "extraction"
+HIERARCHICAL_STAGE_PREFIX = "hierarchical:"
+
+# Как часто (в записях) запускать очистку таблицы кеша
+EVICTION_INTERVAL = 50
+
+
+class CheckResultCache:
+    """Кеш результатов извлечения и этапов иерархической проверки.
+
+    Ключ записи - (хеш файла, этап, версия). В памяти процесса хранится
+    ограниченный LRU, в PostgreSQL - таблица check_result_cache, которая
+    переживает перезапуск и удаление проверяемого документа. Если таблица
+    недоступна, кеш продолжает работать только в памяти.
+    """
+
+    def __init__(self, db_connection: DatabaseConnection,
+                 max_entries: int = CHECK_CACHE_MAX_ENTRIES,
+                 max_rows: int = CHECK_CACHE_MAX_ROWS,
+                 ttl_days: int = CHECK_CACHE_TTL_DAYS):
+        self.db_connection = db_connection
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_days = ttl_days
+        self._memory: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_eviction = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_hash: str, stage: str, version: str) -> Optional[Any]:
+        """Получение результата этапа из кеша (None при промахе)"""
+        key = (file_hash, stage, version)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                logger.info(f"⚡ [CHECK_CACHE] Memory hit: {stage} for {file_hash[:12]}")
+                return self._memory[key]
+
+        payload = self._load_from_db(file_hash, stage, version)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, payload)
+        logger.info(f"⚡ [CHECK_CACHE] Database hit: {stage} for {file_hash[:12]}")
+        return payload
+
+    def put(self, file_hash: str, stage: str, version: str, payload: Any):
+        """Сохранение результата этапа в кеш"""
+        key = (file_hash, stage, version)
+        with self._lock:
+            self._remember(key, payload)
+            self._puts_since_eviction += 1
+            run_eviction = self._puts_since_eviction >= EVICTION_INTERVAL
+            if run_eviction:
+                self._puts_since_eviction = 0
+
+        self._store_in_db(file_hash, stage, version, payload)
+        if run_eviction:
+            self.evict()
+
+    def invalidate_stale_versions(self, stage_prefix: str, current_version: str) -> int:
+        """Удаление записей этапов с префиксом stage_prefix, созданных другой версией правил"""
+        with self._lock:
+            stale_keys = [key for key in self._memory
+                          if key[1].startswith(stage_prefix) and key[2] != current_version]
+            for key in stale_keys:
+                del self._memory[key]
+
+        def _invalidate(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM check_result_cache
+                    WHERE stage LIKE %s AND version <> %s
+                """, (stage_prefix + "%", current_version))
+                return cursor.rowcount
+
+        try:
+            deleted = self.db_connection.execute_in_transaction(_invalidate)
+            if deleted:
+                logger.info(f"🧹 [CHECK_CACHE] Invalidated {deleted} '{stage_prefix}' entries not matching version {current_version}")
+            return deleted
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECK_CACHE] Failed to invalidate stale entries: {e}")
+            return 0
+
+    def evict(self) -> int:
+        """Удаление просроченных записей и записей сверх лимита (по давности использования)"""
+        def _evict(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM check_result_cache
+                    WHERE last_accessed_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 day')
+                """, (self.ttl_days,))
+                expired = cursor.rowcount
+                cursor.execute("""
+                    DELETE FROM check_result_cache
+                    WHERE id IN (
+                        SELECT id FROM check_result_cache
+                        ORDER BY last_accessed_at DESC
+                        OFFSET %s
+                    )
+                """, (self.max_rows,))
+                return expired + cursor.rowcount
+
+        try:
+            evicted = self.db_connection.execute_in_transaction(_evict)
+            if evicted:
+                logger.info(f"🧹 [CHECK_CACHE] Evicted {evicted} entries")
+            return evicted
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECK_CACHE] Eviction failed: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика использования кеша"""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _remember(self, key: Tuple[str, str, str], payload: Any):
+        """Добавление записи в LRU в памяти (вызывается под блокировкой)"""
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load_from_db(self, file_hash: str, stage: str, version: str) -> Optional[Any]:
+        def _load(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE check_result_cache
+                    SET last_accessed_at = CURRENT_TIMESTAMP, hit_count = hit_count + 1
+                    WHERE file_hash = %s AND stage = %s AND version = %s
+                    RETURNING payload
+                """, (file_hash, stage, version))
+                row = cursor.fetchone()
+                return row[0] if row else None
+
+        try:
+            return self.db_connection.execute_in_transaction(_load)
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECK_CACHE] Failed to read cache entry: {e}")
+            return None
+
+    def _store_in_db(self, file_hash: str, stage: str, version: str, payload: Any):
+        def _store(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO check_result_cache (file_hash, stage, version, payload)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (file_hash, stage, version) DO UPDATE
+                    SET payload = EXCLUDED.payload,
+                        created_at = CURRENT_TIMESTAMP,
+                        last_accessed_at = CURRENT_TIMESTAMP
+                """, (file_hash, stage, version, json.dumps(payload, ensure_ascii=False, default=str)))
+
+        try:
+            self.db_connection.execute_in_transaction(_store)
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECK_CACHE] Failed to persist cache entry: {e}")
@@ -1,21 +1,31 @@
+import os
+import shutil
 import logging
 import json
 import fitz  # PyMuPDF
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from core.config import EXTRACTION_VERSION, CHECKABLE_FILES_DIR
 from database.connection import DatabaseConnection
+from services.check_result_cache import CheckResultCache, EXTRACTION_STAGE
+from utils.file_utils import calculate_file_hash_from_path, ensure_directory_exists, cleanup_temp_file
+from utils.page_fingerprint import calculate_page_fingerprints
 
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
     """Сервис для обработки документов и извлечения элементов"""
     
-    def __init__(self, db_connection: DatabaseConnection):
+    def __init__(self, db_connection: DatabaseConnection, result_cache: Optional[CheckResultCache] = None):
         self.db_connection = db_connection
+        self.result_cache = result_cache
+        if self.result_cache:
+            self.result_cache.invalidate_stale_versions(EXTRACTION_STAGE, EXTRACTION_VERSION)
     
-    def process_document(self, document_id: int, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Обработка документа и извлечение элементов"""
+    def process_document(self, document_id: int, file_path: str, filename: str,
+                         file_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Обработка документа с диска и извлечение элементов"""
         try:
             logger.info(f"🔄 [PROCESS] Starting document processing for document {document_id}")
             
@@ -23,11 +33,15 @@ class DocumentProcessor:
             file_type = filename.split('.')[-1].lower()
             
             if file_type == 'pdf':
-                return self.process_pdf_document(document_id, file_content)
+                file_hash = file_hash or calculate_file_hash_from_path(file_path)
+                cached_extraction = self.get_cached_extraction(file_hash)
+                if cached_extraction:
+                    return self.restore_cached_extraction(document_id, cached_extraction)
+                return self.process_pdf_document(document_id, file_path, file_hash)
             elif file_type in ['dwg', 'ifc', 'docx']:
                 # Для других типов файлов пока возвращаем заглушку
                 logger.warning(f"⚠️ [PROCESS] File type {file_type} not fully supported yet")
-                return self.process_unsupported_document(document_id, file_content, file_type)
+                return self.process_unsupported_document(document_id, file_path, file_type)
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
                 
@@ -38,13 +52,14 @@ class DocumentProcessor:
                 "error": str(e)
             }
     
-    def process_pdf_document(self, document_id: int, file_content: bytes) -> Dict[str, Any]:
+    def process_pdf_document(self, document_id: int, file_path: str,
+                             file_hash: Optional[str] = None) -> Dict[str, Any]:
         """Обработка PDF документа"""
         try:
             logger.info(f"📄 [PDF_PROCESS] Processing PDF document {document_id}")
             
-            # Открываем PDF документ
-            doc = fitz.open(stream=file_content, filetype="pdf")
+            # Открываем PDF документ с диска: страницы читаются по мере обращения
+            doc = fitz.open(file_path, filetype="pdf")
             total_pages = len(doc)
             
             logger.info(f"📄 [PDF_PROCESS] PDF has {total_pages} pages")
@@ -53,48 +68,7 @@ class DocumentProcessor:
             elements = []
             
             for page_num in range(total_pages):
-                page = doc.load_page(page_num)
-                
-                # Извлекаем текст
-                text_content = page.get_text()
-                
-                # Извлекаем изображения (если есть)
-                image_list = page.get_images()
-                
-                # Создаем элемент для страницы
-                element = {
-                    "document_id": document_id,
-                    "page_number": page_num + 1,
-                    "content": text_content,
-                    "content_type": "text",
-                    "element_type": "page",
-                    "metadata": {
-                        "page_width": page.rect.width,
-                        "page_height": page.rect.height,
-                        "images_count": len(image_list),
-                        "text_length": len(text_content)
-                    }
-                }
-                
-                elements.append(element)
-                
-                # Если есть изображения, создаем отдельные элементы для них
-                for img_index, img in enumerate(image_list):
-                    img_element = {
-                        "document_id": document_id,
-                        "page_number": page_num + 1,
-                        "content": f"Image {img_index + 1} on page {page_num + 1}",
-                        "content_type": "image",
-                        "element_type": "image",
-                        "metadata": {
-                            "image_index": img_index,
-                            "image_rect": img[0],  # bbox
-                            "image_width": img[2],
-                            "image_height": img[3]
-                        }
-                    }
-                    elements.append(img_element)
-                
+                elements.extend(self.extract_page_elements(document_id, doc, page_num))
                 logger.debug(f"📄 [PDF_PROCESS] Processed page {page_num + 1}/{total_pages}")
             
             # Сохраняем элементы в базу данных
@@ -110,6 +84,13 @@ class DocumentProcessor:
             
             doc.close()
             
+            # Кешируем результат извлечения для повторных загрузок того же файла
+            if self.result_cache and file_hash:
+                self.result_cache.put(file_hash, EXTRACTION_STAGE, EXTRACTION_VERSION, {
+                    "total_pages": total_pages,
+                    "elements": [{k: v for k, v in e.items() if k != "document_id"} for e in elements]
+                })
+            
             logger.info(f"✅ [PDF_PROCESS] PDF document {document_id} processed successfully")
             return {
                 "status": "success",
@@ -126,21 +107,108 @@ class DocumentProcessor:
                 "error": str(e)
             }
     
-    def process_unsupported_document(self, document_id: int, file_content: bytes, file_type: str) -> Dict[str, Any]:
+    def extract_page_elements(self, document_id: int, doc, page_num: int) -> List[Dict[str, Any]]:
+        """Извлечение элементов одной страницы PDF"""
+        page = doc.load_page(page_num)
+        
+        # Извлекаем текст
+        text_content = page.get_text()
+        
+        # Извлекаем изображения (если есть)
+        image_list = page.get_images()
+        
+        # Создаем элемент для страницы (с отпечатками для инкрементальной переобработки)
+        elements = [{
+            "document_id": document_id,
+            "page_number": page_num + 1,
+            "content": text_content,
+            "content_type": "text",
+            "element_type": "page",
+            "metadata": {
+                "page_width": page.rect.width,
+                "page_height": page.rect.height,
+                "images_count": len(image_list),
+                "text_length": len(text_content),
+                **calculate_page_fingerprints(doc, page)
+            }
+        }]
+        
+        # Если есть изображения, создаем отдельные элементы для них
+        for img_index, img in enumerate(image_list):
+            elements.append({
+                "document_id": document_id,
+                "page_number": page_num + 1,
+                "content": f"Image {img_index + 1} on page {page_num + 1}",
+                "content_type": "image",
+                "element_type": "image",
+                "metadata": {
+                    "image_index": img_index,
+                    "image_rect": img[0],  # bbox
+                    "image_width": img[2],
+                    "image_height": img[3]
+                }
+            })
+        
+        return elements
+    
+    def get_cached_extraction(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Получение ранее извлеченных элементов файла из кеша"""
+        if not self.result_cache:
+            return None
+        return self.result_cache.get(file_hash, EXTRACTION_STAGE, EXTRACTION_VERSION)
+    
+    def restore_cached_extraction(self, document_id: int, cached_extraction: Dict[str, Any]) -> Dict[str, Any]:
+        """Сохранение элементов из кеша для документа без повторного разбора PDF"""
+        try:
+            logger.info(f"⚡ [PDF_PROCESS] Using cached extraction for document {document_id}")
+            
+            elements = [
+                {**element, "document_id": document_id}
+                for element in cached_extraction.get("elements", [])
+            ]
+            total_pages = cached_extraction.get("total_pages", 0)
+            saved_elements = self.save_elements(document_id, elements)
+            
+            self.update_document_status(document_id, "completed", {
+                "total_pages": total_pages,
+                "total_elements": len(elements),
+                "text_elements": len([e for e in elements if e["content_type"] == "text"]),
+                "image_elements": len([e for e in elements if e["content_type"] == "image"]),
+                "cache_hit": True
+            })
+            
+            return {
+                "status": "success",
+                "total_pages": total_pages,
+                "total_elements": len(elements),
+                "saved_elements": saved_elements,
+                "cache_hit": True
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ [PDF_PROCESS] Failed to restore cached extraction for document {document_id}: {e}")
+            self.update_document_status(document_id, "failed", {"error": str(e)})
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
+    def process_unsupported_document(self, document_id: int, file_path: str, file_type: str) -> Dict[str, Any]:
         """Обработка неподдерживаемых типов документов"""
         try:
             logger.info(f"📄 [UNSUPPORTED_PROCESS] Processing {file_type} document {document_id}")
+            file_size = os.path.getsize(file_path)
             
             # Создаем базовый элемент для неподдерживаемого типа
             element = {
                 "document_id": document_id,
                 "page_number": 1,
-                "content": f"Document type {file_type} is not fully supported yet. File size: {len(file_content)} bytes",
+                "content": f"Document type {file_type} is not fully supported yet. File size: {file_size} bytes",
                 "content_type": "text",
                 "element_type": "unsupported",
                 "metadata": {
                     "file_type": file_type,
-                    "file_size": len(file_content),
+                    "file_size": file_size,
                     "processing_note": "Limited support for this file type"
                 }
             }
@@ -231,8 +299,30 @@ class DocumentProcessor:
             logger.error(f"❌ [UPDATE_STATUS] Failed to update status for document {document_id}: {e}")
             raise
     
-    async def reprocess_document(self, document_id: int) -> Dict[str, Any]:
-        """Переобработка документа"""
+    def get_stored_file_path(self, document_id: int, file_type: str) -> str:
+        """Путь к сохраненному оригиналу проверяемого документа"""
+        return os.path.join(CHECKABLE_FILES_DIR, f"{document_id}.{file_type.lower()}")
+    
+    def store_original_file(self, document_id: int, filename: str, spooled_path: str) -> str:
+        """Сохранение оригинала документа (из потоково записанного файла) для последующей переобработки"""
+        ensure_directory_exists(CHECKABLE_FILES_DIR)
+        file_path = self.get_stored_file_path(document_id, filename.split('.')[-1])
+        shutil.move(spooled_path, file_path)
+        logger.info(f"💾 [STORE_FILE] Stored original file for document {document_id}: {file_path}")
+        return file_path
+    
+    def delete_stored_file(self, document_id: int, file_type: str):
+        """Удаление сохраненного оригинала документа"""
+        cleanup_temp_file(self.get_stored_file_path(document_id, file_type))
+    
+    async def reprocess_document(self, document_id: int, revision_path: Optional[str] = None,
+                                 revision_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Инкрементальная переобработка документа.
+        
+        Если передана новая редакция файла, она заменяет сохраненный оригинал.
+        Повторно извлекаются только страницы, у которых изменился отпечаток
+        содержимого или изображений; элементы остальных страниц сохраняются.
+        """
         try:
             logger.info(f"🔄 [REPROCESS] Starting reprocessing for document {document_id}")
             
@@ -241,17 +331,131 @@ class DocumentProcessor:
             if not document_info:
                 return {"status": "error", "error": "Document not found"}
             
-            # Получаем содержимое файла (в реальной системе нужно получить из хранилища)
-            # Пока возвращаем ошибку, так как у нас нет доступа к файлу
+            file_type = document_info["file_type"]
+            if file_type != "pdf":
+                return {"status": "error", "error": f"Incremental reprocessing is not supported for {file_type} files"}
+            
+            if revision_path is not None:
+                self.update_document_file_info(
+                    document_id,
+                    revision_hash or calculate_file_hash_from_path(revision_path),
+                    os.path.getsize(revision_path)
+                )
+                file_path = self.store_original_file(document_id, f"{document_id}.{file_type}", revision_path)
+            else:
+                file_path = self.get_stored_file_path(document_id, file_type)
+                if not os.path.exists(file_path):
+                    return {
+                        "status": "error",
+                        "error": "File content not available for reprocessing"
+                    }
+            
+            previous_fingerprints = self.get_page_fingerprints(document_id)
+            
+            doc = fitz.open(file_path, filetype="pdf")
+            try:
+                total_pages = len(doc)
+                changed_pages = []
+                new_elements = []
+                
+                for page_num in range(total_pages):
+                    page = doc.load_page(page_num)
+                    fingerprints = calculate_page_fingerprints(doc, page)
+                    if previous_fingerprints.get(page_num + 1) == fingerprints:
+                        continue
+                    
+                    changed_pages.append(page_num + 1)
+                    new_elements.extend(self.extract_page_elements(document_id, doc, page_num))
+            finally:
+                doc.close()
+            
+            removed_pages = sorted(p for p in previous_fingerprints if p > total_pages)
+            self.replace_page_elements(document_id, changed_pages + removed_pages, new_elements)
+            
+            self.update_document_status(document_id, "completed", {
+                "total_pages": total_pages,
+                "changed_pages": changed_pages,
+                "removed_pages": removed_pages,
+                "unchanged_pages": total_pages - len(changed_pages),
+                "incremental": True
+            })
+            
+            logger.info(f"✅ [REPROCESS] Document {document_id} reprocessed: {len(changed_pages)} changed, "
+                        f"{total_pages - len(changed_pages)} unchanged, {len(removed_pages)} removed pages")
             return {
-                "status": "error",
-                "error": "File content not available for reprocessing"
+                "status": "success",
+                "total_pages": total_pages,
+                "changed_pages": changed_pages,
+                "removed_pages": removed_pages,
+                "unchanged_pages": total_pages - len(changed_pages)
             }
             
         except Exception as e:
             logger.error(f"❌ [REPROCESS] Reprocessing failed for document {document_id}: {e}")
             return {"status": "error", "error": str(e)}
     
+    def get_page_fingerprints(self, document_id: int) -> Dict[int, Dict[str, str]]:
+        """Получение сохраненных отпечатков страниц документа"""
+        def _get_fingerprints(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT page_number, element_metadata
+                    FROM checkable_elements
+                    WHERE checkable_document_id = %s AND element_type = 'page'
+                """, (document_id,))
+                
+                fingerprints = {}
+                for page_number, metadata in cursor.fetchall():
+                    metadata = metadata or {}
+                    fingerprints[page_number] = {
+                        "content_fingerprint": metadata.get("content_fingerprint"),
+                        "image_fingerprint": metadata.get("image_fingerprint")
+                    }
+                return fingerprints
+        
+        return self.db_connection.execute_in_read_only_transaction(_get_fingerprints)
+    
+    def replace_page_elements(self, document_id: int, page_numbers: List[int], elements: List[Dict[str, Any]]):
+        """Замена элементов указанных страниц в одной транзакции"""
+        if not page_numbers:
+            return
+        
+        def _replace_elements(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM checkable_elements
+                    WHERE checkable_document_id = %s AND page_number = ANY(%s)
+                """, (document_id, page_numbers))
+                
+                for element in elements:
+                    cursor.execute("""
+                        INSERT INTO checkable_elements 
+                        (checkable_document_id, page_number, element_content, element_type, content_type, element_metadata)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, (
+                        element["document_id"],
+                        element["page_number"],
+                        element["content"],
+                        element["element_type"],
+                        element["content_type"],
+                        json.dumps(element.get("metadata", {}))
+                    ))
+        
+        self.db_connection.execute_in_transaction(_replace_elements)
+        logger.info(f"💾 [REPLACE_ELEMENTS] Replaced elements of {len(page_numbers)} pages for document {document_id}")
+    
+    def update_document_file_info(self, document_id: int, file_hash: str, file_size: int):
+        """Обновление хеша и размера файла после загрузки новой редакции"""
+        def _update_file_info(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE checkable_documents
+                    SET document_hash = %s, file_size = %s
+                    WHERE id = %s
+                """, (file_hash, file_size, document_id))
+        
+        self.db_connection.execute_in_transaction(_update_file_info)
+    
     def get_document_info(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Получение информации о документе"""
         try:
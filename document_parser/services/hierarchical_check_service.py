@@ -1,10 +1,13 @@
 import logging
 import json
-from typing import Dict, Any, List, Optional
+import hashlib
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
 from datetime import datetime
 
 from models.data_models import DocumentInspectionResult, PageResult, Finding, FindingType, SeverityLevel
+from core.config import HIERARCHICAL_RULES_VERSION, EXTRACTION_VERSION
 from database.connection import DatabaseConnection
+from services.check_result_cache import CheckResultCache, HIERARCHICAL_STAGE_PREFIX
 from utils.memory_utils import check_memory_pressure, cleanup_memory
 
 logger = logging.getLogger(__name__)
@@ -12,8 +15,9 @@ logger = logging.getLogger(__name__)
 class HierarchicalCheckService:
     """Сервис для иерархической проверки документов"""
     
-    def __init__(self, db_connection: DatabaseConnection):
+    def __init__(self, db_connection: DatabaseConnection, result_cache: Optional[CheckResultCache] = None):
         self.db_connection = db_connection
+        self.result_cache = result_cache
         # Инициализируем перечень НТД по маркам согласно "Перечень НТД для руководства внутри ОНК по маркам"
         self.ntd_by_mark = {
             "АР": [  # Архитектурные решения
@@ -60,6 +64,35 @@ class HierarchicalCheckService:
                 "ГОСТ Р 21.101-2020"
             ]
         }
+        
+        # Версия правил: изменение перечня НТД, HIERARCHICAL_RULES_VERSION или
+        # EXTRACTION_VERSION (этапы работают с извлеченными элементами) инвалидирует кеш
+        self.rules_version = self._compute_rules_version()
+        if self.result_cache:
+            self.result_cache.invalidate_stale_versions(HIERARCHICAL_STAGE_PREFIX, self.rules_version)
+    
+    def _compute_rules_version(self) -> str:
+        """Вычисление версии пакета правил для ключа кеша"""
+        rules_digest = hashlib.sha256(
+            json.dumps(self.ntd_by_mark, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        return f"{HIERARCHICAL_RULES_VERSION}-e{EXTRACTION_VERSION}-{rules_digest}"
+    
+    async def _run_cached_stage(self, file_hash: Optional[str], stage: str,
+                                compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """Выполнение этапа проверки с использованием кеша по хешу файла"""
+        cache_stage = f"{HIERARCHICAL_STAGE_PREFIX}{stage}"
+        if self.result_cache and file_hash:
+            cached = self.result_cache.get(file_hash, cache_stage, self.rules_version)
+            if cached is not None:
+                return cached, True
+        
+        result = await compute()
+        
+        # Результаты с ошибкой не кешируем, чтобы следующая проверка повторила этап
+        if self.result_cache and file_hash and "error" not in result:
+            self.result_cache.put(file_hash, cache_stage, self.rules_version, result)
+        return result, False
     
     async def perform_hierarchical_check(self, document_id: int) -> Dict[str, Any]:
         """Выполнение иерархической проверки документа"""
@@ -67,11 +100,14 @@ class HierarchicalCheckService:
             logger.info(f"🚀 [HIERARCHICAL] Starting hierarchical check for document {document_id}")
             logger.info(f"📊 [HIERARCHICAL] Memory usage before check: {check_memory_pressure()}")
             start_time = datetime.now()
+            file_hash = self.get_document_hash(document_id)
             
             # Этап 1: Быстрая проверка первой страницы
             logger.info(f"📄 [HIERARCHICAL] Stage 1: Quick first page analysis")
             stage1_start = datetime.now()
-            first_page_info = await self.analyze_first_page(document_id)
+            first_page_info, stage1_cached = await self._run_cached_stage(
+                file_hash, "first_page_analysis", lambda: self.analyze_first_page(document_id)
+            )
             stage1_time = (datetime.now() - stage1_start).total_seconds()
             logger.info(f"📄 [HIERARCHICAL] Stage 1 completed in {stage1_time:.2f}s")
             logger.info(f"📄 [HIERARCHICAL] Stage 1 result: {first_page_info.get('project_info', {}).get('project_name', 'Unknown')}")
@@ -79,7 +115,9 @@ class HierarchicalCheckService:
             # Этап 2: Проверка всего документа на соответствие нормам
             logger.info(f"📋 [HIERARCHICAL] Stage 2: Full document norm compliance check")
             stage2_start = datetime.now()
-            norm_compliance_results = await self.check_norm_compliance(document_id, first_page_info)
+            norm_compliance_results, stage2_cached = await self._run_cached_stage(
+                file_hash, "norm_compliance", lambda: self.check_norm_compliance(document_id, first_page_info)
+            )
             stage2_time = (datetime.now() - stage2_start).total_seconds()
             logger.info(f"📋 [HIERARCHICAL] Stage 2 completed in {stage2_time:.2f}s")
             logger.info(f"📋 [HIERARCHICAL] Stage 2 findings: {norm_compliance_results.get('total_findings', 0)} total, {norm_compliance_results.get('critical_findings', 0)} critical")
@@ -87,7 +125,9 @@ class HierarchicalCheckService:
             # Этап 3: Выявление разделов и организация проверки по разделам
             logger.info(f"📑 [HIERARCHICAL] Stage 3: Document sections identification and organization")
             stage3_start = datetime.now()
-            section_analysis = await self.analyze_document_sections(document_id, first_page_info)
+            section_analysis, stage3_cached = await self._run_cached_stage(
+                file_hash, "section_analysis", lambda: self.analyze_document_sections(document_id, first_page_info)
+            )
             stage3_time = (datetime.now() - stage3_start).total_seconds()
             logger.info(f"📑 [HIERARCHICAL] Stage 3 completed in {stage3_time:.2f}s")
             logger.info(f"📑 [HIERARCHICAL] Stage 3 sections identified: {len(section_analysis.get('sections', []))}")
@@ -99,6 +139,8 @@ class HierarchicalCheckService:
                 "document_id": document_id,
                 "check_type": "hierarchical",
                 "execution_time": total_time,
+                "cache_hit": stage1_cached and stage2_cached and stage3_cached,
+                "rules_version": self.rules_version,
                 "stages": {
                     "first_page_analysis": first_page_info,
                     "norm_compliance": norm_compliance_results,
@@ -1409,6 +1451,23 @@ class HierarchicalCheckService:
             logger.error(f"Error determining overall status: {e}")
             return "unknown"
     
+    def get_document_hash(self, document_id: int) -> Optional[str]:
+        """Получение хеша содержимого файла документа"""
+        try:
+            with self.db_connection.get_db_connection().cursor() as cursor:
+                cursor.execute("""
+                    SELECT document_hash
+                    FROM checkable_documents
+                    WHERE id = %s
+                """, (document_id,))
+                
+                result = cursor.fetchone()
+                return result[0] if result else None
+                
+        except Exception as e:
+            logger.error(f"Error getting document hash: {e}")
+            return None
+    
     def get_first_page_content(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Получение содержимого первой страницы"""
         try:
@@ -1,19 +1,28 @@
 import asyncio
+import json
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from psycopg2.extras import execute_values
+
 from models.data_models import NormControlResult, Finding, FindingType, SeverityLevel
 from database.connection import DatabaseConnection, TransactionContext
+from services.page_check_executor import PageCheckExecutor
 from utils.memory_utils import check_memory_pressure, cleanup_memory
+from utils.page_fingerprint import calculate_content_hash
 
 logger = logging.getLogger(__name__)
 
+# Размер пакета при вставке нарушений
+FINDINGS_INSERT_PAGE_SIZE = 500
+
 class NormControlService:
     """Сервис для выполнения проверки нормоконтроля"""
     
-    def __init__(self, db_connection: DatabaseConnection):
+    def __init__(self, db_connection: DatabaseConnection, page_check_executor: Optional[PageCheckExecutor] = None):
         self.db_connection = db_connection
+        self.page_check_executor = page_check_executor or PageCheckExecutor()
     
     async def perform_norm_control_check(self, document_id: int, document_content: str) -> Dict[str, Any]:
         """Выполнение проверки нормоконтроля для документа по страницам с применением LLM"""
@@ -25,7 +34,30 @@ class NormControlService:
             pages = self.split_document_into_pages(document_id)
             logger.info(f"Document split into {len(pages)} pages based on PDF structure")
             
-            # Проверяем каждую страницу отдельно
+            # Результаты предыдущей проверки страниц, отпечаток которых не изменился
+            previous_page_results = self.get_page_check_results(document_id)
+            reused_page_keys = set()
+            
+            async def _check_page(page_data: Dict[str, Any]) -> Dict[str, Any]:
+                # Проверяем страницу (или переиспользуем результат для неизменной страницы)
+                page_key = (page_data["page_number"], page_data["fingerprint"])
+                previous_result = previous_page_results.get(page_key)
+                if previous_result is not None:
+                    reused_page_keys.add(page_key)
+                    return {"status": "success", "result": previous_result}
+                logger.info(f"Processing page {page_data['page_number']} of {len(pages)}")
+                return await self.perform_norm_control_check_for_page(document_id, page_data)
+            
+            def _on_page_done(page_data: Dict[str, Any], page_result: Dict[str, Any]):
+                # Частичные результаты сохраняются в БД по мере готовности страниц
+                page_key = (page_data["page_number"], page_data["fingerprint"])
+                if page_result["status"] == "success" and page_key not in reused_page_keys:
+                    self.save_page_check_result(document_id, page_key[0], page_key[1], page_result["result"])
+            
+            page_outcomes = await self.page_check_executor.run(pages, _check_page, _on_page_done)
+            reused_pages = len(reused_page_keys)
+            
+            # Собираем результаты в порядке страниц
             page_results = []
             total_findings = 0
             total_critical_findings = 0
@@ -33,12 +65,7 @@ class NormControlService:
             total_info_findings = 0
             all_findings = []
             
-            for page_data in pages:
-                logger.info(f"Processing page {page_data['page_number']} of {len(pages)}")
-                
-                # Проверяем страницу
-                page_result = await self.perform_norm_control_check_for_page(document_id, page_data)
-                
+            for page_data, page_result in zip(pages, page_outcomes):
                 if page_result["status"] == "success":
                     result_data = page_result["result"]
                     page_results.append(result_data)
@@ -94,6 +121,7 @@ class NormControlService:
                 "info_findings": total_info_findings,
                 "total_pages": total_pages,
                 "successful_pages": successful_pages,
+                "reused_pages": reused_pages,
                 "page_results": page_results,
                 "findings": all_findings,
                 "summary": f"Проверка завершена. Обработано {total_pages} страниц. Найдено {total_findings} нарушений.",
@@ -101,8 +129,11 @@ class NormControlService:
                 "recommendations": f"Общие рекомендации: {total_critical_findings} критических нарушений, {total_warning_findings} предупреждений, {total_info_findings} замечаний."
             }
             
+            logger.info(f"Reused results for {reused_pages} of {total_pages} unchanged pages")
+            
             # Сохраняем результат в базу данных
             await self.save_norm_control_result(document_id, combined_result)
+            self.prune_page_check_results(document_id, [(p["page_number"], p["fingerprint"]) for p in pages])
             
             return {
                 "status": "success",
@@ -122,7 +153,7 @@ class NormControlService:
         try:
             with self.db_connection.get_db_connection().cursor() as cursor:
                 cursor.execute("""
-                    SELECT element_content, page_number
+                    SELECT element_content, page_number, element_metadata
                     FROM checkable_elements
                     WHERE checkable_document_id = %s
                     ORDER BY page_number
@@ -130,9 +161,14 @@ class NormControlService:
                 
                 pages = []
                 for row in cursor.fetchall():
+                    metadata = row[2] or {}
                     pages.append({
                         "page_number": row[1],  # page_number
-                        "content": row[0]  # element_content
+                        "content": row[0],  # element_content
+                        # Отпечаток входных данных проверки: текст страницы и ее изображения
+                        "fingerprint": calculate_content_hash(
+                            f"{row[0] or ''}\x00{metadata.get('image_fingerprint', '')}"
+                        )
                     })
                 
                 return pages
@@ -140,6 +176,57 @@ class NormControlService:
             logger.error(f"Error splitting document into pages: {e}")
             return []
     
+    def get_page_check_results(self, document_id: int) -> Dict[tuple, Dict[str, Any]]:
+        """Получение сохраненных результатов проверки страниц по (номер страницы, отпечаток)"""
+        def _get_results(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT page_number, page_fingerprint, check_result
+                    FROM checkable_page_check_results
+                    WHERE checkable_document_id = %s
+                """, (document_id,))
+                return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+        
+        try:
+            return self.db_connection.execute_in_read_only_transaction(_get_results)
+        except Exception as e:
+            logger.warning(f"Error getting previous page check results: {e}")
+            return {}
+    
+    def save_page_check_result(self, document_id: int, page_number: int, fingerprint: str, result: Dict[str, Any]):
+        """Сохранение результата проверки одной страницы для повторного использования"""
+        def _save_result(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO checkable_page_check_results
+                    (checkable_document_id, page_number, page_fingerprint, check_result)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (checkable_document_id, page_number, page_fingerprint) DO UPDATE
+                    SET check_result = EXCLUDED.check_result, checked_at = CURRENT_TIMESTAMP
+                """, (document_id, page_number, fingerprint, json.dumps(result, ensure_ascii=False)))
+        
+        try:
+            self.db_connection.execute_in_transaction(_save_result)
+        except Exception as e:
+            logger.warning(f"Error saving page {page_number} check result: {e}")
+    
+    def prune_page_check_results(self, document_id: int, current_pages: List[tuple]):
+        """Удаление результатов для изменившихся или удаленных страниц"""
+        current_keys = [f"{page_number}:{fingerprint}" for page_number, fingerprint in current_pages]
+        
+        def _prune_results(conn):
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM checkable_page_check_results
+                    WHERE checkable_document_id = %s
+                      AND NOT (page_number || ':' || page_fingerprint = ANY(%s))
+                """, (document_id, current_keys))
+        
+        try:
+            self.db_connection.execute_in_transaction(_prune_results)
+        except Exception as e:
+            logger.warning(f"Error pruning page check results: {e}")
+    
     async def perform_norm_control_check_for_page(self, document_id: int, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение проверки нормоконтроля для одной страницы"""
         try:
@@ -230,10 +317,12 @@ class NormControlService:
     
     async def save_findings_detailed(self, result_id: int, findings: List[Dict[str, Any]], document_id: int):
         """Сохранение детальной информации о каждом нарушении"""
-        import json
-        
         def _save_findings(conn):
             with conn.cursor() as cursor:
+                # Связанные пункты НТД ищем один раз на каждый уникальный код
+                clause_ids = {}
+                rows = []
+                
                 for finding in findings:
                     # Определяем тип нарушения
                     finding_type = finding.get('type', 'violation')
@@ -254,7 +343,9 @@ class NormControlService:
                     category = self.determine_finding_category(code, finding.get('description', ''))
                     
                     # Ищем связанный нормативный документ (clause_id)
-                    clause_id = self.find_related_clause_id(finding, cursor)
+                    if code not in clause_ids:
+                        clause_ids[code] = self.find_related_clause_id(finding, cursor)
+                    clause_id = clause_ids[code]
                     
                     # Формируем ссылку на место в документе
                     element_reference = {
@@ -265,13 +356,7 @@ class NormControlService:
                         "bounding_box": finding.get('bounding_box', None)
                     }
                     
-                    cursor.execute("""
-                        INSERT INTO findings 
-                        (norm_control_result_id, finding_type, severity_level, category,
-                         title, description, recommendation, related_clause_id,
-                         related_clause_text, element_reference, rule_applied, confidence_score)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
+                    rows.append((
                         result_id,
                         finding_type,
                         severity_level,
@@ -285,6 +370,15 @@ class NormControlService:
                         finding.get('rule_applied', ''),
                         finding.get('confidence_score', 0.8)
                     ))
+                
+                # Одна пакетная вставка вместо INSERT на каждое нарушение
+                execute_values(cursor, """
+                    INSERT INTO findings 
+                    (norm_control_result_id, finding_type, severity_level, category,
+                     title, description, recommendation, related_clause_id,
+                     related_clause_text, element_reference, rule_applied, confidence_score)
+                    VALUES %s
+                """, rows, page_size=FINDINGS_INSERT_PAGE_SIZE)
         
         try:
             self.db_connection.execute_in_transaction(_save_findings)
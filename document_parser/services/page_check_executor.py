@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.config import PAGE_CHECK_CONCURRENCY, PAGE_CHECK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+PageCheck = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+PageDoneCallback = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+
+class PageCheckExecutor:
+    """Параллельное выполнение проверок страниц с ограничением конкурентности.
+
+    Одновременно выполняется не более max_concurrency проверок (LLM-запросов),
+    каждая ограничена page_timeout секундами. Результаты возвращаются в порядке
+    страниц, а on_page_done вызывается по мере завершения каждой страницы.
+    """
+
+    def __init__(self, max_concurrency: int = PAGE_CHECK_CONCURRENCY, page_timeout: float = PAGE_CHECK_TIMEOUT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.page_timeout = page_timeout
+
+    async def run(self, pages: List[Dict[str, Any]], check_page: PageCheck,
+                  on_page_done: Optional[PageDoneCallback] = None) -> List[Dict[str, Any]]:
+        """Проверка всех страниц; возвращает результаты в исходном порядке"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _run_page(page_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    page_result = await asyncio.wait_for(check_page(page_data), timeout=self.page_timeout)
+                except asyncio.TimeoutError:
+                    logger.error(f"⏱️ [PAGE_EXECUTOR] Page {page_data.get('page_number')} check timed out after {self.page_timeout}s")
+                    page_result = {
+                        "status": "error",
+                        "error": f"Page check timed out after {self.page_timeout}s"
+                    }
+                except Exception as e:
+                    logger.error(f"❌ [PAGE_EXECUTOR] Page {page_data.get('page_number')} check failed: {e}")
+                    page_result = {"status": "error", "error": str(e)}
+
+            if on_page_done:
+                try:
+                    on_page_done(page_data, page_result)
+                except Exception as e:
+                    logger.warning(f"⚠️ [PAGE_EXECUTOR] Page {page_data.get('page_number')} completion callback failed: {e}")
+            return page_result
+
+        logger.info(f"🚀 [PAGE_EXECUTOR] Checking {len(pages)} pages with concurrency {self.max_concurrency}")
+        return await asyncio.gather(*(_run_page(page_data) for page_data in pages))
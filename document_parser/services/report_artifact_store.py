@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import REPORTS_DIR
+from utils.file_utils import ensure_directory_exists
+
+logger = logging.getLogger(__name__)
+
+# Увеличивать при изменении вида отчетов, чтобы не отдавать устаревшие файлы
+REPORT_TEMPLATE_VERSION = "1"
+
+REPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+
+def render_report(report_format: str, report_data: Dict[str, Any]) -> bytes:
+    """Генерация содержимого отчета в указанном формате"""
+    if report_format == "pdf":
+        from utils.pdf_generator import PDFReportGenerator
+        return PDFReportGenerator().generate_report_pdf(report_data)
+    elif report_format == "docx":
+        from utils.docx_generator import DOCXReportGenerator
+        return DOCXReportGenerator().generate_report_docx(report_data)
+    raise ValueError(f"Unsupported report format: {report_format}")
+
+
+class ReportArtifactStore:
+    """Хранилище сгенерированных отчетов на диске.
+
+    Отчет рендерится один раз для ключа (ID документа, версия отчета, формат)
+    и затем отдается с диска. Версия - хеш содержимого отчета и версии шаблона,
+    поэтому новая проверка документа автоматически дает новый файл.
+    """
+
+    def __init__(self, base_dir: str = REPORTS_DIR):
+        self.base_dir = base_dir
+        ensure_directory_exists(self.base_dir)
+        self._render_locks: Dict[Tuple[int, str, str], asyncio.Lock] = {}
+
+    @staticmethod
+    def compute_report_version(report_data: Dict[str, Any]) -> str:
+        """Вычисление версии отчета по его содержимому"""
+        serialized = json.dumps(report_data, ensure_ascii=False, sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{REPORT_TEMPLATE_VERSION}:{serialized}".encode("utf-8")).hexdigest()
+        return digest[:20]
+
+    def get_artifact_path(self, document_id: int, version: str, report_format: str) -> str:
+        """Путь к файлу отчета"""
+        return os.path.join(self.base_dir, str(document_id), f"{version}.{report_format}")
+
+    def find_artifact(self, document_id: int, version: str, report_format: str) -> Optional[str]:
+        """Поиск уже сгенерированного отчета"""
+        path = self.get_artifact_path(document_id, version, report_format)
+        return path if os.path.exists(path) else None
+
+    async def get_or_render(self, document_id: int, report_data: Dict[str, Any],
+                            report_format: str) -> Tuple[str, str]:
+        """Получение пути к отчету, генерируя его при отсутствии на диске"""
+        version = self.compute_report_version(report_data)
+        path = self.find_artifact(document_id, version, report_format)
+        if path:
+            return path, version
+
+        key = (document_id, version, report_format)
+        lock = self._render_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                path = self.find_artifact(document_id, version, report_format)
+                if path:
+                    return path, version
+
+                logger.info(f"📄 [REPORT_STORE] Rendering {report_format} report for document {document_id} (version {version})")
+                loop = asyncio.get_running_loop()
+                content = await loop.run_in_executor(None, render_report, report_format, report_data)
+                path = self._write_artifact(document_id, version, report_format, content)
+                self._remove_stale_versions(document_id, version, report_format)
+                return path, version
+        finally:
+            self._render_locks.pop(key, None)
+
+    def delete_document_artifacts(self, document_id: int):
+        """Удаление всех отчетов документа"""
+        document_dir = os.path.join(self.base_dir, str(document_id))
+        try:
+            if os.path.isdir(document_dir):
+                shutil.rmtree(document_dir)
+                logger.info(f"🗑️ [REPORT_STORE] Deleted report artifacts for document {document_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ [REPORT_STORE] Failed to delete report artifacts for document {document_id}: {e}")
+
+    def _write_artifact(self, document_id: int, version: str, report_format: str, content: bytes) -> str:
+        """Атомарная запись отчета на диск"""
+        path = self.get_artifact_path(document_id, version, report_format)
+        document_dir = os.path.dirname(path)
+        ensure_directory_exists(document_dir)
+
+        fd, temp_path = tempfile.mkstemp(dir=document_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        logger.info(f"💾 [REPORT_STORE] Saved {report_format} report for document {document_id}: {len(content)} bytes")
+        return path
+
+    def _remove_stale_versions(self, document_id: int, current_version: str, report_format: str):
+        """Удаление предыдущих версий отчета того же формата"""
+        document_dir = os.path.join(self.base_dir, str(document_id))
+        try:
+            for filename in os.listdir(document_dir):
+                if filename.endswith(f".{report_format}") and filename != f"{current_version}.{report_format}":
+                    os.unlink(os.path.join(document_dir, filename))
+        except Exception as e:
+            logger.warning(f"⚠️ [REPORT_STORE] Failed to remove stale reports for document {document_id}: {e}")
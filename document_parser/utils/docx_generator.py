@@ -1,6 +1,8 @@
 import json
 import logging
 import os
+import threading
+from io import BytesIO
 from datetime import datetime
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
@@ -11,6 +13,10 @@ from docx.oxml.shared import OxmlElement, qn
 logger = logging.getLogger(__name__)
 
 class DOCXReportGenerator:
+    # Шаблон документа загружается один раз на процесс
+    _template_bytes = None
+    _template_lock = threading.Lock()
+    
     def __init__(self):
         self.document = None
         self._setup_styles()
@@ -20,6 +26,15 @@ class DOCXReportGenerator:
         # Стили будут применяться при создании документа
         pass
     
+    def _new_document(self):
+        """Создание документа из предзагруженного шаблона"""
+        with DOCXReportGenerator._template_lock:
+            if DOCXReportGenerator._template_bytes is None:
+                buffer = BytesIO()
+                Document().save(buffer)
+                DOCXReportGenerator._template_bytes = buffer.getvalue()
+        return Document(BytesIO(DOCXReportGenerator._template_bytes))
+    
     def _parse_json_string(self, json_str):
         """Парсинг JSON строки, словаря или Python repr строки"""
         try:
@@ -365,7 +380,7 @@ class DOCXReportGenerator:
         """Генерация DOCX отчета для иерархической проверки"""
         try:
             # Создаем новый документ
-            self.document = Document()
+            self.document = self._new_document()
             
             # Получаем данные отчета
             hierarchical_result = report_data.get('hierarchical_result', {})
@@ -396,7 +411,6 @@ class DOCXReportGenerator:
             self._create_overall_status_section(overall_status, execution_time)
             
             # Сохраняем документ в буфер
-            from io import BytesIO
             buffer = BytesIO()
             self.document.save(buffer)
             buffer.seek(0)
@@ -7,10 +7,57 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Размер блока при потоковом чтении и записи файлов
+FILE_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+class FileTooLargeError(Exception):
+    """Размер загружаемого файла превышает допустимый"""
+    pass
+
 def calculate_file_hash(file_content: bytes) -> str:
     """Вычисление SHA-256 хеша файла"""
     return hashlib.sha256(file_content).hexdigest()
 
+def calculate_file_hash_from_path(file_path: str, chunk_size: int = FILE_CHUNK_SIZE) -> str:
+    """Вычисление SHA-256 хеша файла на диске без загрузки его целиком в память"""
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+async def spool_upload_to_file(upload_file, directory: str, max_size: int,
+                               chunk_size: int = FILE_CHUNK_SIZE) -> Tuple[str, str, int]:
+    """Потоковая запись загружаемого файла на диск с вычислением хеша.
+    
+    Возвращает (путь к временному файлу, SHA-256, размер). В памяти одновременно
+    находится не более одного блока; при превышении max_size файл удаляется
+    и выбрасывается FileTooLargeError.
+    """
+    ensure_directory_exists(directory)
+    file_hash = hashlib.sha256()
+    file_size = 0
+    
+    with tempfile.NamedTemporaryFile(delete=False, dir=directory, suffix=".part") as temp_file:
+        temp_file_path = temp_file.name
+        try:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise FileTooLargeError(f"File exceeds maximum allowed size {max_size}")
+                file_hash.update(chunk)
+                temp_file.write(chunk)
+        except Exception:
+            temp_file.close()
+            cleanup_temp_file(temp_file_path)
+            raise
+    
+    logger.debug(f"Spooled upload to {temp_file_path}: {file_size} bytes")
+    return temp_file_path, file_hash.hexdigest(), file_size
+
 def get_file_info(file_content: bytes, filename: str) -> Tuple[str, int, str]:
     """Получение информации о файле"""
     file_hash = calculate_file_hash(file_content)
@@ -1,7 +1,9 @@
 import psutil
 import gc
+import asyncio
 import logging
-from typing import Dict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -70,3 +72,40 @@ def check_memory_pressure() -> bool:
     except Exception as e:
         logger.error(f"Error checking memory pressure: {e}")
         return False
+
+class MemoryPressureTimeout(Exception):
+    """Не удалось дождаться снижения давления на память"""
+    pass
+
+class MemoryPressureGate:
+    """Общий шлюз для операций с большими файлами.
+    
+    Ограничивает число одновременных операций и перед стартом каждой ждет,
+    пока check_memory_pressure() не перестанет сообщать о нехватке памяти.
+    """
+    
+    def __init__(self, max_concurrent: int, poll_interval: float = 1.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_interval = poll_interval
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+    
+    @asynccontextmanager
+    async def acquire(self, context: str = "", max_wait: Optional[float] = None):
+        """Вход в шлюз; при max_wait=None ожидание не ограничено"""
+        async with self._semaphore:
+            waited = 0.0
+            while check_memory_pressure():
+                if max_wait is not None and waited >= max_wait:
+                    raise MemoryPressureTimeout(f"Memory pressure did not drop within {max_wait}s")
+                if waited == 0:
+                    logger.warning(f"🔍 [MEMORY] Waiting for memory pressure to drop before {context}")
+                    cleanup_memory()
+                await asyncio.sleep(self.poll_interval)
+                waited += self.poll_interval
+            
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
@@ -0,0 +1,37 @@
+import hashlib
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+def calculate_content_hash(content: str) -> str:
+    """Вычисление SHA-256 хеша текстового содержимого"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+def calculate_page_fingerprints(doc, page) -> Dict[str, str]:
+    """Вычисление отпечатков страницы PDF без извлечения текста.
+
+    content_fingerprint - хеш потоков содержимого страницы (текст и векторная графика),
+    image_fingerprint - хеш исходных потоков изображений, размещенных на странице.
+    """
+    content_hash = hashlib.sha256()
+    try:
+        content_hash.update(page.read_contents() or b"")
+    except Exception as e:
+        logger.warning(f"Error reading page {page.number + 1} contents for fingerprint: {e}")
+        content_hash.update(page.get_text().encode("utf-8"))
+    content_hash.update(f"{page.rect.width:.2f}x{page.rect.height:.2f}:{page.rotation}".encode("utf-8"))
+
+    image_hash = hashlib.sha256()
+    for img in page.get_images():
+        xref = img[0]
+        try:
+            image_hash.update(doc.xref_stream_raw(xref) or b"")
+        except Exception as e:
+            logger.warning(f"Error reading image {xref} on page {page.number + 1} for fingerprint: {e}")
+            image_hash.update(f"{xref}:{img[2]}x{img[3]}".encode("utf-8"))
+
+    return {
+        "content_fingerprint": content_hash.hexdigest(),
+        "image_fingerprint": image_hash.hexdigest()
+    }
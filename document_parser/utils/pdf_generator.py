@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import threading
 from io import BytesIO
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
@@ -15,10 +16,25 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 logger = logging.getLogger(__name__)
 
 class PDFReportGenerator:
+    # Шрифты и стили загружаются один раз на процесс и разделяются всеми экземплярами
+    _shared_fonts = None
+    _shared_styles = None
+    _init_lock = threading.Lock()
+    
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_fonts()
-        self._setup_styles()
+        with PDFReportGenerator._init_lock:
+            if PDFReportGenerator._shared_styles is None:
+                self.styles = getSampleStyleSheet()
+                self._setup_fonts()
+                self._setup_styles()
+                PDFReportGenerator._shared_fonts = (
+                    self.default_font, self.bold_font, self.serif_font, self.serif_bold_font
+                )
+                PDFReportGenerator._shared_styles = self.styles
+            else:
+                self.styles = PDFReportGenerator._shared_styles
+                (self.default_font, self.bold_font,
+                 self.serif_font, self.serif_bold_font) = PDFReportGenerator._shared_fonts
     
     def _setup_fonts(self):
         """Настройка шрифтов для поддержки кириллицы"""
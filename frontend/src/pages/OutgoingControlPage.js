@@ -54,20 +54,29 @@ const OutgoingControlPage = ({ isAuthenticated, authToken }) => {
 
     setLoading(true);
     try {
-      const response = await fetch(`${API_BASE}/outgoing-control/documents`, {
-        headers: {
-          'Authorization': `Bearer ${authToken}`,
-          'Content-Type': 'application/json'
+      // Список отдается страницами: идем по next_cursor, пока сервис его возвращает
+      const allDocuments = [];
+      let cursor = null;
+      do {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${API_BASE}/outgoing-control/documents${query}`, {
+          headers: {
+            'Authorization': `Bearer ${authToken}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
         }
-      });
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
+        const data = await response.json();
+        allDocuments.push(...(data.documents || []));
+        cursor = data.next_cursor;
+      } while (cursor);
 
-      const data = await response.json();
-      console.log('🔍 [DEBUG] OutgoingControlPage.js: Fetched documents:', data);
-      setDocuments(data.documents || []);
+      console.log('🔍 [DEBUG] OutgoingControlPage.js: Fetched documents:', allDocuments.length);
+      setDocuments(allDocuments);
     } catch (error) {
       console.error('Error fetching documents:', error);
       setError('Ошибка загрузки документов: ' + error.message);
@@ -197,9 +206,27 @@ const OutgoingControlPage = ({ isAuthenticated, authToken }) => {
   };
 
   // Просмотр документа
-  const handleViewDocument = (document) => {
+  const handleViewDocument = async (document) => {
+    // В списке только сводка документа, результаты проверок загружаются отдельно
     setViewingDocument(document);
     setShowViewDocumentModal(true);
+    try {
+      const response = await fetch(`${API_BASE}/outgoing-control/documents/${document.id}`, {
+        headers: {
+          'Authorization': `Bearer ${authToken}`
+        }
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const data = await response.json();
+      setViewingDocument(data.document);
+    } catch (error) {
+      console.error('Error fetching document:', error);
+      setError('Ошибка загрузки документа: ' + error.message);
+    }
   };
 
   // Скачивание отчета
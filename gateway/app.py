@@ -2,7 +2,7 @@ import asyncio
 import httpx
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import logging
 import json
 import time
@@ -222,6 +222,15 @@ async def log_requests(request: Request, call_next):
     
     return response
 
+async def relay_event_stream(response: httpx.Response, client: httpx.AsyncClient):
+    """Передача потока Server-Sent Events клиенту без буферизации"""
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+        await client.aclose()
+
 async def proxy_request(request: Request, service_url: str, path: str = "") -> JSONResponse:
     """Проксирование запроса к сервису с подробным логированием"""
     print(f"🔍 [DEBUG] Gateway: Proxying request to {service_url}{path}")
@@ -247,81 +256,84 @@ async def proxy_request(request: Request, service_url: str, path: str = "") -> J
         target_url += f"?{request.url.query}"
     print(f"🔍 [DEBUG] Gateway: Target URL: {target_url}")
     
+    # Клиент закрывается здесь, а для потока событий - после его передачи клиенту
+    client = httpx.AsyncClient(timeout=600.0)
+    streaming = False
     try:
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            print(f"🔍 [DEBUG] Gateway: Creating httpx client with timeout 600s")
+        print(f"🔍 [DEBUG] Gateway: Creating httpx client with timeout 600s")
+        
+        # Читаем тело запроса
+        body = await request.body()
+        print(f"🔍 [DEBUG] Gateway: Body length: {len(body)} bytes")
+        
+        # Ответ читается потоком: способ передачи выбирается по content-type ответа сервиса,
+        # поток событий (например, /process выходного контроля) передается клиенту сразу
+        response = await client.send(
+            client.build_request(method, target_url, content=body, headers=headers),
+            stream=True
+        )
+        print(f"🔍 [DEBUG] Gateway: Response status: {response.status_code}")
+        
+        content_type = response.headers.get("content-type", "")
+        print(f"🔍 [DEBUG] Gateway: Response content-type: {content_type}")
+        
+        if content_type.startswith("text/event-stream"):
+            print(f"🔍 [DEBUG] Gateway: Streaming events from {target_url}")
+            streaming = True
+            return StreamingResponse(
+                relay_event_stream(response, client),
+                status_code=response.status_code,
+                media_type=content_type,
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        
+        # Обработка multipart/form-data
+        if "multipart/form-data" in headers.get("content-type", ""):
+            print(f"🔍 [DEBUG] Gateway: Processing multipart/form-data request")
+            print(f"🔍 [DEBUG] Gateway: Content-Type: {headers.get('content-type', 'Not set')}")
+            print(f"🔍 [DEBUG] Gateway: Response headers: {dict(response.headers)}")
             
-            # Обработка multipart/form-data
-            if "multipart/form-data" in headers.get("content-type", ""):
-                print(f"🔍 [DEBUG] Gateway: Processing multipart/form-data request")
-                print(f"🔍 [DEBUG] Gateway: Content-Type: {headers.get('content-type', 'Not set')}")
-                
-                # Читаем тело запроса
-                body = await request.body()
-                print(f"🔍 [DEBUG] Gateway: Body length: {len(body)} bytes")
-                
-                # Отправляем запрос с телом
-                response = await client.post(
-                    target_url,
-                    content=body,
-                    headers=headers
-                )
-                print(f"🔍 [DEBUG] Gateway: Response status: {response.status_code}")
-                print(f"🔍 [DEBUG] Gateway: Response headers: {dict(response.headers)}")
-                
-                # Логируем ответ
-                try:
-                    response_text = response.text
-                    print(f"🔍 [DEBUG] Gateway: Response body length: {len(response_text)}")
-                    if len(response_text) < 500:  # Логируем только небольшие ответы
-                        print(f"🔍 [DEBUG] Gateway: Response body: {response_text}")
-                    else:
-                        print(f"🔍 [DEBUG] Gateway: Response body preview: {response_text[:200]}...")
-                except Exception as e:
-                    print(f"🔍 [DEBUG] Gateway: Error reading response body: {e}")
-                
-                return JSONResponse(
-                    content=response.json() if response.headers.get("content-type", "").startswith("application/json") else {"detail": response.text},
-                    status_code=response.status_code
-                )
-            else:
-                # Обычная обработка для других типов запросов
-                print(f"🔍 [DEBUG] Gateway: Processing regular request")
-                
-                # Читаем тело запроса
-                body = await request.body()
-                print(f"🔍 [DEBUG] Gateway: Body length: {len(body)} bytes")
-                
-                # Отправляем запрос
-                response = await client.request(
-                    method,
-                    target_url,
-                    content=body,
-                    headers=headers
-                )
-                print(f"🔍 [DEBUG] Gateway: Response status: {response.status_code}")
-                
-                # Проверяем тип контента
-                content_type = response.headers.get("content-type", "")
-                print(f"🔍 [DEBUG] Gateway: Response content-type: {content_type}")
-                
-                # Для PDF, DOCX и других бинарных типов возвращаем Response
-                if (content_type.startswith("application/pdf") or 
-                    content_type.startswith("application/octet-stream") or
-                    content_type.startswith("application/vnd.openxmlformats-officedocument")):
-                    print(f"🔍 [DEBUG] Gateway: Returning binary response for content-type: {content_type}")
-                    from fastapi.responses import Response
-                    return Response(
-                        content=response.content,
-                        media_type=content_type,
-                        headers=dict(response.headers)
-                    )
+            # Логируем ответ
+            try:
+                response_text = response.text
+                print(f"🔍 [DEBUG] Gateway: Response body length: {len(response_text)}")
+                if len(response_text) < 500:  # Логируем только небольшие ответы
+                    print(f"🔍 [DEBUG] Gateway: Response body: {response_text}")
                 else:
-                    # Для JSON и текстовых ответов возвращаем JSONResponse
-                    return JSONResponse(
-                        content=response.json() if content_type.startswith("application/json") else {"detail": response.text},
-                        status_code=response.status_code
-                    )
+                    print(f"🔍 [DEBUG] Gateway: Response body preview: {response_text[:200]}...")
+            except Exception as e:
+                print(f"🔍 [DEBUG] Gateway: Error reading response body: {e}")
+            
+            return JSONResponse(
+                content=response.json() if content_type.startswith("application/json") else {"detail": response.text},
+                status_code=response.status_code
+            )
+        
+        # Обычная обработка для других типов запросов
+        print(f"🔍 [DEBUG] Gateway: Processing regular request")
+        
+        # Для PDF, DOCX и других бинарных типов возвращаем Response
+        if (content_type.startswith("application/pdf") or 
+            content_type.startswith("application/octet-stream") or
+            content_type.startswith("application/vnd.openxmlformats-officedocument")):
+            print(f"🔍 [DEBUG] Gateway: Returning binary response for content-type: {content_type}")
+            from fastapi.responses import Response
+            return Response(
+                content=response.content,
+                media_type=content_type,
+                headers=dict(response.headers)
+            )
+        else:
+            # Для JSON и текстовых ответов возвращаем JSONResponse
+            return JSONResponse(
+                content=response.json() if content_type.startswith("application/json") else {"detail": response.text},
+                status_code=response.status_code
+            )
                 
     except httpx.ConnectError as e:
         print(f"🔍 [DEBUG] Gateway: Connection error to {service_url}: {e}")
@@ -341,6 +353,9 @@ async def proxy_request(request: Request, service_url: str, path: str = "") -> J
             content={"detail": f"Proxy error: {str(e)}"},
             status_code=500
         )
+    finally:
+        if not streaming:
+            await client.aclose()
 
 # Analog Objects Service endpoints (должен быть перед /api/v1/{path:path})
 @app.api_route("/api/analog-objects", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
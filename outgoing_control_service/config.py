@@ -0,0 +1,28 @@
+"""
+Конфигурация для outgoing_control_service
+"""
+import os
+
+# Хранилище документов: метаданные и результаты проверок в SQLite, текст/страницы/чанки - файлами на диске
+OUTGOING_CONTROL_DATA_DIR: str = os.getenv('OUTGOING_CONTROL_DATA_DIR', 'data/outgoing_control')
+OUTGOING_CONTROL_DB_PATH: str = os.getenv('OUTGOING_CONTROL_DB_PATH', os.path.join(OUTGOING_CONTROL_DATA_DIR, 'documents.db'))
+OUTGOING_CONTROL_CONTENT_DIR: str = os.getenv('OUTGOING_CONTROL_CONTENT_DIR', os.path.join(OUTGOING_CONTROL_DATA_DIR, 'content'))
+# Число документов (вместе с текстом), которые держатся в памяти процесса (LRU)
+OUTGOING_CONTROL_DOCUMENT_CACHE_SIZE: int = int(os.getenv('OUTGOING_CONTROL_DOCUMENT_CACHE_SIZE', '32'))
+
+# Постраничный вывод /documents
+OUTGOING_CONTROL_PAGE_SIZE: int = int(os.getenv('OUTGOING_CONTROL_PAGE_SIZE', '50'))
+OUTGOING_CONTROL_MAX_PAGE_SIZE: int = int(os.getenv('OUTGOING_CONTROL_MAX_PAGE_SIZE', '200'))
+
+# Внешние сервисы: общий HTTP-клиент на сервис и предел одновременных запросов к нему
+SPELLCHECKER_TIMEOUT: float = float(os.getenv('SPELLCHECKER_TIMEOUT', '30'))
+SPELLCHECKER_CONCURRENCY: int = int(os.getenv('SPELLCHECKER_CONCURRENCY', '8'))
+VLLM_TIMEOUT: float = float(os.getenv('VLLM_TIMEOUT', '300'))
+VLLM_CONCURRENCY: int = int(os.getenv('VLLM_CONCURRENCY', '4'))
+
+# Двойная проверка ошибок через LLM: соседние ошибки группируются, в промпт идет только окно вокруг них
+LLM_VERIFY_WINDOW_SENTENCES: int = int(os.getenv('LLM_VERIFY_WINDOW_SENTENCES', '1'))
+LLM_VERIFY_MAX_GROUP_ERRORS: int = int(os.getenv('LLM_VERIFY_MAX_GROUP_ERRORS', '10'))
+LLM_VERIFY_MAX_WINDOW_CHARS: int = int(os.getenv('LLM_VERIFY_MAX_WINDOW_CHARS', '2000'))
+# Кеш вердиктов по (модель, слово, хеш предложения)
+LLM_VERIFY_CACHE_SIZE: int = int(os.getenv('LLM_VERIFY_CACHE_SIZE', '20000'))
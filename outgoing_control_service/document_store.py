@@ -0,0 +1,318 @@
+"""
+Хранилище документов выходного контроля: SQLite + файлы содержимого на диске
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Содержимое документа: хранится отдельным файлом и загружается только при обращении к документу
+CONTENT_FIELDS = ("text", "pages", "chunks")
+# Поля, вынесенные в колонки таблицы: из них собирается список документов без разбора JSON
+LIST_FIELDS = ("id", "document_id", "filename", "title", "status", "created_at", "uploaded_at",
+               "has_report", "text_length", "pages_count", "chunks_count", "verdict", "verdict_color")
+# Колонки, добавленные после первой версии схемы: в существующую базу дописываются при открытии
+ADDED_COLUMNS = {"verdict": "TEXT", "verdict_color": "TEXT"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    title TEXT,
+    status TEXT,
+    created_at TEXT,
+    uploaded_at TEXT,
+    has_report INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0,
+    pages_count INTEGER NOT NULL DEFAULT 0,
+    chunks_count INTEGER NOT NULL DEFAULT 0,
+    verdict TEXT,
+    verdict_color TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class DocumentStore:
+    """Документы и настройки сервиса.
+
+    Метаданные и результаты проверок лежат в SQLite (режим WAL - несколько
+    процессов uvicorn работают с одной базой), текст, страницы и чанки - в
+    JSON-файле на документ. В памяти держится не больше cache_size последних
+    документов; версия строки сверяется при каждом чтении, поэтому изменения
+    из другого процесса не теряются.
+    """
+
+    def __init__(self, db_path: str, content_dir: str, cache_size: int = 32,
+                 default_settings: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path
+        self.content_dir = content_dir
+        self.cache_size = max(0, cache_size)
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "content_loads": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        os.makedirs(content_dir, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        self._migrate(connection)
+        if default_settings:
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False)) for key, value in default_settings.items()]
+                )
+        logger.info(f"✅ [DOCUMENT_STORE] Opened {db_path} ({self.count()} documents, cache size {self.cache_size})")
+
+    # Документы
+
+    def create(self, document: Dict[str, Any]):
+        """Сохранение нового документа: содержимое - в файл, остальное - в базу"""
+        document_id = document["id"]
+        content = {field: document.get(field) for field in CONTENT_FIELDS}
+        self._write_content(document_id, content)
+
+        data = {key: value for key, value in document.items() if key not in CONTENT_FIELDS}
+        data["text_length"] = len(content["text"] or "")
+        data["pages_count"] = len(content["pages"] or [])
+        data["chunks_count"] = len(content["chunks"] or [])
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT INTO documents (id, filename, title, status, created_at, uploaded_at, has_report, "
+                "text_length, pages_count, chunks_count, verdict, verdict_color, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_id, data.get("filename"), data.get("title"), data.get("status"),
+                 data.get("created_at"), data.get("uploaded_at"), int(bool(data.get("has_report"))),
+                 data["text_length"], data["pages_count"], data["chunks_count"],
+                 *_verdict_columns(data), json.dumps(data, ensure_ascii=False))
+            )
+        self._cache_put(document_id, 1, {**data, **content})
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Документ целиком (с текстом); None, если документа нет"""
+        row = self._connection().execute(
+            "SELECT version FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            self._cache_pop(document_id)
+            return None
+
+        version = row[0]
+        with self._cache_lock:
+            cached = self._cache.get(document_id)
+            if cached is not None:
+                self._cache.move_to_end(document_id)
+        if cached is not None and cached[0] == version:
+            self.stats["cache_hits"] += 1
+            return dict(cached[1])
+
+        self.stats["cache_misses"] += 1
+        row = self._connection().execute(
+            "SELECT version, data FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        version, data = row[0], json.loads(row[1])
+        # Содержимое не меняется после загрузки - при смене версии берется из кеша
+        if cached is not None:
+            content = {field: cached[1].get(field) for field in CONTENT_FIELDS}
+        else:
+            content = self._read_content(document_id)
+        document = {**data, **content}
+        self._cache_put(document_id, version, document)
+        return dict(document)
+
+    def exists(self, document_id: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM documents WHERE id = ?", (document_id,)
+        ).fetchone() is not None
+
+    def update(self, document_id: str, fields: Dict[str, Any]) -> bool:
+        """Обновление полей документа (результаты проверок, статус); False, если документа нет"""
+        fields = {key: value for key, value in fields.items() if key not in CONTENT_FIELDS}
+        connection = self._connection()
+        with connection:
+            # BEGIN IMMEDIATE: параллельные обновления одного документа не затирают друг друга
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT version, data FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            version, data = row[0] + 1, json.loads(row[1])
+            data.update(fields)
+            connection.execute(
+                "UPDATE documents SET filename = ?, title = ?, status = ?, has_report = ?, verdict = ?, "
+                "verdict_color = ?, version = ?, data = ? WHERE id = ?",
+                (data.get("filename"), data.get("title"), data.get("status"), int(bool(data.get("has_report"))),
+                 *_verdict_columns(data), version, json.dumps(data, ensure_ascii=False), document_id)
+            )
+
+        with self._cache_lock:
+            cached = self._cache.get(document_id)
+            if cached is not None:
+                self._cache[document_id] = (version, {**cached[1], **fields})
+        return True
+
+    def delete(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Удаление документа и файла содержимого; возвращает метаданные удаленного документа"""
+        connection = self._connection()
+        with connection:
+            row = connection.execute("SELECT data FROM documents WHERE id = ?", (document_id,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+        self._cache_pop(document_id)
+        content_path = self._content_path(document_id)
+        if os.path.exists(content_path):
+            os.remove(content_path)
+        return json.loads(row[0])
+
+    def list_documents(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Страница списка документов (новые первыми) и курсор следующей страницы.
+
+        Курсор - порядковый номер последнего документа страницы: выборка по
+        индексу первичного ключа, без OFFSET и без загрузки текстов. Из экспертного
+        анализа в список попадают только вердикт и его цвет (для отметки в списке).
+        """
+        query = ("SELECT seq, id, filename, title, status, created_at, uploaded_at, has_report, "
+                 "text_length, pages_count, chunks_count, verdict, verdict_color FROM documents")
+        params: List[Any] = []
+        if cursor:
+            query += " WHERE seq < ?"
+            params.append(int(cursor))
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = self._connection().execute(query, params).fetchall()
+
+        documents = []
+        for row in rows[:limit]:
+            document_id = row[1]
+            documents.append({
+                "id": document_id,
+                "document_id": document_id,
+                "filename": row[2],
+                "title": row[3],
+                "status": row[4],
+                "created_at": row[5],
+                "uploaded_at": row[6],
+                "has_report": bool(row[7]),
+                "text_length": row[8],
+                "pages_count": row[9],
+                "chunks_count": row[10],
+                "expert_analysis": {"verdict": row[11], "verdict_color": row[12]} if row[11] else None
+            })
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return documents, next_cursor
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # Настройки
+
+    def get_settings(self) -> Dict[str, Any]:
+        rows = self._connection().execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def update_settings(self, values: Dict[str, Any]):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()]
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {**self.stats, "documents": self.count(), "cached_documents": cached, "cache_size": self.cache_size}
+
+    # Внутренние методы
+
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока (sqlite3 не разделяет соединения между потоками)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _migrate(self, connection: sqlite3.Connection):
+        """Добавление новых колонок в базу, созданную прежней версией сервиса"""
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(documents)")}
+        missing = {name: sql_type for name, sql_type in ADDED_COLUMNS.items() if name not in existing}
+        if not missing:
+            return
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            # Другой процесс мог добавить колонки, пока ждали блокировку
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(documents)")}
+            for name, sql_type in missing.items():
+                if name not in existing:
+                    connection.execute(f"ALTER TABLE documents ADD COLUMN {name} {sql_type}")
+            rows = connection.execute("SELECT id, data FROM documents").fetchall()
+            connection.executemany(
+                "UPDATE documents SET verdict = ?, verdict_color = ? WHERE id = ?",
+                [(*_verdict_columns(json.loads(data)), document_id) for document_id, data in rows]
+            )
+        logger.info(f"✅ [DOCUMENT_STORE] Added columns {', '.join(missing)} to {self.db_path}")
+
+    def _content_path(self, document_id: str) -> str:
+        return os.path.join(self.content_dir, f"{document_id}.json")
+
+    def _write_content(self, document_id: str, content: Dict[str, Any]):
+        content_path = self._content_path(document_id)
+        temp_path = f"{content_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(temp_path, content_path)
+
+    def _read_content(self, document_id: str) -> Dict[str, Any]:
+        self.stats["content_loads"] += 1
+        try:
+            with open(self._content_path(document_id), 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"⚠️ [DOCUMENT_STORE] Content file for {document_id} not found")
+            content = {}
+        return {field: content.get(field, "" if field == "text" else []) for field in CONTENT_FIELDS}
+
+    def _cache_put(self, document_id: str, version: int, document: Dict[str, Any]):
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[document_id] = (version, document)
+            self._cache.move_to_end(document_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_pop(self, document_id: str):
+        with self._cache_lock:
+            self._cache.pop(document_id, None)
+
+
+def _verdict_columns(data: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Вердикт экспертного анализа и его цвет для колонок списка"""
+    expert_analysis = data.get("expert_analysis") or {}
+    return expert_analysis.get("verdict"), expert_analysis.get("verdict_color")
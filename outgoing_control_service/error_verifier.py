@@ -0,0 +1,259 @@
+"""
+Двойная проверка найденных ошибок через LLM: группы ошибок с локальным контекстом
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Граница предложения: пробелы после знака конца предложения или перевод строки
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n+')
+JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+VERIFY_PROMPT = """
+Вы - эксперт по русскому языку. Проанализируйте найденные "ошибки" во фрагменте текста и определите, являются ли они реальными ошибками или ложными срабатываниями.
+
+ФРАГМЕНТ ТЕКСТА:
+{fragment}
+
+НАЙДЕННЫЕ "ОШИБКИ":
+{errors_text}
+
+ИНСТРУКЦИИ:
+1. Для каждой найденной "ошибки" определите, является ли она реальной ошибкой
+2. Учитывайте контекст использования слова
+3. Учитывайте, что это деловой документ с техническими терминами, именами, названиями организаций
+4. Учитывайте, что могут быть сокращения, аббревиатуры, коды
+5. Учитывайте, что могут быть английские слова в деловом контексте
+
+ОТВЕТЬТЕ В ФОРМАТЕ JSON (по одному элементу на каждую ошибку, index - номер ошибки из списка):
+{{
+    "verified_errors": [
+        {{
+            "index": 1,
+            "word": "слово",
+            "is_real_error": true/false,
+            "reason": "объяснение решения",
+            "confidence": 0.0-1.0
+        }}
+    ]
+}}
+
+Если слово является реальной ошибкой, установите "is_real_error": true.
+Если слово корректно в данном контексте, установите "is_real_error": false.
+"""
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Границы предложений текста [(начало, конец)]"""
+    spans = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans or [(0, len(text))]
+
+
+class _ErrorItem:
+    """Ошибка с позицией в тексте, окном контекста и ключом кеша вердикта"""
+    __slots__ = ("error", "word", "start", "window", "key")
+
+    def __init__(self, error: Dict[str, Any], word: str, start: int,
+                 window: Tuple[int, int], key: Tuple[str, str, str]):
+        self.error = error
+        self.word = word
+        self.start = start
+        self.window = window
+        self.key = key
+
+
+class ErrorVerifier:
+    """Проверка ошибок spellchecker через LLM по частям документа.
+
+    Ошибки упорядочиваются по позиции и объединяются в группы соседних; в
+    промпт группы попадает только окно из window_sentences предложений вокруг
+    ее ошибок (не больше max_window_chars символов), поэтому размер промпта не
+    зависит от длины документа. Группы отправляются одновременно, вердикты
+    кешируются по (модель, слово, хеш предложения) - повторяющиеся абзацы
+    писем не проверяются заново.
+    """
+
+    def __init__(self, ask_llm: Callable[[str, str], Awaitable[Dict[str, Any]]],
+                 window_sentences: int = 1, max_group_errors: int = 10,
+                 max_window_chars: int = 2000, cache_size: int = 20000):
+        self.ask_llm = ask_llm
+        self.window_sentences = max(0, window_sentences)
+        self.max_group_errors = max(1, max_group_errors)
+        self.max_window_chars = max(200, max_window_chars)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"documents": 0, "errors": 0, "cache_hits": 0, "llm_requests": 0,
+                      "failed_groups": 0, "prompt_chars": 0, "seconds": 0.0}
+
+    async def verify(self, text: str, errors: List[Dict[str, Any]], model: str) -> List[Dict[str, Any]]:
+        """Ошибки, которые LLM подтвердил (или не смог проверить), в исходном порядке"""
+        if not errors:
+            return errors
+
+        started = time.time()
+        items = self._locate(text, errors, model)
+        verdicts: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        pending: List[_ErrorItem] = []
+        queued = set()
+        cache_hits = 0
+        for item in items:
+            cached = self._cache_get(item.key)
+            if cached is not None:
+                verdicts[item.key] = cached
+                cache_hits += 1
+            elif item.key not in queued:
+                # Одинаковое слово в одинаковом предложении проверяется один раз
+                queued.add(item.key)
+                pending.append(item)
+
+        groups = self._group(pending)
+        results = await asyncio.gather(*(self._verify_group(text, group, model) for group in groups))
+        for group_verdicts in results:
+            verdicts.update(group_verdicts)
+
+        real_errors = []
+        for item in items:
+            verdict = verdicts.get(item.key)
+            if verdict is None:
+                # Если LLM не проанализировал эту ошибку, оставляем её
+                real_errors.append(item.error)
+            elif verdict["is_real_error"]:
+                item.error["llm_verification"] = dict(verdict)
+                real_errors.append(item.error)
+            else:
+                logger.info(f"LLM исключил ложное срабатывание: {item.word} - {verdict['reason']}")
+
+        elapsed = time.time() - started
+        self.stats["documents"] += 1
+        self.stats["errors"] += len(errors)
+        self.stats["cache_hits"] += cache_hits
+        self.stats["seconds"] += elapsed
+        logger.info(f"LLM проверка завершена: {len(errors)} -> {len(real_errors)} ошибок "
+                    f"({len(groups)} групп, из кеша {cache_hits}, {elapsed:.2f}s)")
+        return real_errors
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = len(self._cache)
+        return {**self.stats, "cached_verdicts": cached}
+
+    def _locate(self, text: str, errors: List[Dict[str, Any]], model: str) -> List[_ErrorItem]:
+        """Позиция, слово, окно контекста и ключ кеша для каждой ошибки"""
+        spans = sentence_spans(text)
+        starts = [start for start, _ in spans]
+        items = []
+        for error in errors:
+            start = error.get("position", error.get("offset"))
+            word = error.get("word")
+            if word is None and start is not None:
+                word = text[start:start + error.get("length", 0)]
+            word = word or ""
+            if start is None or not 0 <= start < len(text):
+                found = text.find(word) if word else -1
+                start = found if found >= 0 else 0
+
+            sentence = max(0, bisect.bisect_right(starts, start) - 1)
+            first = max(0, sentence - self.window_sentences)
+            last = min(len(spans) - 1, sentence + self.window_sentences)
+            window = (spans[first][0], spans[last][1])
+            if window[1] - window[0] > self.max_window_chars:
+                half = self.max_window_chars // 2
+                window = (max(window[0], start - half), min(window[1], start + half))
+
+            sentence_text = text[spans[sentence][0]:spans[sentence][1]]
+            context_hash = hashlib.sha1(" ".join(sentence_text.split()).encode('utf-8')).hexdigest()
+            items.append(_ErrorItem(error, word, start, window, (model, word.lower(), context_hash)))
+        return items
+
+    def _group(self, items: List[_ErrorItem]) -> List[List[_ErrorItem]]:
+        """Соседние ошибки в группы: общее окно не длиннее max_window_chars"""
+        groups: List[List[_ErrorItem]] = []
+        window: Optional[Tuple[int, int]] = None
+        for item in sorted(items, key=lambda item: item.start):
+            if groups and len(groups[-1]) < self.max_group_errors:
+                merged = (min(window[0], item.window[0]), max(window[1], item.window[1]))
+                if merged[1] - merged[0] <= self.max_window_chars:
+                    groups[-1].append(item)
+                    window = merged
+                    continue
+            groups.append([item])
+            window = item.window
+        return groups
+
+    async def _verify_group(self, text: str, group: List[_ErrorItem], model: str) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """Один запрос к LLM по группе; при ошибке группа остается без вердиктов"""
+        start = min(item.window[0] for item in group)
+        end = max(item.window[1] for item in group)
+        errors_text = "\n".join(
+            f"{number}. Слово: '{item.word}' | Контекст: '{item.error.get('context', '')}' | Тип: {item.error.get('type', '')}"
+            for number, item in enumerate(group, 1)
+        )
+        prompt = VERIFY_PROMPT.format(fragment=text[start:end], errors_text=errors_text)
+        self.stats["llm_requests"] += 1
+        self.stats["prompt_chars"] += len(prompt)
+
+        try:
+            llm_result = await self.ask_llm(prompt, model)
+            if "response" not in llm_result:
+                raise ValueError(llm_result.get("message", "no response"))
+            json_match = JSON_OBJECT.search(llm_result["response"])
+            if not json_match:
+                raise ValueError("Не удалось найти JSON в ответе LLM")
+            verified_errors = json.loads(json_match.group()).get("verified_errors", [])
+        except Exception as e:
+            self.stats["failed_groups"] += 1
+            logger.warning(f"⚠️ [LLM_VERIFY] Группа из {len(group)} ошибок не проверена: {e}")
+            return {}
+
+        verdicts = {}
+        for position, verification in enumerate(verified_errors):
+            if not isinstance(verification, dict):
+                continue
+            number = verification.get("index")
+            if isinstance(number, int) and 1 <= number <= len(group):
+                item = group[number - 1]
+            elif position < len(group):
+                item = group[position]
+            else:
+                continue
+            verdict = {
+                "is_real_error": bool(verification.get("is_real_error", True)),  # По умолчанию считаем ошибкой
+                "reason": verification.get("reason", ""),
+                "confidence": verification.get("confidence", 0.8)
+            }
+            verdicts[item.key] = verdict
+            self._cache_put(item.key, verdict)
+        return verdicts
+
+    def _cache_get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                self._cache.move_to_end(key)
+            return verdict
+
+    def _cache_put(self, key: Tuple[str, str, str], verdict: Dict[str, Any]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = verdict
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
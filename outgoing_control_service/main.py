@@ -1,13 +1,14 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 import uvicorn
 import os
 import json
+import time
 import uuid
 import logging
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Awaitable, List, Optional, Dict, Any
 import asyncio
 import aiofiles
 from pathlib import Path
@@ -17,7 +18,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Импорты для обработки документов
-import requests
+import httpx
 
 # Импорт общего модуля утилит
 import sys
@@ -25,12 +26,26 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from utils import parse_document, parse_document_from_bytes, clean_text, hierarchical_text_chunking
 
+from config import (
+    OUTGOING_CONTROL_DB_PATH, OUTGOING_CONTROL_CONTENT_DIR, OUTGOING_CONTROL_DOCUMENT_CACHE_SIZE,
+    OUTGOING_CONTROL_PAGE_SIZE, OUTGOING_CONTROL_MAX_PAGE_SIZE,
+    SPELLCHECKER_TIMEOUT, SPELLCHECKER_CONCURRENCY, VLLM_TIMEOUT, VLLM_CONCURRENCY,
+    LLM_VERIFY_WINDOW_SENTENCES, LLM_VERIFY_MAX_GROUP_ERRORS, LLM_VERIFY_MAX_WINDOW_CHARS, LLM_VERIFY_CACHE_SIZE
+)
+from document_store import DocumentStore
+from upstream_client import UpstreamClient
+from error_verifier import ErrorVerifier
+
 # Локальный fallback проверщик (упрощенный)
 
 # Конфигурация внешних сервисов
 SPELLCHECKER_SERVICE_URL = os.getenv("SPELLCHECKER_SERVICE_URL", "http://spellchecker-service:8007")
 VLLM_SERVICE_URL = os.getenv("VLLM_SERVICE_URL", "http://ai-nk-vllm-1:8005")
 
+# Общие HTTP-клиенты внешних сервисов (пул соединений, предел одновременных запросов)
+spellchecker_client = UpstreamClient("spellchecker", SPELLCHECKER_SERVICE_URL, SPELLCHECKER_TIMEOUT, SPELLCHECKER_CONCURRENCY)
+vllm_client = UpstreamClient("vllm", VLLM_SERVICE_URL, VLLM_TIMEOUT, VLLM_CONCURRENCY)
+
 # Функции для работы с spellchecker-service
 async def call_spellchecker_service(text: str, check_type: str = "comprehensive") -> Dict[str, Any]:
     """Вызов spellchecker-service для проверки текста"""
@@ -49,12 +64,10 @@ async def call_spellchecker_service(text: str, check_type: str = "comprehensive"
         request_log = f"POST {url} | Data: {len(text)} chars | Check type: {check_type}"
         logger.info(f"Отправляем запрос в spellchecker-service в {request_time}")
         
-        response = requests.post(url, json=data, timeout=30)
-        response.raise_for_status()
+        result = await spellchecker_client.post_json("/comprehensive-check", data)
         
         # Логируем время получения ответа
         response_time = datetime.now().isoformat()
-        result = response.json()
         response_log = f"Status: {result.get('status', 'unknown')} | Response size: {len(str(result))} chars"
         logger.info(f"Получен ответ от spellchecker-service в {response_time}")
         
@@ -74,7 +87,7 @@ async def call_spellchecker_service(text: str, check_type: str = "comprehensive"
         
         return result
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Ошибка вызова spellchecker-service: {e}")
         # Fallback на локальный проверщик
         return await fallback_spell_check(text)
@@ -179,7 +192,7 @@ async def call_vllm_service(prompt: str, model: str = None) -> Dict[str, Any]:
     """Вызов vllm-service для LLM обработки"""
     try:
         # Используем выбранную модель или модель по умолчанию
-        selected_model = model or settings_db.get("selected_llm_model", "llama3.1:8b")
+        selected_model = model or document_store.get_setting("selected_llm_model", "llama3.1:8b")
         
         # Если выбрана системная модель, используем локальную обработку
         if selected_model == "system":
@@ -197,12 +210,10 @@ async def call_vllm_service(prompt: str, model: str = None) -> Dict[str, Any]:
         request_log = f"POST {url} | Prompt: {len(prompt)} chars | Model: {selected_model}"
         logger.info(f"Отправляем запрос в vllm-service в {request_time} с моделью {selected_model}")
         
-        response = requests.post(url, json=data, timeout=300)
-        response.raise_for_status()
+        result = await vllm_client.post_json("/chat", data)
         
         # Логируем время получения ответа
         response_time = datetime.now().isoformat()
-        result = response.json()
         response_log = f"Response size: {len(str(result))} chars | Has response: {'response' in result}"
         logger.info(f"Получен ответ от vllm-service в {response_time}")
         
@@ -229,6 +240,15 @@ async def call_vllm_service(prompt: str, model: str = None) -> Dict[str, Any]:
             }
         }
 
+# Двойная проверка ошибок: группы соседних ошибок с окном из нескольких предложений
+error_verifier = ErrorVerifier(
+    call_vllm_service,
+    window_sentences=LLM_VERIFY_WINDOW_SENTENCES,
+    max_group_errors=LLM_VERIFY_MAX_GROUP_ERRORS,
+    max_window_chars=LLM_VERIFY_MAX_WINDOW_CHARS,
+    cache_size=LLM_VERIFY_CACHE_SIZE
+)
+
 def parse_llm_spelling_analysis(analysis_text: str, original_errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Парсинг детального анализа орфографических ошибок от LLM"""
     detailed_errors = []
@@ -306,96 +326,13 @@ def parse_llm_spelling_analysis(analysis_text: str, original_errors: List[Dict[s
     return detailed_errors
 
 async def double_check_errors_with_llm(text: str, errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Двойная проверка найденных ошибок через LLM"""
+    """Двойная проверка найденных ошибок через LLM (группами с локальным контекстом)"""
     if not errors:
         return errors
     
     try:
-        # Формируем промпт для LLM
-        errors_text = "\n".join([
-            f"- Слово: '{error.get('word', '')}' | Контекст: '{error.get('context', '')}' | Тип: {error.get('type', '')}"
-            for error in errors
-        ])
-        
-        prompt = f"""
-Вы - эксперт по русскому языку. Проанализируйте найденные "ошибки" в тексте и определите, являются ли они реальными ошибками или ложными срабатываниями.
-
-ИСХОДНЫЙ ТЕКСТ:
-{text}
-
-НАЙДЕННЫЕ "ОШИБКИ":
-{errors_text}
-
-ИНСТРУКЦИИ:
-1. Для каждой найденной "ошибки" определите, является ли она реальной ошибкой
-2. Учитывайте контекст использования слова
-3. Учитывайте, что это деловой документ с техническими терминами, именами, названиями организаций
-4. Учитывайте, что могут быть сокращения, аббревиатуры, коды
-5. Учитывайте, что могут быть английские слова в деловом контексте
-
-ОТВЕТЬТЕ В ФОРМАТЕ JSON:
-{{
-    "verified_errors": [
-        {{
-            "word": "слово",
-            "is_real_error": true/false,
-            "reason": "объяснение решения",
-            "confidence": 0.0-1.0
-        }}
-    ]
-}}
-
-Если слово является реальной ошибкой, установите "is_real_error": true.
-Если слово корректно в данном контексте, установите "is_real_error": false.
-"""
-        
-        # Вызываем LLM
-        selected_model = settings_db.get("selected_llm_model", "llama3.1:8b")
-        llm_result = await call_vllm_service(prompt, selected_model)
-        
-        if "response" not in llm_result:
-            logger.warning("LLM проверка не удалась, возвращаем исходные ошибки")
-            return errors
-        
-        # Парсим ответ LLM
-        try:
-            llm_response = llm_result["response"]
-            # Извлекаем JSON из ответа
-            import re
-            json_match = re.search(r'\{.*\}', llm_response, re.DOTALL)
-            if json_match:
-                llm_analysis = json.loads(json_match.group())
-                verified_errors = llm_analysis.get("verified_errors", [])
-                
-                # Фильтруем ошибки на основе анализа LLM
-                real_errors = []
-                for i, error in enumerate(errors):
-                    if i < len(verified_errors):
-                        verification = verified_errors[i]
-                        if verification.get("is_real_error", True):  # По умолчанию считаем ошибкой
-                            # Добавляем информацию от LLM
-                            error["llm_verification"] = {
-                                "is_real_error": verification.get("is_real_error", True),
-                                "reason": verification.get("reason", ""),
-                                "confidence": verification.get("confidence", 0.8)
-                            }
-                            real_errors.append(error)
-                        else:
-                            logger.info(f"LLM исключил ложное срабатывание: {error.get('word', '')} - {verification.get('reason', '')}")
-                    else:
-                        # Если LLM не проанализировал эту ошибку, оставляем её
-                        real_errors.append(error)
-                
-                logger.info(f"LLM проверка завершена: {len(errors)} -> {len(real_errors)} ошибок")
-                return real_errors
-            else:
-                logger.warning("Не удалось найти JSON в ответе LLM")
-                return errors
-                
-        except json.JSONDecodeError as e:
-            logger.error(f"Ошибка парсинга JSON от LLM: {e}")
-            return errors
-            
+        selected_model = document_store.get_setting("selected_llm_model", "llama3.1:8b")
+        return await error_verifier.verify(text, errors, selected_model)
     except Exception as e:
         logger.error(f"Ошибка двойной проверки через LLM: {e}")
         return errors
@@ -466,6 +403,12 @@ async def fallback_spell_check(text: str) -> Dict[str, Any]:
 
 app = FastAPI(title="Outgoing Control Service", version="1.0.0")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Закрытие соединений с внешними сервисами"""
+    await spellchecker_client.close()
+    await vllm_client.close()
+
 # CORS настройки
 app.add_middleware(
     CORSMiddleware,
@@ -484,17 +427,8 @@ os.makedirs(REPORTS_DIR, exist_ok=True)
 # Инициализация сервисов (спелчекер временно отключен)
 # spell_checker = SpellChecker(language='ru')
 
-# База данных в памяти (в реальном проекте использовать PostgreSQL)
-documents_db = {}
-
-def update_existing_documents():
-    """Обновляет существующие документы в базе данных для совместимости с фронтендом"""
-    for doc_id, doc in documents_db.items():
-        # Всегда обновляем document_id и has_report
-        doc["document_id"] = doc_id
-        doc["has_report"] = doc.get("consolidated_report") is not None
-reports_db = {}
-settings_db = {
+# Настройки по умолчанию (записываются в хранилище при первом запуске)
+DEFAULT_SETTINGS = {
     "llm_prompt": """Вы - эксперт по выходному контролю технической документации (ТДО). 
 Ваша задача - проверить исходящую корреспонденцию на соответствие требованиям ТДО.
 
@@ -596,6 +530,14 @@ settings_db = {
     "selected_llm_model": "llama3.1:8b"
 }
 
+# Хранилище документов и настроек (SQLite, текст документов - файлами на диске)
+document_store = DocumentStore(
+    OUTGOING_CONTROL_DB_PATH,
+    OUTGOING_CONTROL_CONTENT_DIR,
+    cache_size=OUTGOING_CONTROL_DOCUMENT_CACHE_SIZE,
+    default_settings=DEFAULT_SETTINGS
+)
+
 # Промпт для эксперта выходного контроля ТДО
 EXPERT_PROMPT = """
 Вы - эксперт по выходному контролю технической документации (ТДО). 
@@ -704,10 +646,8 @@ async def health_check():
     # Проверяем доступность spellchecker-service
     spellchecker_status = "unknown"
     try:
-        response = requests.get(f"{SPELLCHECKER_SERVICE_URL}/health", timeout=5)
-        if response.status_code == 200:
-            spellchecker_data = response.json()
-            spellchecker_status = spellchecker_data.get("status", "unknown")
+        spellchecker_data = await spellchecker_client.get_json("/health", timeout=5)
+        spellchecker_status = spellchecker_data.get("status", "unknown")
     except Exception as e:
         logger.warning(f"Spellchecker service недоступен: {e}")
         spellchecker_status = "unavailable"
@@ -715,18 +655,21 @@ async def health_check():
     return {
         "status": "healthy", 
         "service": "outgoing_control",
-        "spellchecker_service": spellchecker_status
+        "spellchecker_service": spellchecker_status,
+        "upstreams": {
+            "spellchecker": spellchecker_client.get_stats(),
+            "vllm": vllm_client.get_stats()
+        },
+        "llm_verification": error_verifier.get_stats()
     }
 
 @app.get("/spellchecker-status")
 async def get_spellchecker_status():
     """Получение статуса spellchecker-service"""
     try:
-        response = requests.get(f"{SPELLCHECKER_SERVICE_URL}/health", timeout=5)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"status": "error", "message": f"HTTP {response.status_code}"}
+        return await spellchecker_client.get_json("/health", timeout=5)
+    except httpx.HTTPStatusError as e:
+        return {"status": "error", "message": f"HTTP {e.response.status_code}"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -734,139 +677,149 @@ async def get_spellchecker_status():
 async def get_spellchecker_stats():
     """Получение статистики spellchecker-service"""
     try:
-        response = requests.get(f"{SPELLCHECKER_SERVICE_URL}/stats", timeout=5)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"status": "error", "message": f"HTTP {response.status_code}"}
+        return await spellchecker_client.get_json("/stats", timeout=5)
+    except httpx.HTTPStatusError as e:
+        return {"status": "error", "message": f"HTTP {e.response.status_code}"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/settings")
 async def get_settings():
     """Получение настроек"""
-    return settings_db
+    return document_store.get_settings()
 
 
+async def store_uploaded_document(filename: str, content: bytes) -> Dict[str, Any]:
+    """Сохранение файла, извлечение текста и запись документа в хранилище"""
+    # Генерируем уникальный ID документа
+    document_id = str(uuid.uuid4())
+    
+    # Начинаем отсчет времени загрузки
+    upload_start_time = datetime.now()
+    
+    # Сохраняем файл
+    file_path = os.path.join(UPLOAD_DIR, f"{document_id}_{filename}")
+    async with aiofiles.open(file_path, 'wb') as f:
+        await f.write(content)
+    
+    # Время завершения загрузки файла
+    upload_end_time = datetime.now()
+    upload_duration = (upload_end_time - upload_start_time).total_seconds()
+    
+    # Начинаем отсчет времени извлечения текста
+    text_extraction_start_time = datetime.now()
+    
+    # Парсим документ
+    parsed_content = await parse_document(file_path)
+    
+    # Время завершения извлечения текста
+    text_extraction_end_time = datetime.now()
+    text_extraction_duration = (text_extraction_end_time - text_extraction_start_time).total_seconds()
+    
+    # Сохраняем информацию о документе
+    upload_time = datetime.now().isoformat()
+    document_info = {
+        "id": document_id,
+        "document_id": document_id,  # Добавляем document_id для совместимости с фронтендом
+        "filename": filename,
+        "title": filename.replace('.pdf', '').replace('.doc', '').replace('.docx', ''),
+        "file_path": file_path,
+        "text": parsed_content["text"],
+        "pages": parsed_content["pages"],
+        "chunks": parsed_content["chunks"],
+        "status": "uploaded",
+        "created_at": upload_time,
+        "uploaded_at": upload_time,
+        "spell_check_results": None,
+        "expert_analysis": None,
+        "consolidated_report": None,
+        "has_report": False,  # Добавляем has_report для совместимости с фронтендом
+        # Добавляем метрики времени
+        "timing_metrics": {
+            "upload_duration_seconds": upload_duration,
+            "text_extraction_duration_seconds": text_extraction_duration,
+            "total_processing_duration_seconds": upload_duration + text_extraction_duration,
+            "upload_start_time": upload_start_time.isoformat(),
+            "upload_end_time": upload_end_time.isoformat(),
+            "text_extraction_start_time": text_extraction_start_time.isoformat(),
+            "text_extraction_end_time": text_extraction_end_time.isoformat()
+        }
+    }
+    
+    document_store.create(document_info)
+    return document_info
+
 @app.post("/upload")
 async def upload_document(file: UploadFile = File(...)):
     """Загрузка документа для проверки"""
     try:
-        # Генерируем уникальный ID документа
-        document_id = str(uuid.uuid4())
-        
-        # Начинаем отсчет времени загрузки
-        upload_start_time = datetime.now()
-        
-        # Сохраняем файл
-        file_path = os.path.join(UPLOAD_DIR, f"{document_id}_{file.filename}")
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Время завершения загрузки файла
-        upload_end_time = datetime.now()
-        upload_duration = (upload_end_time - upload_start_time).total_seconds()
-        
-        # Начинаем отсчет времени извлечения текста
-        text_extraction_start_time = datetime.now()
-        
-        # Парсим документ
-        parsed_content = await parse_document(file_path)
-        
-        # Время завершения извлечения текста
-        text_extraction_end_time = datetime.now()
-        text_extraction_duration = (text_extraction_end_time - text_extraction_start_time).total_seconds()
-        
-        # Сохраняем информацию о документе
-        upload_time = datetime.now().isoformat()
-        document_info = {
-            "id": document_id,
-            "document_id": document_id,  # Добавляем document_id для совместимости с фронтендом
-            "filename": file.filename,
-            "title": file.filename.replace('.pdf', '').replace('.doc', '').replace('.docx', ''),
-            "file_path": file_path,
-            "text": parsed_content["text"],
-            "pages": parsed_content["pages"],
-            "chunks": parsed_content["chunks"],
-            "status": "uploaded",
-            "created_at": upload_time,
-            "uploaded_at": upload_time,
-            "spell_check_results": None,
-            "expert_analysis": None,
-            "consolidated_report": None,
-            "has_report": False,  # Добавляем has_report для совместимости с фронтендом
-            # Добавляем метрики времени
-            "timing_metrics": {
-                "upload_duration_seconds": upload_duration,
-                "text_extraction_duration_seconds": text_extraction_duration,
-                "total_processing_duration_seconds": upload_duration + text_extraction_duration,
-                "upload_start_time": upload_start_time.isoformat(),
-                "upload_end_time": upload_end_time.isoformat(),
-                "text_extraction_start_time": text_extraction_start_time.isoformat(),
-                "text_extraction_end_time": text_extraction_end_time.isoformat()
-            }
-        }
-        
-        documents_db[document_id] = document_info
+        document_info = await store_uploaded_document(file.filename, await file.read())
         
         return {
             "status": "success",
-            "document_id": document_id,
+            "document_id": document_info["id"],
             "filename": file.filename,
-            "text": parsed_content["text"],
-            "pages_count": len(parsed_content["pages"]),
-            "chunks_count": len(parsed_content["chunks"])
+            "text": document_info["text"],
+            "pages_count": len(document_info["pages"]),
+            "chunks_count": len(document_info["chunks"])
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка загрузки документа: {str(e)}")
 
+async def run_spell_check(document_id: str, text: str) -> Dict[str, Any]:
+    """Проверка орфографии через spellchecker-service с двойной проверкой ошибок через LLM.
+    
+    Результаты сохраняются в документ; возвращается ответ spellchecker-service
+    с проверенными ошибками в поле spelling.
+    """
+    logger.info(f"Начинаем проверку орфографии для документа {document_id} через spellchecker-service")
+    spell_check_result = await call_spellchecker_service(text, "spellcheck")
+    
+    if spell_check_result["status"] != "success":
+        raise RuntimeError("Ошибка spellchecker-service")
+    
+    spell_check_results = spell_check_result["spelling"]
+    
+    # Двойная проверка найденных ошибок через LLM
+    errors = spell_check_results.get("errors", [])
+    if errors:
+        logger.info(f"Начинаем двойную проверку {len(errors)} орфографических ошибок через LLM")
+        verified_errors = await double_check_errors_with_llm(text, errors)
+        
+        # Обновляем результаты с проверенными ошибками
+        spell_check_results["errors"] = verified_errors
+        spell_check_results["misspelled_count"] = len(verified_errors)
+        
+        logger.info(f"Двойная проверка орфографии завершена: {len(errors)} -> {len(verified_errors)} ошибок")
+    
+    document_store.update(document_id, {
+        "spell_check_results": spell_check_results,
+        "spell_check_debug_info": spell_check_result.get("debug_info", {}),
+        "status": "spell_checked"
+    })
+    
+    logger.info(f"Проверка орфографии завершена для документа {document_id}: {spell_check_results['misspelled_count']} ошибок")
+    return spell_check_result
+
 @app.post("/spellcheck")
 async def spell_check_document(request: Dict[str, Any]):
     """Проверка орфографии документа с помощью spellchecker-service"""
     try:
         document_id = request["document_id"]
         
-        if document_id not in documents_db:
-            raise HTTPException(status_code=404, detail="Документ не найден")
-        
         # Получаем текст документа
-        document = documents_db[document_id]
-        text = document["text"]
+        document = document_store.get(document_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Документ не найден")
         
-        # Используем spellchecker-service
-        logger.info(f"Начинаем проверку орфографии для документа {document_id} через spellchecker-service")
-        spell_check_result = await call_spellchecker_service(text, "spellcheck")
+        spell_check_result = await run_spell_check(document_id, document["text"])
         
-        if spell_check_result["status"] == "success":
-            spell_check_results = spell_check_result["spelling"]
-            
-            # Двойная проверка найденных ошибок через LLM
-            errors = spell_check_results.get("errors", [])
-            if errors:
-                logger.info(f"Начинаем двойную проверку {len(errors)} орфографических ошибок через LLM")
-                verified_errors = await double_check_errors_with_llm(text, errors)
-                
-                # Обновляем результаты с проверенными ошибками
-                spell_check_results["errors"] = verified_errors
-                spell_check_results["misspelled_count"] = len(verified_errors)
-                
-                logger.info(f"Двойная проверка орфографии завершена: {len(errors)} -> {len(verified_errors)} ошибок")
-            
-            documents_db[document_id]["spell_check_results"] = spell_check_results
-            documents_db[document_id]["spell_check_debug_info"] = spell_check_result.get("debug_info", {})
-            documents_db[document_id]["status"] = "spell_checked"
-            
-            logger.info(f"Проверка орфографии завершена для документа {document_id}: {spell_check_results['misspelled_count']} ошибок")
-            
-            return {
-                "status": "success",
-                "spell_check_results": spell_check_results,
-                "method": spell_check_result.get("method", "unknown")
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Ошибка spellchecker-service")
+        return {
+            "status": "success",
+            "spell_check_results": spell_check_result["spelling"],
+            "method": spell_check_result.get("method", "unknown")
+        }
         
     except Exception as e:
         logger.error(f"Ошибка проверки орфографии: {str(e)}", exc_info=True)
@@ -878,11 +831,11 @@ async def grammar_check_document(request: Dict[str, Any]):
     try:
         document_id = request["document_id"]
         
-        if document_id not in documents_db:
+        # Получаем текст документа
+        document = document_store.get(document_id)
+        if document is None:
             raise HTTPException(status_code=404, detail="Документ не найден")
         
-        # Получаем текст документа
-        document = documents_db[document_id]
         text = document["text"]
         
         # Используем spellchecker-service
@@ -905,11 +858,10 @@ async def grammar_check_document(request: Dict[str, Any]):
                 logger.info(f"Двойная проверка грамматики завершена: {len(errors)} -> {len(verified_errors)} ошибок")
             
             # Сохраняем результаты
-            if "grammar_check_results" not in documents_db[document_id]:
-                documents_db[document_id]["grammar_check_results"] = {}
-            
-            documents_db[document_id]["grammar_check_results"] = grammar_results
-            documents_db[document_id]["grammar_check_debug_info"] = grammar_check_result.get("debug_info", {})
+            document_store.update(document_id, {
+                "grammar_check_results": grammar_results,
+                "grammar_check_debug_info": grammar_check_result.get("debug_info", {})
+            })
             
             logger.info(f"Проверка грамматики завершена для документа {document_id}: {grammar_results['total_errors']} ошибок")
             
@@ -931,11 +883,11 @@ async def comprehensive_check_document(request: Dict[str, Any]):
     try:
         document_id = request["document_id"]
         
-        if document_id not in documents_db:
+        # Получаем текст документа
+        document = document_store.get(document_id)
+        if document is None:
             raise HTTPException(status_code=404, detail="Документ не найден")
         
-        # Получаем текст документа
-        document = documents_db[document_id]
         text = document["text"]
         
         # Используем spellchecker-service для комплексной проверки
@@ -970,9 +922,11 @@ async def comprehensive_check_document(request: Dict[str, Any]):
                 logger.info(f"Двойная проверка завершена: {len(all_errors)} -> {len(verified_errors)} ошибок")
             
             # Сохраняем результаты
-            documents_db[document_id]["comprehensive_check_results"] = comprehensive_results
-            documents_db[document_id]["comprehensive_check_debug_info"] = comprehensive_result.get("debug_info", {})
-            documents_db[document_id]["status"] = "comprehensively_checked"
+            document_store.update(document_id, {
+                "comprehensive_check_results": comprehensive_results,
+                "comprehensive_check_debug_info": comprehensive_result.get("debug_info", {}),
+                "status": "comprehensively_checked"
+            })
             
             logger.info(f"Комплексная проверка завершена для документа {document_id}: {comprehensive_results['total_errors']} ошибок")
             
@@ -989,57 +943,83 @@ async def comprehensive_check_document(request: Dict[str, Any]):
         logger.error(f"Ошибка комплексной проверки: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ошибка комплексной проверки: {str(e)}")
 
-@app.post("/expert-analysis")
-async def expert_analysis(request: Dict[str, Any]):
-    """Экспертная проверка документа"""
+async def run_expert_analysis(document: Dict[str, Any], spell_check: Optional[Awaitable[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Экспертный анализ документа через LLM; результат сохраняется в документ.
+    
+    spell_check - незавершенный этап проверки орфографии (конвейер /process): его
+    результат ожидается, только если промпт эксперта включает результаты spellchecker.
+    """
+    document_id = document["id"]
+    text = document["text"]
+    spell_check_results = document.get("spell_check_results", {})
+    prompt_template = document_store.get_setting("llm_prompt", EXPERT_PROMPT)
+    selected_model = document_store.get_setting("selected_llm_model", "llama3.1:8b")
+    
+    # Промпт без результатов spellchecker не зависит от проверки орфографии:
+    # запрос к LLM отправляется сразу и выполняется одновременно с ней
+    llm_task = None
+    if "{spell_check_results}" not in prompt_template:
+        logger.info(f"Начинаем экспертный анализ документа {document_id} через LLM с моделью {selected_model} (параллельно с проверкой орфографии)")
+        llm_task = asyncio.create_task(call_vllm_service(
+            prompt_template.format(text=text, spell_check_results=""), selected_model
+        ))
+    
+    # Если нет результатов проверки орфографии, выполняем проверку
+    spell_check_debug_info = {}
     try:
-        document_id = request["document_id"]
-        
-        if document_id not in documents_db:
-            raise HTTPException(status_code=404, detail="Документ не найден")
-        
-        # Получаем данные из базы данных
-        document = documents_db[document_id]
-        text = document["text"]
-        spell_check_results = document.get("spell_check_results", {})
-        
-        # Если нет результатов проверки орфографии, выполняем проверку
-        spell_check_debug_info = {}
-        if not spell_check_results:
+        if spell_check is not None:
+            # Результаты параллельного этапа проверки орфографии
+            try:
+                spell_check_result = await spell_check
+                spell_check_results = spell_check_result["spelling"]
+                spell_check_debug_info = spell_check_result.get("debug_info", {})
+            except Exception as e:
+                logger.warning(f"⚠️ Проверка орфографии для документа {document_id} не удалась: {e}")
+                spell_check_results = {"errors": [], "accuracy": 100}
+        elif not spell_check_results:
             logger.info(f"Выполняем проверку орфографии для документа {document_id}")
             spell_check_result = await call_spellchecker_service(text, "spellcheck")
             if spell_check_result["status"] == "success":
                 spell_check_results = spell_check_result["spelling"]
                 spell_check_debug_info = spell_check_result.get("debug_info", {})
-                documents_db[document_id]["spell_check_results"] = spell_check_results
-                documents_db[document_id]["spell_check_debug_info"] = spell_check_debug_info
+                document_store.update(document_id, {
+                    "spell_check_results": spell_check_results,
+                    "spell_check_debug_info": spell_check_debug_info
+                })
             else:
                 spell_check_results = {"errors": [], "accuracy": 100}
         else:
             # Получаем сохраненную отладочную информацию
-            spell_check_debug_info = documents_db[document_id].get("spell_check_debug_info", {})
-        
+            spell_check_debug_info = document.get("spell_check_debug_info", {})
+    except BaseException:
+        # Запрос к LLM больше не нужен: без отмены задача останется без ожидания
+        if llm_task is not None:
+            llm_task.cancel()
+        raise
+    
+    if llm_task is not None:
+        llm_result = await llm_task
+    else:
         # Формируем промпт для эксперта (используем настраиваемый промпт)
-        prompt = settings_db.get("llm_prompt", EXPERT_PROMPT).format(
+        prompt = prompt_template.format(
             text=text,
             spell_check_results=json.dumps(spell_check_results, ensure_ascii=False, indent=2)
         )
         
         # Вызываем LLM для экспертного анализа
-        selected_model = settings_db.get("selected_llm_model", "llama3.1:8b")
         logger.info(f"Начинаем экспертный анализ документа {document_id} через LLM с моделью {selected_model}")
         llm_result = await call_vllm_service(prompt, selected_model)
+    
+    if "response" in llm_result:
+        analysis_text = llm_result["response"]
+        logger.info(f"LLM анализ завершен для документа {document_id}")
+    else:
+        logger.warning("LLM анализ не удался, используем упрощенный анализ")
+        # Fallback анализ
+        error_count = len(spell_check_results.get('errors', []))
+        accuracy = spell_check_results.get('accuracy', 0)
         
-        if "response" in llm_result:
-            analysis_text = llm_result["response"]
-            logger.info(f"LLM анализ завершен для документа {document_id}")
-        else:
-            logger.warning("LLM анализ не удался, используем упрощенный анализ")
-            # Fallback анализ
-            error_count = len(spell_check_results.get('errors', []))
-            accuracy = spell_check_results.get('accuracy', 0)
-            
-            analysis_text = f"""
+        analysis_text = f"""
             ЭКСПЕРТНЫЙ АНАЛИЗ ДОКУМЕНТА (УПРОЩЕННЫЙ)
             
             Документ: {document_id}
@@ -1054,49 +1034,49 @@ async def expert_analysis(request: Dict[str, Any]):
             ОБЩАЯ ОЦЕНКА:
             Документ прошел базовую проверку. Рекомендуется исправить орфографические ошибки перед отправкой.
             """
-        
-        # Парсим детальный анализ от LLM
-        detailed_errors = []
-        if "response" in llm_result:
-            detailed_errors = parse_llm_spelling_analysis(analysis_text, spell_check_results.get('errors', []))
-        
-        # Извлекаем вердикт из анализа LLM
+    
+    # Парсим детальный анализ от LLM
+    detailed_errors = []
+    if "response" in llm_result:
+        detailed_errors = parse_llm_spelling_analysis(analysis_text, spell_check_results.get('errors', []))
+    
+    # Извлекаем вердикт из анализа LLM
+    verdict = "ТРЕБУЕТСЯ ДОРАБОТКИ"
+    verdict_color = "warning"
+    
+    if "ГОТОВ К ОТПРАВКЕ" in analysis_text.upper():
+        verdict = "ДОКУМЕНТ ГОТОВ К ОТПРАВКЕ"
+        verdict_color = "success"
+    elif "НЕ ГОТОВ К ОТПРАВКЕ" in analysis_text.upper():
+        verdict = "НЕ ГОТОВ К ОТПРАВКЕ"
+        verdict_color = "error"
+    elif "ТРЕБУЕТ ДОРАБОТКИ" in analysis_text.upper():
         verdict = "ТРЕБУЕТСЯ ДОРАБОТКИ"
         verdict_color = "warning"
-        
-        if "ГОТОВ К ОТПРАВКЕ" in analysis_text.upper():
-            verdict = "ДОКУМЕНТ ГОТОВ К ОТПРАВКЕ"
-            verdict_color = "success"
-        elif "НЕ ГОТОВ К ОТПРАВКЕ" in analysis_text.upper():
-            verdict = "НЕ ГОТОВ К ОТПРАВКЕ"
-            verdict_color = "error"
-        elif "ТРЕБУЕТ ДОРАБОТКИ" in analysis_text.upper():
-            verdict = "ТРЕБУЕТСЯ ДОРАБОТКИ"
-            verdict_color = "warning"
-        
-        # Определяем общий балл на основе вердикта
-        if verdict == "ДОКУМЕНТ ГОТОВ К ОТПРАВКЕ":
-            overall_score = 90
-            compliance_status = "compliant"
-        elif verdict == "ТРЕБУЕТСЯ ДОРАБОТКИ":
-            overall_score = 60
-            compliance_status = "partial"
-        else:
-            overall_score = 30
-            compliance_status = "non_compliant"
-        
-        # Собираем отладочную информацию
-        debug_info = {
-            "spellchecker_debug": spell_check_debug_info,
-            "vllm_debug": llm_result.get('debug_info', {}),
-            "analysis_generation_time": datetime.now().isoformat()
-        }
-        
-        # Получаем метрики времени из документа
-        timing_metrics = document.get('timing_metrics', {})
-        
-        # Добавляем отладочную информацию в конец отчета
-        debug_section = f"""
+    
+    # Определяем общий балл на основе вердикта
+    if verdict == "ДОКУМЕНТ ГОТОВ К ОТПРАВКЕ":
+        overall_score = 90
+        compliance_status = "compliant"
+    elif verdict == "ТРЕБУЕТСЯ ДОРАБОТКИ":
+        overall_score = 60
+        compliance_status = "partial"
+    else:
+        overall_score = 30
+        compliance_status = "non_compliant"
+    
+    # Собираем отладочную информацию
+    debug_info = {
+        "spellchecker_debug": spell_check_debug_info,
+        "vllm_debug": llm_result.get('debug_info', {}),
+        "analysis_generation_time": datetime.now().isoformat()
+    }
+    
+    # Получаем метрики времени из документа
+    timing_metrics = document.get('timing_metrics', {})
+    
+    # Добавляем отладочную информацию в конец отчета
+    debug_section = f"""
 
 ## ОТЛАДОЧНАЯ ИНФОРМАЦИЯ
 
@@ -1136,168 +1116,354 @@ async def expert_analysis(request: Dict[str, Any]):
 - **Время генерации отчета**: {debug_info['analysis_generation_time']}
 - **LLM использован**: {'Да' if "response" in llm_result else 'Нет'}
 """
+    
+    # Добавляем отладочную секцию к анализу
+    analysis_text_with_debug = analysis_text + debug_section
+    
+    expert_analysis = {
+        "analysis_text": analysis_text_with_debug,
+        "overall_score": overall_score,
+        "verdict": verdict,
+        "verdict_color": verdict_color,
+        "spelling_errors": spell_check_results.get('errors', []),
+        "detailed_spelling_errors": detailed_errors,
+        "spelling_accuracy": spell_check_results.get('accuracy', 0),
+        "violations": [
+            {
+                "type": "spelling",
+                "description": f"Найдено {len(spell_check_results.get('errors', []))} орфографических ошибок",
+                "severity": "medium"
+            }
+        ] if spell_check_results.get('errors') else [],
+        "recommendations": [
+            "Исправить орфографические ошибки",
+            "Проверить соответствие стандартам оформления",
+            "Убедиться в наличии всех необходимых подписей"
+        ],
+        "compliance_status": compliance_status,
+        "generated_at": datetime.now().isoformat(),
+        "llm_used": "response" in llm_result,
+        "debug_info": debug_info
+    }
+    
+    # Сохраняем результаты
+    document_store.update(document_id, {
+        "expert_analysis": expert_analysis,
+        "status": "expert_analyzed"
+    })
+    
+    return expert_analysis
+
+@app.post("/expert-analysis")
+async def expert_analysis(request: Dict[str, Any]):
+    """Экспертная проверка документа"""
+    try:
+        document_id = request["document_id"]
         
-        # Добавляем отладочную секцию к анализу
-        analysis_text_with_debug = analysis_text + debug_section
-        
-        expert_analysis = {
-            "analysis_text": analysis_text_with_debug,
-            "overall_score": overall_score,
-            "verdict": verdict,
-            "verdict_color": verdict_color,
-            "spelling_errors": spell_check_results.get('errors', []),
-            "detailed_spelling_errors": detailed_errors,
-            "spelling_accuracy": spell_check_results.get('accuracy', 0),
-            "violations": [
-                {
-                    "type": "spelling",
-                    "description": f"Найдено {len(spell_check_results.get('errors', []))} орфографических ошибок",
-                    "severity": "medium"
-                }
-            ] if spell_check_results.get('errors') else [],
-            "recommendations": [
-                "Исправить орфографические ошибки",
-                "Проверить соответствие стандартам оформления",
-                "Убедиться в наличии всех необходимых подписей"
-            ],
-            "compliance_status": compliance_status,
-            "generated_at": datetime.now().isoformat(),
-            "llm_used": "response" in llm_result,
-            "debug_info": debug_info
-        }
-        
-        # Сохраняем результаты
-        documents_db[document_id]["expert_analysis"] = expert_analysis
-        documents_db[document_id]["status"] = "expert_analyzed"
+        # Получаем данные из базы данных
+        document = document_store.get(document_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Документ не найден")
         
         return {
             "status": "success",
-            "expert_analysis": expert_analysis
+            "expert_analysis": await run_expert_analysis(document)
         }
         
     except Exception as e:
         logger.error(f"Ошибка экспертного анализа: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Ошибка экспертного анализа: {str(e)}")
 
+async def run_consolidation(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Консолидированный отчет по результатам проверок; сохраняется в документ и в файл"""
+    document_id = document["id"]
+    spell_check_results = document.get("spell_check_results", {})
+    expert_analysis = document.get("expert_analysis", {})
+    original_text = document["text"]
+    
+    # Получаем метрики времени
+    timing_metrics = document.get('timing_metrics', {})
+    
+    # Создаем консолидированный отчет
+    consolidated_report = {
+        "document_id": document_id,
+        "generated_at": datetime.now().isoformat(),
+        "summary": {
+            "total_issues": len(spell_check_results.get("errors", [])) + len(expert_analysis.get("violations", [])),
+            "spell_errors": len(spell_check_results.get("errors", [])),
+            "expert_violations": len(expert_analysis.get("violations", [])),
+            "overall_score": expert_analysis.get("overall_score", 0),
+            "compliance_status": expert_analysis.get("compliance_status", "unknown")
+        },
+        "timing_metrics": {
+            "upload_duration_seconds": timing_metrics.get('upload_duration_seconds', 0),
+            "text_extraction_duration_seconds": timing_metrics.get('text_extraction_duration_seconds', 0),
+            "total_processing_duration_seconds": timing_metrics.get('total_processing_duration_seconds', 0),
+            "upload_start_time": timing_metrics.get('upload_start_time', 'N/A'),
+            "upload_end_time": timing_metrics.get('upload_end_time', 'N/A'),
+            "text_extraction_start_time": timing_metrics.get('text_extraction_start_time', 'N/A'),
+            "text_extraction_end_time": timing_metrics.get('text_extraction_end_time', 'N/A')
+        },
+        "document_metrics": {
+            "text_length": len(original_text),
+            "pages_count": len(document.get("pages", [])),
+            "chunks_count": len(document.get("chunks", [])),
+            "filename": document.get("filename", "N/A"),
+            "file_size": document.get("file_size", 0)
+        },
+        "spell_check": spell_check_results,
+        "expert_analysis": expert_analysis,
+        "recommendations": generate_final_recommendations(spell_check_results, expert_analysis),
+        "action_items": generate_action_items(spell_check_results, expert_analysis)
+    }
+    
+    # Сохраняем отчет
+    document_store.update(document_id, {
+        "consolidated_report": consolidated_report,
+        "status": "completed",
+        "has_report": True  # Отмечаем, что отчет готов
+    })
+    
+    # Сохраняем отчет в файл
+    report_path = os.path.join(REPORTS_DIR, f"report_{document_id}.json")
+    async with aiofiles.open(report_path, 'w', encoding='utf-8') as f:
+        await f.write(json.dumps(consolidated_report, ensure_ascii=False, indent=2))
+    
+    return consolidated_report
+
 @app.post("/consolidate")
 async def consolidate_results(request: Dict[str, Any]):
     """Консолидация результатов проверки"""
     try:
         document_id = request["document_id"]
         
-        if document_id not in documents_db:
-            raise HTTPException(status_code=404, detail="Документ не найден")
-        
         # Получаем данные из базы данных
-        document = documents_db[document_id]
-        spell_check_results = document.get("spell_check_results", {})
-        expert_analysis = document.get("expert_analysis", {})
-        original_text = document["text"]
-        
-        # Получаем метрики времени
-        timing_metrics = document.get('timing_metrics', {})
-        
-        # Создаем консолидированный отчет
-        consolidated_report = {
-            "document_id": document_id,
-            "generated_at": datetime.now().isoformat(),
-            "summary": {
-                "total_issues": len(spell_check_results.get("errors", [])) + len(expert_analysis.get("violations", [])),
-                "spell_errors": len(spell_check_results.get("errors", [])),
-                "expert_violations": len(expert_analysis.get("violations", [])),
-                "overall_score": expert_analysis.get("overall_score", 0),
-                "compliance_status": expert_analysis.get("compliance_status", "unknown")
-            },
-            "timing_metrics": {
-                "upload_duration_seconds": timing_metrics.get('upload_duration_seconds', 0),
-                "text_extraction_duration_seconds": timing_metrics.get('text_extraction_duration_seconds', 0),
-                "total_processing_duration_seconds": timing_metrics.get('total_processing_duration_seconds', 0),
-                "upload_start_time": timing_metrics.get('upload_start_time', 'N/A'),
-                "upload_end_time": timing_metrics.get('upload_end_time', 'N/A'),
-                "text_extraction_start_time": timing_metrics.get('text_extraction_start_time', 'N/A'),
-                "text_extraction_end_time": timing_metrics.get('text_extraction_end_time', 'N/A')
-            },
-            "document_metrics": {
-                "text_length": len(original_text),
-                "pages_count": len(document.get("pages", [])),
-                "chunks_count": len(document.get("chunks", [])),
-                "filename": document.get("filename", "N/A"),
-                "file_size": document.get("file_size", 0)
-            },
-            "spell_check": spell_check_results,
-            "expert_analysis": expert_analysis,
-            "recommendations": generate_final_recommendations(spell_check_results, expert_analysis),
-            "action_items": generate_action_items(spell_check_results, expert_analysis)
-        }
-        
-        # Сохраняем отчет
-        documents_db[document_id]["consolidated_report"] = consolidated_report
-        documents_db[document_id]["status"] = "completed"
-        documents_db[document_id]["has_report"] = True  # Отмечаем, что отчет готов
-        
-        # Сохраняем отчет в файл
-        report_path = os.path.join(REPORTS_DIR, f"report_{document_id}.json")
-        async with aiofiles.open(report_path, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(consolidated_report, ensure_ascii=False, indent=2))
+        document = document_store.get(document_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Документ не найден")
         
         return {
             "status": "success",
-            "consolidated_report": consolidated_report
+            "consolidated_report": await run_consolidation(document)
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка консолидации результатов: {str(e)}")
 
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Форматирование события Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def _document_links(document_id: str) -> Dict[str, str]:
+    """Ссылки на артефакты документа (текст и отчет передаются по ссылке, а не в ответе)"""
+    return {
+        "document": f"/documents/{document_id}",
+        "report": f"/report/{document_id}"
+    }
+
+def _summarize_spell_check(spell_check_result: Dict[str, Any]) -> Dict[str, Any]:
+    spelling = spell_check_result.get("spelling", {})
+    return {
+        "misspelled_count": spelling.get("misspelled_count", 0),
+        "total_words": spelling.get("total_words", 0),
+        "accuracy": spelling.get("accuracy", 0),
+        "method": spell_check_result.get("method", "unknown")
+    }
+
+def _summarize_expert_analysis(expert_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "verdict": expert_analysis.get("verdict"),
+        "verdict_color": expert_analysis.get("verdict_color"),
+        "overall_score": expert_analysis.get("overall_score"),
+        "compliance_status": expert_analysis.get("compliance_status"),
+        "llm_used": expert_analysis.get("llm_used")
+    }
+
+async def run_pipeline(filename: str, content: bytes):
+    """Конвейер проверки письма: события (тип, данные) по мере завершения этапов.
+    
+    upload -> spellcheck и expert-analysis одновременно -> consolidate. Экспертный
+    анализ ждет этап орфографии, только если промпт эксперта включает результаты
+    spellchecker. Последнее событие - done.
+    """
+    started = time.perf_counter()
+    stage_seconds = {}
+    
+    try:
+        document = await store_uploaded_document(filename, content)
+    except Exception as e:
+        logger.error(f"❌ [PIPELINE] Ошибка загрузки документа {filename}: {e}")
+        yield "error", {"stage": "upload", "message": str(e)}
+        yield "done", {"status": "error", "document_id": None, "seconds": time.perf_counter() - started}
+        return
+    
+    document_id = document["id"]
+    stage_seconds["upload"] = time.perf_counter() - started
+    yield "stage", {
+        "stage": "upload",
+        "document_id": document_id,
+        "seconds": stage_seconds["upload"],
+        "filename": filename,
+        "text_length": len(document["text"]),
+        "pages_count": len(document["pages"]),
+        "chunks_count": len(document["chunks"]),
+        "links": _document_links(document_id)
+    }
+    
+    # Этапы после загрузки сообщают о завершении через очередь - события уходят в порядке готовности
+    completed: asyncio.Queue = asyncio.Queue()
+    
+    async def run_stage(name: str, coroutine: Awaitable[Dict[str, Any]], summarize) -> Dict[str, Any]:
+        stage_started = time.perf_counter()
+        try:
+            result = await coroutine
+        except Exception as e:
+            logger.error(f"❌ [PIPELINE] Этап {name} документа {document_id} завершился ошибкой: {e}")
+            await completed.put(("error", {"stage": name, "document_id": document_id, "message": str(e)}))
+            raise
+        stage_seconds[name] = time.perf_counter() - stage_started
+        await completed.put(("stage", {"stage": name, "document_id": document_id,
+                                       "seconds": stage_seconds[name], **summarize(result)}))
+        return result
+    
+    spell_task = asyncio.create_task(run_stage(
+        "spellcheck", run_spell_check(document_id, document["text"]), _summarize_spell_check
+    ))
+    expert_task = asyncio.create_task(run_stage(
+        "expert-analysis", run_expert_analysis(document, spell_task), _summarize_expert_analysis
+    ))
+    for _ in range(2):
+        yield await completed.get()
+    
+    results = await asyncio.gather(spell_task, expert_task, return_exceptions=True)
+    if any(isinstance(result, BaseException) for result in results):
+        yield "done", {"status": "error", "document_id": document_id, "seconds": time.perf_counter() - started,
+                       "stages": stage_seconds, "links": _document_links(document_id)}
+        return
+    
+    try:
+        stage_started = time.perf_counter()
+        consolidated_report = await run_consolidation(document_store.get(document_id))
+        stage_seconds["consolidate"] = time.perf_counter() - stage_started
+    except Exception as e:
+        logger.error(f"❌ [PIPELINE] Ошибка консолидации документа {document_id}: {e}")
+        yield "error", {"stage": "consolidate", "document_id": document_id, "message": str(e)}
+        yield "done", {"status": "error", "document_id": document_id, "seconds": time.perf_counter() - started,
+                       "stages": stage_seconds, "links": _document_links(document_id)}
+        return
+    
+    yield "stage", {
+        "stage": "consolidate",
+        "document_id": document_id,
+        "seconds": stage_seconds["consolidate"],
+        "summary": consolidated_report["summary"],
+        "links": _document_links(document_id)
+    }
+    total_seconds = time.perf_counter() - started
+    logger.info(f"✅ [PIPELINE] Документ {document_id} проверен за {total_seconds:.2f}s: {stage_seconds}")
+    yield "done", {
+        "status": "completed",
+        "document_id": document_id,
+        "seconds": total_seconds,
+        "stages": stage_seconds,
+        "verdict": results[1].get("verdict"),
+        "links": _document_links(document_id)
+    }
+
+@app.post("/process")
+async def process_document(file: UploadFile = File(...), stream: bool = True):
+    """Полный цикл проверки письма одним запросом (загрузка, проверки, отчет).
+    
+    По умолчанию ответ - поток Server-Sent Events: событие stage на каждый
+    завершенный этап и итоговое done. С stream=false - один JSON после
+    завершения. Текст документа и отчет в ответ не входят, только ссылки на них.
+    """
+    filename = file.filename
+    content = await file.read()
+    
+    if stream:
+        async def event_stream():
+            async for event, data in run_pipeline(filename, content):
+                yield _format_sse(event, data)
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    stages = {}
+    errors = []
+    async for event, data in run_pipeline(filename, content):
+        if event == "stage":
+            stages[data["stage"]] = data
+        elif event == "error":
+            errors.append(data)
+        else:
+            result = data
+    
+    if result["document_id"] is None:
+        raise HTTPException(status_code=500, detail=f"Ошибка загрузки документа: {errors[0]['message']}")
+    
+    return {
+        **result,
+        "status": "success" if result["status"] == "completed" else "error",
+        "stages": stages,
+        "errors": errors
+    }
+
 @app.get("/debug/documents")
-async def debug_documents():
-    """Отладочная информация о документах"""
+async def debug_documents(limit: int = OUTGOING_CONTROL_PAGE_SIZE):
+    """Отладочная информация о документах (последние limit документов)"""
+    documents, _ = document_store.list_documents(min(max(limit, 1), OUTGOING_CONTROL_MAX_PAGE_SIZE))
     debug_info = {}
-    for doc_id, doc in documents_db.items():
-        debug_info[doc_id] = {
+    for doc in documents:
+        debug_info[doc["id"]] = {
             "id": doc.get("id"),
             "document_id": doc.get("document_id"),
             "has_report": doc.get("has_report"),
-            "status": doc.get("status"),
-            "keys": list(doc.keys())
+            "status": doc.get("status")
         }
     return {
-        "total_docs": len(documents_db),
-        "documents": debug_info
+        "total_docs": document_store.count(),
+        "documents": debug_info,
+        "store": document_store.get_stats()
     }
 
 @app.get("/documents")
-async def get_documents():
-    """Получение списка документов"""
-    # Исправляем документы перед возвратом
-    for doc_id, doc in documents_db.items():
-        if "document_id" not in doc or doc["document_id"] is None:
-            doc["document_id"] = doc_id
-        if "has_report" not in doc or doc["has_report"] is None:
-            doc["has_report"] = doc.get("consolidated_report") is not None
+async def get_documents(limit: int = OUTGOING_CONTROL_PAGE_SIZE, cursor: Optional[str] = None):
+    """Получение списка документов (новые первыми, постранично по курсору next_cursor)"""
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
     
+    documents, next_cursor = document_store.list_documents(
+        min(max(limit, 1), OUTGOING_CONTROL_MAX_PAGE_SIZE), cursor
+    )
     return {
         "status": "success",
-        "documents": list(documents_db.values())
+        "documents": documents,
+        "next_cursor": next_cursor
     }
 
 @app.get("/documents/{document_id}")
 async def get_document(document_id: str):
     """Получение информации о документе"""
-    if document_id not in documents_db:
+    document = document_store.get(document_id)
+    if document is None:
         raise HTTPException(status_code=404, detail="Документ не найден")
     
     return {
         "status": "success",
-        "document": documents_db[document_id]
+        "document": document
     }
 
 @app.get("/report/{document_id}")
 async def get_report(document_id: str):
     """Получение отчета по документу"""
-    if document_id not in documents_db:
+    document = document_store.get(document_id)
+    if document is None:
         raise HTTPException(status_code=404, detail="Документ не найден")
     
-    document = documents_db[document_id]
     if not document.get("consolidated_report"):
         raise HTTPException(status_code=404, detail="Отчет не готов")
     
@@ -1312,11 +1478,11 @@ async def get_report(document_id: str):
 @app.delete("/documents/{document_id}")
 async def delete_document(document_id: str):
     """Удаление документа"""
-    if document_id not in documents_db:
+    # Удаляем из базы данных (вместе с сохраненным текстом)
+    document = document_store.delete(document_id)
+    if document is None:
         raise HTTPException(status_code=404, detail="Документ не найден")
     
-    document = documents_db[document_id]
-    
     # Удаляем файл
     if os.path.exists(document["file_path"]):
         os.remove(document["file_path"])
@@ -1326,9 +1492,6 @@ async def delete_document(document_id: str):
     if os.path.exists(report_path):
         os.remove(report_path)
     
-    # Удаляем из базы данных
-    del documents_db[document_id]
-    
     return {"status": "success", "message": "Документ удален"}
 
 # Вспомогательные функции
@@ -1352,7 +1515,8 @@ async def parse_document(file_path: str) -> Dict[str, Any]:
     try:
         # Используем универсальный парсер из модуля utils
         from utils import parse_document as utils_parse_document
-        result = utils_parse_document(file_path)
+        # Разбор выполняется в пуле потоков, чтобы не останавливать цикл событий
+        result = await asyncio.get_running_loop().run_in_executor(None, utils_parse_document, file_path)
         
         if not result.get("success", False):
             raise Exception(f"Ошибка парсинга документа: {result.get('error', 'Неизвестная ошибка')}")
@@ -1581,19 +1745,17 @@ def generate_html_report(document: Dict[str, Any]) -> str:
 async def get_settings():
     """Получение настроек системы"""
     return {
-        "llm_prompt": settings_db.get("llm_prompt", ""),
-        "selected_llm_model": settings_db.get("selected_llm_model", "llama3.1:8b")
+        "llm_prompt": document_store.get_setting("llm_prompt", ""),
+        "selected_llm_model": document_store.get_setting("selected_llm_model", "llama3.1:8b")
     }
 
 @app.post("/settings")
 async def update_settings(request: Dict[str, Any]):
     """Обновление настроек системы"""
     try:
-        if "llm_prompt" in request:
-            settings_db["llm_prompt"] = request["llm_prompt"]
-        
-        if "selected_llm_model" in request:
-            settings_db["selected_llm_model"] = request["selected_llm_model"]
+        document_store.update_settings({
+            key: request[key] for key in ("llm_prompt", "selected_llm_model") if key in request
+        })
         
         logger.info(f"Настройки обновлены: {request}")
         return {"status": "success", "message": "Настройки успешно обновлены"}
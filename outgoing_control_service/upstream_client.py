@@ -0,0 +1,74 @@
+"""
+Асинхронные HTTP-клиенты внешних сервисов (spellchecker-service, vllm-service)
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamClient:
+    """Общий httpx.AsyncClient одного внешнего сервиса.
+
+    Соединения переиспользуются между запросами (keep-alive), а число
+    одновременных запросов ограничено семафором: остальные ждут очереди в
+    цикле событий и не блокируют другие запросы пользователей.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, concurrency: int):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "waiting": 0, "seconds": 0.0}
+
+    async def post_json(self, path: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self._request("POST", path, json=payload, timeout=timeout)
+
+    async def get_json(self, path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self._request("GET", path, timeout=timeout)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "base_url": self.base_url, "concurrency": self.concurrency}
+
+    async def _request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        client = self._get_client()
+        self.stats["waiting"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.stats["waiting"] -= 1
+
+        self.stats["in_flight"] += 1
+        started = time.time()
+        try:
+            response = await client.request(method, path, timeout=timeout or self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._semaphore.release()
+            self.stats["in_flight"] -= 1
+            self.stats["requests"] += 1
+            self.stats["seconds"] += time.time() - started
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            logger.info(f"✅ [{self.name.upper()}] HTTP client created ({self.base_url}, concurrency {self.concurrency})")
+        return self._client
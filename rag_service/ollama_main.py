@@ -70,11 +70,13 @@ class ChatResponse(BaseModel):
     reasoning_steps: Optional[int] = None  # Количество шагов рассуждения
 
 class EmbeddingRequest(BaseModel):
-    text: str
+    text: Optional[str] = None
+    texts: Optional[List[str]] = None  # Пачка текстов: ответ в поле embeddings
 
 class EmbeddingResponse(BaseModel):
     status: str
-    embedding: List[float]
+    embedding: Optional[List[float]] = None
+    embeddings: Optional[List[List[float]]] = None
     text_length: int
     timestamp: str
 
@@ -1020,11 +1022,27 @@ async def chat_documents_stats_endpoint():
 
 @app.post("/api/embeddings")
 async def create_embedding_endpoint(request: EmbeddingRequest):
-    """Создание эмбеддинга для текста"""
+    """Создание эмбеддинга для текста (или пачки текстов в поле texts)"""
     try:
+        rag_service = get_ollama_rag_service()
+        
+        if request.texts is not None:
+            logger.info(f"🔍 [EMBEDDINGS] Creating embeddings for {len(request.texts)} texts")
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                None, rag_service.embedding_service.create_embeddings, request.texts
+            ) if request.texts else []
+            return EmbeddingResponse(
+                status="success",
+                embeddings=embeddings,
+                text_length=sum(len(text) for text in request.texts),
+                timestamp=datetime.now().isoformat()
+            )
+        
+        if request.text is None:
+            raise HTTPException(status_code=422, detail="text or texts is required")
+        
         logger.info(f"🔍 [EMBEDDINGS] Creating embedding for text: '{request.text[:100]}...'")
         
-        rag_service = get_ollama_rag_service()
         embedding = rag_service.embedding_service.create_embedding(request.text)
         
         return EmbeddingResponse(
@@ -1034,6 +1052,8 @@ async def create_embedding_endpoint(request: EmbeddingRequest):
             timestamp=datetime.now().isoformat()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ [EMBEDDINGS] Error creating embedding: {e}")
         raise HTTPException(status_code=500, detail=str(e))
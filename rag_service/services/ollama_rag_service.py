@@ -75,6 +75,33 @@ class OllamaEmbeddingService:
         except Exception as e:
             logger.error(f"❌ [EMBEDDING] Error creating embedding: {e}")
             raise e
+    
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Эмбеддинги пачки текстов одним запросом к Ollama (/api/embed)"""
+        try:
+            response = requests.post(
+                f"{self.ollama_url}/api/embed",
+                json={"model": self.model_name, "input": texts},
+                timeout=30 + 5 * len(texts)
+            )
+            if response.status_code == 404:
+                # Ollama без пакетного /api/embed - по одному тексту
+                return [self.create_embedding(text) for text in texts]
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+            
+            embeddings = np.array(response.json().get("embeddings", []), dtype=np.float32)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} texts")
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            model_logger.info(f"✅ [EMBEDDING] Generated {len(texts)} embeddings in one request")
+            return (embeddings / norms).tolist()
+            
+        except Exception as e:
+            logger.error(f"❌ [EMBEDDING] Error creating embeddings batch: {e}")
+            raise e
+
 
 class DatabaseManager:
     """Менеджер для работы с базой данных PostgreSQL"""
@@ -7,6 +7,9 @@
 -- Создаем таблицы архива документов
 \i ../sql/create_archive_documents_table.sql
 
+-- Полнотекстовый и триграммный поиск
+\i ../sql/add_archive_search_indexes.sql
+
 -- Создаем индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_archive_documents_project_code ON archive_documents(project_code);
 CREATE INDEX IF NOT EXISTS idx_archive_documents_document_type ON archive_documents(document_type);
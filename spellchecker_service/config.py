@@ -0,0 +1,42 @@
+"""
+Конфигурация для spellchecker_service
+"""
+import os
+
+# Кеш вердиктов по словам (общий для всех запросов, LRU)
+SPELLCHECK_CACHE_SIZE: int = int(os.getenv('SPELLCHECK_CACHE_SIZE', '100000'))
+# Число слов вокруг ошибки в поле context
+SPELLCHECK_CONTEXT_WORDS: int = int(os.getenv('SPELLCHECK_CONTEXT_WORDS', '3'))
+
+# LanguageTool: текст проверяется частями (по абзацам и предложениям) параллельно
+LANGUAGETOOL_CHUNK_SIZE: int = int(os.getenv('LANGUAGETOOL_CHUNK_SIZE', '6000'))
+LANGUAGETOOL_CONCURRENCY: int = int(os.getenv('LANGUAGETOOL_CONCURRENCY', '4'))
+LANGUAGETOOL_TIMEOUT: float = float(os.getenv('LANGUAGETOOL_TIMEOUT', '30'))
+# Повторные запросы на одну проверку (на все части вместе)
+LANGUAGETOOL_RETRY_BUDGET: int = int(os.getenv('LANGUAGETOOL_RETRY_BUDGET', '4'))
+LANGUAGETOOL_RETRY_BACKOFF: float = float(os.getenv('LANGUAGETOOL_RETRY_BACKOFF', '0.5'))
+# Кеш результатов по хешу абзаца
+LANGUAGETOOL_PARAGRAPH_CACHE_SIZE: int = int(os.getenv('LANGUAGETOOL_PARAGRAPH_CACHE_SIZE', '20000'))
+
+# Пакетная комплексная проверка (/comprehensive-check/batch)
+SPELLCHECK_BATCH_MAX_TEXTS: int = int(os.getenv('SPELLCHECK_BATCH_MAX_TEXTS', '100'))
+
+# Hunspell: словари и пул процессов проверки слов (0 - проверка в основном процессе)
+HUNSPELL_DICT_PATH: str = os.getenv('HUNSPELL_DICT_PATH', '/usr/share/hunspell')
+HUNSPELL_LANGUAGES: list = [language.strip() for language in os.getenv('HUNSPELL_LANGUAGES', 'ru_RU,en_US').split(',') if language.strip()]
+# По умолчанию - число ядер, доступных процессу (с учетом ограничений контейнера по cpuset)
+HUNSPELL_WORKERS: int = int(os.getenv('HUNSPELL_WORKERS', str(len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1))))
+# Минимум слов в пачке, отправляемой одному процессу
+HUNSPELL_WORKER_MIN_BATCH: int = int(os.getenv('HUNSPELL_WORKER_MIN_BATCH', '200'))
+
+# Словарь предметной области (термины, организации, аббревиатуры) и индекс нечеткого поиска по нему
+SPELLCHECK_DOMAIN_DICTIONARY: str = os.getenv(
+    'SPELLCHECK_DOMAIN_DICTIONARY',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionaries', 'domain_ru.txt')
+)
+# Индекс строится при первом запуске и переиспользуется, пока не изменится словарь
+SPELLCHECK_FUZZY_INDEX_CACHE: str = os.getenv(
+    'SPELLCHECK_FUZZY_INDEX_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'domain_fuzzy_index.pickle')
+)
+SPELLCHECK_MAX_EDIT_DISTANCE: int = int(os.getenv('SPELLCHECK_MAX_EDIT_DISTANCE', '2'))
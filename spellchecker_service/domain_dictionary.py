@@ -0,0 +1,158 @@
+"""
+Словарь предметной области и индекс нечеткого поиска (SymSpell)
+"""
+import hashlib
+import logging
+import os
+import pickle
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Версия формата кеша индекса на диске
+INDEX_FORMAT_VERSION = 1
+
+
+def load_domain_dictionary(path: str) -> Set[str]:
+    """Слова словаря предметной области (по одному на строку, # - комментарий)"""
+    words = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.split('#', 1)[0].strip().lower()
+            if word:
+                words.add(word)
+    return words
+
+
+def pattern_bitmasks(pattern: str) -> Dict[str, int]:
+    """Битовые маски позиций символов шаблона для levenshtein_bitparallel"""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def levenshtein_bitparallel(pattern: str, masks: Dict[str, int], text: str) -> int:
+    """Расстояние Левенштейна битово-параллельным алгоритмом Майерса (Hyyrö, 2003).
+
+    Один проход по text с целочисленными операциями над строкой матрицы
+    вместо вложенного цикла по символам обоих слов.
+    """
+    length = len(pattern)
+    if not length:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, score = full, 0, length
+    for char in text:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+        negative = horizontal_positive & vertical
+    return score
+
+
+class SymSpellIndex:
+    """Индекс симметричных удалений (SymSpell).
+
+    Для каждого слова заранее строятся варианты с удалением до max_distance
+    символов из префикса длины prefix_length. При поиске такие же удаления
+    строятся для проверяемого слова, а найденные кандидаты проверяются
+    точным расстоянием - перебор всего словаря не нужен.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = max(prefix_length, max_distance + 1)
+        self.words: Set[str] = set()
+        self.deletes: Dict[str, List[str]] = {}
+
+    def build(self, words: Iterable[str]) -> "SymSpellIndex":
+        for word in sorted(set(words)):
+            self.words.add(word)
+            for variant in self._variants(word):
+                self.deletes.setdefault(variant, []).append(word)
+        return self
+
+    def lookup(self, word: str, limit: int = 5) -> List[str]:
+        """Слова словаря на расстоянии не больше max_distance (ближайшие первыми)"""
+        candidates = set()
+        for variant in self._variants(word):
+            candidates.update(self.deletes.get(variant, ()))
+
+        scored: List[Tuple[int, str]] = []
+        length = len(word)
+        masks = pattern_bitmasks(word)
+        for candidate in candidates:
+            if abs(len(candidate) - length) > self.max_distance:
+                continue
+            distance = levenshtein_bitparallel(word, masks, candidate)
+            if distance <= self.max_distance:
+                scored.append((distance, candidate))
+        scored.sort()
+        return [candidate for _, candidate in scored[:limit]]
+
+    def _variants(self, word: str) -> Set[str]:
+        """Префикс слова и все его варианты с удалением до max_distance символов"""
+        variants = edge = {word[:self.prefix_length]}
+        for _ in range(self.max_distance):
+            edge = {variant[:index] + variant[index + 1:] for variant in edge for index in range(len(variant))}
+            variants = variants | edge
+        return variants
+
+    @staticmethod
+    def source_checksum(words: Iterable[str], max_distance: int, prefix_length: int) -> str:
+        digest = hashlib.sha256(f"{INDEX_FORMAT_VERSION}:{max_distance}:{prefix_length}\n".encode('utf-8'))
+        for word in sorted(words):
+            digest.update(word.encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    @classmethod
+    def load_or_build(cls, words: Set[str], cache_path: Optional[str],
+                      max_distance: int = 2, prefix_length: int = 7) -> "SymSpellIndex":
+        """Индекс из кеша на диске; если словарь или параметры изменились - строится заново"""
+        index = cls(max_distance, prefix_length)
+        checksum = cls.source_checksum(words, index.max_distance, index.prefix_length)
+
+        if cache_path and os.path.exists(cache_path):
+            start_time = time.time()
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get("checksum") == checksum:
+                    index.words = set(words)
+                    index.deletes = cached["deletes"]
+                    logger.info(f"✅ [FUZZY_INDEX] Loaded from {cache_path} in {time.time() - start_time:.3f}s "
+                                f"({len(index.words)} words, {len(index.deletes)} deletes)")
+                    return index
+                logger.info("🔧 [FUZZY_INDEX] Dictionary changed, rebuilding index")
+            except Exception as e:
+                logger.warning(f"⚠️ [FUZZY_INDEX] Failed to load cached index: {e}")
+
+        start_time = time.time()
+        index.build(words)
+        logger.info(f"✅ [FUZZY_INDEX] Built in {time.time() - start_time:.3f}s "
+                    f"({len(index.words)} words, {len(index.deletes)} deletes)")
+
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+                # Запись во временный файл и переименование: параллельный запуск не прочитает половину файла
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    pickle.dump({"checksum": checksum, "deletes": index.deletes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, cache_path)
+            except OSError as e:
+                logger.warning(f"⚠️ [FUZZY_INDEX] Failed to save index cache: {e}")
+        return index
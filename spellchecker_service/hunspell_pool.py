@@ -0,0 +1,136 @@
+"""
+Пул процессов Hunspell: проверка слов на нескольких ядрах
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Число предложений, возвращаемых для слова с ошибкой
+MAX_SUGGESTIONS = 5
+
+# Словари дочернего процесса: загружаются один раз при запуске процесса
+_worker_dictionaries: List[Tuple[str, Any]] = []
+
+
+def load_dictionaries(dict_path: str, languages: Sequence[str],
+                      domain_words: Sequence[str] = ()) -> List[Tuple[str, Any]]:
+    """Загрузка словарей Hunspell (язык, HunSpell) с добавлением слов предметной области"""
+    import hunspell
+
+    dictionaries = []
+    for language in languages:
+        dic_file = os.path.join(dict_path, f"{language}.dic")
+        aff_file = os.path.join(dict_path, f"{language}.aff")
+        if not (os.path.exists(dic_file) and os.path.exists(aff_file)):
+            logger.warning(f"⚠️ [HUNSPELL_POOL] Dictionary {language} not found in {dict_path}")
+            continue
+        checker = hunspell.HunSpell(dic_file, aff_file)
+        for word in domain_words:
+            checker.add(word)
+        dictionaries.append((language, checker))
+    return dictionaries
+
+
+def check_word(dictionaries: List[Tuple[str, Any]], word: str) -> Tuple[bool, List[str]]:
+    """Слово верно, если его знает любой из словарей; предложения - из словаря алфавита слова"""
+    for _, checker in dictionaries:
+        if checker.spell(word):
+            return True, []
+
+    checker = dictionaries[0][1]
+    if word.isascii():
+        checker = next((item for language, item in dictionaries if language.startswith("en")), checker)
+    return False, checker.suggest(word)[:MAX_SUGGESTIONS]
+
+
+def _init_worker(dict_path: str, languages: Sequence[str], domain_words: Sequence[str]):
+    global _worker_dictionaries
+    _worker_dictionaries = load_dictionaries(dict_path, languages, domain_words)
+    if not _worker_dictionaries:
+        raise RuntimeError(f"No Hunspell dictionaries loaded from {dict_path}")
+
+
+def check_words(words: List[str]) -> List[Tuple[bool, List[str]]]:
+    """Проверка пачки слов в дочернем процессе"""
+    return [check_word(_worker_dictionaries, word) for word in words]
+
+
+class HunspellProcessPool:
+    """Пул процессов, в каждом из которых загружены словари Hunspell.
+
+    Непроверенные слова текста делятся на пачки, пачки распределяются
+    по процессам. Слова, для которых нет вердикта, проверяются в пуле целиком,
+    поэтому одновременные запросы тоже распределяются по ядрам.
+    """
+
+    def __init__(self, workers: int, min_batch_size: int, dict_path: str,
+                 languages: Sequence[str], domain_words: Sequence[str]):
+        self.workers = max(1, workers)
+        self.min_batch_size = max(1, min_batch_size)
+        self.dict_path = dict_path
+        self.languages = tuple(languages)
+        self.domain_words = tuple(domain_words)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {"words": 0, "batches": 0, "seconds": 0.0, "restarts": 0}
+
+    def check_words(self, words: List[str]) -> Dict[str, Tuple[bool, List[str]]]:
+        """Вердикты Hunspell для слов: {слово: (верно, предложения)}"""
+        if not words:
+            return {}
+
+        started = time.time()
+        batches_count = min(self.workers, math.ceil(len(words) / self.min_batch_size))
+        size = math.ceil(len(words) / batches_count)
+        batches = [words[start:start + size] for start in range(0, len(words), size)]
+        try:
+            results = list(self._get_pool().map(check_words, batches))
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+                self.stats["restarts"] += 1
+            raise
+
+        self.stats["words"] += len(words)
+        self.stats["batches"] += len(batches)
+        self.stats["seconds"] += time.time() - started
+        return {word: verdict for batch, verdicts in zip(batches, results)
+                for word, verdict in zip(batch, verdicts)}
+
+    def start(self):
+        """Запуск процессов заранее, чтобы словари загрузились до первого запроса"""
+        pool = self._get_pool()
+        list(pool.map(check_words, [[] for _ in range(self.workers)]))
+
+    def shutdown(self):
+        """Остановка пула процессов"""
+        with self._lock:
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "workers": self.workers, "languages": list(self.languages),
+                "running": self._pool is not None}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["hunspell_pool"])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.dict_path, self.languages, self.domain_words)
+                )
+                logger.info(f"✅ [HUNSPELL_POOL] Process pool started ({self.workers} processes, "
+                            f"dictionaries: {', '.join(self.languages)}, domain words: {len(self.domain_words)})")
+            return self._pool
@@ -0,0 +1,248 @@
+"""
+Клиент LanguageTool: проверка больших текстов частями
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from config import (
+    LANGUAGETOOL_CHUNK_SIZE, LANGUAGETOOL_CONCURRENCY, LANGUAGETOOL_TIMEOUT,
+    LANGUAGETOOL_RETRY_BUDGET, LANGUAGETOOL_RETRY_BACKOFF, LANGUAGETOOL_PARAGRAPH_CACHE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+# Ответы, после которых запрос имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# (номер абзаца, границы абзаца в тексте, ключ кеша)
+_PendingUnit = Tuple[int, Tuple[int, int], str]
+
+
+def split_units(text: str, max_size: int) -> List[Tuple[int, int]]:
+    """Границы абзацев текста; абзацы длиннее max_size делятся по предложениям"""
+    units: List[Tuple[int, int]] = []
+    start = 0
+    for separator in PARAGRAPH_SEPARATOR.finditer(text):
+        _add_paragraph(text, start, separator.start(), max_size, units)
+        start = separator.end()
+    _add_paragraph(text, start, len(text), max_size, units)
+    return units
+
+
+def _add_paragraph(text: str, start: int, end: int, max_size: int, units: List[Tuple[int, int]]):
+    if not text[start:end].strip():
+        return
+    if end - start <= max_size:
+        units.append((start, end))
+        return
+
+    # Предложения собираются в части не длиннее max_size
+    pieces = []
+    piece_start = previous = start
+    for boundary in [match.end() for match in SENTENCE_END.finditer(text, start, end)] + [end]:
+        if boundary - piece_start > max_size and previous > piece_start:
+            pieces.append((piece_start, previous))
+            piece_start = previous
+        previous = boundary
+    pieces.append((piece_start, end))
+
+    # Предложение длиннее max_size режется по последнему пробелу
+    for piece_start, piece_end in pieces:
+        while piece_end - piece_start > max_size:
+            cut = text.rfind(' ', piece_start + 1, piece_start + max_size)
+            if cut <= piece_start:
+                cut = piece_start + max_size
+            units.append((piece_start, cut))
+            piece_start = cut
+        units.append((piece_start, piece_end))
+
+
+class _RetryBudget:
+    """Общий на одну проверку запас повторных запросов"""
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self.used = 0
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.used += 1
+        return True
+
+
+class LanguageToolClient:
+    """Проверка текста через LanguageTool HTTP API (/v2/check).
+
+    Текст делится на абзацы (длинные абзацы - по предложениям), абзацы
+    собираются в части не длиннее chunk_size и проверяются параллельно
+    через общий пул соединений. Смещения найденных ошибок пересчитываются
+    в координаты исходного текста. Результаты хранятся по хешу абзаца,
+    поэтому при повторной проверке документа отправляются только измененные абзацы.
+    """
+
+    def __init__(self, base_url: str, language: str = "ru-RU",
+                 chunk_size: int = LANGUAGETOOL_CHUNK_SIZE,
+                 concurrency: int = LANGUAGETOOL_CONCURRENCY,
+                 timeout: float = LANGUAGETOOL_TIMEOUT,
+                 retry_budget: int = LANGUAGETOOL_RETRY_BUDGET,
+                 cache_size: int = LANGUAGETOOL_PARAGRAPH_CACHE_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.language = language
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retry_budget = max(0, retry_budget)
+        self.cache_size = max(0, cache_size)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"requests": 0, "retries": 0, "failed_chunks": 0, "cache_hits": 0, "cache_misses": 0}
+
+    async def check(self, text: str) -> Dict[str, Any]:
+        """Проверка текста.
+
+        Возвращает совпадения LanguageTool со смещениями в исходном тексте
+        и границы частей, которые не удалось проверить (failed_spans).
+        """
+        units = split_units(text, self.chunk_size)
+        matches: List[Dict[str, Any]] = []
+        pending: List[_PendingUnit] = []
+        for index, unit in enumerate(units):
+            key = self._cache_key(text[unit[0]:unit[1]])
+            cached = self._cache_get(key)
+            if cached is None:
+                pending.append((index, unit, key))
+            else:
+                matches.extend(self._shift(cached, unit[0]))
+
+        chunks = self._build_chunks(pending)
+        budget = _RetryBudget(self.retry_budget)
+        outcomes = await asyncio.gather(
+            *(self._post_chunk(text[chunk[0][1][0]:chunk[-1][1][1]], budget) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        failed_spans = []
+        for chunk, outcome in zip(chunks, outcomes):
+            chunk_start, chunk_end = chunk[0][1][0], chunk[-1][1][1]
+            if isinstance(outcome, BaseException):
+                self.stats["failed_chunks"] += 1
+                logger.warning(f"⚠️ [LANGUAGETOOL] Chunk {chunk_start}-{chunk_end} failed: {outcome!r}")
+                failed_spans.append((chunk_start, chunk_end))
+                continue
+            matches.extend(self._store_chunk(chunk, outcome, chunk_start))
+
+        matches.sort(key=lambda match: match.get('offset', 0))
+        self.stats["retries"] += budget.used
+        return {
+            "matches": matches,
+            "units": len(units),
+            "chunks": len(chunks),
+            "cached_units": len(units) - len(pending),
+            "failed_spans": failed_spans,
+            "retries": budget.used
+        }
+
+    async def close(self):
+        """Закрытие пула соединений"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cache_size": len(self._cache), "cache_max_size": self.cache_size}
+
+    def _build_chunks(self, pending: List[_PendingUnit]) -> List[List[_PendingUnit]]:
+        """Соседние непроверенные абзацы объединяются в части не длиннее chunk_size.
+
+        Часть не перешагивает абзац, результат которого взят из кеша.
+        """
+        chunks: List[List[_PendingUnit]] = []
+        for item in pending:
+            index, (_, end), _ = item
+            if chunks and chunks[-1][-1][0] == index - 1 and end - chunks[-1][0][1][0] <= self.chunk_size:
+                chunks[-1].append(item)
+            else:
+                chunks.append([item])
+        return chunks
+
+    async def _post_chunk(self, chunk_text: str, budget: _RetryBudget) -> List[Dict[str, Any]]:
+        client = self._get_client()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    response = await client.post("/v2/check", data={"text": chunk_text, "language": self.language})
+                response.raise_for_status()
+                return response.json().get('matches', [])
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or not budget.take():
+                    raise
+                attempt += 1
+                logger.info(f"🔍 [LANGUAGETOOL] Retry {attempt} for chunk of {len(chunk_text)} chars: {e!r}")
+                await asyncio.sleep(LANGUAGETOOL_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    def _store_chunk(self, chunk: List[_PendingUnit], chunk_matches: List[Dict[str, Any]],
+                     chunk_start: int) -> List[Dict[str, Any]]:
+        """Пересчет смещений части в координаты текста и сохранение результатов по абзацам"""
+        starts = [unit[0] for _, unit, _ in chunk]
+        per_unit: List[List[Dict[str, Any]]] = [[] for _ in chunk]
+        result = []
+        for match in chunk_matches:
+            offset = chunk_start + match.get('offset', 0)
+            index = max(0, bisect.bisect_right(starts, offset) - 1)
+            per_unit[index].append({**match, 'offset': offset - starts[index]})
+            result.append({**match, 'offset': offset})
+        for (_, _, key), unit_matches in zip(chunk, per_unit):
+            self._cache_put(key, unit_matches)
+        return result
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.concurrency,
+                                    max_keepalive_connections=self.concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            logger.info(f"✅ [LANGUAGETOOL] HTTP client pool created ({self.concurrency} connections)")
+        return self._client
+
+    def _cache_key(self, paragraph: str) -> str:
+        return hashlib.sha1(f"{self.language}\0{paragraph}".encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        matches = self._cache.get(key)
+        if matches is None:
+            self.stats["cache_misses"] += 1
+            return None
+        self._cache.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        return matches
+
+    def _cache_put(self, key: str, matches: List[Dict[str, Any]]):
+        if not self.cache_size:
+            return
+        self._cache[key] = matches
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _shift(matches: List[Dict[str, Any]], start: int) -> List[Dict[str, Any]]:
+        return [{**match, 'offset': match.get('offset', 0) + start} for match in matches]
@@ -4,8 +4,9 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+import asyncio
 import logging
 import os
 import time
@@ -13,6 +14,7 @@ from pathlib import Path
 
 # Импорты для проверки
 from spell_checker import AdvancedSpellChecker
+from config import SPELLCHECK_BATCH_MAX_TEXTS
 
 # Настройка логирования
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -49,6 +51,15 @@ class SpellCheckResponse(BaseModel):
     comprehensive: Optional[Dict[str, Any]] = None
     processing_time: float
 
+class BatchCheckRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=SPELLCHECK_BATCH_MAX_TEXTS)
+    language: str = "ru"
+
+class BatchCheckResponse(BaseModel):
+    status: str
+    results: List[SpellCheckResponse]
+    processing_time: float
+
 class HealthResponse(BaseModel):
     status: str
     service: str
@@ -71,6 +82,12 @@ async def startup_event():
         logger.error(f"Ошибка инициализации SpellChecker: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Освобождение ресурсов при остановке"""
+    if spell_checker:
+        await spell_checker.close()
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Проверка здоровья сервиса"""
@@ -107,7 +124,7 @@ async def spell_check(request: SpellCheckRequest):
         logger.info(f"Начинаем проверку орфографии для текста длиной {len(request.text)} символов")
         
         # Проверка орфографии
-        spelling_result = spell_checker.check_spelling(request.text)
+        spelling_result = await spell_checker.check_spelling_async(request.text)
         
         processing_time = time.time() - start_time
         
@@ -135,7 +152,7 @@ async def grammar_check(request: SpellCheckRequest):
         logger.info(f"Начинаем проверку грамматики для текста длиной {len(request.text)} символов")
         
         # Проверка грамматики
-        grammar_result = spell_checker.check_grammar(request.text)
+        grammar_result = await spell_checker.check_grammar(request.text)
         
         processing_time = time.time() - start_time
         
@@ -163,7 +180,7 @@ async def comprehensive_check(request: SpellCheckRequest):
         logger.info(f"Начинаем комплексную проверку для текста длиной {len(request.text)} символов")
         
         # Комплексная проверка
-        comprehensive_result = spell_checker.comprehensive_check(request.text)
+        comprehensive_result = await spell_checker.comprehensive_check(request.text)
         
         processing_time = time.time() - start_time
         
@@ -179,6 +196,37 @@ async def comprehensive_check(request: SpellCheckRequest):
         logger.error(f"Ошибка комплексной проверки: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Ошибка комплексной проверки: {str(e)}")
 
+@app.post("/comprehensive-check/batch", response_model=BatchCheckResponse)
+async def comprehensive_check_batch(request: BatchCheckRequest):
+    """Комплексная проверка нескольких текстов за один запрос"""
+    if not spell_checker:
+        raise HTTPException(status_code=503, detail="SpellChecker не инициализирован")
+    
+    start_time = time.time()
+    logger.info(f"Начинаем пакетную комплексную проверку {len(request.texts)} текстов")
+    
+    # Тексты проверяются одновременно; ошибка в одном тексте не прерывает остальные
+    outcomes = await asyncio.gather(
+        *(spell_checker.comprehensive_check(text) for text in request.texts),
+        return_exceptions=True
+    )
+    
+    results = []
+    for text, outcome in zip(request.texts, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Ошибка комплексной проверки в пакете: {outcome}", exc_info=outcome)
+            results.append(SpellCheckResponse(status="error", text=text, language=request.language,
+                                              comprehensive={"error": str(outcome)}, processing_time=0.0))
+        else:
+            results.append(SpellCheckResponse(status="success", text=text, language=request.language,
+                                              comprehensive=outcome, processing_time=outcome["processing_time"]))
+    
+    return BatchCheckResponse(
+        status="success",
+        results=results,
+        processing_time=time.time() - start_time
+    )
+
 @app.get("/languages")
 async def get_supported_languages():
     """Получение списка поддерживаемых языков"""
@@ -201,6 +249,9 @@ async def get_service_stats():
         "hunspell_initialized": spell_checker.hunspell is not None,
         "languagetool_initialized": spell_checker.language_tool is not None,
         "dictionary_size": len(spell_checker.dictionary) if hasattr(spell_checker, 'dictionary') else 0,
+        "verdict_cache": spell_checker.verdict_cache.get_stats(),
+        "languagetool": spell_checker.language_tool_client.get_stats() if spell_checker.language_tool_client else None,
+        "hunspell_pool": spell_checker.hunspell_pool.get_stats() if spell_checker.hunspell_pool else None,
         "uptime": "N/A"  # Можно добавить отслеживание времени работы
     }
 
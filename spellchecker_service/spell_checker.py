@@ -3,23 +3,139 @@
 """
 
 import re
+import asyncio
+import bisect
+import heapq
 import logging
 import os
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from config import (
+    SPELLCHECK_CACHE_SIZE, SPELLCHECK_CONTEXT_WORDS, HUNSPELL_DICT_PATH, HUNSPELL_LANGUAGES,
+    HUNSPELL_WORKERS, HUNSPELL_WORKER_MIN_BATCH, SPELLCHECK_DOMAIN_DICTIONARY,
+    SPELLCHECK_FUZZY_INDEX_CACHE, SPELLCHECK_MAX_EDIT_DISTANCE
+)
+from domain_dictionary import SymSpellIndex, load_domain_dictionary
+from hunspell_pool import HunspellProcessPool, check_word, load_dictionaries
+from languagetool_client import LanguageToolClient
+
 logger = logging.getLogger(__name__)
 # Настройка логирования для модуля spell_checker
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+WORD_PATTERN = re.compile(r'\b[а-яёА-ЯЁa-zA-Z]+\b')
+WHITESPACE_TOKEN_PATTERN = re.compile(r'\S+')
+
+
+class WordVerdictCache:
+    """Ограниченный LRU кеш вердиктов по словам.
+
+    Ключ - (метод проверки, слово), значение - (статус, предложения).
+    Один экземпляр живет вместе с проверщиком и переиспользуется между запросами.
+    """
+
+    def __init__(self, max_size: int = SPELLCHECK_CACHE_SIZE):
+        self.max_size = max(0, max_size)
+        self._items: "OrderedDict[Tuple[str, str], Tuple[str, Tuple[str, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, method: str, word: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        key = (method, word)
+        with self._lock:
+            verdict = self._items.get(key)
+            if verdict is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, method: str, word: str, verdict: Tuple[str, Tuple[str, ...]]):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._items[(method, word)] = verdict
+            self._items.move_to_end((method, word))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+class TokenizedText:
+    """Слова текста с позициями (один проход регулярным выражением).
+
+    Контекст ошибки строится по позиции вхождения, без повторного разбора текста.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.words: List[Tuple[str, int, int]] = [
+            (match.group().lower(), match.start(), match.end())
+            for match in WORD_PATTERN.finditer(text)
+        ]
+        self._context_tokens: Optional[List[Tuple[int, int]]] = None
+        self._context_starts: Optional[List[int]] = None
+
+    def occurrences(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Уникальные слова (в порядке первого появления) и позиции их вхождений"""
+        result: Dict[str, List[Tuple[int, int]]] = {}
+        for word, start, end in self.words:
+            result.setdefault(word, []).append((start, end))
+        return result
+
+    def context(self, start: int, end: int, window: int = SPELLCHECK_CONTEXT_WORDS) -> str:
+        """Контекст вокруг вхождения: соседние слова, само вхождение выделено **"""
+        if self._context_tokens is None:
+            self._context_tokens = [match.span() for match in WHITESPACE_TOKEN_PATTERN.finditer(self.text)]
+            self._context_starts = [span[0] for span in self._context_tokens]
+
+        index = bisect.bisect_right(self._context_starts, start) - 1
+        if index < 0:
+            return f"...{self.text[start:end]}..."
+
+        token_start, token_end = self._context_tokens[index]
+        highlighted = (self.text[token_start:start] + f"**{self.text[start:end]}**"
+                       + self.text[end:token_end])
+        before = [self.text[s:e] for s, e in self._context_tokens[max(0, index - window):index]]
+        after = [self.text[s:e] for s, e in self._context_tokens[index + 1:index + 1 + window]]
+        return " ".join(before + [highlighted] + after)
+
 class AdvancedSpellChecker:
     """Продвинутый проверщик орфографии и грамматики"""
     
     def __init__(self):
         self.hunspell = None
         self.language_tool = None
+        self.language_tool_client: Optional[LanguageToolClient] = None
         self.dictionary = set()
+        self.fuzzy_index: Optional[SymSpellIndex] = None
+        self.verdict_cache = WordVerdictCache()
+        self.hunspell_pool: Optional[HunspellProcessPool] = None
+        self._hunspell_dictionaries: Optional[List[Tuple[str, Any]]] = None
+        self._hunspell_lock = threading.Lock()
+        self._spelling_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._initialize_checkers()
     
     def _initialize_checkers(self):
@@ -33,6 +149,9 @@ class AdvancedSpellChecker:
         # Инициализация базового словаря
         self._init_dictionary()
         
+        # Пул процессов Hunspell (словари загружаются в каждом процессе)
+        self._init_hunspell_pool()
+        
         logger.info("AdvancedSpellChecker инициализирован успешно")
     
     def _init_hunspell(self):
@@ -101,6 +220,29 @@ class AdvancedSpellChecker:
         else:
             logger.warning(f"⚠️ [HUNSPELL] Инициализация завершена с ошибками за {init_time:.3f}с")
     
+    def _init_hunspell_pool(self):
+        """Запуск пула процессов Hunspell"""
+        if not self.hunspell or HUNSPELL_WORKERS <= 0:
+            logger.info("🔧 [HUNSPELL_POOL] Пул процессов отключен, слова проверяются в основном процессе")
+            return
+        
+        start_time = time.time()
+        try:
+            self.hunspell_pool = HunspellProcessPool(
+                workers=HUNSPELL_WORKERS,
+                min_batch_size=HUNSPELL_WORKER_MIN_BATCH,
+                dict_path=HUNSPELL_DICT_PATH,
+                languages=HUNSPELL_LANGUAGES,
+                domain_words=sorted(self.dictionary)
+            )
+            self.hunspell_pool.start()
+            logger.info(f"✅ [HUNSPELL_POOL] Пул из {HUNSPELL_WORKERS} процессов запущен за {time.time() - start_time:.3f}с")
+        except Exception as e:
+            logger.warning(f"⚠️ [HUNSPELL_POOL] Не удалось запустить пул процессов: {e}")
+            if self.hunspell_pool:
+                self.hunspell_pool.shutdown()
+            self.hunspell_pool = None
+    
     def _init_language_tool(self):
         """Инициализация LanguageTool"""
         try:
@@ -127,6 +269,7 @@ class AdvancedSpellChecker:
                 logger.warning("LanguageTool сервис недоступен, используется упрощенная проверка")
             else:
                 self.language_tool = True  # Устанавливаем флаг для совместимости
+                self.language_tool_client = LanguageToolClient(self.language_tool_url)
             
         except ImportError:
             logger.warning("Модуль requests не установлен, используется упрощенная проверка")
@@ -134,69 +277,19 @@ class AdvancedSpellChecker:
             logger.error(f"Ошибка инициализации LanguageTool: {e}")
     
     def _init_dictionary(self):
-        """Инициализация базового словаря"""
-        # Расширенный словарь русских слов
-        self.dictionary = {
-            # Основные слова
-            'документ', 'проверка', 'орфография', 'грамматика', 'ошибка', 'исправление',
-            'текст', 'слово', 'предложение', 'абзац', 'страница', 'файл', 'загрузка',
-            'сохранение', 'отправка', 'получение', 'обработка', 'анализ', 'результат',
-            'система', 'сервис', 'модуль', 'функция', 'метод', 'класс', 'объект',
-            'данные', 'информация', 'содержание', 'структура', 'формат', 'версия',
-            'настройка', 'конфигурация', 'параметр', 'опция', 'выбор', 'установка',
-            'запуск', 'остановка', 'работа', 'выполнение', 'завершение', 'успех',
-            'проблема', 'решение', 'помощь', 'поддержка', 'техническая',
-            'пользователь', 'администратор', 'разработчик', 'тестировщик', 'аналитик',
-            
-            # Деловая лексика
-            'договор', 'соглашение', 'контракт', 'протокол', 'акт', 'справка',
-            'отчет', 'заключение', 'рекомендация', 'предложение', 'заявление',
-            'уведомление', 'извещение', 'сообщение', 'информация', 'сведения',
-            'документооборот', 'корреспонденция', 'переписка', 'коммуникация',
-            
-            # Техническая лексика
-            'программирование', 'разработка', 'тестирование', 'отладка', 'интеграция',
-            'деплой', 'развертывание', 'конфигурация', 'настройка', 'оптимизация',
-            'производительность', 'безопасность', 'аутентификация', 'авторизация',
-            'шифрование', 'кодирование', 'декодирование', 'сжатие', 'архивирование',
-            
-            # Общие слова
-            'привет', 'здравствуйте', 'спасибо', 'пожалуйста', 'извините',
-            'хорошо', 'плохо', 'отлично', 'замечательно', 'прекрасно',
-            'важно', 'необходимо', 'обязательно', 'желательно', 'рекомендуется',
-            'можно', 'нужно', 'следует', 'требуется', 'необходимо',
-            
-            # Организации и аббревиатуры
-            'ооо', 'зао', 'оао', 'пао', 'ип', 'тд', 'тдо', 'пир', 'ркд', 'ниопс',
-            'еврохим', 'протех', 'инжиниринг', 'белобородов', 'давлеткулов',
-            'галушков', 'юрманова', 'сергеевна', 'илья', 'викторович',
-            
-            # Технические термины
-            'концентрат', 'переработка', 'установка', 'проектирование', 'строительство',
-            'объект', 'проект', 'задание', 'техническое', 'коммерческое',
-            'стоимость', 'работы', 'гарантия', 'оплата', 'разъяснение',
-            'стадийность', 'приоритетность', 'предварительный', 'запрос',
-            'исходный', 'согласование', 'схема', 'документация', 'цех',
-            'предпроектный', 'проработка', 'технологический', 'совещание',
-            'изменение', 'объем', 'временный', 'подключение', 'трубопровод',
-            'эстакада', 'подтверждение', 'готовность', 'заключение', 'рассмотрение',
-            'комментарий', 'уточнение', 'критерий', 'разработка', 'проектная',
-            'рабочая', 'регистрация', 'отдельный', 'состав', 'действующий',
-            'приложение', 'уважением', 'директор', 'наименование', 'должность',
-            'личная', 'подпись', 'фамилия', 'исполнитель', 'телефон', 'email',
-            
-            # Географические названия
-            'россия', 'москва', 'дубининская', 'даниловский', 'северо', 'запад',
-            
-            # Английские слова (часто используемые в деловых документах)
-            'office', 'eurochem', 'pte', 'out', 'gen', 'mail', 'ilya', 'beloborodov',
-            'asya', 'yurmanova', 'e32c', 'e320', 'e230', 'dkc', 'ksp',
-            
-            # Сокращения и коды
-            'огрн', 'инн', 'кпп', 'грк', 'рф', 'ехсз', 'пти', 'испо', 'опо'
-        }
-        
-        logger.info(f"Базовый словарь инициализирован: {len(self.dictionary)} слов")
+        """Загрузка словаря предметной области и индекса нечеткого поиска"""
+        start_time = time.time()
+        try:
+            self.dictionary = load_domain_dictionary(SPELLCHECK_DOMAIN_DICTIONARY)
+            logger.info(f"Словарь предметной области загружен из {SPELLCHECK_DOMAIN_DICTIONARY}: {len(self.dictionary)} слов")
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось загрузить словарь предметной области {SPELLCHECK_DOMAIN_DICTIONARY}: {e}")
+            self.dictionary = set()
+        
+        self.fuzzy_index = SymSpellIndex.load_or_build(
+            self.dictionary, SPELLCHECK_FUZZY_INDEX_CACHE, max_distance=SPELLCHECK_MAX_EDIT_DISTANCE
+        )
+        logger.info(f"Индекс нечеткого поиска готов за {time.time() - start_time:.3f}с")
     
     def check_spelling(self, text: str) -> Dict[str, Any]:
         """Проверка орфографии"""
@@ -211,86 +304,91 @@ class AdvancedSpellChecker:
         start_time = time.time()
         
         try:
-            words = self._extract_words(text)
-            logger.info(f"🔍 [HUNSPELL] Извлечено {len(words)} слов для проверки")
+            tokens = TokenizedText(text)
+            occurrences = tokens.occurrences()
+            total_words = len(tokens.words)
+            logger.info(f"🔍 [HUNSPELL] Извлечено {total_words} слов для проверки, уникальных: {len(occurrences)}")
             
             errors = []
-            checked_words = 0
             skipped_words = 0
             dictionary_hits = 0
             false_positive_skips = 0
+            cache_hits = 0
             
-            for word in words:
-                checked_words += 1
+            # Каждое уникальное слово проверяется один раз, вердикт распространяется на все вхождения
+            candidates = []
+            for word, positions in occurrences.items():
+                count = len(positions)
                 
                 # Пропускаем короткие слова, числа и специальные символы
                 if len(word) < 3 or word.isdigit() or not word.isalpha():
-                    skipped_words += 1
-                    logger.debug(f"🔍 [HUNSPELL] Пропущено короткое слово/число: '{word}'")
+                    skipped_words += count
                     continue
                 
                 # Пропускаем слова из расширенного словаря
-                if word.lower() in self.dictionary:
-                    dictionary_hits += 1
-                    logger.debug(f"🔍 [HUNSPELL] Слово найдено в расширенном словаре: '{word}'")
+                if word in self.dictionary:
+                    dictionary_hits += count
                     continue
                 
                 # Пропускаем слова, которые выглядят как корректные
                 if self._is_likely_correct_word(word):
-                    skipped_words += 1
-                    logger.debug(f"🔍 [HUNSPELL] Слово выглядит корректным: '{word}'")
+                    skipped_words += count
                     continue
                 
-                # Проверяем слово через Hunspell
-                logger.debug(f"🔍 [HUNSPELL] Проверяем слово: '{word}'")
-                is_correct = self.hunspell.spell(word)
+                candidates.append((word, positions, self.verdict_cache.get("hunspell", word)))
+            
+            # Слова без вердикта в кеше проверяются одним пакетом (в пуле процессов, если он запущен)
+            missing = [word for word, _, verdict in candidates if verdict is None]
+            cache_hits = len(candidates) - len(missing)
+            verdicts = self._hunspell_verdicts(missing)
+            
+            for word, positions, verdict in candidates:
+                count = len(positions)
+                if verdict is None:
+                    verdict = verdicts[word]
+                    self.verdict_cache.put("hunspell", word, verdict)
+                status, suggestions = verdict
                 
-                if not is_correct:
-                    logger.info(f"🔍 [HUNSPELL] Найдена ошибка в слове: '{word}'")
-                    suggestions = self.hunspell.suggest(word)
-                    logger.info(f"🔍 [HUNSPELL] Предложения для '{word}': {suggestions[:3]}")
-                    
-                    context = self._get_word_context(text, word)
-                    
-                    # Дополнительная проверка - возможно это правильное слово
-                    if self._is_likely_false_positive(word, suggestions):
-                        false_positive_skips += 1
-                        logger.info(f"🔍 [HUNSPELL] Слово '{word}' пропущено как ложное срабатывание")
-                        continue
-                    
-                    error_data = {
+                if status == "false_positive":
+                    false_positive_skips += count
+                    continue
+                if status != "error":
+                    continue
+                
+                logger.info(f"🔍 [HUNSPELL] Найдена ошибка в слове: '{word}' ({count} вхожд.), предложения: {list(suggestions[:3])}")
+                for position, end in positions:
+                    errors.append({
                         "word": word,
-                        "position": text.find(word),
-                        "context": context,
-                        "suggestions": suggestions[:5],  # Ограничиваем до 5 предложений
+                        "position": position,
+                        "context": tokens.context(position, end),
+                        "suggestions": list(suggestions),
                         "type": "spelling",
                         "confidence": 0.8  # Высокая уверенность для Hunspell
-                    }
-                    errors.append(error_data)
-                    logger.info(f"🔍 [HUNSPELL] Добавлена ошибка: {error_data}")
-                else:
-                    logger.debug(f"🔍 [HUNSPELL] Слово корректно: '{word}'")
+                    })
             
+            errors.sort(key=lambda error: error["position"])
             processing_time = time.time() - start_time
             
             result = {
-                "total_words": len(words),
-                "checked_words": checked_words,
+                "total_words": total_words,
+                "checked_words": total_words,
+                "unique_words": len(occurrences),
                 "skipped_words": skipped_words,
                 "dictionary_hits": dictionary_hits,
                 "false_positive_skips": false_positive_skips,
+                "cache_hits": cache_hits,
                 "misspelled_count": len(errors),
                 "errors": errors,
-                "accuracy": (len(words) - len(errors)) / len(words) * 100 if words else 100,
+                "accuracy": (total_words - len(errors)) / total_words * 100 if total_words else 100,
                 "method": "hunspell",
                 "processing_time": processing_time
             }
             
             logger.info(f"🔍 [HUNSPELL] Проверка завершена за {processing_time:.3f}с:")
-            logger.info(f"🔍 [HUNSPELL] - Всего слов: {len(words)}")
-            logger.info(f"🔍 [HUNSPELL] - Проверено: {checked_words}")
+            logger.info(f"🔍 [HUNSPELL] - Всего слов: {total_words} (уникальных: {len(occurrences)})")
             logger.info(f"🔍 [HUNSPELL] - Пропущено: {skipped_words}")
             logger.info(f"🔍 [HUNSPELL] - Найдено в словаре: {dictionary_hits}")
+            logger.info(f"🔍 [HUNSPELL] - Вердиктов из кеша: {cache_hits}")
             logger.info(f"🔍 [HUNSPELL] - Ложные срабатывания: {false_positive_skips}")
             logger.info(f"🔍 [HUNSPELL] - Ошибок найдено: {len(errors)}")
             logger.info(f"🔍 [HUNSPELL] - Точность: {result['accuracy']:.1f}%")
@@ -301,69 +399,125 @@ class AdvancedSpellChecker:
             logger.error(f"Ошибка проверки орфографии Hunspell: {e}")
             return self._check_spelling_fallback(text)
     
+    def _hunspell_verdicts(self, words: List[str]) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        """Вердикты Hunspell для слов: correct, false_positive или error с предложениями"""
+        raw = None
+        if self.hunspell_pool is not None and words:
+            try:
+                raw = self.hunspell_pool.check_words(words)
+            except Exception as e:
+                logger.warning(f"⚠️ [HUNSPELL_POOL] Ошибка пула процессов, проверка в основном процессе: {e}")
+        if raw is None:
+            with self._hunspell_lock:
+                dictionaries = self._get_hunspell_dictionaries()
+                raw = {word: check_word(dictionaries, word) for word in words}
+        
+        verdicts = {}
+        for word, (is_correct, suggestions) in raw.items():
+            if is_correct:
+                verdicts[word] = ("correct", ())
+            # Дополнительная проверка - возможно это правильное слово
+            elif self._is_likely_false_positive(word, suggestions):
+                verdicts[word] = ("false_positive", ())
+            else:
+                verdicts[word] = ("error", tuple(suggestions))
+        return verdicts
+    
+    def _get_hunspell_dictionaries(self) -> List[Tuple[str, Any]]:
+        """Словари для проверки в основном процессе: те же языки и слова предметной области, что в пуле.
+
+        Вердикты пула и основного процесса попадают в один кэш, поэтому
+        должны совпадать. Вызывается под self._hunspell_lock.
+        """
+        if self._hunspell_dictionaries is None:
+            try:
+                self._hunspell_dictionaries = load_dictionaries(
+                    HUNSPELL_DICT_PATH, HUNSPELL_LANGUAGES, sorted(self.dictionary)
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ [HUNSPELL] Не удалось загрузить словари {', '.join(HUNSPELL_LANGUAGES)}: {e}")
+                self._hunspell_dictionaries = []
+            if not self._hunspell_dictionaries:
+                # Словарей нет в HUNSPELL_DICT_PATH - пул тоже не запустится, проверяем словарем из _init_hunspell
+                for word in self.dictionary:
+                    self.hunspell.add(word)
+                self._hunspell_dictionaries = [("main", self.hunspell)]
+            logger.info(f"✅ [HUNSPELL] Словари основного процесса: "
+                        f"{', '.join(language for language, _ in self._hunspell_dictionaries)}")
+        return self._hunspell_dictionaries
+    
     def _check_spelling_fallback(self, text: str) -> Dict[str, Any]:
         """Резервная проверка орфографии"""
         logger.info(f"🔍 [FALLBACK] Начинаем резервную проверку орфографии для текста длиной {len(text)} символов")
         start_time = time.time()
         
-        words = self._extract_words(text)
-        logger.info(f"🔍 [FALLBACK] Извлечено {len(words)} слов для проверки")
+        tokens = TokenizedText(text)
+        occurrences = tokens.occurrences()
+        total_words = len(tokens.words)
+        logger.info(f"🔍 [FALLBACK] Извлечено {total_words} слов для проверки, уникальных: {len(occurrences)}")
         
         errors = []
-        checked_words = 0
         dictionary_hits = 0
         suspicious_words = 0
+        cache_hits = 0
         
-        for word in words:
-            checked_words += 1
+        for word, positions in occurrences.items():
+            count = len(positions)
             
             # Пропускаем короткие слова, числа и специальные символы
             if len(word) < 3 or word.isdigit() or not word.isalpha():
-                logger.debug(f"🔍 [FALLBACK] Пропущено короткое слово/число: '{word}'")
                 continue
             
             # Проверяем слово по словарю
-            if word.lower() not in self.dictionary:
-                logger.debug(f"🔍 [FALLBACK] Слово не найдено в словаре: '{word}'")
+            if word in self.dictionary:
+                dictionary_hits += count
+                continue
+            
+            verdict = self.verdict_cache.get("fallback", word)
+            if verdict is None:
                 # Дополнительные проверки
                 if self._is_suspicious_word(word):
-                    suspicious_words += 1
-                    logger.info(f"🔍 [FALLBACK] Найдена подозрительная ошибка в слове: '{word}'")
-                    context = self._get_word_context(text, word)
-                    suggestions = self._get_suggestions(word)
-                    
-                    error_data = {
-                        "word": word,
-                        "position": text.find(word),
-                        "context": context,
-                        "suggestions": suggestions,
-                        "type": "spelling",
-                        "confidence": 0.5  # Средняя уверенность для fallback
-                    }
-                    errors.append(error_data)
-                    logger.info(f"🔍 [FALLBACK] Добавлена ошибка: {error_data}")
+                    verdict = ("error", tuple(self._get_suggestions(word)))
                 else:
-                    logger.debug(f"🔍 [FALLBACK] Слово не выглядит подозрительным: '{word}'")
+                    verdict = ("correct", ())
+                self.verdict_cache.put("fallback", word, verdict)
             else:
-                dictionary_hits += 1
-                logger.debug(f"🔍 [FALLBACK] Слово найдено в словаре: '{word}'")
+                cache_hits += 1
+            status, suggestions = verdict
+            if status != "error":
+                continue
+            
+            suspicious_words += count
+            logger.info(f"🔍 [FALLBACK] Найдена подозрительная ошибка в слове: '{word}' ({count} вхожд.)")
+            for position, end in positions:
+                errors.append({
+                    "word": word,
+                    "position": position,
+                    "context": tokens.context(position, end),
+                    "suggestions": list(suggestions),
+                    "type": "spelling",
+                    "confidence": 0.5  # Средняя уверенность для fallback
+                })
         
+        errors.sort(key=lambda error: error["position"])
         processing_time = time.time() - start_time
-        accuracy = (len(words) - len(errors)) / len(words) * 100 if words else 100
+        accuracy = (total_words - len(errors)) / total_words * 100 if total_words else 100
         
         logger.info(f"🔍 [FALLBACK] Резервная проверка завершена за {processing_time:.3f}с:")
-        logger.info(f"🔍 [FALLBACK] - Всего слов: {len(words)}")
-        logger.info(f"🔍 [FALLBACK] - Проверено: {checked_words}")
+        logger.info(f"🔍 [FALLBACK] - Всего слов: {total_words} (уникальных: {len(occurrences)})")
         logger.info(f"🔍 [FALLBACK] - Найдено в словаре: {dictionary_hits}")
+        logger.info(f"🔍 [FALLBACK] - Вердиктов из кеша: {cache_hits}")
         logger.info(f"🔍 [FALLBACK] - Подозрительных слов: {suspicious_words}")
         logger.info(f"🔍 [FALLBACK] - Ошибок найдено: {len(errors)}")
         logger.info(f"🔍 [FALLBACK] - Точность: {accuracy:.1f}%")
         
         return {
-            "total_words": len(words),
-            "checked_words": checked_words,
+            "total_words": total_words,
+            "checked_words": total_words,
+            "unique_words": len(occurrences),
             "dictionary_hits": dictionary_hits,
             "suspicious_words": suspicious_words,
+            "cache_hits": cache_hits,
             "misspelled_count": len(errors),
             "errors": errors,
             "accuracy": accuracy,
@@ -371,10 +525,10 @@ class AdvancedSpellChecker:
             "processing_time": processing_time
         }
     
-    def check_grammar(self, text: str) -> Dict[str, Any]:
+    async def check_grammar(self, text: str) -> Dict[str, Any]:
         """Проверка грамматики"""
-        if hasattr(self, 'language_tool_available') and self.language_tool_available:
-            return self._check_grammar_languagetool_http(text)
+        if self.language_tool_client is not None:
+            return await self._check_grammar_languagetool_http(text)
         else:
             return self._check_grammar_fallback(text)
     
@@ -406,49 +560,57 @@ class AdvancedSpellChecker:
             logger.error(f"Ошибка проверки грамматики LanguageTool: {e}")
             return self._check_grammar_fallback(text)
     
-    def _check_grammar_languagetool_http(self, text: str) -> Dict[str, Any]:
-        """Проверка грамматики с помощью LanguageTool через HTTP API"""
+    async def _check_grammar_languagetool_http(self, text: str) -> Dict[str, Any]:
+        """Проверка грамматики с помощью LanguageTool через HTTP API.
+
+        Текст отправляется частями параллельно; части, которые не удалось
+        проверить, проверяются резервным способом.
+        """
+        logger.info(f"🔍 [LANGUAGETOOL] Начинаем проверку грамматики для текста длиной {len(text)} символов")
+        start_time = time.time()
+        
         try:
-            import requests
-            
-            # Отправляем запрос к LanguageTool API
-            response = requests.post(
-                f"{self.language_tool_url}/v2/check",
-                data={
-                    'text': text,
-                    'language': 'ru-RU'
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                grammar_errors = []
-                
-                for match in data.get('matches', []):
-                    grammar_errors.append({
-                        "message": match.get('message', ''),
-                        "context": match.get('context', {}).get('text', ''),
-                        "offset": match.get('offset', 0),
-                        "length": match.get('length', 0),
-                        "replacements": match.get('replacements', [])[:3],  # Ограничиваем до 3 предложений
-                        "rule_id": match.get('rule', {}).get('id', ''),
-                        "type": "grammar",
-                        "confidence": 0.9  # Высокая уверенность для LanguageTool
-                    })
-                
-                return {
-                    "errors": grammar_errors,
-                    "total_errors": len(grammar_errors),
-                    "method": "languagetool_http"
-                }
-            else:
-                logger.warning(f"LanguageTool API вернул статус {response.status_code}")
-                return self._check_grammar_fallback(text)
-            
+            checked = await self.language_tool_client.check(text)
         except Exception as e:
             logger.error(f"Ошибка проверки грамматики с LanguageTool HTTP API: {e}")
             return self._check_grammar_fallback(text)
+        
+        grammar_errors = [self._languagetool_match_to_error(match) for match in checked["matches"]]
+        for start, end in checked["failed_spans"]:
+            for error in self._check_grammar_fallback(text[start:end])["errors"]:
+                error["offset"] += start
+                grammar_errors.append(error)
+        grammar_errors.sort(key=lambda error: error["offset"])
+        
+        processing_time = time.time() - start_time
+        logger.info(f"🔍 [LANGUAGETOOL] Проверка завершена за {processing_time:.3f}с: "
+                    f"частей {checked['chunks']}, абзацев из кеша {checked['cached_units']}/{checked['units']}, "
+                    f"ошибок {len(grammar_errors)}, повторов {checked['retries']}")
+        
+        return {
+            "errors": grammar_errors,
+            "total_errors": len(grammar_errors),
+            "method": "languagetool_http",
+            "chunks": checked["chunks"],
+            "paragraphs": checked["units"],
+            "cached_paragraphs": checked["cached_units"],
+            "failed_chunks": len(checked["failed_spans"]),
+            "retries": checked["retries"],
+            "processing_time": processing_time
+        }
+    
+    def _languagetool_match_to_error(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        """Совпадение LanguageTool в формате ошибки сервиса"""
+        return {
+            "message": match.get('message', ''),
+            "context": match.get('context', {}).get('text', ''),
+            "offset": match.get('offset', 0),
+            "length": match.get('length', 0),
+            "replacements": match.get('replacements', [])[:3],  # Ограничиваем до 3 предложений
+            "rule_id": match.get('rule', {}).get('id', ''),
+            "type": "grammar",
+            "confidence": 0.9  # Высокая уверенность для LanguageTool
+        }
     
     def _check_grammar_fallback(self, text: str) -> Dict[str, Any]:
         """Резервная проверка грамматики"""
@@ -483,35 +645,37 @@ class AdvancedSpellChecker:
             "method": "fallback"
         }
     
-    def comprehensive_check(self, text: str) -> Dict[str, Any]:
-        """Комплексная проверка орфографии и грамматики"""
+    async def check_spelling_async(self, text: str) -> Dict[str, Any]:
+        """Проверка орфографии в пуле потоков (не блокирует цикл событий)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_spelling_executor(), self.check_spelling, text)
+    
+    async def comprehensive_check(self, text: str) -> Dict[str, Any]:
+        """Комплексная проверка орфографии и грамматики.
+
+        Орфография (Hunspell, CPU) проверяется в пуле потоков одновременно
+        с грамматикой (запросы к LanguageTool).
+        """
         logger.info(f"🔍 [COMPREHENSIVE] Начинаем комплексную проверку для текста длиной {len(text)} символов")
         start_time = time.time()
         
-        # Проверка орфографии
-        logger.info("🔍 [COMPREHENSIVE] Запускаем проверку орфографии...")
-        spelling_start = time.time()
-        spelling_result = self.check_spelling(text)
-        spelling_time = time.time() - spelling_start
-        logger.info(f"🔍 [COMPREHENSIVE] Проверка орфографии завершена за {spelling_time:.3f}с")
-        
-        # Проверка грамматики
-        logger.info("🔍 [COMPREHENSIVE] Запускаем проверку грамматики...")
-        grammar_start = time.time()
-        grammar_result = self.check_grammar(text)
-        grammar_time = time.time() - grammar_start
-        logger.info(f"🔍 [COMPREHENSIVE] Проверка грамматики завершена за {grammar_time:.3f}с")
+        (spelling_result, spelling_time), (grammar_result, grammar_time) = await asyncio.gather(
+            self._timed(self.check_spelling_async(text)),
+            self._timed(self.check_grammar(text))
+        )
+        logger.info(f"🔍 [COMPREHENSIVE] Проверка орфографии завершена за {spelling_time:.3f}с, "
+                    f"грамматики - за {grammar_time:.3f}с")
         
-        # Объединяем результаты
-        all_errors = spelling_result["errors"] + grammar_result["errors"]
-        
-        # Сортируем ошибки по позиции в тексте
-        all_errors.sort(key=lambda x: x.get("offset", x.get("position", 0)))
+        # Обе части уже отсортированы по позиции в тексте
+        all_errors = list(heapq.merge(
+            spelling_result["errors"], grammar_result["errors"],
+            key=lambda x: x.get("offset", x.get("position", 0))
+        ))
         
         processing_time = time.time() - start_time
         total_errors = len(all_errors)
         spelling_errors = spelling_result.get("misspelled_count", 0)
-        grammar_errors = grammar_result.get("error_count", 0)
+        grammar_errors = grammar_result.get("total_errors", 0)
         overall_accuracy = self._calculate_overall_accuracy(spelling_result, grammar_result, text)
         
         logger.info(f"🔍 [COMPREHENSIVE] Комплексная проверка завершена за {processing_time:.3f}с:")
@@ -530,37 +694,40 @@ class AdvancedSpellChecker:
                 "spelling": spelling_result.get("method", "unknown"),
                 "grammar": grammar_result.get("method", "unknown")
             },
+            "timings": {
+                "spelling": spelling_time,
+                "grammar": grammar_time,
+                # Время, сэкономленное за счет одновременного выполнения
+                "overlap": max(0.0, spelling_time + grammar_time - processing_time)
+            },
             "processing_time": processing_time
         }
     
-    def _extract_words(self, text: str) -> List[str]:
-        """Извлечение слов из текста"""
-        # Убираем знаки препинания и разбиваем на слова
-        words = re.findall(r'\b[а-яёА-ЯЁa-zA-Z]+\b', text.lower())
-        return words
+    @staticmethod
+    async def _timed(coroutine) -> Tuple[Dict[str, Any], float]:
+        started = time.time()
+        result = await coroutine
+        return result, time.time() - started
+    
+    def _get_spelling_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._spelling_executor is None:
+                # Без пула процессов Hunspell работает в одном потоке: экземпляр не рассчитан
+                # на одновременные вызовы. С пулом потоки только разбирают текст и ждут процессы
+                workers = self.hunspell_pool.workers if self.hunspell_pool else 1
+                self._spelling_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spelling")
+            return self._spelling_executor
     
-    def _get_word_context(self, text: str, word: str) -> str:
-        """Получение контекста вокруг слова"""
-        words = text.split()
-        word_index = -1
-        for i, w in enumerate(words):
-            if word in w:
-                word_index = i
-                break
-        
-        if word_index == -1:
-            return f"...{word}..."
-        
-        start = max(0, word_index - 3)
-        end = min(len(words), word_index + 4)
-        context_words = words[start:end]
-        
-        # Выделяем проблемное слово
-        context = " ".join(context_words)
-        if word in context:
-            context = context.replace(word, f"**{word}**", 1)
-        
-        return context
+    async def close(self):
+        """Освобождение соединений с внешними сервисами"""
+        if self.language_tool_client is not None:
+            await self.language_tool_client.close()
+        with self._executor_lock:
+            if self._spelling_executor is not None:
+                self._spelling_executor.shutdown(wait=False, cancel_futures=True)
+                self._spelling_executor = None
+        if self.hunspell_pool is not None:
+            self.hunspell_pool.shutdown()
     
     def _is_suspicious_word(self, word: str) -> bool:
         """Проверка, является ли слово подозрительным"""
@@ -647,35 +814,9 @@ class AdvancedSpellChecker:
     
     def _get_suggestions(self, word: str) -> List[str]:
         """Получение предложений по исправлению"""
-        suggestions = []
-        
-        # Поиск похожих слов в словаре
-        for dict_word in self.dictionary:
-            if self._levenshtein_distance(word.lower(), dict_word) <= 2:
-                suggestions.append(dict_word)
-        
-        # Ограничиваем количество предложений
-        return suggestions[:5] if suggestions else ["проверьте написание"]
-    
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Расчет расстояния Левенштейна"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+        # Поиск похожих слов в словаре по индексу SymSpell
+        suggestions = self.fuzzy_index.lookup(word.lower(), limit=5)
+        return suggestions if suggestions else ["проверьте написание"]
     
     def _calculate_overall_accuracy(self, spelling_result: Dict, grammar_result: Dict, text: str) -> float:
         """Расчет общей точности"""
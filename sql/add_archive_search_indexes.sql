@@ -0,0 +1,29 @@
+-- Полнотекстовый и нечеткий поиск по архиву технической документации
+-- tsvector-колонки вычисляются PostgreSQL при записи и индексируются GIN,
+-- номера документов ищутся по триграммам (pg_trgm), постраничная выдача - по ключу (upload_date, id)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Название, номер и имя файла документа
+ALTER TABLE archive_documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian'::regconfig, coalesce(document_name, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(document_number, '')), 'A') ||
+        setweight(to_tsvector('russian'::regconfig, coalesce(original_filename, '')), 'B')
+    ) STORED;
+
+-- Заголовок и содержимое раздела (содержимое ограничено: tsvector не больше 1 МБ)
+ALTER TABLE archive_document_sections ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian'::regconfig, coalesce(section_title, '')), 'B') ||
+        setweight(to_tsvector('russian'::regconfig, left(coalesce(section_content, ''), 200000)), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_archive_documents_search ON archive_documents USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_archive_sections_search ON archive_document_sections USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_archive_documents_number_trgm ON archive_documents USING GIN (document_number gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_archive_documents_upload_keyset ON archive_documents (upload_date DESC, id DESC);
+
+-- Оценка числа найденных документов берется из статистики планировщика
+ANALYZE archive_documents;
+ANALYZE archive_document_sections;
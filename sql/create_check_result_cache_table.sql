@@ -0,0 +1,17 @@
+-- Кеш результатов извлечения и иерархической проверки документов
+-- Ключ: хеш содержимого файла + этап + версия (извлечения или пакета правил)
+
+CREATE TABLE IF NOT EXISTS check_result_cache (
+    id SERIAL PRIMARY KEY,
+    file_hash VARCHAR(64) NOT NULL, -- SHA-256 хеш файла
+    stage VARCHAR(100) NOT NULL, -- extraction, hierarchical:first_page_analysis, ...
+    version VARCHAR(100) NOT NULL, -- версия извлечения или пакета правил
+    payload JSONB NOT NULL, -- результат этапа
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (file_hash, stage, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_check_result_cache_last_accessed ON check_result_cache(last_accessed_at);
+CREATE INDEX IF NOT EXISTS idx_check_result_cache_stage_version ON check_result_cache(stage, version);
@@ -0,0 +1,14 @@
+-- Результаты проверки нормоконтроля по страницам для инкрементальной перепроверки
+-- Отпечатки страниц хранятся в checkable_elements.element_metadata (content_fingerprint, image_fingerprint)
+
+CREATE TABLE IF NOT EXISTS checkable_page_check_results (
+    id SERIAL PRIMARY KEY,
+    checkable_document_id INTEGER REFERENCES checkable_documents(id) ON DELETE CASCADE,
+    page_number INTEGER NOT NULL,
+    page_fingerprint VARCHAR(64) NOT NULL, -- SHA-256 текста страницы и отпечатка изображений
+    check_result JSONB NOT NULL, -- результат проверки страницы (findings, статус)
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (checkable_document_id, page_number, page_fingerprint)
+);
+
+CREATE INDEX IF NOT EXISTS idx_checkable_page_check_results_document ON checkable_page_check_results(checkable_document_id);
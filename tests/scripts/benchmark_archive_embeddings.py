@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Замер моделей эмбеддингов архива: качество поиска разделов и скорость на CPU
+
+На небольшом наборе разделов технической документации с запросами-перефразами
+считает recall@1, recall@3 и MRR поиска по косинусной близости, затем скорость
+построения векторов пачками (холодный кеш и повторный проход из кеша):
+    python benchmark_archive_embeddings.py --backends md5,hashing
+    python benchmark_archive_embeddings.py --backends md5,hashing,onnx --texts 2000
+md5 - прежние псевдовекторы из MD5-хеша (для сравнения). sentence-transformers
+и onnx требуют пакета sentence-transformers, rag - работающего rag-service.
+GPU не нужен. Результаты сохраняются в reports/archive_embeddings_benchmark.json.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+import numpy as np
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'archive_embeddings_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+from archive_service.embeddings import (  # noqa: E402
+    EmbeddingBackend, CachedEmbedder, create_embedding_backend
+)
+
+# Разделы документации и запросы, которые должны находить именно их
+FIXTURE = [
+    ("Фундаменты выполнены монолитными железобетонными плитами толщиной 600 мм из бетона класса B25 по бетонной подготовке.",
+     "какой толщины фундаментная плита"),
+    ("Кровля плоская, утеплитель из минераловатных плит, гидроизоляция в два слоя наплавляемого рулонного материала.",
+     "из чего сделана гидроизоляция крыши"),
+    ("Система вентиляции приточно-вытяжная с механическим побуждением, воздухообмен жилых помещений принят по нормам.",
+     "как устроена вентиляция в квартирах"),
+    ("Электроснабжение здания осуществляется от трансформаторной подстанции по двум взаимно резервируемым кабельным линиям.",
+     "откуда питается здание электроэнергией"),
+    ("Пути эвакуации обеспечены двумя незадымляемыми лестничными клетками, ширина эвакуационных выходов не менее 1,2 м.",
+     "ширина эвакуационных выходов при пожаре"),
+    ("Наружные стены из газобетонных блоков плотностью D500 с облицовкой кирпичом, приведенное сопротивление теплопередаче 3,2.",
+     "теплозащита наружных стен из газобетона"),
+    ("Водоснабжение от городской сети, на вводе установлен водомерный узел с обводной линией и задвижкой.",
+     "подключение к городскому водопроводу и счетчик воды"),
+    ("Канализация бытовая самотечная, стояки из полипропиленовых труб диаметром 110 мм с ревизиями на каждом этаже.",
+     "трубы канализационных стояков"),
+    ("Отопление двухтрубное с нижней разводкой, нагревательные приборы - стальные панельные радиаторы с термостатами.",
+     "какие радиаторы отопления установлены"),
+    ("Лифты пассажирские грузоподъемностью 1000 кг, скорость 1,6 м/с, один лифт с режимом перевозки пожарных подразделений.",
+     "грузоподъемность лифтов"),
+    ("Инженерно-геологические изыскания выявили суглинки тугопластичные, уровень грунтовых вод на глубине 4,5 м.",
+     "на какой глубине грунтовые воды"),
+    ("Сейсмичность площадки строительства 7 баллов, конструктивные решения выполнены с антисейсмическими поясами.",
+     "сколько баллов сейсмичность участка"),
+    ("Благоустройство территории включает детскую площадку, парковку на 40 машиномест и озеленение газонами.",
+     "сколько мест на парковке"),
+    ("Окна из ПВХ профиля с двухкамерными стеклопакетами, коэффициент сопротивления теплопередаче не менее 0,6.",
+     "какие стеклопакеты в окнах"),
+    ("Молниезащита здания выполнена сеткой из стальной проволоки, уложенной на кровле, с токоотводами по углам.",
+     "защита здания от молнии"),
+    ("Сметная стоимость строительства определена ресурсным методом в текущих ценах второго квартала 2024 года.",
+     "каким методом рассчитана сметная стоимость"),
+    ("Перекрытия сборные из многопустотных плит толщиной 220 мм, опирание на несущие стены не менее 120 мм.",
+     "глубина опирания плит перекрытия"),
+    ("Автоматическая пожарная сигнализация с адресными дымовыми извещателями установлена во всех помещениях.",
+     "какие извещатели пожарной сигнализации"),
+    ("Срок строительства 24 месяца, подготовительный период 2 месяца, работы ведутся башенным краном.",
+     "продолжительность строительства объекта"),
+    ("Шумозащита обеспечена звукоизоляцией межквартирных стен индексом не менее 52 дБ.",
+     "звукоизоляция стен между квартирами"),
+]
+
+
+class Md5Backend(EmbeddingBackend):
+    """Прежний способ: байты MD5-хеша текста, дополненные нулями до размерности"""
+    name = "md5"
+
+    def __init__(self, dimension: int = 1536):
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            digest = hashlib.md5(text.encode('utf-8')).hexdigest()
+            vector = [int(digest[i:i + 2], 16) / 255.0 for i in range(0, len(digest), 2)]
+            vectors.append(vector + [0.0] * (self._dimension - len(vector)))
+        return vectors
+
+
+def make_backend(name: str, args) -> EmbeddingBackend:
+    if name == "md5":
+        return Md5Backend(args.dimension)
+    return create_embedding_backend(name, args.model, args.rag_url, args.batch_size, args.dimension)
+
+
+def evaluate_quality(embedder: CachedEmbedder) -> dict:
+    """recall@k и MRR: запрос должен находить свой раздел среди всех разделов набора"""
+    sections = np.array(embedder.embed([section for section, _ in FIXTURE]), dtype=np.float32)
+    queries = np.array(embedder.embed([query for _, query in FIXTURE]), dtype=np.float32)
+    sections /= np.maximum(np.linalg.norm(sections, axis=1, keepdims=True), 1e-12)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = queries @ sections.T
+    ranks = []
+    for index, row in enumerate(scores):
+        ranks.append(int((row > row[index]).sum()) + 1)
+    return {
+        "recall_at_1": sum(rank == 1 for rank in ranks) / len(ranks),
+        "recall_at_3": sum(rank <= 3 for rank in ranks) / len(ranks),
+        "mrr": sum(1 / rank for rank in ranks) / len(ranks)
+    }
+
+
+def evaluate_throughput(embedder: CachedEmbedder, count: int) -> dict:
+    """Векторов в секунду: уникальные тексты (холодный кеш), затем те же тексты повторно"""
+    texts = [f"{FIXTURE[i % len(FIXTURE)][0]} Лист {i}." for i in range(count)]
+    started = time.perf_counter()
+    embedder.embed(texts)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    embedder.embed(texts)
+    warm = time.perf_counter() - started
+    return {
+        "texts": count,
+        "cold_texts_per_second": count / cold if cold else 0,
+        "cached_texts_per_second": count / warm if warm else 0
+    }
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark archive embedding backends (quality and CPU throughput)")
+    add_label_argument(parser)
+    parser.add_argument('--backends', default='md5,hashing',
+                        help="Через запятую: md5, hashing, sentence-transformers, onnx, rag")
+    parser.add_argument('--texts', type=int, default=1000, help="Текстов в замере скорости")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--dimension', type=int, default=1536, help="Размерность md5 и hashing")
+    parser.add_argument('--model', default='sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    parser.add_argument('--rag-url', default=os.getenv('RAG_SERVICE_URL', 'http://localhost:8003'))
+    args = parser.parse_args()
+
+    results = {}
+    for name in [backend.strip() for backend in args.backends.split(',') if backend.strip()]:
+        try:
+            embedder = CachedEmbedder(make_backend(name, args), batch_size=args.batch_size, cache_size=args.texts * 2)
+            started = time.perf_counter()
+            dimension = embedder.dimension
+            load_seconds = time.perf_counter() - started
+            results[name] = {
+                "dimension": dimension,
+                "vector_bytes": dimension * 4,
+                "load_seconds": load_seconds,
+                **evaluate_quality(embedder),
+                **evaluate_throughput(embedder, args.texts)
+            }
+        except Exception as e:
+            logger.error(f"❌ {name}: {e}")
+            results[name] = {"error": str(e)}
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ЭМБЕДДИНГИ АРХИВА: {len(FIXTURE)} РАЗДЕЛОВ, {args.texts} ТЕКСТОВ")
+    print("="*60)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name}: ошибка - {result['error']}")
+            continue
+        print(f"{name}: recall@1 {result['recall_at_1']:.2f}, recall@3 {result['recall_at_3']:.2f}, "
+              f"MRR {result['mrr']:.2f} | {result['dimension']} измерений | "
+              f"{result['cold_texts_per_second']:.0f} текстов/с (из кеша {result['cached_texts_per_second']:.0f})")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Замер объединения документов проекта архива в один PDF
+
+Генерирует проект из PDF-чертежей (векторная графика, штамп, оглавление) и
+нескольких DOCX и объединяет его через DocumentMerger._merge_to_pdf:
+    python benchmark_archive_merge.py                       # 100 PDF по 20 страниц = 2000 страниц
+    python benchmark_archive_merge.py --documents 200 --pages 10 --flush-pages 500
+Проверяет число страниц, закладки и сохранность графики, фиксирует время и пик
+памяти процесса. БД не нужна. Результаты сохраняются в reports/archive_merge_benchmark.json.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'archive_merge_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+MARKS = ["АР", "КЖ", "КМ", "ОВ", "ВК", "ЭОМ"]
+
+
+def write_drawing_pdf(path: str, index: int, pages: int):
+    """PDF-чертеж: сетка осей, конструкции и штамп на каждом листе, оглавление по листам"""
+    import fitz
+    document = fitz.open()
+    for number in range(1, pages + 1):
+        page = document.new_page(width=1191, height=842)  # A3 альбомный
+        shape = page.new_shape()
+        for x in range(60, 1140, 60):
+            shape.draw_line((x, 40), (x, 700))
+        for y in range(40, 700, 60):
+            shape.draw_line((40, y), (1150, y))
+        shape.finish(color=(0.6, 0.6, 0.6), width=0.3)
+        for k in range(12):
+            shape.draw_rect(fitz.Rect(100 + k * 80, 120 + (k % 4) * 100, 150 + k * 80, 200 + (k % 4) * 100))
+            shape.draw_circle((125 + k * 80, 560), 18)
+        shape.finish(color=(0, 0, 0), width=1.2)
+        shape.draw_rect(fitz.Rect(760, 720, 1150, 820))
+        shape.finish(color=(0, 0, 0), width=1)
+        shape.commit()
+        page.insert_text((770, 760), f"Drawing {index}, sheet {number}", fontsize=14)
+    document.set_toc([[1, f"Sheet {number}", number] for number in range(1, pages + 1)])
+    document.save(path, deflate=True)
+    document.close()
+
+
+def build_project(work_dir: str, documents: int, pages: int, docx_count: int) -> list:
+    """Файлы и записи документов проекта"""
+    import docx
+    from archive_service.models import ArchiveDocument, DocumentType
+
+    types = [DocumentType.PD, DocumentType.RD, DocumentType.RD, DocumentType.DRAWING]
+    records = []
+    base_date = datetime(2024, 1, 1)
+    for index in range(documents):
+        path = os.path.join(work_dir, f"drawing_{index:04d}.pdf")
+        write_drawing_pdf(path, index, pages)
+        records.append(ArchiveDocument(
+            id=index + 1, project_code="BENCH-MERGE", document_type=types[index % len(types)],
+            document_number=f"1234-21-{MARKS[index % len(MARKS)]}{index % 5 + 1}",
+            document_name=f"Комплект чертежей {index + 1}", file_path=path, file_type=".pdf",
+            upload_date=base_date + timedelta(minutes=index)
+        ))
+    for index in range(docx_count):
+        path = os.path.join(work_dir, f"note_{index:02d}.docx")
+        document = docx.Document()
+        for paragraph in range(120):
+            document.add_paragraph(f"Пункт {paragraph + 1}. Пояснительная записка к разделу, "
+                                   f"требования к материалам и производству работ ({index}).")
+        document.save(path)
+        records.append(ArchiveDocument(
+            id=documents + index + 1, project_code="BENCH-MERGE", document_type=DocumentType.TEO,
+            document_name=f"Пояснительная записка {index + 1}", file_path=path, file_type=".docx",
+            upload_date=base_date + timedelta(minutes=index)
+        ))
+    return records
+
+
+def max_rss_mb() -> float:
+    """Пик резидентной памяти процесса, МБ"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_merge(args, work_dir: str) -> dict:
+    """Объединение и проверка результата"""
+    import fitz
+    from archive_service.document_merger import DocumentMerger
+
+    records = build_project(work_dir, args.documents, args.pages, args.docx)
+    merger = DocumentMerger(None, merged_dir=os.path.join(work_dir, "merged"), flush_pages=args.flush_pages)
+    sorted_records = merger._sort_documents_for_merge(records)
+
+    rss_before = max_rss_mb()
+    started = time.perf_counter()
+    output_path = asyncio.run(merger._merge_to_pdf("BENCH-MERGE", sorted_records))
+    elapsed = time.perf_counter() - started
+    rss_after = max_rss_mb()
+
+    merged = fitz.open(output_path)
+    source_pages = args.documents * args.pages
+    drawing_page = merged.page_count - 1  # последний лист последнего чертежа
+    result = {
+        "seconds": elapsed,
+        "pages": merged.page_count,
+        "source_pdf_pages": source_pages,
+        "pages_per_second": merged.page_count / elapsed if elapsed else 0,
+        "bookmarks": len(merged.get_toc()),
+        "drawings_on_sample_page": len(merged[drawing_page].get_drawings()),
+        "output_mb": os.path.getsize(output_path) / 1024 / 1024,
+        "max_rss_before_mb": rss_before,
+        "max_rss_after_mb": rss_after
+    }
+    merged.close()
+    return result
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark archive project merge into one PDF")
+    add_label_argument(parser)
+    parser.add_argument('--documents', type=int, default=100, help="PDF-документов в проекте")
+    parser.add_argument('--pages', type=int, default=20, help="Листов в каждом PDF")
+    parser.add_argument('--docx', type=int, default=5, help="DOCX-документов (переводятся в PDF)")
+    parser.add_argument('--flush-pages', type=int, default=200, help="Страниц между инкрементальными сохранениями")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="archive_merge_benchmark_")
+    try:
+        results = run_merge(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ОБЪЕДИНЕНИЕ ПРОЕКТА: {results['source_pdf_pages']} СТРАНИЦ PDF + {args.docx} DOCX")
+    print("="*60)
+    print(f"Время: {results['seconds']:.1f} с ({results['pages_per_second']:.0f} страниц/с), "
+          f"страниц в результате: {results['pages']}, закладок: {results['bookmarks']}")
+    print(f"Графика сохранена: {results['drawings_on_sample_page']} элементов на проверочном листе")
+    print(f"Файл: {results['output_mb']:.1f} МБ, пик памяти: {results['max_rss_before_mb']:.0f} -> "
+          f"{results['max_rss_after_mb']:.0f} МБ")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+    expected = results['source_pdf_pages']
+    if results['pages'] < expected or results['drawings_on_sample_page'] == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
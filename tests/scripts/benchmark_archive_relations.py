@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Замер построения связей между документами проекта архива
+
+Генерирует проект из ПД, РД, ТЭО и прочих документов с обозначениями вида
+"1234-21-П-АР1 изм.2" и строит связи двумя способами: прежним перебором всех
+пар и по ключам блокировки (archive_service/document_relations.py). Проверяет,
+что результаты совпадают, и сравнивает время на разных размерах пакета.
+Для проектов, где все документы в одном блоке (без обозначений или одна марка
+одного объекта), связи сверяются с исходным правилом только по типам документов:
+    python benchmark_archive_relations.py --sizes 500,1000,2000,4000
+БД не нужна. Результаты сохраняются в reports/archive_relations_benchmark.json.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'archive_relations_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+from archive_service.models import ArchiveDocument, DocumentType, RelationType  # noqa: E402
+from archive_service.document_relations import (  # noqa: E402
+    build_document_relations, determine_relation_type
+)
+
+MARKS = ["АР", "КЖ", "КМ", "ОВ", "ВК", "ЭОМ", "СС", "ТХ", "ГП", "ПОС"]
+OBJECTS = ["1234-21", "1234-22", "5678-23"]
+
+
+def build_project(count: int, seed: int = 42) -> list:
+    """Документы проекта: ТЭО на объект, раздел ПД на объект и марку, остальное - листы РД и прочие"""
+    rng = random.Random(seed)
+    specs = [(DocumentType.TEO, f"{code}-ТЭО") for code in OBJECTS]
+    specs += [(DocumentType.PD, f"{code}-П-{mark}") for code in OBJECTS for mark in MARKS]
+    while len(specs) < count:
+        if rng.random() < 0.9:
+            number = f"{rng.choice(OBJECTS)}-Р-{rng.choice(MARKS)}{rng.randint(1, 4)}"
+            if rng.random() < 0.2:
+                number += f" изм.{rng.randint(1, 3)}"
+            specs.append((DocumentType.RD, None if rng.random() < 0.02 else number))
+        else:
+            specs.append((rng.choice([DocumentType.DRAWING, DocumentType.SPECIFICATION, DocumentType.OTHER]), None))
+    specs = specs[:count]
+    rng.shuffle(specs)
+    return [ArchiveDocument(id=index + 1, project_code="BENCH", document_type=document_type,
+                            document_number=number, document_name=f"Документ {index}")
+            for index, (document_type, number) in enumerate(specs)]
+
+
+def type_only_relation_type(doc1: ArchiveDocument, doc2: ArchiveDocument):
+    """Исходное правило: тип связи только по типам документов, без обозначений"""
+    if doc1.document_type == DocumentType.PD and doc2.document_type == DocumentType.RD:
+        return RelationType.DEPENDS_ON
+    elif doc1.document_type == DocumentType.RD and doc2.document_type == DocumentType.PD:
+        return RelationType.REFERENCES
+    elif doc1.document_type == DocumentType.TEO and doc2.document_type in [DocumentType.PD, DocumentType.RD]:
+        return RelationType.RELATED_TO
+    else:
+        return None
+
+
+def build_relations_pairwise(documents: list, rule=determine_relation_type) -> list:
+    """Прежний способ: сравнение каждой пары документов"""
+    relations = []
+    for i, doc1 in enumerate(documents):
+        for doc2 in documents[i + 1:]:
+            relation_type = rule(doc1, doc2)
+            if relation_type:
+                relations.append((doc1.id, doc2.id, relation_type))
+    return relations
+
+
+def build_single_block_projects(count: int, seed: int = 42) -> dict:
+    """Проекты, где все документы попадают в один блок: без обозначений и с одной маркой одного объекта"""
+    rng = random.Random(seed)
+    types = [DocumentType.TEO, DocumentType.PD, DocumentType.RD, DocumentType.RD,
+             DocumentType.DRAWING, DocumentType.OTHER]
+    numbers = ["1234-21-П-АР", "1234-21-Р-АР1", "1234-21-АР2 изм.1", "1234-21-Р-АР3.1"]
+    specs = [rng.choice(types) for _ in range(count)]
+    return {
+        "without_numbers": [ArchiveDocument(id=index + 1, project_code="BENCH", document_type=document_type,
+                                            document_name=f"Документ {index}")
+                            for index, document_type in enumerate(specs)],
+        "one_mark": [ArchiveDocument(id=index + 1, project_code="BENCH", document_type=document_type,
+                                     document_number=rng.choice(numbers), document_name=f"Документ {index}")
+                     for index, document_type in enumerate(specs)]
+    }
+
+
+def check_type_only_rule(count: int) -> dict:
+    """Совпадение связей по блокам с исходным правилом по типам, когда все документы в одном блоке"""
+    results = {}
+    for name, documents in build_single_block_projects(count).items():
+        blocked = [(relation.source_document_id, relation.target_document_id, relation.relation_type)
+                   for relation in build_document_relations(documents)]
+        original = build_relations_pairwise(documents, rule=type_only_relation_type)
+        results[name] = {"documents": count, "relations": len(blocked), "identical": original == blocked}
+        if not results[name]["identical"]:
+            logger.error(f"❌ {name}: связи отличаются от исходного правила "
+                         f"({len(original)} по типам, {len(blocked)} по блокам)")
+    return results
+
+
+def measure(size: int, pairwise_limit: int) -> dict:
+    """Время обоих способов и проверка совпадения связей"""
+    documents = build_project(size)
+
+    started = time.perf_counter()
+    blocked = [(relation.source_document_id, relation.target_document_id, relation.relation_type)
+               for relation in build_document_relations(documents)]
+    blocked_seconds = time.perf_counter() - started
+
+    result = {"documents": size, "relations": len(blocked), "blocked_seconds": blocked_seconds}
+    if size <= pairwise_limit:
+        started = time.perf_counter()
+        pairwise = build_relations_pairwise(documents)
+        result["pairwise_seconds"] = time.perf_counter() - started
+        result["identical"] = pairwise == blocked
+        if not result["identical"]:
+            logger.error(f"❌ {size} документов: связи отличаются ({len(pairwise)} попарно, {len(blocked)} по блокам)")
+    return result
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark archive document relation building")
+    add_label_argument(parser)
+    parser.add_argument('--sizes', default='500,1000,2000,4000', help="Размеры пакета через запятую")
+    parser.add_argument('--pairwise-limit', type=int, default=4000,
+                        help="Наибольший пакет, для которого выполняется попарный перебор")
+    parser.add_argument('--type-only-size', type=int, default=500,
+                        help="Размер проектов из одного блока для сверки с исходным правилом по типам")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {str(size): measure(size, args.pairwise_limit) for size in sizes}
+    type_only = check_type_only_rule(args.type_only_size)
+    save_results(REPORT_NAME, args.label, vars(args), {**results, "type_only_rule": type_only})
+
+    print("\n" + "="*60)
+    print("📊 СВЯЗИ МЕЖДУ ДОКУМЕНТАМИ ПРОЕКТА")
+    print("="*60)
+    for size, result in results.items():
+        line = f"{size} документов: {result['relations']} связей, по блокам {result['blocked_seconds'] * 1000:.1f} мс"
+        if "pairwise_seconds" in result:
+            line += (f", попарно {result['pairwise_seconds'] * 1000:.1f} мс, "
+                     f"{'✅ совпадают' if result['identical'] else '❌ отличаются'}")
+        print(line)
+    for name, result in type_only.items():
+        print(f"Исходное правило по типам, {name}: {result['relations']} связей, "
+              f"{'✅ совпадают' if result['identical'] else '❌ отличаются'}")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+    checks = list(results.values()) + list(type_only.values())
+    if not all(result.get("identical", True) for result in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Замер поиска по архиву технической документации на большом объеме
+
+Заполняет archive_documents (и разделы части документов) сгенерированными
+данными средствами PostgreSQL и сравнивает прежний поиск (ILIKE '%...%',
+отдельный COUNT(*), OFFSET) с ArchiveDatabaseManager.search_documents
+(tsvector + GIN, pg_trgm, ts_rank, курсор, оценка числа строк):
+    python benchmark_archive_search.py --documents 1000000
+    python benchmark_archive_search.py --documents 1000000 --keep   # данные остаются для повторных замеров
+Нужна БД с примененной миграцией sql/add_archive_search_indexes.sql (DATABASE_URL).
+Результаты сохраняются в reports/archive_search_benchmark.json.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'archive_search_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+PROJECT_PREFIX = "BENCH-SEARCH-"
+WORDS = ("фундамент перекрытие кровля фасад колонна ригель арматура бетон монтаж вентиляция "
+         "отопление водоснабжение канализация электроснабжение лестница лифт окно дверь "
+         "утеплитель гидроизоляция сейсмика нагрузка расчет спецификация узел опора").split()
+MARKS = ["АР", "КЖ", "КМ", "ОВ", "ВК", "ЭОМ", "СС", "ТХ", "ГП", "ПОС"]
+
+
+def generate_archive(db_manager, documents: int, projects: int):
+    """Документы и разделы генерируются одним INSERT ... SELECT на стороне БД"""
+    words = "ARRAY[" + ",".join(f"'{word}'" for word in WORDS) + "]"
+    marks = "ARRAY[" + ",".join(f"'{mark}'" for mark in MARKS) + "]"
+    with db_manager.get_write_cursor() as (cursor, connection):
+        # Триггер статистики проекта пересчитывает COUNT(*) на каждую строку
+        cursor.execute("ALTER TABLE archive_documents DISABLE TRIGGER trigger_update_project_stats")
+        cursor.execute(f"""
+            INSERT INTO archive_documents
+            (project_code, document_type, document_number, document_name, original_filename,
+             file_type, file_size, document_hash, upload_date, processing_status, token_count)
+            SELECT
+                '{PROJECT_PREFIX}' || (i %% %(projects)s),
+                (ARRAY['PD', 'RD', 'RD', 'RD', 'TEO', 'DRAWING'])[1 + i %% 6],
+                (1000 + i %% 977) || '-' || (20 + i %% 5) || '-' || ({marks})[1 + i %% 10] || (1 + i %% 7),
+                'Раздел ' || ({words})[1 + i %% 25] || ' ' || ({words})[1 + (i / 25) %% 25]
+                    || ' ' || ({words})[1 + (i / 625) %% 25] || ' ' || i
+                    || CASE WHEN i %% 1000 = 0 THEN ' шумозащита' ELSE '' END,
+                'doc_' || i || '.pdf',
+                'pdf', 100000 + i %% 5000,
+                md5('{PROJECT_PREFIX}' || i),
+                TIMESTAMP '2020-01-01' + (i * INTERVAL '1 minute'),
+                'completed', 1000
+            FROM generate_series(1, %(documents)s) AS i
+        """, {"projects": projects, "documents": documents})
+        cursor.execute(f"""
+            INSERT INTO archive_document_sections (archive_document_id, section_number, section_title, section_content)
+            SELECT d.id, '1', 'Общие положения',
+                   array_to_string(ARRAY(
+                       SELECT ({words})[1 + (d.id * 7 + n * 13) % 25] FROM generate_series(1, 12) AS n
+                   ), ' ')
+            FROM archive_documents d
+            WHERE d.project_code LIKE '{PROJECT_PREFIX}%' AND d.id % 5 = 0
+        """)
+        cursor.execute("ALTER TABLE archive_documents ENABLE TRIGGER trigger_update_project_stats")
+        connection.commit()
+    db_manager.execute_write_query("ANALYZE archive_documents")
+    db_manager.execute_write_query("ANALYZE archive_document_sections")
+
+
+def legacy_search(db_manager, search_query, limit: int, offset: int) -> dict:
+    """Прежний поиск: ILIKE по названию и номеру, COUNT(*) и OFFSET"""
+    where_clause, params = "1=1", []
+    if search_query:
+        where_clause = "(document_name ILIKE %s OR document_number ILIKE %s)"
+        params = [f"%{search_query}%", f"%{search_query}%"]
+    count = db_manager.execute_read_query(
+        f"SELECT COUNT(*) as total FROM archive_documents WHERE {where_clause}", tuple(params))
+    rows = db_manager.execute_read_query(f"""
+        SELECT * FROM archive_documents WHERE {where_clause}
+        ORDER BY upload_date DESC LIMIT %s OFFSET %s
+    """, tuple(params + [limit, offset]))
+    return {"total": count[0]['total'] if count else 0, "rows": len(rows)}
+
+
+def timed(function, repeats: int) -> dict:
+    """Медиана и минимум времени вызова, мс"""
+    timings, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "result": result}
+
+
+def cursor_at(db_manager, position: int) -> str:
+    """Курсор страницы, начинающейся после position документов (без учета времени)"""
+    rows = db_manager.execute_read_query("""
+        SELECT id, upload_date FROM archive_documents
+        ORDER BY upload_date DESC, id DESC LIMIT 1 OFFSET %s
+    """, (position - 1,))
+    return db_manager._encode_search_cursor("date", rows[0]['upload_date'], rows[0]['id'])
+
+
+def run_scenarios(db_manager, args) -> dict:
+    """Прежний и новый поиск на одинаковых запросах"""
+    from archive_service.models import DocumentSearchRequest
+
+    def search(**kwargs):
+        response = db_manager.search_documents(DocumentSearchRequest(limit=args.limit, **kwargs))
+        return {"total": response.total_count, "rows": len(response.documents),
+                "estimated": response.total_count_estimated}
+
+    deep_cursor = cursor_at(db_manager, args.deep_offset)
+    scenarios = {
+        "rare_term": (
+            lambda: legacy_search(db_manager, "шумозащита", args.limit, 0),
+            lambda: search(search_query="шумозащита", count_mode="exact")
+        ),
+        "text_query": (
+            lambda: legacy_search(db_manager, "гидроизоляция", args.limit, 0),
+            lambda: search(search_query="гидроизоляция", count_mode="estimated")
+        ),
+        "text_query_exact_count": (
+            lambda: legacy_search(db_manager, "гидроизоляция", args.limit, 0),
+            lambda: search(search_query="гидроизоляция", count_mode="exact")
+        ),
+        "document_number": (
+            lambda: legacy_search(db_manager, "1234-21-КЖ", args.limit, 0),
+            lambda: search(search_query="1234-21-КЖ", count_mode="estimated")
+        ),
+        "browse_first_page": (
+            lambda: legacy_search(db_manager, None, args.limit, 0),
+            lambda: search(count_mode="estimated")
+        ),
+        "browse_deep_page": (
+            lambda: legacy_search(db_manager, None, args.limit, args.deep_offset),
+            lambda: search(cursor=deep_cursor, count_mode="estimated")
+        ),
+    }
+    results = {}
+    for name, (legacy, current) in scenarios.items():
+        results[name] = {
+            "legacy": timed(legacy, args.repeats),
+            "search_documents": timed(current, args.repeats)
+        }
+    return results
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark archive document search on a generated archive")
+    add_label_argument(parser)
+    parser.add_argument('--documents', type=int, default=1000000, help="Документов в сгенерированном архиве")
+    parser.add_argument('--projects', type=int, default=200, help="Проектов, по которым распределяются документы")
+    parser.add_argument('--limit', type=int, default=50, help="Документов на странице")
+    parser.add_argument('--deep-offset', type=int, default=500000, help="Позиция глубокой страницы")
+    parser.add_argument('--repeats', type=int, default=5, help="Повторов каждого запроса")
+    parser.add_argument('--keep', action='store_true', help="Не удалять сгенерированные документы")
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from archive_service.database_manager import ArchiveDatabaseManager
+
+    db_manager = ArchiveDatabaseManager(connection_string=args.database_url) if args.database_url else ArchiveDatabaseManager()
+    args.deep_offset = min(args.deep_offset, max(1, args.documents - args.limit))
+    try:
+        existing = db_manager.execute_read_query(
+            "SELECT COUNT(*) AS total FROM archive_documents WHERE project_code LIKE %s", (PROJECT_PREFIX + '%',))
+        if existing and existing[0]['total'] >= args.documents:
+            print(f"ℹ️ Используются ранее сгенерированные документы: {existing[0]['total']}")
+        else:
+            db_manager.execute_write_query(
+                "DELETE FROM archive_documents WHERE project_code LIKE %s", (PROJECT_PREFIX + '%',))
+            started = time.perf_counter()
+            generate_archive(db_manager, args.documents, args.projects)
+            print(f"✅ Сгенерировано {args.documents} документов за {time.perf_counter() - started:.0f} с")
+        results = run_scenarios(db_manager, args)
+    finally:
+        if not args.keep:
+            db_manager.execute_write_query(
+                "DELETE FROM archive_documents WHERE project_code LIKE %s", (PROJECT_PREFIX + '%',))
+        db_manager.close_all_connections()
+    config = {key: value for key, value in vars(args).items() if key != 'database_url'}
+    save_results(REPORT_NAME, args.label, config, results)
+
+    print("\n" + "="*60)
+    print(f"📊 ПОИСК ПО АРХИВУ: {args.documents} ДОКУМЕНТОВ")
+    print("="*60)
+    for name, result in results.items():
+        legacy, current = result['legacy'], result['search_documents']
+        print(f"{name}: прежний {legacy['median_ms']:.1f} мс (всего {legacy['result']['total']}), "
+              f"новый {current['median_ms']:.1f} мс "
+              f"(всего {'~' if current['result']['estimated'] else ''}{current['result']['total']})")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Замер пакетной загрузки архива технической документации (файлов в минуту)
+
+Генерирует пакет документов с разделами и загружает его через
+BatchUploadService в локальные PostgreSQL и Qdrant (DATABASE_URL, QDRANT_URL):
+    python benchmark_archive_upload.py --label sequential --io-workers 1 --extract-processes 0 --write-batch 1
+    python benchmark_archive_upload.py --label pipeline --documents 200
+Первый вариант повторяет прежнюю обработку "по одному файлу"; без параметров
+используются настройки сервиса из archive_service/config.py. После замера
+документы проекта удаляются из БД и Qdrant. Результаты сохраняются в
+reports/archive_upload_benchmark.json.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования (сообщения сервиса о каждом документе не выводятся)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'archive_upload_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+SECTION_TITLES = [
+    "Общие положения", "Технические требования", "Методы испытаний", "Правила приемки",
+    "Транспортирование и хранение", "Требования безопасности", "Гарантии изготовителя"
+]
+WORDS = ("конструкция фундамент нагрузка арматура бетон сечение пролет расчет прочность "
+         "устойчивость узел опора колонна ригель перекрытие кровля фасад монтаж").split()
+
+
+def build_document(index: int, sections: int, paragraphs: int, rng: random.Random) -> str:
+    """Текст документа: нумерованные разделы с абзацами"""
+    lines = [f"Проектная документация ПР-2024-{index:03d}"]
+    for number in range(1, sections + 1):
+        lines.append(f"{number}. {SECTION_TITLES[(number - 1) % len(SECTION_TITLES)]}")
+        for _ in range(paragraphs):
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(40)) + f" (документ {index}).")
+    return "\n".join(lines)
+
+
+def write_documents(work_dir: str, count: int, file_format: str, sections: int, paragraphs: int) -> list:
+    """Файлы пакета во временной директории"""
+    rng = random.Random(42)
+    source_dir = os.path.join(work_dir, "source")
+    os.makedirs(source_dir, exist_ok=True)
+    documents = []
+    for index in range(count):
+        text = build_document(index, sections, paragraphs, rng)
+        file_path = os.path.join(source_dir, f"ПД_{index:04d}.{file_format}")
+        if file_format == "docx":
+            import docx
+            document = docx.Document()
+            for line in text.split("\n"):
+                document.add_paragraph(line)
+            document.save(file_path)
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        documents.append({"file_path": file_path, "document_type": "PD"})
+    return documents
+
+
+async def run_upload(args, documents: list) -> dict:
+    """Загрузка пакета и удаление загруженного после замера"""
+    from archive_service.database_manager import ArchiveDatabaseManager
+    from archive_service.batch_upload_service import BatchUploadService
+    from archive_service.models import BatchUploadRequest
+
+    db_manager = ArchiveDatabaseManager()
+    service = BatchUploadService(db_manager)
+    pipeline = service.upload_pipeline
+    if args.io_workers is not None:
+        pipeline.io_workers = max(1, args.io_workers)
+    if args.extract_processes is not None:
+        pipeline.extract_processes = max(0, args.extract_processes)
+    if args.write_batch is not None:
+        pipeline.write_batch_size = max(1, args.write_batch)
+
+    project_code = f"BENCH-{datetime.now().strftime('%H%M%S')}"
+    request = BatchUploadRequest(project_code=project_code, documents=documents,
+                                 auto_extract_sections=True, create_relations=False)
+    response = None
+    try:
+        started = time.perf_counter()
+        response = await service.upload_documents_batch(request)
+        elapsed = time.perf_counter() - started
+        progress = pipeline.get_progress(project_code) or {}
+    finally:
+        for document_id in (response.document_ids if response else []):
+            await service.vector_indexer.delete_document_sections(document_id)
+        db_manager.execute_write_query("DELETE FROM archive_documents WHERE project_code = %s", (project_code,))
+        db_manager.execute_write_query("DELETE FROM archive_projects WHERE project_code = %s", (project_code,))
+        service.shutdown()
+        db_manager.close_all_connections()
+
+    results = {
+        "seconds": elapsed,
+        "documents": len(documents),
+        "processed": response.processed_documents,
+        "failed": response.failed_documents,
+        "files_per_minute": response.processed_documents / elapsed * 60 if elapsed else 0,
+        "pipeline": {
+            "io_workers": pipeline.io_workers,
+            "extract_processes": pipeline.extract_processes,
+            "write_batch_size": pipeline.write_batch_size
+        },
+        "stages": progress.get("stages", {}),
+        "errors": response.errors[:5]
+    }
+    return results
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark archive batch upload (files per minute)")
+    add_label_argument(parser, "sequential/pipeline")
+    parser.add_argument('--documents', type=int, default=200, help="Число файлов в пакете")
+    parser.add_argument('--format', choices=['txt', 'docx'], default='txt', help="Формат файлов")
+    parser.add_argument('--sections', type=int, default=20, help="Разделов в документе")
+    parser.add_argument('--paragraphs', type=int, default=5, help="Абзацев в разделе")
+    parser.add_argument('--io-workers', type=int, default=None, help="Потоков копирования и хеширования")
+    parser.add_argument('--extract-processes', type=int, default=None, help="Процессов извлечения (0 - в потоке)")
+    parser.add_argument('--write-batch', type=int, default=None, help="Документов в одной записи в БД и Qdrant")
+    args = parser.parse_args()
+
+    # Копии файлов сервис кладет во временную директорию замера (задается до импорта archive_service)
+    work_dir = tempfile.mkdtemp(prefix="archive_upload_benchmark_")
+    os.environ.setdefault("ARCHIVE_UPLOAD_DIR", os.path.join(work_dir, "uploads"))
+    try:
+        documents = write_documents(work_dir, args.documents, args.format, args.sections, args.paragraphs)
+        results = asyncio.run(run_upload(args, documents))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    report = save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ПАКЕТНАЯ ЗАГРУЗКА АРХИВА: {args.documents} ФАЙЛОВ ({args.format})")
+    print("="*60)
+    print(f"Файлов в минуту: {results['files_per_minute']:.1f} "
+          f"(загружено {results['processed']}, ошибок {results['failed']}, {results['seconds']:.1f} с)")
+    print(f"Конвейер: {results['pipeline']}")
+    for stage, counters in results['stages'].items():
+        print(f"{stage}: {counters['done']} готово, {counters['failed']} ошибок")
+    if len(report) > 1:
+        print("\nСравнение замеров:")
+        for label, entry in report.items():
+            print(f"  {label}: {entry['results']['files_per_minute']:.1f} файлов/мин")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Замер экспорта отчетов по расчетам в DOCX
+
+Создает N расчетов в работающем сервисе и сравнивает поштучный экспорт
+(GET /calculations/{id}/export-docx) с пакетным (POST /calculations/export-docx,
+один DOCX и ZIP):
+    python benchmark_calculation_docx_export.py --count 200
+Результаты сохраняются в reports/calculation_docx_export_benchmark.json.
+"""
+
+import argparse
+import asyncio
+import aiohttp
+import os
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'calculation_docx_export_benchmark.json'
+
+THERMAL_PARAMETERS = {
+    "building_type": "жилое",
+    "building_area": 100,
+    "building_volume": 300,
+    "number_of_floors": 1,
+    "wall_thickness": 0.4,
+    "wall_material": "кирпич",
+    "thermal_conductivity": 0.7,
+    "wall_area": 120,
+    "window_area": 10,
+    "floor_area": 100,
+    "ceiling_area": 100
+}
+
+
+async def prepare_calculations(session: aiohttp.ClientSession, api_url: str, count: int) -> list:
+    """Создание и выполнение расчетов для выгрузки"""
+    calculation_ids = []
+    for index in range(count):
+        parameters = {**THERMAL_PARAMETERS, "wall_area": 100 + index}
+        async with session.post(f"{api_url}/calculations", json={
+            "name": f"docx_benchmark_{index}",
+            "type": "thermal",
+            "category": "heat_loss",
+            "parameters": parameters
+        }, ssl=False) as response:
+            response.raise_for_status()
+            calculation_id = (await response.json())["id"]
+        async with session.post(f"{api_url}/calculations/{calculation_id}/execute",
+                                json={"parameters": parameters}, ssl=False) as response:
+            response.raise_for_status()
+        calculation_ids.append(calculation_id)
+    logger.info(f"✅ Prepared {len(calculation_ids)} calculations")
+    return calculation_ids
+
+
+async def measure_single_exports(session: aiohttp.ClientSession, api_url: str, calculation_ids: list) -> dict:
+    """Поштучный экспорт всех расчетов"""
+    started = time.perf_counter()
+    total_bytes = 0
+    for calculation_id in calculation_ids:
+        async with session.get(f"{api_url}/calculations/{calculation_id}/export-docx", ssl=False) as response:
+            response.raise_for_status()
+            total_bytes += len(await response.read())
+    elapsed = time.perf_counter() - started
+    logger.info(f"📊 Single exports: {elapsed:.2f}s")
+    return {"seconds": elapsed, "bytes": total_bytes}
+
+
+async def measure_bulk_export(session: aiohttp.ClientSession, api_url: str,
+                              calculation_ids: list, export_format: str) -> dict:
+    """Пакетный экспорт в одном запросе"""
+    started = time.perf_counter()
+    async with session.post(f"{api_url}/calculations/export-docx", json={
+        "calculation_ids": calculation_ids,
+        "format": export_format
+    }, ssl=False) as response:
+        response.raise_for_status()
+        content = await response.read()
+    elapsed = time.perf_counter() - started
+    logger.info(f"📊 Bulk export ({export_format}): {elapsed:.2f}s, {len(content)} bytes")
+    return {"seconds": elapsed, "bytes": len(content)}
+
+
+async def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark calculation DOCX export")
+    parser.add_argument('--url', default=os.getenv('CALCULATION_SERVICE_URL', 'http://localhost:8002'))
+    add_label_argument(parser)
+    parser.add_argument('--count', type=int, default=200, help="Число расчетов в выгрузке")
+    parser.add_argument('--skip-single', action='store_true', help="Не замерять поштучный экспорт")
+    args = parser.parse_args()
+
+    api_url = args.url.rstrip('/')
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        calculation_ids = await prepare_calculations(session, api_url, args.count)
+        results = {}
+        if not args.skip_single:
+            results["single"] = await measure_single_exports(session, api_url, calculation_ids)
+        results["bulk_docx"] = await measure_bulk_export(session, api_url, calculation_ids, "docx")
+        results["bulk_zip"] = await measure_bulk_export(session, api_url, calculation_ids, "zip")
+
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ЭКСПОРТ {args.count} РАСЧЕТОВ В DOCX")
+    print("="*60)
+    for scenario, result in results.items():
+        print(f"{scenario}: {result['seconds']:.2f} с, {result['bytes']} байт")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный замер обращений calculation_service к базе данных (вызовов в секунду)
+
+Запускается против работающего сервиса до и после изменения:
+    python benchmark_calculation_service_db.py --label before
+    python benchmark_calculation_service_db.py --label after
+Результаты сохраняются в reports/calculation_db_benchmark.json; когда есть оба
+замера, выводится сравнение.
+"""
+
+import argparse
+import asyncio
+import aiohttp
+import os
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'calculation_db_benchmark.json'
+
+THERMAL_PARAMETERS = {
+    "building_type": "жилое",
+    "building_area": 100,
+    "building_volume": 300,
+    "number_of_floors": 1,
+    "wall_thickness": 0.4,
+    "wall_material": "кирпич",
+    "thermal_conductivity": 0.7,
+    "wall_area": 120,
+    "window_area": 10,
+    "floor_area": 100,
+    "ceiling_area": 100
+}
+
+
+class CalculationDatabaseBenchmark:
+    def __init__(self, api_url: str, concurrency: int, duration: float):
+        self.api_url = api_url.rstrip('/')
+        self.concurrency = concurrency
+        self.duration = duration
+        self.calculation_ids = []
+
+    async def prepare(self, session: aiohttp.ClientSession, count: int):
+        """Создание расчетов, по которым идет нагрузка"""
+        for index in range(count):
+            async with session.post(f"{self.api_url}/calculations", json={
+                "name": f"benchmark_{index}",
+                "type": "thermal",
+                "category": "heat_loss",
+                "parameters": THERMAL_PARAMETERS
+            }, ssl=False) as response:
+                response.raise_for_status()
+                self.calculation_ids.append((await response.json())["id"])
+        logger.info(f"✅ Created {len(self.calculation_ids)} calculations")
+
+    async def run_scenario(self, session: aiohttp.ClientSession, name: str, make_request):
+        """Запуск сценария с N параллельными клиентами на заданное время"""
+        deadline = time.perf_counter() + self.duration
+        counters = {"ok": 0, "errors": 0}
+        latencies = []
+
+        async def worker(worker_index: int):
+            iteration = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    method, url, payload = make_request(worker_index, iteration)
+                    async with session.request(method, url, json=payload, ssl=False) as response:
+                        await response.read()
+                        counters["ok" if response.status < 400 else "errors"] += 1
+                except Exception:
+                    counters["errors"] += 1
+                latencies.append(time.perf_counter() - started)
+                iteration += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        result = {
+            "calls": counters["ok"],
+            "errors": counters["errors"],
+            "calls_per_second": counters["ok"] / elapsed if elapsed > 0 else 0,
+            "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None
+        }
+        logger.info(f"📊 {name}: {result['calls_per_second']:.1f} calls/s, errors: {result['errors']}")
+        return result
+
+    async def run(self):
+        timeout = aiohttp.ClientTimeout(total=60)
+        connector = aiohttp.TCPConnector(limit=self.concurrency * 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await self.prepare(session, max(self.concurrency, 20))
+            ids = self.calculation_ids
+
+            return {
+                "get_calculation": await self.run_scenario(
+                    session, "GET /calculations/{id}",
+                    lambda w, i: ("GET", f"{self.api_url}/calculations/{ids[(w + i) % len(ids)]}", None)
+                ),
+                "list_calculations": await self.run_scenario(
+                    session, "GET /calculations",
+                    lambda w, i: ("GET", f"{self.api_url}/calculations?limit=50", None)
+                ),
+                "execute_calculation": await self.run_scenario(
+                    session, "POST /calculations/{id}/execute",
+                    lambda w, i: ("POST", f"{self.api_url}/calculations/{ids[(w + i) % len(ids)]}/execute",
+                                  {"parameters": THERMAL_PARAMETERS})
+                )
+            }
+
+
+async def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark calculation_service database access")
+    parser.add_argument('--url', default=os.getenv('CALCULATION_SERVICE_URL', 'http://localhost:8002'))
+    add_label_argument(parser)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0)
+    args = parser.parse_args()
+
+    benchmark = CalculationDatabaseBenchmark(args.url, args.concurrency, args.duration)
+    results = await benchmark.run()
+    report = save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print("📊 ОБРАЩЕНИЯ К БД CALCULATION SERVICE (вызовов/с)")
+    print("="*60)
+    for scenario, result in results.items():
+        line = f"{scenario}: {result['calls_per_second']:.1f}"
+        if 'before' in report and args.label != 'before':
+            before = report['before']['results'].get(scenario, {}).get('calls_per_second')
+            if before:
+                line += f" (до: {before:.1f}, x{result['calls_per_second'] / before:.2f})"
+        print(line)
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
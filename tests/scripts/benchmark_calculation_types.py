@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Замер времени запуска реестра расчетов и задержки запросов /calculations/*/types
+
+Запуск реестра замеряется в отдельном процессе (нужны зависимости
+calculation_service, интерпретатор задается через --python), задержка
+запросов - против работающего сервиса, с If-None-Match и без него:
+    python benchmark_calculation_types.py --label after
+Результаты сохраняются в reports/calculation_types_benchmark.json.
+"""
+
+import argparse
+import asyncio
+import aiohttp
+import json
+import os
+import subprocess
+import sys
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'calculation_types_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_DIR = os.path.join(os.path.dirname(BASE_DIR), 'calculation_service')
+
+TYPES_ENDPOINTS = [
+    "structural", "degasification", "electrical", "thermal", "ventilation",
+    "water_supply", "fire_safety", "acoustic", "lighting", "geological", "uav_protection"
+]
+
+# Код, выполняемый в отдельном процессе: импорт реестра, первая сборка ответа и повторные обращения
+STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+from registry import calculation_registry
+imported = time.perf_counter()
+calculation_registry.get_types_payload()
+built = time.perf_counter()
+iterations = 10000
+for _ in range(iterations):
+    calculation_registry.get_types_payload()
+cached = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_payload_ms": (built - imported) * 1000,
+    "cached_payload_us": (cached - built) / iterations * 1e6,
+    "payload_bytes": len(calculation_registry.get_types_payload().body)
+}))
+"""
+
+
+def measure_startup(python: str, runs: int) -> dict:
+    """Замер импорта реестра и сборки ответа /types в новом процессе"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [python, "-c", STARTUP_PROBE], cwd=SERVICE_DIR,
+            capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if completed.returncode != 0:
+            logger.warning(f"⚠️ Startup probe failed: {completed.stderr.strip().splitlines()[-1:]}")
+            return {"error": completed.stderr.strip()[-500:]}
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = elapsed * 1000
+        samples.append(sample)
+
+    result = {key: sorted(sample[key] for sample in samples)[len(samples) // 2] for key in samples[0]}
+    logger.info(f"📊 Startup: import {result['import_ms']:.1f} ms, "
+                f"first payload {result['first_payload_ms']:.2f} ms, "
+                f"cached payload {result['cached_payload_us']:.2f} µs")
+    return result
+
+
+async def measure_requests(api_url: str, requests_per_endpoint: int) -> dict:
+    """Задержка запросов /types без кеша клиента и с If-None-Match"""
+    api_url = api_url.rstrip('/')
+    timeout = aiohttp.ClientTimeout(total=30)
+    results = {}
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        for conditional in (False, True):
+            latencies = []
+            statuses = {}
+            for endpoint in TYPES_ENDPOINTS:
+                url = f"{api_url}/calculations/{endpoint}/types"
+                etag = None
+                for _ in range(requests_per_endpoint):
+                    headers = {"If-None-Match": etag} if conditional and etag else {}
+                    started = time.perf_counter()
+                    async with session.get(url, headers=headers, ssl=False) as response:
+                        await response.read()
+                        etag = response.headers.get("ETag", etag)
+                        statuses[response.status] = statuses.get(response.status, 0) + 1
+                    latencies.append(time.perf_counter() - started)
+
+            latencies.sort()
+            name = "if_none_match" if conditional else "full_body"
+            results[name] = {
+                "requests": len(latencies),
+                "statuses": {str(code): count for code, count in statuses.items()},
+                "p50_ms": latencies[len(latencies) // 2] * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "mean_ms": sum(latencies) / len(latencies) * 1000
+            }
+            logger.info(f"📊 {name}: p50 {results[name]['p50_ms']:.2f} ms, statuses {results[name]['statuses']}")
+    return results
+
+
+async def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark calculation types registry and /types endpoints")
+    parser.add_argument('--url', default=os.getenv('CALCULATION_SERVICE_URL', 'http://localhost:8002'))
+    add_label_argument(parser)
+    parser.add_argument('--python', default=sys.executable, help="Интерпретатор с зависимостями calculation_service")
+    parser.add_argument('--startup-runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50, help="Запросов на каждый эндпоинт /types")
+    parser.add_argument('--skip-http', action='store_true', help="Только замер запуска реестра")
+    args = parser.parse_args()
+
+    results = {"startup": measure_startup(args.python, args.startup_runs)}
+    if not args.skip_http:
+        try:
+            results["requests"] = await measure_requests(args.url, args.requests)
+        except aiohttp.ClientError as e:
+            logger.error(f"❌ Service is unavailable: {e}")
+            results["requests"] = {"error": str(e)}
+
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print("📊 ТИПЫ РАСЧЕТОВ: ЗАПУСК И ЗАДЕРЖКА /types")
+    print("="*60)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+"""
+Общие функции замеров производительности: имя замера и отчет в tests/reports
+
+Каждый замер сохраняется под своим именем (--label, например before/after)
+рядом с предыдущими замерами того же отчета.
+"""
+
+import json
+import os
+from datetime import datetime
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'reports')
+
+
+def add_label_argument(parser, examples: str = "before/after"):
+    """Аргумент --label: имя замера в отчете"""
+    parser.add_argument('--label', default='after', help=f"Имя замера (например, {examples})")
+
+
+def save_results(report_name: str, label: str, config: dict, results: dict) -> dict:
+    """Сохранение замера в reports/<report_name>; возвращает отчет со всеми замерами"""
+    report_path = os.path.join(REPORTS_DIR, report_name)
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    report = {}
+    if os.path.exists(report_path):
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    report[label] = {
+        'timestamp': datetime.now().isoformat(),
+        'config': config,
+        'results': results
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return report
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Замер проверки орфографии на большом письме
+
+Собирает письмо из повторяющихся абзацев (деловая переписка с опечатками)
+и отправляет его в работающий spellchecker_service дважды: первый запрос
+заполняет кеш вердиктов, второй показывает проверку с прогретым кешем.
+С --concurrency N дополнительно отправляются N разных писем одновременно
+(пропускная способность пула процессов Hunspell):
+    python benchmark_spellchecker.py --pages 200 --concurrency 4
+Результаты сохраняются в reports/spellchecker_benchmark.json.
+"""
+
+import argparse
+import asyncio
+import aiohttp
+import os
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'spellchecker_benchmark.json'
+
+LETTER_PARAGRAPHS = [
+    "Уважаемый Илья Викторович! В связи с проведением предпроектной проработки направляем "
+    "исходные данные для проектирования установки переработки концентрата. Просим рассмотреть "
+    "техническое задание и подтвердить готовность к выполнению работ.",
+    "Согласно протоколу технологического совещания, изменение объема работ по трубопроводной "
+    "эстакаде требует дополнительного согласования. Прошу предоставить коментарии по стадийности "
+    "и приоритетности работ в срок до конца недели.",
+    "Проектная и рабочая документация разрабатывается в соответсвии с действующими нормативными "
+    "документами. Стоимость работ и условия оплаты будут уточнены после рассмотрения "
+    "коммерческого предложения.",
+    "Временное подключение к действующим сетям цеха выполняется по отдельной схеме. Гарантийные "
+    "обязательства распростроняются на весь объем выполненных работ.",
+]
+
+# Примерно 300 слов на страницу
+WORDS_PER_PAGE = 300
+
+
+def build_letter(pages: int) -> str:
+    """Письмо заданного объема из повторяющихся абзацев"""
+    paragraphs = []
+    words = 0
+    index = 0
+    while words < pages * WORDS_PER_PAGE:
+        paragraph = LETTER_PARAGRAPHS[index % len(LETTER_PARAGRAPHS)]
+        paragraphs.append(f"{index + 1}. {paragraph}")
+        words += len(paragraph.split())
+        index += 1
+    return "\n\n".join(paragraphs)
+
+
+async def measure_check(session: aiohttp.ClientSession, api_url: str, endpoint: str, text: str) -> dict:
+    """Один запрос проверки: время на клиенте и статистика ответа"""
+    started = time.perf_counter()
+    async with session.post(f"{api_url}/{endpoint}", json={"text": text, "language": "ru"}, ssl=False) as response:
+        response.raise_for_status()
+        data = await response.json()
+    elapsed = time.perf_counter() - started
+
+    spelling = data.get("spelling") or (data.get("comprehensive") or {}).get("spelling") or {}
+    grammar = data.get("grammar") or (data.get("comprehensive") or {}).get("grammar") or {}
+    result = {
+        "seconds": elapsed,
+        "service_processing_time": data.get("processing_time"),
+        "total_words": spelling.get("total_words"),
+        "unique_words": spelling.get("unique_words"),
+        "cache_hits": spelling.get("cache_hits"),
+        "misspelled_count": spelling.get("misspelled_count"),
+        "method": spelling.get("method"),
+        "grammar_method": grammar.get("method"),
+        "grammar_errors": grammar.get("total_errors"),
+        "grammar_chunks": grammar.get("chunks"),
+        "grammar_cached_paragraphs": grammar.get("cached_paragraphs")
+    }
+    logger.info(f"📊 {endpoint}: {elapsed:.2f}s, words {result['total_words']}, "
+                f"unique {result['unique_words']}, cache hits {result['cache_hits']}")
+    return result
+
+
+async def measure_throughput(session: aiohttp.ClientSession, api_url: str, endpoint: str,
+                             pages: int, concurrency: int) -> dict:
+    """Одновременные запросы с письмами, отличающимися словами (кеш вердиктов не помогает)"""
+    texts = [mark_letter(build_letter(pages), index) for index in range(concurrency)]
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(measure_check(session, api_url, endpoint, text) for text in texts))
+    elapsed = time.perf_counter() - started
+    logger.info(f"📊 {concurrency} concurrent {endpoint} requests: {elapsed:.2f}s")
+    return {
+        "seconds": elapsed,
+        "texts_per_second": concurrency / elapsed,
+        "requests": outcomes
+    }
+
+
+def mark_letter(text: str, index: int) -> str:
+    """Уникальные опечатки: каждое 7-е слово получает суффикс из номера письма и позиции слова"""
+    words = text.split(" ")
+    return " ".join(word + "ъ" + "".join("абвгдежзик"[int(digit)] for digit in f"{index}{position}")
+                    if position % 7 == 0 and word.isalpha() else word
+                    for position, word in enumerate(words))
+
+
+async def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark spellchecker service on a large letter")
+    parser.add_argument('--url', default=os.getenv('SPELLCHECKER_SERVICE_URL', 'http://localhost:8007'))
+    add_label_argument(parser)
+    parser.add_argument('--pages', type=int, default=200, help="Объем письма в страницах")
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help="Дополнительно: число одновременных запросов с разными письмами (пропускная способность)")
+    parser.add_argument('--endpoint', default='spellcheck', help="Эндпоинт проверки (spellcheck, grammar-check, comprehensive-check)")
+    args = parser.parse_args()
+
+    api_url = args.url.rstrip('/')
+    text = build_letter(args.pages)
+    logger.info(f"📄 Letter: {args.pages} pages, {len(text)} characters")
+
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        results = {
+            "characters": len(text),
+            "cold": await measure_check(session, api_url, args.endpoint, text),
+            "warm": await measure_check(session, api_url, args.endpoint, text)
+        }
+        if args.concurrency > 0:
+            results["concurrent"] = await measure_throughput(session, api_url, args.endpoint,
+                                                             args.pages, args.concurrency)
+
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ПРОВЕРКА ПИСЬМА НА {args.pages} СТРАНИЦ ({args.endpoint})")
+    print("="*60)
+    for scenario in ("cold", "warm"):
+        print(f"{scenario}: {results[scenario]['seconds']:.2f} с, "
+              f"орфография: {results[scenario]['misspelled_count']}, "
+              f"грамматика: {results[scenario]['grammar_errors']}")
+    if "concurrent" in results:
+        print(f"concurrent x{args.concurrency}: {results['concurrent']['seconds']:.2f} с, "
+              f"{results['concurrent']['texts_per_second']:.2f} писем/с")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
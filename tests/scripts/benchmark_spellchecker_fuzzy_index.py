@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Замер подсказок резервной проверки орфографии на большом словаре
+
+Строит синтетический словарь предметной области (основы с окончаниями)
+поверх dictionaries/domain_ru.txt, затем сравнивает поиск по индексу
+SymSpell с прежним перебором всего словаря расстоянием Левенштейна:
+    python benchmark_spellchecker_fuzzy_index.py --words 100000
+Сервис запускать не нужно. Результаты сохраняются в
+reports/spellchecker_fuzzy_index_benchmark.json.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'spellchecker_fuzzy_index_benchmark.json'
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_DIR = os.path.join(os.path.dirname(BASE_DIR), 'spellchecker_service')
+sys.path.insert(0, SERVICE_DIR)
+
+from domain_dictionary import SymSpellIndex, load_domain_dictionary  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+ENDINGS = ['', 'а', 'ы', 'ов', 'ами', 'ный', 'ного', 'ение', 'ения', 'ка']
+
+
+def build_lexicon(size: int, seed: int) -> set:
+    """Словарь предметной области, дополненный синтетическими терминами до size слов"""
+    rng = random.Random(seed)
+    words = set(load_domain_dictionary(os.path.join(SERVICE_DIR, 'dictionaries', 'domain_ru.txt')))
+    while len(words) < size:
+        stem = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+        for ending in rng.sample(ENDINGS, 4):
+            words.add(stem + ending)
+    return words
+
+
+def make_typos(words: set, count: int, seed: int) -> list:
+    """Слова словаря с одной-двумя заменами символов"""
+    rng = random.Random(seed)
+    source = sorted(words)
+    typos = []
+    for _ in range(count):
+        word = list(rng.choice(source))
+        for _ in range(rng.randint(1, 2)):
+            word[rng.randrange(len(word))] = rng.choice(ALPHABET)
+        typos.append(''.join(word))
+    return typos
+
+
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """Прежний расчет расстояния (перебор словаря в _get_suggestions)"""
+    if len(s1) < len(s2):
+        return levenshtein_distance(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            current_row.append(min(previous_row[j + 1] + 1, current_row[j] + 1, previous_row[j] + (c1 != c2)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def measure(words: set, typos: list, linear_samples: int) -> dict:
+    """Построение, загрузка индекса с диска и время подсказки на слово"""
+    results = {"words": len(words)}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'fuzzy_index.pickle')
+        started = time.perf_counter()
+        SymSpellIndex.load_or_build(words, cache_path)
+        results["build_seconds"] = time.perf_counter() - started
+        started = time.perf_counter()
+        index = SymSpellIndex.load_or_build(words, cache_path)
+        results["load_seconds"] = time.perf_counter() - started
+        results["cache_bytes"] = os.path.getsize(cache_path)
+
+    started = time.perf_counter()
+    found = sum(1 for typo in typos if index.lookup(typo))
+    results["symspell_us_per_word"] = (time.perf_counter() - started) / len(typos) * 1e6
+    results["symspell_found"] = found / len(typos)
+
+    if linear_samples > 0:
+        samples = typos[:linear_samples]
+        started = time.perf_counter()
+        for typo in samples:
+            [word for word in words if levenshtein_distance(typo, word) <= 2][:5]
+        results["linear_us_per_word"] = (time.perf_counter() - started) / len(samples) * 1e6
+
+    logger.info(f"📊 {len(words)} words: build {results['build_seconds']:.2f}s, "
+                f"load {results['load_seconds']:.2f}s, lookup {results['symspell_us_per_word']:.1f} µs/word")
+    return results
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Benchmark fallback spelling suggestions on a large lexicon")
+    add_label_argument(parser)
+    parser.add_argument('--words', type=int, default=100000, help="Размер словаря")
+    parser.add_argument('--typos', type=int, default=2000, help="Число проверяемых слов с опечатками")
+    parser.add_argument('--linear-samples', type=int, default=3, help="Слов для замера прежнего перебора (0 - пропустить)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    words = build_lexicon(args.words, args.seed)
+    typos = make_typos(words, args.typos, args.seed + 1)
+    results = measure(words, typos, args.linear_samples)
+    save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ПОДСКАЗКИ ПО СЛОВАРЮ ИЗ {results['words']} СЛОВ")
+    print("="*60)
+    print(f"Построение индекса: {results['build_seconds']:.2f} с, загрузка с диска: {results['load_seconds']:.2f} с")
+    print(f"SymSpell: {results['symspell_us_per_word']:.1f} мкс/слово")
+    if "linear_us_per_word" in results:
+        print(f"Перебор словаря: {results['linear_us_per_word'] / 1000:.1f} мс/слово")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    main()
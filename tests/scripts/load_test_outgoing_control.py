@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный замер модуля "Выходной контроль": писем в минуту
+
+Несколько клиентов одновременно проводят письма через полный цикл
+/upload -> /spellcheck -> /expert-analysis -> /consolidate работающего
+outgoing_control_service. Замер запускается до и после изменения:
+    python load_test_outgoing_control.py --label before --documents 40 --concurrency 8
+    python load_test_outgoing_control.py --label after --documents 40 --concurrency 8
+Результаты сохраняются в reports/outgoing_control_load_test.json; когда есть
+оба замера, выводится сравнение.
+"""
+
+import argparse
+import asyncio
+import aiohttp
+import os
+import statistics
+import time
+import logging
+
+from benchmark_report import add_label_argument, save_results
+
+from benchmark_spellchecker import build_letter, mark_letter
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'outgoing_control_load_test.json'
+
+STAGES = ["upload", "spellcheck", "expert-analysis", "consolidate"]
+
+
+async def process_letter(session: aiohttp.ClientSession, api_url: str, index: int, text: str) -> dict:
+    """Полный цикл проверки одного письма: время каждого этапа"""
+    timings = {}
+    started = time.perf_counter()
+    data = aiohttp.FormData()
+    data.add_field('file', text.encode('utf-8'), filename=f"load_test_{index}.txt", content_type='text/plain')
+    async with session.post(f"{api_url}/upload", data=data, ssl=False) as response:
+        response.raise_for_status()
+        document_id = (await response.json())["document_id"]
+    timings["upload"] = time.perf_counter() - started
+
+    for stage in STAGES[1:]:
+        stage_started = time.perf_counter()
+        async with session.post(f"{api_url}/{stage}", json={"document_id": document_id}, ssl=False) as response:
+            response.raise_for_status()
+            await response.read()
+        timings[stage] = time.perf_counter() - stage_started
+
+    timings["total"] = time.perf_counter() - started
+    async with session.delete(f"{api_url}/documents/{document_id}", ssl=False) as response:
+        await response.read()
+    return timings
+
+
+async def run_load(api_url: str, documents: int, concurrency: int, pages: int) -> dict:
+    """documents писем через concurrency одновременных клиентов"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(documents):
+        queue.put_nowait(index)
+    outcomes, errors = [], []
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                outcomes.append(await process_letter(session, api_url, index, mark_letter(build_letter(pages), index)))
+            except Exception as e:
+                logger.error(f"❌ Letter {index}: {e}")
+                errors.append(str(e))
+
+    timeout = aiohttp.ClientTimeout(total=900)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {
+        "seconds": elapsed,
+        "documents_ok": len(outcomes),
+        "errors": len(errors),
+        "documents_per_minute": len(outcomes) / elapsed * 60 if elapsed else 0
+    }
+    for stage in STAGES + ["total"]:
+        values = sorted(outcome[stage] for outcome in outcomes)
+        if values:
+            results[stage] = {
+                "p50": statistics.median(values),
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1]
+            }
+    logger.info(f"📊 {len(outcomes)}/{documents} letters in {elapsed:.1f}s "
+                f"({results['documents_per_minute']:.1f} documents/min, concurrency {concurrency})")
+    return results
+
+
+async def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Load test outgoing control service (documents per minute)")
+    parser.add_argument('--url', default=os.getenv('OUTGOING_CONTROL_SERVICE_URL', 'http://localhost:8006'))
+    add_label_argument(parser)
+    parser.add_argument('--documents', type=int, default=40, help="Число писем")
+    parser.add_argument('--concurrency', type=int, default=8, help="Одновременных клиентов")
+    parser.add_argument('--pages', type=int, default=2, help="Объем письма в страницах")
+    args = parser.parse_args()
+
+    results = await run_load(args.url.rstrip('/'), args.documents, args.concurrency, args.pages)
+    report = save_results(REPORT_NAME, args.label, vars(args), results)
+
+    print("\n" + "="*60)
+    print(f"📊 ВЫХОДНОЙ КОНТРОЛЬ: {args.documents} ПИСЕМ, {args.concurrency} КЛИЕНТОВ")
+    print("="*60)
+    print(f"Писем в минуту: {results['documents_per_minute']:.1f} (ошибок: {results['errors']})")
+    for stage in STAGES + ["total"]:
+        if stage in results:
+            print(f"{stage}: p50 {results[stage]['p50']:.2f} с, p95 {results[stage]['p95']:.2f} с")
+    if "before" in report and "after" in report:
+        before = report["before"]["results"]["documents_per_minute"]
+        after = report["after"]["results"]["documents_per_minute"]
+        if before:
+            print(f"\nbefore -> after: {before:.1f} -> {after:.1f} писем/мин (x{after / before:.2f})")
+    print(f"\n📄 Отчет сохранен: {REPORT_NAME}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -506,6 +506,82 @@ class CalculationsTester:
             logger.info("✅ Обработка ошибок работает (исключение перехвачено)")
             return True
 
+    async def test_calculation_jobs(self):
+        """Тестирование фоновых заданий расчетов (постановка, повтор, SSE)"""
+        logger.info("🧪 Тестирование фоновых заданий расчетов...")
+        
+        payload = {
+            'parameters': {
+                'building_type': 'жилое',
+                'building_area': 100,
+                'building_volume': 300,
+                'number_of_floors': 1,
+                'wall_thickness': 0.4,
+                'wall_material': 'кирпич',
+                'thermal_conductivity': 0.7,
+                'wall_area': 120,
+                'window_area': 10,
+                'floor_area': 100,
+                'ceiling_area': 100
+            }
+        }
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.api_url}/calculations/thermal/jobs",
+                    json=payload,
+                    ssl=False,
+                    timeout=10
+                ) as response:
+                    if response.status != 202:
+                        logger.error(f"❌ Ошибка постановки задания: {response.status}")
+                        return False
+                    job = await response.json()
+                
+                # Повторная постановка с теми же параметрами возвращает то же задание
+                async with session.post(
+                    f"{self.api_url}/calculations/thermal/jobs",
+                    json=payload,
+                    ssl=False,
+                    timeout=10
+                ) as response:
+                    repeated = await response.json()
+                    if repeated.get('id') != job['id'] or not repeated.get('deduplicated'):
+                        logger.error("❌ Повторная постановка создала новое задание")
+                        return False
+                
+                # Поток событий заканчивается событием completed
+                last_event = None
+                async with session.get(
+                    f"{self.api_url}/calculations/jobs/{job['id']}/events",
+                    ssl=False,
+                    timeout=60
+                ) as response:
+                    async for line in response.content:
+                        line = line.decode('utf-8').strip()
+                        if line.startswith('event:'):
+                            last_event = line.split(':', 1)[1].strip()
+                
+                if last_event != 'completed':
+                    logger.error(f"❌ Задание не завершено: {last_event}")
+                    return False
+                
+                async with session.get(
+                    f"{self.api_url}/calculations/jobs/{job['id']}",
+                    ssl=False,
+                    timeout=10
+                ) as response:
+                    result = await response.json()
+                    if result.get('status') == 'completed' and result.get('results'):
+                        logger.info("✅ Фоновое задание выполнено")
+                        return True
+                    logger.warning("⚠️ Результат задания не получен")
+                    return False
+        except Exception as e:
+            logger.error(f"❌ Ошибка фоновых заданий: {e}")
+            return False
+
     async def run_all_tests(self):
         """Запуск всех тестов модуля расчетов"""
         logger.info("🚀 Запуск тестирования модуля 'Расчеты'...")
@@ -523,6 +599,7 @@ class CalculationsTester:
             'batch_calculations': await self.test_batch_calculations(),
             'frontend_calculations': await self.test_frontend_calculations(),
             'calculation_accuracy': await self.test_calculation_accuracy(),
+            'calculation_jobs': await self.test_calculation_jobs(),
             'error_handling': await self.test_error_handling()
         }
         
@@ -364,6 +364,56 @@ class FinalOutgoingControlTester:
         except Exception as e:
             self.log_test("Report Generation", "FAIL", error=str(e))
     
+    def test_one_shot_processing(self):
+        """Тест 7.1: Полный цикл одним запросом /process с потоком событий"""
+        print("🔍 Тест 7.1: Полный цикл одним запросом /process")
+        print("="*60)
+        
+        try:
+            start_time = time.time()
+            events = []
+            first_event_time = None
+            with open(self.test_document_path, 'rb') as f:
+                files = {'file': (Path(self.test_document_path).name, f, 'application/pdf')}
+                with requests.post(f"{self.outgoing_control_url}/process", files=files,
+                                   headers={"Accept": "text/event-stream"}, stream=True, timeout=600) as response:
+                    if response.status_code != 200:
+                        self.log_test("One-shot Processing", "FAIL", error=f"HTTP {response.status_code}: {response.text}")
+                        return
+                    event = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line.startswith("event: "):
+                            event = line[len("event: "):]
+                        elif line.startswith("data: "):
+                            if first_event_time is None:
+                                first_event_time = time.time()
+                            events.append((event, json.loads(line[len("data: "):])))
+            end_time = time.time()
+            
+            stages = [data["stage"] for event, data in events if event == "stage"]
+            done = events[-1][1] if events and events[-1][0] == "done" else {}
+            metrics = {
+                "stages": stages,
+                "status": done.get("status"),
+                "verdict": done.get("verdict"),
+                "stage_seconds": done.get("stages"),
+                "first_event_time": (first_event_time or end_time) - start_time,
+                "processing_time": end_time - start_time
+            }
+            
+            if done.get("status") == "completed" and stages[0] == "upload" and stages[-1] == "consolidate":
+                self.log_test(
+                    "One-shot Processing",
+                    "PASS",
+                    f"Этапы: {' -> '.join(stages)}, Вердикт: {metrics['verdict']}",
+                    metrics=metrics
+                )
+                requests.delete(f"{self.outgoing_control_url}/documents/{done['document_id']}", timeout=30)
+            else:
+                self.log_test("One-shot Processing", "FAIL", error=f"События: {events}", metrics=metrics)
+        except Exception as e:
+            self.log_test("One-shot Processing", "FAIL", error=str(e))
+    
     def test_performance_benchmark(self):
         """Тест 8: Бенчмарк производительности"""
         print("🔍 Тест 8: Бенчмарк производительности")
@@ -639,6 +689,9 @@ class FinalOutgoingControlTester:
             
             # Тест 7: Генерация отчета
             self.test_report_generation()
+            
+            # Тест 7.1: Полный цикл одним запросом
+            self.test_one_shot_processing()
         
         # Тест 8: Бенчмарк производительности
         self.test_performance_benchmark()
@@ -329,6 +329,61 @@ class OutgoingControlTester:
             logger.error(f"❌ Ошибка контроля качества: {e}")
             return False
 
+    async def test_documents_listing(self):
+        """Тестирование списка документов: состав сводки и постраничный обход по next_cursor"""
+        logger.info("🧪 Тестирование списка документов...")
+        summary_fields = {"id", "document_id", "filename", "title", "status", "created_at",
+                          "has_report", "expert_analysis"}
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{self.base_url}/debug/documents", ssl=False, timeout=30) as response:
+                    total_docs = (await response.json())["total_docs"]
+                
+                seen_ids, cursor, pages = [], None, 0
+                while True:
+                    params = {"limit": 2}
+                    if cursor:
+                        params["cursor"] = cursor
+                    async with session.get(f"{self.base_url}/documents", params=params, ssl=False, timeout=30) as response:
+                        if response.status != 200:
+                            logger.error(f"❌ Ошибка получения списка: {response.status}")
+                            return False
+                        result = await response.json()
+                    pages += 1
+                    
+                    for document in result["documents"]:
+                        missing = summary_fields - document.keys()
+                        if missing:
+                            logger.error(f"❌ В сводке документа нет полей: {sorted(missing)}")
+                            return False
+                        analysis = document["expert_analysis"]
+                        if analysis is not None and not (analysis.get("verdict") and analysis.get("verdict_color")):
+                            logger.error(f"❌ Вердикт без цвета в сводке документа {document['id']}")
+                            return False
+                        if "text" in document:
+                            logger.error("❌ Список возвращает текст документа")
+                            return False
+                        seen_ids.append(document["id"])
+                    
+                    cursor = result.get("next_cursor")
+                    if not cursor or pages > total_docs + 1:
+                        break
+                
+                if len(seen_ids) != len(set(seen_ids)) or len(seen_ids) < total_docs:
+                    logger.error(f"❌ Обход по курсору: {len(seen_ids)} документов ({len(set(seen_ids))} уникальных) из {total_docs}")
+                    return False
+                logger.info(f"✅ Список обойден за {pages} страниц, документов: {len(seen_ids)}")
+                
+                async with session.get(f"{self.base_url}/documents", params={"cursor": "abc"}, ssl=False, timeout=10) as response:
+                    if response.status != 400:
+                        logger.error(f"❌ Некорректный курсор принят: {response.status}")
+                        return False
+                return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка тестирования списка документов: {e}")
+            return False
+
     async def test_error_handling(self):
         """Тестирование обработки ошибок"""
         logger.info("🧪 Тестирование обработки ошибок...")
@@ -372,6 +427,7 @@ class OutgoingControlTester:
             'report_generation': await self.test_report_generation(),
             'batch_processing': await self.test_batch_processing(),
             'quality_control': await self.test_quality_control(),
+            'documents_listing': await self.test_documents_listing(),
             'error_handling': await self.test_error_handling()
         }
         
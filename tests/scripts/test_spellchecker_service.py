@@ -135,6 +135,41 @@ def test_comprehensive_check():
     except Exception as e:
         print(f"❌ Ошибка: {e}")
 
+def test_comprehensive_check_batch():
+    """Тест пакетной комплексной проверки"""
+    print("\n🔍 Тестирование пакетной комплексной проверки...")
+    
+    try:
+        texts = [paragraph for paragraph in TEST_TEXT.split("\n\n") if paragraph.strip()]
+        data = {
+            "texts": texts,
+            "language": "ru"
+        }
+        
+        response = requests.post(
+            f"{API_BASE}/comprehensive-check/batch",
+            json=data,
+            verify=False,
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            statuses = [item['status'] for item in result['results']]
+            if len(result['results']) == len(texts) and all(status == "success" for status in statuses):
+                print(f"✅ Пакетная проверка завершена: {len(texts)} текстов за {result['processing_time']:.2f}с")
+            else:
+                print(f"❌ Неожиданный результат пакетной проверки: {statuses}")
+            for item in result['results']:
+                timings = (item.get('comprehensive') or {}).get('timings', {})
+                print(f"📊 Ошибок: {item['comprehensive'].get('total_errors')}, тайминги: {timings}")
+        else:
+            print(f"❌ Ошибка пакетной проверки: {response.status_code}")
+            print(f"📝 Ответ: {response.text}")
+            
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+
 def test_languages():
     """Тест получения поддерживаемых языков"""
     print("\n🔍 Тестирование получения языков...")
@@ -185,6 +220,7 @@ if __name__ == "__main__":
     test_spell_check()
     test_grammar_check()
     test_comprehensive_check()
+    test_comprehensive_check_batch()
     test_languages()
     test_stats()
     